@@ -0,0 +1,177 @@
+"""
+Benchmark do agrupamento de rajadas do WhatsApp (src/burst_coalescer.py).
+
+Reproduz um trace sintético de rajadas — várias sessões em paralelo, cada uma
+com rajadas de 2 a 5 mensagens digitadas em sequência ("oi", "quero
+vergalhão", "10mm", ...) separadas por pausas longas — contra o /chat com o
+FakeModel (latência fixa por chamada), com e sem agrupamento, e mede:
+
+  - chamadas de modelo e turnos executados
+  - latência ponta a ponta: do envio da última mensagem da rajada até a
+    primeira resposta que a leva em conta
+  - respostas desatualizadas: respostas entregues ao cliente que não levam
+    em conta a última mensagem que ele já tinha mandado
+
+Os tempos do trace estão em segundos "de WhatsApp" e são acelerados por
+--escala (padrão 0.5: 1 s do trace = 0,5 s). Escalas muito pequenas distorcem
+o resultado: o custo de CPU do Agno por turno (~0,1 s) não encolhe junto.
+
+Executar:
+    python benchmarks/bench_burst.py [--sessoes 8] [--rajadas 4] [--janela 2.5] [--escala 0.5]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+
+sys.path.insert(0, ".")
+
+_FRASES = ["oi", "bom dia", "quero vergalhão", "10mm", "e 8mm também", "pra Fortaleza", "umas 3 toneladas",
+           "tem metalon?", "30x30", "qual o prazo?", "entrega na obra?", "sou de Recife/PE"]
+
+
+@dataclass
+class Envio:
+    session_id: str
+    rajada: int
+    texto: str
+    instante: float  # segundos do trace
+
+
+def gerar_trace(sessoes: int, rajadas: int, seed: int = 15) -> list[Envio]:
+    rng = random.Random(seed)
+    envios = []
+    for s in range(sessoes):
+        t = rng.uniform(0, 3)
+        for r in range(rajadas):
+            for i in range(rng.randint(2, 5)):
+                envios.append(Envio(f"wa-{s}", r, f"{rng.choice(_FRASES)} #{s}.{r}.{i}", t))
+                t += rng.uniform(0.4, 2.0)  # digitando a próxima mensagem
+            t += rng.uniform(8, 20)  # pausa até a próxima rajada
+    return sorted(envios, key=lambda e: e.instante)
+
+
+def _modelo(atraso: float):
+    from src.models import TurnResult
+    from tests.fake_model import FakeModel, delegating_reply
+
+    delegar = delegating_reply()
+
+    def reply(messages):
+        if "Orquestrador" not in str(messages[0].content):
+            return f"Certo! {messages[-1].content}\nSTATUS: FRIO"  # ecoa a tarefa: diz o que a resposta considerou
+        if messages[-1].role == "tool":
+            return TurnResult(message=str(messages[-1].content), classification="FRIO",
+                              next_action="collect_data").model_dump_json()
+        return delegar(messages)
+
+    return FakeModel(reply=reply, delay=atraso)
+
+
+async def reproduzir(trace: list[Envio], db, modo: str, janela: float, max_espera: float, escala: float, atraso: float):
+    import httpx
+    import src.api as api
+    from src.burst_coalescer import MERGED_ACTION, BurstCoalescer
+    from src.history_compactor import HistoryCompactor
+    from src.orchestrator import create_steel_sales_team
+    from src.session_store import SessionStore
+    from src.turn_pool import TurnPool
+    from tests.fake_model import use_fake_model
+
+    model = _modelo(atraso * escala)
+    use_fake_model(model)
+    team = create_steel_sales_team(tool_hooks=[api.absorb_follow_ups])
+    team.db = db
+    api.get_team = lambda: team
+    api.FAST_PATH_ROUTER = False
+    api._session_store = SessionStore(team.db)
+    api._history_compactor = HistoryCompactor(api.HISTORY_RAW_TURNS, api.HISTORY_TOKEN_BUDGET)
+    api._turn_pool = TurnPool(max_concurrent=32, max_queued=256)
+    api._coalescer = BurstCoalescer(window=janela * escala, max_wait=max_espera * escala)
+
+    enviados: dict[str, float] = {}  # texto → instante real de envio
+    respostas: list[tuple[str, float, str]] = []  # (sessão, instante, texto da resposta)
+
+    async def enviar(client, envio: Envio, inicio: float):
+        await asyncio.sleep(max(0.0, inicio + envio.instante * escala - time.perf_counter()))
+        enviados[envio.texto] = time.perf_counter()
+        session_id = f"{modo}-{envio.session_id}"
+        resp = (await client.post("/chat", json={"session_id": session_id, "message": envio.texto})).json()
+        if resp["next_action"] != MERGED_ACTION:
+            respostas.append((envio.session_id, time.perf_counter(), resp["message"]))
+
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=120) as client:
+        inicio = time.perf_counter()
+        await asyncio.gather(*(enviar(client, e, inicio) for e in trace))
+
+    # Latência: última mensagem de cada rajada → primeira resposta que a contém
+    ultima = {}
+    for e in trace:
+        ultima[(e.session_id, e.rajada)] = e.texto
+    latencias = []
+    for (sessao, _), texto in ultima.items():
+        chegada = min((t for s, t, msg in respostas if s == sessao and texto in msg), default=None)
+        if chegada is not None:
+            latencias.append(chegada - enviados[texto])
+
+    # Desatualizada: a resposta não considera a última mensagem que o cliente mandou
+    # antes de o turno dela começar (folga de um turno: 3 chamadas de modelo)
+    desatualizadas = 0
+    por_sessao = {}
+    for e in trace:
+        por_sessao.setdefault(e.session_id, []).append(e.texto)
+    for sessao, t, msg in respostas:
+        ja_enviadas = [x for x in por_sessao[sessao] if enviados[x] < t - atraso * escala * 3]
+        if ja_enviadas and ja_enviadas[-1] not in msg:
+            desatualizadas += 1
+
+    return {
+        "chamadas": len(model.calls),
+        "turnos": len(respostas),
+        "latencias": [x / escala for x in latencias],  # de volta a segundos do trace
+        "desatualizadas": desatualizadas,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rajadas do WhatsApp: turnos por mensagem vs. agrupados")
+    parser.add_argument("--sessoes", type=int, default=8)
+    parser.add_argument("--rajadas", type=int, default=4)
+    parser.add_argument("--janela", type=float, default=2.5, help="BURST_WINDOW_SECONDS (segundos do trace)")
+    parser.add_argument("--max-espera", type=float, default=6.0, help="BURST_MAX_WAIT_SECONDS")
+    parser.add_argument("--atraso", type=float, default=1.5, help="latência de cada chamada de modelo (s)")
+    parser.add_argument("--escala", type=float, default=0.5)
+    args = parser.parse_args()
+
+    from agno.db.sqlite import SqliteDb
+    from agno.utils.log import set_log_level_to_warning
+
+    set_log_level_to_warning()
+    trace = gerar_trace(args.sessoes, args.rajadas)
+    rajadas = len({(e.session_id, e.rajada) for e in trace})
+    print(f"{len(trace)} mensagens em {rajadas} rajadas, {args.sessoes} sessões; "
+          f"{args.atraso}s por chamada de modelo, janela {args.janela}s\n")
+
+    db = SqliteDb(db_file=f"{tempfile.mkdtemp()}/sessions.db")
+    modos = [("por mensagem", 0.0), ("agrupado", args.janela)]
+    resultados = [
+        (nome, asyncio.run(reproduzir(trace, db, f"m{i}", janela, args.max_espera, args.escala, args.atraso)))
+        for i, (nome, janela) in enumerate(modos)
+    ]
+
+    print(f"{'modo':<14} {'chamadas':>9} {'turnos':>7} {'latência média':>15} {'p95':>7} {'desatualizadas':>15}")
+    for nome, r in resultados:
+        lat = sorted(r["latencias"])
+        p95 = lat[min(len(lat) - 1, int(len(lat) * 0.95))]
+        print(f"{nome:<14} {r['chamadas']:>9} {r['turnos']:>7} {statistics.mean(lat):>14.1f}s {p95:>6.1f}s "
+              f"{r['desatualizadas']:>15}")
+    print("\nlatência = envio da última mensagem da rajada → primeira resposta que a considera (segundos do trace)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark do cliente HTTP do CRM (src/crm_http.py).
+
+Dispara --requests atualizações de lead (PATCH /sobjects/Lead/<id>) de
+--concorrencia threads contra o servidor falso do Salesforce
+(tests/fake_crm.py) e compara:
+
+  - sem pool: conexão nova por request (handshake a cada atualização)
+  - pool keep-alive: httpx.Client compartilhado, CRM_MAX_CONNECTIONS conexões
+
+Depois simula um CRM lento (--lento por request) e mede quanto tempo os
+turnos passam esperando o CRM com e sem circuit breaker: com o circuito
+aberto a chamada falha na hora e a atualização vai para a fila.
+
+Executar:
+    python benchmarks/bench_crm_http.py [--requests 2000] [--concorrencia 16] [--latencia 0.005]
+"""
+import argparse
+import sys
+import threading
+import time
+
+sys.path.insert(0, ".")
+
+LEAD_PATH = "/services/data/v60.0/sobjects/Lead"
+
+
+def _disparar(http, total: int, concorrencia: int) -> tuple[list[float], int, float]:
+    """Retorna latências (s), falhas e duração total."""
+    latencias: list[float] = []
+    falhas = 0
+    lock = threading.Lock()
+    proximo = iter(range(total))
+
+    def trabalhador():
+        nonlocal falhas
+        while True:
+            with lock:
+                i = next(proximo, None)
+            if i is None:
+                return
+            inicio = time.perf_counter()
+            try:
+                http.request("PATCH", f"{LEAD_PATH}/00Q{i % 500}", json={"Status": "MORNO", "Lead_Score__c": i % 100})
+                ok = True
+            except Exception:
+                ok = False
+            custo = time.perf_counter() - inicio
+            with lock:
+                latencias.append(custo)
+                falhas += not ok
+
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=trabalhador) for _ in range(concorrencia)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    return latencias, falhas, time.perf_counter() - inicio
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def _linha(nome: str, latencias: list[float], falhas: int, duracao: float, conexoes: int):
+    print(f"{nome:<16} {len(latencias) / duracao:>9.0f} {_percentil(latencias, 0.50) * 1000:>8.2f}ms "
+          f"{_percentil(latencias, 0.95) * 1000:>8.2f}ms {_percentil(latencias, 0.99) * 1000:>8.2f}ms "
+          f"{conexoes:>9} {falhas:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CRM: conexão por request vs. pool keep-alive; circuit breaker")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concorrencia", type=int, default=16)
+    parser.add_argument("--conexoes", type=int, default=8, help="CRM_MAX_CONNECTIONS")
+    parser.add_argument("--latencia", type=float, default=0.005, help="latência normal do CRM (s)")
+    parser.add_argument("--lento", type=float, default=0.5, help="latência do CRM degradado (s)")
+    parser.add_argument("--requests-lento", type=int, default=200)
+    args = parser.parse_args()
+
+    from src.crm_http import CircuitBreaker, CRMHttpClient
+    from tests.fake_crm import FakeCRMServer
+
+    print(f"{args.requests} PATCH em {args.concorrencia} threads; CRM com {args.latencia * 1000:.0f}ms por request\n")
+    print(f"{'cliente':<16} {'req/s':>9} {'p50':>10} {'p95':>10} {'p99':>10} {'conexões':>9} {'falhas':>7}")
+
+    for nome, pooled in (("sem pool", False), ("pool keep-alive", True)):
+        with FakeCRMServer(delay=args.latencia) as crm:
+            http = CRMHttpClient(crm.url, max_connections=args.conexoes, pooled=pooled,
+                                 breaker=CircuitBreaker(failure_threshold=10**9))
+            latencias, falhas, duracao = _disparar(http, args.requests, args.concorrencia)
+            _linha(nome, latencias, falhas, duracao, crm.connections)
+            http.close()
+
+    print(f"\nCRM degradado: {args.requests_lento} PATCH com {args.lento * 1000:.0f}ms por request "
+          f"(lenta = acima de {args.lento / 2 * 1000:.0f}ms)\n")
+    print(f"{'cliente':<16} {'req/s':>9} {'p50':>10} {'p95':>10} {'p99':>10} {'no CRM':>9} {'falhas':>7}")
+    for nome, limiar in (("sem breaker", 10**9), ("com breaker", 5)):
+        with FakeCRMServer(delay=args.lento) as crm:
+            breaker = CircuitBreaker(failure_threshold=limiar, reset_seconds=60, slow_call_seconds=args.lento / 2)
+            http = CRMHttpClient(crm.url, max_connections=args.conexoes, breaker=breaker)
+            latencias, falhas, duracao = _disparar(http, args.requests_lento, args.concorrencia)
+            _linha(nome, latencias, falhas, duracao, len(crm.requests))
+            http.close()
+    print("com breaker, as falhas são recusas imediatas (CircuitOpenError): o CRMClient manda a atualização "
+          "para a fila write-behind em vez de segurar o turno")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark da sincronização com o CRM (src/crm_sync.py).
+
+Simula --sessoes conversas em paralelo, cada uma com --turnos turnos, em que
+todo turno atualiza status/score do lead no CRM (servidor falso do Salesforce
+em tests/fake_crm.py, --latencia por request). Compara:
+
+  - inline: cada turno faz o upsert de 1 registro e espera a resposta (o que
+    chamar o CRMClient dentro do /chat faria)
+  - write-behind: o turno só enfileira; a fila coalesce por lead e envia em
+    lotes (CRM_SYNC_BATCH_SIZE / CRM_SYNC_FLUSH_SECONDS)
+
+Mede a latência que a sincronização acrescenta a cada turno, requests HTTP,
+registros enviados, tamanhos dos lotes e o tempo até o CRM ficar em dia.
+
+Executar:
+    python benchmarks/bench_crm_sync.py [--sessoes 200] [--turnos 8] [--latencia 0.08]
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, ".")
+
+_STATUS = ["FRIO", "FRIO", "MORNO", "MORNO", "QUENTE"]
+
+
+def _conversas(sessoes: int, turnos: int, intervalo: float, atualizar) -> list[float]:
+    """Roda as conversas em threads; retorna o custo de sincronização de cada turno."""
+    custos: list[float] = []
+    lock = threading.Lock()
+
+    def conversa(s: int):
+        for t in range(turnos):
+            inicio = time.perf_counter()
+            atualizar(f"sess-{s}", status=_STATUS[min(t, len(_STATUS) - 1)], score=t * 12)
+            custo = time.perf_counter() - inicio
+            with lock:
+                custos.append(custo)
+            time.sleep(intervalo)  # resposta do modelo + cliente digitando
+
+    threads = [threading.Thread(target=conversa, args=(s,)) for s in range(sessoes)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    return custos
+
+
+def _linha(nome: str, custos: list[float], requests: int, registros: int, lotes: list[int], em_dia: float):
+    custos = sorted(custos)
+    p95 = custos[int(len(custos) * 0.95)]
+    lote = f"{statistics.mean(lotes):.0f} (máx {max(lotes)})" if lotes else "-"
+    print(f"{nome:<13} {statistics.median(custos) * 1000:>9.2f}ms {p95 * 1000:>8.2f}ms {requests:>9} "
+          f"{registros:>10} {lote:>14} {em_dia:>9.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CRM: upsert inline por turno vs. fila write-behind")
+    parser.add_argument("--sessoes", type=int, default=200)
+    parser.add_argument("--turnos", type=int, default=8)
+    parser.add_argument("--latencia", type=float, default=0.08, help="latência de cada request ao CRM (s)")
+    parser.add_argument("--intervalo", type=float, default=0.05, help="pausa entre turnos da mesma conversa (s)")
+    parser.add_argument("--lote", type=int, default=200, help="CRM_SYNC_BATCH_SIZE")
+    parser.add_argument("--flush", type=float, default=0.5, help="CRM_SYNC_FLUSH_SECONDS")
+    args = parser.parse_args()
+
+    from src.crm_sync import CRMSyncQueue, SalesforceCompositeTransport
+    from tests.fake_crm import FakeCRMServer
+
+    total = args.sessoes * args.turnos
+    print(f"{args.sessoes} conversas x {args.turnos} turnos = {total} atualizações; "
+          f"CRM com {args.latencia * 1000:.0f}ms por request\n")
+    print(f"{'modo':<13} {'custo p50':>11} {'p95':>10} {'requests':>9} {'registros':>10} {'lote médio':>14} "
+          f"{'em dia em':>10}")
+
+    with FakeCRMServer(delay=args.latencia) as crm:
+        transport = SalesforceCompositeTransport(crm.url)
+        inicio = time.perf_counter()
+        custos = _conversas(args.sessoes, args.turnos, args.intervalo,
+                            lambda lead_id, **campos: transport.send_batch([(lead_id, campos)]))
+        em_dia = time.perf_counter() - inicio
+        _linha("inline", custos, len(crm.requests), sum(crm.batch_sizes), crm.batch_sizes, em_dia)
+
+    with FakeCRMServer(delay=args.latencia) as crm:
+        fila = CRMSyncQueue(SalesforceCompositeTransport(crm.url), journal_path=f"{tempfile.mkdtemp()}/outbox.db",
+                            batch_size=args.lote, flush_seconds=args.flush)
+        inicio = time.perf_counter()
+        custos = _conversas(args.sessoes, args.turnos, args.intervalo, fila.enqueue)
+        while fila.stats()["pending"]:
+            time.sleep(0.01)
+        em_dia = time.perf_counter() - inicio
+        stats = fila.stats()
+        fila.close()
+        _linha("write-behind", custos, len(crm.requests), sum(crm.batch_sizes), crm.batch_sizes, em_dia)
+        print(f"\ncoalescidas: {stats['coalesced']} de {stats['enqueued']} atualizações; "
+              f"latência média no CRM: {statistics.mean(r.latency for r in crm.requests) * 1000:.0f}ms/request")
+    print("custo = tempo que a sincronização acrescenta ao turno; em dia = do primeiro turno até o CRM "
+          "ter a última atualização")
+
+
+if __name__ == "__main__":
+    main()
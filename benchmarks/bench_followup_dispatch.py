@@ -0,0 +1,122 @@
+"""
+Benchmark do envio dos follow-ups (src/followup_dispatcher.py).
+
+Cenário das 9h: --leads orçamentos saem entre 9h00 e 9h10, a maior parte no
+primeiro minuto, e os follow-ups de 2h vencem juntos às 11h. O FollowUpManager
+(SQLite em memória, run_due a cada segundo) entrega os vencidos ao dispatcher,
+que envia para o FakeBlipSender (limite de --limite-blip mensagens/s, acima
+disso 429; --falhas de falha transitória). Relógio simulado em passos de 0,1 s.
+
+Modos:
+  - direto: sem limite de taxa nem espalhamento (o que o envio ingênuo faria)
+  - token bucket: --taxa mensagens/s, rajada de 2x
+  - bucket + espalhamento: idem, vencimentos espalhados em --espalhar segundos
+
+Mede 429s, retentativas, desistências, pico de envios/s no Blip, vazão,
+profundidade da fila e atraso entre o vencimento e a entrega.
+
+Executar:
+    python benchmarks/bench_followup_dispatch.py [--leads 3000] [--taxa 20] [--limite-blip 25]
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+
+class Relogio:
+    def __init__(self, agora: float):
+        self.agora = agora
+
+    def __call__(self) -> float:
+        return self.agora
+
+
+def simular(leads: int, taxa: float, espalhar: float, limite_blip: float, falhas: float, seed: int = 17) -> dict:
+    from src.followup_dispatcher import FakeBlipSender, FollowUpDispatcher
+    from src.followup_scheduler import FollowUpManager
+
+    rng = random.Random(seed)
+    nove_horas = 1_700_000_000.0
+    relogio = Relogio(nove_horas)
+    blip = FakeBlipSender(rate_limit=limite_blip, failure_rate=falhas, clock=relogio, seed=seed)
+    dispatcher = FollowUpDispatcher(sender=blip, dry_run=True, rate=taxa, burst=2 * taxa, spread_seconds=espalhar,
+                                    clock=relogio, seed=seed)
+    manager = FollowUpManager(dry_run=True, clock=relogio, sender=dispatcher.submit, confirm_delivery=True)
+    dispatcher.on_delivered, dispatcher.on_failed = manager.mark_delivered, manager.mark_failed
+
+    # 80% dos orçamentos no primeiro minuto, o resto até 9h10
+    instantes = sorted(rng.uniform(0, 60) if rng.random() < 0.8 else rng.uniform(60, 600) for _ in range(leads))
+    vencimento = {}
+    for i, t in enumerate(instantes):
+        relogio.agora = nove_horas + t
+        manager.register(f"sess-{i}", "Carlos", "11999998888")
+        vencimento[f"sess-{i}"] = relogio.agora + 2 * 3600
+
+    relogio.agora = nove_horas + 2 * 3600 - 1
+    profundidade = []
+    cpu = 0.0
+    passos = 0
+    while len(blip.delivered) + dispatcher.stats()["failed"] < leads and passos < 36_000:
+        relogio.agora += 0.1
+        passos += 1
+        inicio = time.perf_counter()
+        if passos % 10 == 0:
+            manager.run_due()
+            profundidade.append(dispatcher.stats()["queue_depth"])
+        dispatcher.pump()
+        cpu += time.perf_counter() - inicio
+
+    por_segundo = {}
+    for t, _ in blip.delivered:
+        por_segundo[int(t)] = por_segundo.get(int(t), 0) + 1
+    atrasos = sorted(t - vencimento[m.session_id] for t, m in blip.delivered)
+    duracao = blip.delivered[-1][0] - blip.delivered[0][0] if blip.delivered else 0
+    stats = dispatcher.stats()
+    return {
+        "entregues": len(blip.delivered),
+        "429": blip.throttled,
+        "retentativas": stats["retries"],
+        "desistencias": stats["failed"],
+        "pico_por_s": max(por_segundo.values(), default=0),
+        "vazao": len(blip.delivered) / duracao if duracao else 0,
+        "fila_max": stats["max_queue_depth"],
+        "fila_media": statistics.mean(profundidade) if profundidade else 0,
+        "atraso_p50": atrasos[len(atrasos) // 2] if atrasos else 0,
+        "atraso_p95": atrasos[int(len(atrasos) * 0.95)] if atrasos else 0,
+        "cpu_por_msg_us": cpu / max(1, stats["submitted"]) * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Follow-ups de 2h vencendo juntos: envio direto vs. limitado")
+    parser.add_argument("--leads", type=int, default=3000)
+    parser.add_argument("--taxa", type=float, default=20, help="FOLLOWUP_SEND_RATE (mensagens/s)")
+    parser.add_argument("--espalhar", type=float, default=300, help="FOLLOWUP_SPREAD_SECONDS")
+    parser.add_argument("--limite-blip", type=float, default=25, help="mensagens/s aceitas pelo Blip simulado")
+    parser.add_argument("--falhas", type=float, default=0.02, help="probabilidade de falha transitória")
+    args = parser.parse_args()
+
+    modos = [
+        ("direto", 1e9, 0.0),
+        ("token bucket", args.taxa, 0.0),
+        ("bucket + espalhamento", args.taxa, args.espalhar),
+    ]
+    print(f"{args.leads} follow-ups vencendo às 11h, Blip aceita {args.limite_blip:g}/s, "
+          f"{args.falhas:.0%} de falhas transitórias\n")
+    print(f"{'modo':<22} {'entregues':>9} {'429':>6} {'retry':>6} {'desist.':>7} {'pico/s':>7} {'vazão/s':>8} "
+          f"{'fila máx':>8} {'fila méd':>8} {'atraso p50':>10} {'p95':>7} {'CPU/msg':>9}")
+    for nome, taxa, espalhar in modos:
+        r = simular(args.leads, taxa, espalhar, args.limite_blip, args.falhas)
+        print(f"{nome:<22} {r['entregues']:>9} {r['429']:>6} {r['retentativas']:>6} {r['desistencias']:>7} "
+              f"{r['pico_por_s']:>7} {r['vazao']:>8.1f} {r['fila_max']:>8} {r['fila_media']:>8.0f} "
+              f"{r['atraso_p50']:>9.0f}s {r['atraso_p95']:>6.0f}s {r['cpu_por_msg_us']:>7.0f}µs")
+    print("\natraso = vencimento do follow-up → entrega no Blip (segundos simulados); vazão = média entre a "
+          "primeira e a última entrega; a fila inclui as mensagens aguardando o espalhamento")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark do agendador de follow-ups persistente (src/followup_scheduler.py).
+
+Registra N leads (padrão 1M) num banco SQLite em disco, espalhados ao longo
+de --horas de operação (relógio simulado, run_due a cada minuto, sender
+vazio), derruba o processo por --parada horas e mede:
+
+  - registro em lote (register_many) e um a um (register)
+  - memória: follow-ups carregados no heap vs. pendentes no banco
+  - restart: tempo para reabrir o banco e carregar a janela, que inclui os
+    vencimentos perdidos durante a parada
+  - envio dos vencidos após o restart
+  - cancelamento um a um de todos os leads (cancel)
+
+Executar:
+    python benchmarks/bench_followup_scheduler.py [--leads 1000000] [--horas 6] [--parada 1] [--janela 900]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, ".")
+
+
+class Relogio:
+    def __init__(self, agora: float):
+        self.agora = agora
+
+    def __call__(self) -> float:
+        return self.agora
+
+
+def _linha(nome: str, n: int, segundos: float):
+    print(f"{nome:<34} {n:>10} {segundos:>9.2f}s {n / segundos:>12,.0f}/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registro, restart e cancelamento de follow-ups em SQLite")
+    parser.add_argument("--leads", type=int, default=1_000_000)
+    parser.add_argument("--lote", type=int, default=10_000)
+    parser.add_argument("--janela", type=float, default=900, help="FOLLOWUP_WINDOW_SECONDS")
+    parser.add_argument("--individuais", type=int, default=20_000, help="leads registrados um a um")
+    parser.add_argument("--horas", type=float, default=6, help="período em que os leads são registrados")
+    parser.add_argument("--parada", type=float, default=1, help="horas com o processo parado")
+    args = parser.parse_args()
+
+    from src.followup_scheduler import FollowUpManager
+
+    db_path = os.path.join(tempfile.mkdtemp(), "followups.db")
+    relogio = Relogio(1_700_000_000.0)
+    manager = FollowUpManager(dry_run=True, db_path=db_path, clock=relogio,
+                              window_seconds=args.janela, sender=lambda state, message: None)
+    passo = args.horas * 3600 / args.leads
+    print(f"{args.leads:,} leads em {args.horas:g}h, parada de {args.parada:g}h, janela de {args.janela:.0f}s\n")
+    print(f"{'operação':<34} {'itens':>10} {'tempo':>10} {'vazão':>14}")
+
+    em_lote = um_a_um = envio = 0.0
+    enviados = 0
+    proxima_verificacao = relogio.agora + 60
+    lote = min(args.lote, max(1, int(60 / passo)))  # no máximo um minuto simulado por lote
+    for base in range(0, args.leads, lote):
+        fim = min(base + lote, args.leads)
+        inicio = time.perf_counter()
+        if base >= args.leads - args.individuais:
+            for i in range(base, fim):
+                manager.register(f"sess-{i}", "Carlos", "11999998888")
+            um_a_um += time.perf_counter() - inicio
+        else:
+            manager.register_many((f"sess-{i}", "Carlos", "11999998888") for i in range(base, fim))
+            em_lote += time.perf_counter() - inicio
+        relogio.agora += passo * (fim - base)
+        if relogio.agora >= proxima_verificacao:
+            inicio = time.perf_counter()
+            enviados += len(manager.run_due())
+            envio += time.perf_counter() - inicio
+            proxima_verificacao += 60
+    _linha("register_many (lotes)", args.leads - args.individuais, em_lote)
+    _linha("register (um a um)", args.individuais, um_a_um)
+    _linha("run_due durante a operação", enviados, envio)
+
+    pendentes = manager.pending_count()
+    print(f"\nem memória: {manager.loaded_count:,} de {pendentes:,} pendentes (heap {len(manager._heap):,} entradas)")
+    manager.close()
+
+    relogio.agora += args.parada * 3600
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    manager = FollowUpManager(dry_run=True, db_path=db_path, clock=relogio,
+                              window_seconds=args.janela, sender=lambda state, message: None)
+    recuperacao = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"restart: {recuperacao:.2f}s para reabrir e carregar {manager.loaded_count:,} vencimentos "
+          f"(pico de {pico / 2**20:.1f} MiB)\n")
+
+    inicio = time.perf_counter()
+    enviados = manager.run_due()
+    _linha("run_due (vencidos na parada)", len(enviados), time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    for i in range(args.leads):
+        manager.cancel(f"sess-{i}")
+    _linha("cancel (um a um)", args.leads, time.perf_counter() - inicio)
+    print(f"\npendentes após cancelar: {manager.pending_count()}, em memória: {manager.loaded_count}")
+    manager.close()
+
+
+if __name__ == "__main__":
+    main()
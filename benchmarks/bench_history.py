@@ -0,0 +1,107 @@
+"""
+Benchmark do tamanho do prompt ao longo de uma conversa longa (histórico compactado).
+
+Simula uma negociação de 30 turnos pelo /chat com o FakeModel (sem API key),
+todos os turnos passando pelo coordenador, e mede os tokens de entrada
+(estimativa ~4 caracteres/token, system prompt incluído) de cada chamada:
+
+  - histórico bruto do Agno: runs anteriores inteiras no coordenador e 5 runs
+    de histórico em cada membro (configuração anterior)
+  - histórico compactado: últimos HISTORY_RAW_TURNS turnos + resumo, dentro
+    de HISTORY_TOKEN_BUDGET (src/history_compactor.py)
+
+Executar:
+    python benchmarks/bench_history.py [--turnos 30]
+"""
+import argparse
+import sys
+import tempfile
+
+sys.path.insert(0, ".")
+
+_MENSAGENS = [
+    "Oi, bom dia", "quero vergalhão", "de 10mm", "e também 8mm", "quanto custa a barra?",
+    "sou de Fortaleza/CE", "preciso de umas 5 toneladas", "tem entrega na obra?",
+    "qual o prazo?", "e se for 8 toneladas?", "vocês parcelam?", "tem metalon também?",
+]
+
+
+def _resposta_membro(turno: int) -> str:
+    # Resposta típica de membro: ~700 caracteres com a linha de STATUS
+    return (
+        f"Perfeito! Anotei a sua informação do turno {turno}. "
+        + "Trabalhamos com vergalhão CA-50 em barras de 12m, com entrega em todo o Ceará e demais estados. " * 6
+        + "Pode me informar o seu CNPJ para seguirmos com o orçamento?\nSTATUS: FRIO - faltam dados"
+    )
+
+
+def conversa(turnos: int, compactar: bool) -> list[tuple[int, int]]:
+    """(tokens do coordenador, tokens do membro) por turno."""
+    import src.api as api
+    from agno.db.sqlite import SqliteDb
+    from src.history_compactor import HistoryCompactor
+    from src.models import TurnResult
+    from src.orchestrator import create_steel_sales_team
+    from src.session_store import SessionStore
+    from tests.fake_model import FakeModel, delegating_reply, estimate_tokens, use_fake_model
+    from fastapi.testclient import TestClient
+
+    turno_atual = {"n": 0}
+
+    def reply(messages):
+        texto = _resposta_membro(turno_atual["n"])
+        final = TurnResult(message=texto.split("\nSTATUS")[0], classification="FRIO", next_action="collect_data")
+        return delegating_reply(member_reply=texto, final_reply=final.model_dump_json())(messages)
+
+    model = FakeModel(reply=reply)
+    use_fake_model(model)
+    team = create_steel_sales_team(compact_history=compactar)
+    team.db = SqliteDb(db_file=f"{tempfile.mkdtemp()}/sessions.db")
+    api.get_team = lambda: team
+    api.FAST_PATH_ROUTER = False
+    api.HISTORY_COMPACTION = compactar
+    api._session_store = SessionStore(team.db)
+    api._history_compactor = HistoryCompactor(api.HISTORY_RAW_TURNS, api.HISTORY_TOKEN_BUDGET)
+    client = TestClient(api.app)
+
+    medidas = []
+    for turno in range(turnos):
+        turno_atual["n"] = turno
+        antes = len(model.calls)
+        client.post("/chat", json={"session_id": "bench-longa", "message": _MENSAGENS[turno % len(_MENSAGENS)]})
+        chamadas = model.calls[antes:]
+        tokens = [sum(estimate_tokens(str(m.content or "")) for m in c) for c in chamadas]
+        coordenador = tokens[0]
+        membro = tokens[1] if len(tokens) > 1 else 0
+        medidas.append((coordenador, membro))
+    return medidas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tamanho do prompt por turno: histórico bruto vs. compactado")
+    parser.add_argument("--turnos", type=int, default=30)
+    args = parser.parse_args()
+
+    from agno.utils.log import set_log_level_to_warning
+    from src.config import HISTORY_RAW_TURNS, HISTORY_TOKEN_BUDGET
+
+    set_log_level_to_warning()
+    bruto = conversa(args.turnos, compactar=False)
+    compacto = conversa(args.turnos, compactar=True)
+
+    print(f"HISTORY_RAW_TURNS={HISTORY_RAW_TURNS}, HISTORY_TOKEN_BUDGET={HISTORY_TOKEN_BUDGET}\n")
+    print(f"{'turno':>5}  {'coord. bruto':>12} {'coord. compacto':>15}  {'membro bruto':>12} {'membro compacto':>15}")
+    for i, ((cb, mb), (cc, mc)) in enumerate(zip(bruto, compacto), 1):
+        if i in (1, 2, 3, 5) or i % 5 == 0:
+            print(f"{i:>5}  {cb:>12} {cc:>15}  {mb:>12} {mc:>15}")
+
+    meio = len(compacto) // 2
+    for nome, medidas in (("bruto", bruto), ("compacto", compacto)):
+        total = sum(c + m for c, m in medidas)
+        crescimento = max(c for c, _ in medidas[meio:]) - min(c for c, _ in medidas[meio:])
+        print(f"\n{nome:<9} tokens de entrada no total: {total:>7}   "
+              f"variação do coordenador na 2ª metade: {crescimento} tokens")
+
+
+if __name__ == "__main__":
+    main()
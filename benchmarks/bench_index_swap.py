@@ -0,0 +1,211 @@
+"""
+Benchmark da atualização do índice com buscas em andamento (src/knowledge_versions.py).
+
+Threads de leitura buscam sem parar (como os agentes da API) enquanto o
+índice é reconstruído do zero, em dois modos:
+  - no lugar: reindex --recreate na tabela que os leitores estão usando
+    (comportamento anterior do `make reindex`)
+  - versionado: build_version() numa tabela nova + troca do ponteiro; os
+    leitores seguem o ponteiro (KNOWLEDGE_SWAP_POLL_SECONDS)
+
+Reporta buscas, erros, buscas sem resultado (tabela vazia ou pela metade),
+p50/p99 das buscas durante o build e, no versionado, o tempo entre a
+publicação e o leitor passar a buscar na versão nova.
+
+O FastEmbed é trocado por um embedder determinístico com custo simulado por
+lote; a busca híbrida no LanceDB é real (FTS nativo, sem tantivy).
+
+Executar:
+    python benchmarks/bench_index_swap.py [--copias 20] [--leitores 4] [--intervalo 0.2]
+"""
+import argparse
+import hashlib
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+sys.path.insert(0, ".")
+
+QUERIES = ["vergalhão 10mm", "telha galvanizada", "metalon 20x20", "tela soldada", "arame recozido",
+           "chapa A-36", "perfil W", "tubo galvanizado"]
+BASE = "bench_swap"
+
+
+def _embedder(batch_cost: float):
+    from agno.knowledge.embedder.base import Embedder
+
+    @dataclass
+    class SimulatedEmbedder(Embedder):
+        """Hash no lugar do ONNX; lote com custo fixo."""
+        id: str = "simulado"
+        dimensions: int = 384
+        batch_cost: float = 0.0
+
+        def get_embedding(self, text):
+            digest = hashlib.sha256(text.encode()).digest()
+            return [digest[i % len(digest)] / 255 for i in range(self.dimensions)]
+
+        def get_embedding_and_usage(self, text):
+            return self.get_embedding(text), None
+
+        def get_embeddings_batch(self, texts):
+            time.sleep(self.batch_cost)
+            return [self.get_embedding(t) for t in texts]
+
+    return SimulatedEmbedder(batch_cost=batch_cost)
+
+
+def _vector_db(uri: str, embedder, table_name: str, follow_interval: float = 0.0):
+    from agno.vectordb.lancedb import SearchType
+    from src.knowledge_versions import PointerWatcher
+    from src.retrieval_cache import CachedLanceDb
+
+    return CachedLanceDb(
+        table_name=table_name, uri=uri, search_type=SearchType.hybrid, embedder=embedder, use_tantivy=False,
+        search_cache_size=0,  # toda busca vai ao LanceDB
+        table_resolver=PointerWatcher(uri, BASE, cleanup=False) if follow_interval else None,
+        resolve_interval=follow_interval,
+    )
+
+
+def _copy_knowledge(dest: Path, copies: int) -> Path:
+    (dest / "catalog_groups").mkdir(parents=True)
+    for path in sorted(Path("knowledge/catalog_groups").glob("*.txt")):
+        text = path.read_text(encoding="utf-8")
+        for i in range(copies):
+            (dest / "catalog_groups" / f"{path.stem}_{i}.txt").write_text(f"{text}\nFilial {i}.", encoding="utf-8")
+    return dest
+
+
+class Readers:
+    """Threads que buscam em loop e registram latência, erros e resultados vazios."""
+
+    def __init__(self, vector_db, n: int):
+        self.vector_db = vector_db
+        self.latencies, self.errors, self.empty = [], 0, 0
+        self.recording = False
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._loop, args=(i,), daemon=True) for i in range(n)]
+
+    def _loop(self, offset: int):
+        i = offset
+        while not self._stop.is_set():
+            query = QUERIES[i % len(QUERIES)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                empty = not self.vector_db.search(query, limit=5)
+                error = False
+            except Exception:
+                empty, error = False, True
+            elapsed = time.perf_counter() - started
+            if self.recording:
+                with self._lock:
+                    self.latencies.append(elapsed)
+                    self.errors += error
+                    self.empty += empty
+
+    def __enter__(self):
+        for t in self._threads:
+            t.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        for t in self._threads:
+            t.join()
+
+
+def _summary(readers: Readers, build_seconds: float, swap_seconds=None) -> dict:
+    latencies = readers.latencies or [0.0]
+    return {
+        "build_s": build_seconds,
+        "searches": len(readers.latencies),
+        "errors": readers.errors,
+        "empty": readers.empty,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": (statistics.quantiles(latencies, n=100)[98] if len(latencies) > 1 else latencies[0]) * 1000,
+        "swap_s": swap_seconds,
+    }
+
+
+def _run_in_place(root: Path, knowledge_dir: Path, args) -> dict:
+    from agno.knowledge.knowledge import Knowledge
+    from src.knowledge_index import reindex
+
+    uri = str(root / "in_place")
+    builder = Knowledge(name=BASE, vector_db=_vector_db(uri, _embedder(args.custo_lote), BASE))
+    reindex(builder, knowledge_dir, parse_workers=1, batch_size=args.lote)
+    reader = _vector_db(uri, _embedder(0), BASE)
+
+    with Readers(reader, args.leitores) as readers:
+        time.sleep(0.2)
+        readers.recording = True
+        started = time.perf_counter()
+        reindex(builder, knowledge_dir, recreate=True, parse_workers=1, batch_size=args.lote)
+        build_seconds = time.perf_counter() - started
+        time.sleep(args.intervalo * 2)
+        readers.recording = False
+    return _summary(readers, build_seconds)
+
+
+def _run_versioned(root: Path, knowledge_dir: Path, args) -> dict:
+    from agno.knowledge.knowledge import Knowledge
+    from src.knowledge_versions import build_version, current_table
+
+    uri = str(root / "versioned")
+    builder_db = _vector_db(uri, _embedder(args.custo_lote), BASE)
+    build_version(Knowledge(name=BASE, vector_db=builder_db), knowledge_dir, parse_workers=1, batch_size=args.lote)
+    reader = _vector_db(uri, _embedder(0), current_table(uri, BASE), follow_interval=args.intervalo)
+
+    with Readers(reader, args.leitores) as readers:
+        time.sleep(0.2)
+        readers.recording = True
+        started = time.perf_counter()
+        version = build_version(Knowledge(name=BASE, vector_db=builder_db), knowledge_dir, recreate=True,
+                                parse_workers=1, batch_size=args.lote)
+        published = time.perf_counter()
+        while reader.table_name != version.table and time.perf_counter() - published < 30:
+            time.sleep(0.005)
+        swap_seconds = time.perf_counter() - published
+        time.sleep(args.intervalo * 2)
+        readers.recording = False
+    return _summary(readers, published - started, swap_seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Buscas durante a reconstrução do índice: no lugar vs. versionado")
+    parser.add_argument("--copias", type=int, default=20, help="réplicas de cada TXT do catálogo")
+    parser.add_argument("--leitores", type=int, default=4, help="threads buscando em paralelo")
+    parser.add_argument("--intervalo", type=float, default=0.2, help="KNOWLEDGE_SWAP_POLL_SECONDS dos leitores")
+    parser.add_argument("--lote", type=int, default=64)
+    parser.add_argument("--custo-lote", type=float, default=0.05, help="s por lote de embedding")
+    args = parser.parse_args()
+
+    from agno.utils.log import set_log_level_to_warning
+    set_log_level_to_warning()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        knowledge_dir = _copy_knowledge(root / "knowledge", args.copias)
+        files = len(list(knowledge_dir.rglob("*.txt")))
+        results = [("no lugar", _run_in_place(root, knowledge_dir, args)),
+                   ("versionado", _run_versioned(root, knowledge_dir, args))]
+        shutil.rmtree(root / "knowledge")
+
+    print(f"{files} arquivos, {args.leitores} leitores, ponteiro conferido a cada {args.intervalo}s\n")
+    print(f"{'modo':<11} {'build':>7} {'buscas':>7} {'erros':>6} {'vazias':>7} {'p50':>9} {'p99':>9} {'troca':>7}")
+    for name, r in results:
+        swap = f"{r['swap_s']:>6.2f}s" if r["swap_s"] is not None else f"{'—':>7}"
+        print(f"{name:<11} {r['build_s']:>6.2f}s {r['searches']:>7} {r['errors']:>6} {r['empty']:>7} "
+              f"{r['p50_ms']:>6.2f} ms {r['p99_ms']:>6.2f} ms {swap}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark de memória: knowledge base por agente vs. singleton compartilhado.
+
+Simula o que o agent_os_server.py faz na inicialização (3 agentes avulsos +
+o Team com 4 membros) e mede, em um subprocesso limpo para cada modo:
+  - RSS após criar os agentes (startup)
+  - pico de RSS
+  - tempo até a primeira resposta da knowledge base (primeira busca)
+
+Modos:
+  per_agent — comportamento anterior: cada fábrica cria seu próprio
+              Knowledge/FastEmbedEmbedder/LanceDb
+  shared    — comportamento atual: get_knowledge_base() compartilhado
+
+Executar (requer o modelo FastEmbed disponível e a base indexada):
+    python benchmarks/bench_knowledge_memory.py
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+QUERY = "vergalhão 10mm"
+
+
+def _current_rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * resource.getpagesize() / (1024 * 1024)
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_mode(mode: str) -> dict:
+    started = time.perf_counter()
+
+    from src import knowledge_builder
+    import src.agents.qualifier_agent as qualifier_mod
+    import src.agents.product_specialist_agent as specialist_mod
+
+    if mode == "per_agent":
+        qualifier_mod.get_knowledge_base = knowledge_builder.build_knowledge_base
+        specialist_mod.get_knowledge_base = knowledge_builder.build_knowledge_base
+
+    from src.agents.quote_generator_agent import create_quote_generator_agent
+    from src.orchestrator import create_steel_sales_team
+
+    agents = [
+        qualifier_mod.create_qualifier_agent(),
+        specialist_mod.create_product_specialist_agent(),
+        create_quote_generator_agent(),
+    ]
+    team = create_steel_sales_team()
+    agents += list(team.members)
+
+    # Cada instância distinta de Knowledge carrega seu próprio modelo ONNX
+    # no primeiro embedding — força o carregamento como aconteceria em produção.
+    knowledge_bases = {id(a.knowledge): a.knowledge for a in agents if a.knowledge is not None}
+    startup_s = time.perf_counter() - started
+    startup_rss = _current_rss_mb()
+
+    first_answer_s = None
+    for kb in knowledge_bases.values():
+        kb.search(QUERY)
+        if first_answer_s is None:
+            first_answer_s = time.perf_counter() - started
+
+    return {
+        "mode": mode,
+        "knowledge_instances": len(knowledge_bases),
+        "startup_s": round(startup_s, 3),
+        "startup_rss_mb": round(startup_rss, 1),
+        "time_to_first_answer_s": round(first_answer_s or 0.0, 3),
+        "rss_after_all_loaded_mb": round(_current_rss_mb(), 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de memória da knowledge base")
+    parser.add_argument("--mode", choices=["per_agent", "shared"], help="Executa apenas um modo (uso interno)")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(_run_mode(args.mode)))
+        return
+
+    results = []
+    for mode in ("per_agent", "shared"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--mode", mode],
+            capture_output=True, text=True, check=True,
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    print(f"{'modo':<10} {'instâncias':>10} {'startup RSS':>12} {'pico RSS':>10} {'1ª resposta':>12}")
+    for r in results:
+        print(
+            f"{r['mode']:<10} {r['knowledge_instances']:>10} "
+            f"{r['startup_rss_mb']:>9.1f} MB {r['peak_rss_mb']:>7.1f} MB "
+            f"{r['time_to_first_answer_s']:>10.3f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Benchmark do extrator determinístico de campos do lead (src/lead_extractor.py).
+
+Gera milhares de turnos sintéticos (LeadData parcial + mensagem do cliente com
+CNPJ, e-mail, WhatsApp, cidade/UF, volume e urgência em formatos variados) e:
+
+  - mede a vazão da extração (µs por mensagem)
+  - confere os campos extraídos contra o gabarito do gerador
+  - planeja cada turno com o _plan_turn real da API, com e sem o extrator, e
+    conta as chamadas de modelo que o turno custaria:
+        desqualificado / orçamento renderizado → 0
+        membro via pré-roteador ou generate_quote → 1
+        coordenador → 3 (delegação + membro + resposta final)
+
+Executar:
+    python benchmarks/bench_lead_extractor.py [--mensagens 5000]
+"""
+import argparse
+import random
+import sys
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+sys.path.insert(0, ".")
+
+_NOMES = ["Carlos Souza", "Ana Lima", "João Pereira", "Marcos Alves", "Fernanda Rocha"]
+_PRODUTOS = ["vergalhão", "metalon", "tubo quadrado", "cantoneira", "arame recozido", "barra chata"]
+_SAUDACOES = ["Oi, bom dia", "Boa tarde!", "qual o preço?", "vocês entregam?", "ok, pode ser", "obrigado"]
+
+
+def _cnpj_valido(rng: random.Random) -> str:
+    digits = [rng.randint(0, 9) for _ in range(8)] + [0, 0, 0, 1]
+    for size in (12, 13):
+        weights = list(range(size - 7, 1, -1)) + list(range(9, 1, -1))
+        remainder = sum(d * w for d, w in zip(digits, weights)) % 11
+        digits.append(0 if remainder < 2 else 11 - remainder)
+    d = "".join(map(str, digits))
+    return rng.choice([d, f"{d[:2]}.{d[2:5]}.{d[5:8]}/{d[8:12]}-{d[12:]}"])
+
+
+def _telefone(rng: random.Random, ddd: str) -> tuple[str, str]:
+    numero = f"9{rng.randint(1000, 9999)}{rng.randint(1000, 9999)}"
+    texto = rng.choice([
+        f"{ddd} {numero[:5]}-{numero[5:]}", f"({ddd}) {numero[:5]}-{numero[5:]}",
+        f"+55 {ddd} {numero}", f"{ddd}{numero}",
+    ])
+    return texto, f"{ddd}{numero}"
+
+
+def _volume(rng: random.Random, produto: str) -> str:
+    return rng.choice([
+        f"{rng.choice([0.2, 0.5, 1, 2, 5, 10, 20])} toneladas".replace(".", ","),
+        f"{rng.choice([100, 300, 500, 800, 2000, 5000])}kg de {produto}",
+        f"{rng.choice([10, 50, 100, 300])} barras de {rng.choice(['8mm', '10mm', '12,5mm'])}",
+        f"{rng.choice([20, 60, 200])} tubos",
+    ])
+
+
+def gerar_turnos(n: int, seed: int = 11):
+    """(lead parcial, mensagem, gabarito {campo: valor}) — gabarito só com o que a mensagem traz."""
+    from src.data.localidades import CIDADES_AMBIGUAS, CIDADES_POR_UF
+
+    rng = random.Random(seed)
+    cidades = [(c, uf) for uf, cs in CIDADES_POR_UF.items() for c in cs if c not in CIDADES_AMBIGUAS]
+    for i in range(n):
+        cidade, uf = rng.choice(cidades)
+        produto = rng.choice(_PRODUTOS)
+        ddd = rng.choice(["85", "81", "11", "21", "31", "71", "91"])
+        lead = {"session_id": f"bench-{i}", "name": rng.choice(_NOMES)}
+        # Lead já com parte dos dados (turnos anteriores)
+        for campo, valor in [("state", uf), ("city", cidade), ("product_interest", produto),
+                             ("email", "compras@obra.com.br"), ("whatsapp", "85999998888"),
+                             ("cnpj", "11222333000181")]:
+            if rng.random() < 0.4:
+                lead[campo] = valor
+
+        partes, gabarito = [], {}
+        if rng.random() < 0.3:
+            partes.append(rng.choice(_SAUDACOES))
+        if rng.random() < 0.45:
+            partes.append(rng.choice([f"Sou de {cidade}/{uf}", f"{cidade} - {uf}", f"moro em {cidade}, {uf}"]))
+            gabarito.update(state=uf, city=cidade)
+        if rng.random() < 0.35:
+            email = f"{lead['name'].split()[0].lower()}{i}@empresa.com.br"
+            partes.append(f"meu email é {email}")
+            gabarito["email"] = email
+        if rng.random() < 0.35:
+            texto, digitos = _telefone(rng, ddd)
+            partes.append(f"zap {texto}")
+            gabarito["whatsapp"] = digitos
+        if rng.random() < 0.3:
+            cnpj = _cnpj_valido(rng)
+            partes.append(f"CNPJ {cnpj}")
+            gabarito["cnpj"] = "".join(c for c in cnpj if c.isdigit())
+        if rng.random() < 0.5:
+            volume = _volume(rng, produto)
+            partes.append(f"preciso de {volume}")
+            gabarito["volume_estimate"] = volume
+        if rng.random() < 0.2:
+            partes.append(rng.choice(["é urgente", "pra amanhã cedo", "sem pressa"]))
+        if not partes:
+            partes.append(rng.choice(_SAUDACOES))
+        yield lead, ", ".join(partes), gabarito
+
+
+def _fake_team():
+    from src.router import HUMAN_HANDOFF, PRODUCT_SPECIALIST, QUALIFIER, QUOTE_GENERATOR
+
+    def member(name):
+        return SimpleNamespace(name=name, run=lambda *a, **k: None)  # só planejado, nunca executado
+
+    members = [member(n) for n in (QUALIFIER, PRODUCT_SPECIALIST, QUOTE_GENERATOR, HUMAN_HANDOFF)]
+    return SimpleNamespace(members=members, run=lambda *a, **k: None)
+
+
+def _chamadas(plan, team) -> tuple[int, str]:
+    if plan.response is not None:
+        return 0, plan.response.next_action
+    if plan.content is not None:
+        return 0, "orçamento renderizado"
+    if plan.runner is team.run:
+        return 3, "coordenador"
+    return 1, "membro direto"
+
+
+def planejar(turnos, com_extrator: bool) -> tuple[int, Counter]:
+    import src.api as api
+    from src.lead_extractor import ExtractedFields, extract_lead_fields
+    from src.models import IncomingMessage
+
+    team = _fake_team()
+    api.get_team = lambda: team
+    api.extract_lead_fields = extract_lead_fields if com_extrator else (lambda _m: ExtractedFields())
+
+    total, caminhos = 0, Counter()
+    for lead, mensagem, _ in turnos:
+        plan = api._plan_turn(IncomingMessage(session_id=lead["session_id"], message=mensagem, lead_data=lead))
+        chamadas, caminho = _chamadas(plan, team)
+        total += chamadas
+        caminhos[caminho] += 1
+    return total, caminhos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extrator de campos do lead: vazão, acerto e chamadas evitadas")
+    parser.add_argument("--mensagens", type=int, default=5000)
+    args = parser.parse_args()
+
+    from agno.utils.log import set_log_level_to_warning
+    from src.lead_extractor import extract_lead_fields
+
+    set_log_level_to_warning()
+    turnos = list(gerar_turnos(args.mensagens))
+
+    start = time.perf_counter()
+    extraidos = [extract_lead_fields(m) for _, m, _ in turnos]
+    duracao = time.perf_counter() - start
+
+    acertos, esperados, extras = Counter(), Counter(), Counter()
+    for (_, _, gabarito), fields in zip(turnos, extraidos):
+        encontrados = fields.as_dict()
+        for campo, valor in gabarito.items():
+            esperados[campo] += 1
+            acertos[campo] += encontrados.get(campo) == valor
+        for campo in ("cnpj", "email", "whatsapp", "state", "city"):
+            if campo in encontrados and campo not in gabarito:
+                extras[campo] += 1
+
+    print(f"{len(turnos)} mensagens, {duracao / len(turnos) * 1e6:.1f} µs/mensagem\n")
+    print(f"{'campo':<16} {'acerto':>8} {'falsos +':>9}")
+    for campo in ("cnpj", "email", "whatsapp", "state", "city", "volume_estimate"):
+        taxa = acertos[campo] / esperados[campo] if esperados[campo] else 0
+        print(f"{campo:<16} {taxa:>7.1%} {extras[campo]:>9}")
+
+    sem, caminhos_sem = planejar(turnos, com_extrator=False)
+    com, caminhos_com = planejar(turnos, com_extrator=True)
+    print(f"\n{'caminho do turno':<24} {'sem extrator':>13} {'com extrator':>13}")
+    for caminho in sorted(set(caminhos_sem) | set(caminhos_com)):
+        print(f"{caminho:<24} {caminhos_sem[caminho]:>13} {caminhos_com[caminho]:>13}")
+    print(f"{'chamadas de modelo':<24} {sem:>13} {com:>13}")
+    print(f"\nchamadas evitadas: {sem - com} ({(sem - com) / sem:.1%})")
+
+
+if __name__ == "__main__":
+    main()
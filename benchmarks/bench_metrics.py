@@ -0,0 +1,66 @@
+"""
+Benchmark do custo da instrumentação (src/metrics.py).
+
+Mede quanto cada observação acrescenta ao turno — histograma direto,
+stage_timer e contador — com --threads threads observando ao mesmo tempo,
+e o tempo de renderizar o /metrics com as séries de um processo real.
+
+Executar:
+    python benchmarks/bench_metrics.py [--observacoes 200000] [--threads 8]
+"""
+import argparse
+import sys
+import threading
+import time
+
+sys.path.insert(0, ".")
+
+_ETAPAS = ["coalesce", "session_lock", "plan", "turn_queue", "agent_run", "finish", "knowledge_search",
+           "embedding", "session_read", "session_write"]
+
+
+def _medir(nome: str, observar, total: int, threads: int):
+    por_thread = total // threads
+
+    def trabalhador(t: int):
+        for i in range(por_thread):
+            observar(i)
+
+    inicio = time.perf_counter()
+    ths = [threading.Thread(target=trabalhador, args=(t,)) for t in range(threads)]
+    for th in ths:
+        th.start()
+    for th in ths:
+        th.join()
+    duracao = time.perf_counter() - inicio
+    print(f"{nome:<22} {duracao / (por_thread * threads) * 1e6:>8.2f}µs/observação")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Custo das métricas do /metrics")
+    parser.add_argument("--observacoes", type=int, default=200_000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    from src.metrics import MODEL_TOKENS, STAGE_SECONDS, METRICS, stage_timer
+
+    print(f"{args.observacoes} observações em {args.threads} threads\n")
+    _medir("histogram.observe", lambda i: STAGE_SECONDS.observe(0.01, _ETAPAS[i % 10]),
+           args.observacoes, args.threads)
+
+    def com_timer(i):
+        with stage_timer(_ETAPAS[i % 10]):
+            pass
+
+    _medir("stage_timer", com_timer, args.observacoes, args.threads)
+    _medir("counter.inc", lambda i: MODEL_TOKENS.inc("Qualificador de Leads", "gemini", "input", amount=900),
+           args.observacoes, args.threads)
+
+    METRICS.render()  # o primeiro scrape importa src/knowledge_builder
+    inicio = time.perf_counter()
+    texto = METRICS.render()
+    print(f"\n/metrics: {len(texto.splitlines())} linhas renderizadas em {(time.perf_counter() - inicio) * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
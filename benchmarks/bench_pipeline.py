@@ -0,0 +1,269 @@
+"""
+Suíte offline do pipeline de agentes com modelo falso determinístico.
+
+Troca o get_model() por um FakeModel roteirizado (tests/fake_model.py) com
+latência e tamanho de resposta configuráveis, e roda as conversas gravadas de
+benchmarks/scenarios.json por dois caminhos:
+
+  - api:  POST /chat (pré-roteador, regras, histórico, TurnPool), com
+          --concorrencia conversas em paralelo
+  - team: create_steel_sales_team().run(...) direto, sempre pelo coordenador
+
+Para cada caminho reporta vazão, latência p50/p95/p99 por turno, chamadas de
+modelo por turno, tokens de prompt por chamada, o custo próprio do pipeline
+(latência menos o tempo do modelo falso) e o pico de RSS do processo. Sem
+chave de API e sem rede: mede só o overhead do pipeline.
+
+O resultado sai em JSON (--saida) para comparar entre commits (--baseline).
+
+Com --cassete, o modelo roteirizado dá lugar às respostas reais gravadas
+num cassete (src/model_cassette.py): grave uma vez com --modo-cassete record
+(precisa da chave do provedor) e rode depois em replay, offline. O tempo do
+modelo passa a ser a latência gravada vezes --latencia-cassete, e ao final
+sai o relatório de misses (requests sem gravação e se o motivo foi mudança
+de prompt).
+
+Executar:
+    python benchmarks/bench_pipeline.py [--latencia 0.05] [--tokens-saida 60] [--repeticoes 3]
+    python benchmarks/bench_pipeline.py --saida atual.json --baseline main.json
+    python benchmarks/bench_pipeline.py --cassete data/model_cassette.db --modo-cassete record --repeticoes 1
+    python benchmarks/bench_pipeline.py --cassete data/model_cassette.db [--latencia-cassete 1]
+"""
+import argparse
+import asyncio
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, ".")
+
+SCENARIOS_PATH = Path(__file__).with_name("scenarios.json")
+
+# Métricas comparadas com o --baseline: (chave, maior é melhor)
+_COMPARED = [("throughput_turns_s", True), ("p50_ms", False), ("p95_ms", False), ("p99_ms", False),
+             ("model_calls_per_turn", False), ("prompt_tokens_per_call", False), ("peak_rss_mb", False)]
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes no macOS, KB no Linux
+
+
+def _scripted_model(latency: float, output_tokens: int):
+    """Coordenador que delega e redige; membros respondem com ~output_tokens tokens."""
+    from src.models import LeadClassification, NextAction, TurnResult
+    from tests.fake_model import FakeModel, delegating_reply
+
+    filler = " ".join(["ok"] * max(0, output_tokens - 8))
+    final = TurnResult(message=f"Qual o seu nome? {filler}", classification=LeadClassification.FRIO,
+                       next_action=NextAction.COLLECT_DATA)
+    return FakeModel(
+        reply=delegating_reply(member_reply=f"Qual o seu nome? {filler} STATUS: FRIO",
+                               final_reply=final.model_dump_json()),
+        delay=latency,
+        report_usage=True,
+    )
+
+
+def _cassette_model(path: str, mode: str, latency_factor: float):
+    """Modelo do provedor (MODEL_ID) atrás do cassete; em replay não toca a rede."""
+    from src.config import _provider_model
+    from src.model_cassette import CassetteModel, get_cassette
+
+    return CassetteModel.wrap(_provider_model(), get_cassette(path), mode, latency_factor, log_requests=True)
+
+
+def _new_team(model):
+    from agno.db.sqlite import SqliteDb
+    from src.orchestrator import create_steel_sales_team
+    from tests.fake_model import use_fake_model
+
+    use_fake_model(model)
+    team = create_steel_sales_team()
+    team.db = SqliteDb(db_file=tempfile.mktemp(suffix=".db"))
+    return team
+
+
+def _summary(driver: str, latencies: list[float], duration: float, model, latency: float) -> dict:
+    from tests.fake_model import prompt_tokens
+
+    calls = len(model.calls)
+    tokens = [prompt_tokens(messages) for messages in model.calls]
+    calls_per_turn = calls / len(latencies)
+    return {
+        "driver": driver,
+        "turns": len(latencies),
+        "throughput_turns_s": round(len(latencies) / duration, 2),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 1),
+        "model_calls": calls,
+        "model_calls_per_turn": round(calls_per_turn, 2),
+        "prompt_tokens_per_call": round(statistics.mean(tokens), 1) if tokens else 0,
+        "prompt_tokens_p95": _percentile(tokens, 95) if tokens else 0,
+        # Tempo do turno fora do modelo falso (chamadas em sequência dentro do turno)
+        "pipeline_overhead_ms": round((statistics.mean(latencies) - calls_per_turn * latency) * 1000, 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def run_api(scenarios: dict, repetitions: int, concurrency: int, model, latency: float) -> dict:
+    import httpx
+    import src.api as api
+    from src.session_store import SessionStore
+
+    team = _new_team(model)
+    api.get_team = lambda: team
+    api._session_store = SessionStore(team.db)
+    latencies: list[float] = []
+
+    async def conversation(client, session_id: str, messages: list[str]):
+        for message in messages:
+            started = time.perf_counter()
+            response = await client.post("/chat", json={"session_id": session_id, "message": message})
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+    async def main():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            jobs = [(f"api-{r}-{name}", messages) for r in range(repetitions) for name, messages in scenarios.items()]
+            limit = asyncio.Semaphore(concurrency)
+
+            async def limited(session_id, messages):
+                async with limit:
+                    await conversation(client, session_id, messages)
+
+            await asyncio.gather(*(limited(s, m) for s, m in jobs))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    return _summary("api", latencies, time.perf_counter() - started, model, latency)
+
+
+def run_team(scenarios: dict, repetitions: int, model, latency: float) -> dict:
+    team = _new_team(model)
+    latencies: list[float] = []
+    started = time.perf_counter()
+    for r in range(repetitions):
+        for name, messages in scenarios.items():
+            for message in messages:
+                turn_started = time.perf_counter()
+                team.run(message, session_id=f"team-{r}-{name}")
+                latencies.append(time.perf_counter() - turn_started)
+    return _summary("team", latencies, time.perf_counter() - started, model, latency)
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+
+
+def _print_table(results: list[dict]):
+    print(f"{'caminho':<6} {'turnos':>6} {'turnos/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'chamadas/turno':>15} "
+          f"{'tokens/chamada':>15} {'overhead':>10} {'RSS pico':>9}")
+    for r in results:
+        print(f"{r['driver']:<6} {r['turns']:>6} {r['throughput_turns_s']:>9} {r['p50_ms']:>6.1f} ms "
+              f"{r['p95_ms']:>6.1f} ms {r['p99_ms']:>6.1f} ms {r['model_calls_per_turn']:>15} "
+              f"{r['prompt_tokens_per_call']:>15} {r['pipeline_overhead_ms']:>7.1f} ms {r['peak_rss_mb']:>6.1f} MB")
+
+
+def _print_comparison(results: list[dict], baseline: dict):
+    print(f"\ncomparado com {baseline.get('commit', '?')}:")
+    previous = {r["driver"]: r for r in baseline.get("results", [])}
+    for r in results:
+        old = previous.get(r["driver"])
+        if old is None:
+            continue
+        changes = []
+        for key, higher_is_better in _COMPARED:
+            if old.get(key):
+                delta = (r[key] - old[key]) / old[key] * 100
+                worse = delta < 0 if higher_is_better else delta > 0
+                changes.append(f"{key} {delta:+.1f}%{' (pior)' if worse and abs(delta) >= 5 else ''}")
+        print(f"  {r['driver']}: " + ", ".join(changes))
+
+
+def _print_cassette_report(cassette):
+    stats = cassette.stats.as_dict()
+    print(f"\ncassete {cassette.path}: {stats['hits']} reproduzidas, {stats['recorded']} gravadas, "
+          f"{stats['misses']} misses")
+    reasons = {}
+    for miss in stats["last_misses"]:
+        reasons.setdefault(miss["reason"], []).append(miss)
+    for reason, misses in reasons.items():
+        print(f"  {reason}: {len(misses)}")
+        for miss in misses[:5]:
+            print(f"    {miss['agent'][:50]:<50} {miss['last_user_message'][:60]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suíte offline do pipeline com modelo falso")
+    parser.add_argument("--latencia", type=float, default=0.05, help="latência de cada chamada de modelo (s)")
+    parser.add_argument("--tokens-saida", type=int, default=60, help="tokens de cada resposta dos membros")
+    parser.add_argument("--repeticoes", type=int, default=3, help="vezes que cada cenário é repetido")
+    parser.add_argument("--concorrencia", type=int, default=4, help="conversas simultâneas no caminho api")
+    parser.add_argument("--caminhos", default="api,team", help="api, team ou ambos separados por vírgula")
+    parser.add_argument("--cenarios", default=str(SCENARIOS_PATH))
+    parser.add_argument("--saida", help="grava o resultado em JSON neste arquivo")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--cassete", help="usa as respostas gravadas neste cassete no lugar do modelo roteirizado")
+    parser.add_argument("--modo-cassete", default="replay", choices=["replay", "record", "auto"])
+    parser.add_argument("--latencia-cassete", type=float, default=0.0,
+                        help="fator da latência gravada na reprodução (0 = instantâneo)")
+    args = parser.parse_args()
+
+    if args.cassete:
+        def new_model():
+            return _cassette_model(args.cassete, args.modo_cassete, args.latencia_cassete)
+        latency = 0.0  # tempo do modelo entra no overhead: varia por chamada gravada
+    else:
+        def new_model():
+            return _scripted_model(args.latencia, args.tokens_saida)
+        latency = args.latencia
+
+    scenarios = json.loads(Path(args.cenarios).read_text(encoding="utf-8"))
+    drivers = [d.strip() for d in args.caminhos.split(",") if d.strip()]
+    results = []
+    if "api" in drivers:
+        results.append(run_api(scenarios, args.repeticoes, args.concorrencia, new_model(), latency))
+    if "team" in drivers:
+        results.append(run_team(scenarios, args.repeticoes, new_model(), latency))
+
+    report = {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "params": {"latency_s": args.latencia, "output_tokens": args.tokens_saida, "repetitions": args.repeticoes,
+                   "concurrency": args.concorrencia, "scenarios": sorted(scenarios),
+                   "cassette": args.cassete, "cassette_latency": args.latencia_cassete},
+        "results": results,
+    }
+    _print_table(results)
+    if args.cassete:
+        from src.model_cassette import get_cassette
+        _print_cassette_report(get_cassette(args.cassete))
+    if args.baseline:
+        _print_comparison(results, json.loads(Path(args.baseline).read_text(encoding="utf-8")))
+    if args.saida:
+        Path(args.saida).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\nresultado em {args.saida}")
+    else:
+        print("\n" + json.dumps(report, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Microbenchmark: resumo de orçamento renderizado vs. agente Gerador de Orçamentos.
+
+Mede o custo por resumo de:
+  - render_quote (template preenchido a partir do LeadData, sem LLM)
+  - agente Gerador de Orçamentos com um modelo falso de latência configurável
+    (isola o overhead do Agno + a latência simulada do provedor)
+
+Executar:
+    python benchmarks/bench_quote_render.py [--iterations 10000] [--model-latency 2.0]
+"""
+import argparse
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark do render_quote")
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument("--agent-iterations", type=int, default=5)
+    parser.add_argument("--model-latency", type=float, default=2.0, help="Latência simulada do LLM (s)")
+    args = parser.parse_args()
+
+    from src.agents.quote_generator_agent import render_quote, create_quote_generator_agent
+    from src.models import LeadData
+    from src.router import build_context_block
+    from tests.fake_model import FakeModel, use_fake_model
+
+    lead = LeadData(
+        session_id="bench", name="Carlos Souza", whatsapp="85999998888",
+        email="carlos@construtora.com.br", cnpj="12345678000195", state="CE",
+        city="Fortaleza", product_interest="vergalhão 10mm", volume_estimate="5 toneladas",
+    )
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        render_quote(lead)
+    render_us = (time.perf_counter() - start) / args.iterations * 1e6
+
+    model = FakeModel(reply=render_quote(lead), delay=args.model_latency)
+    use_fake_model(model)
+    agent = create_quote_generator_agent()
+    task = build_context_block(lead, "pode fechar")
+    start = time.perf_counter()
+    for _ in range(args.agent_iterations):
+        agent.run(task)
+    agent_ms = (time.perf_counter() - start) / args.agent_iterations * 1e3
+
+    print(f"render_quote:            {render_us:10.1f} µs/resumo  (0 chamadas de modelo)")
+    print(f"agente + LLM simulado:   {agent_ms:10.1f} ms/resumo  (1 chamada, latência {args.model_latency}s)")
+    print(f"overhead do Agno sem o LLM: {agent_ms - args.model_latency * 1e3:7.1f} ms/resumo")
+
+
+if __name__ == "__main__":
+    main()
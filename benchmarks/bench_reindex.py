@@ -0,0 +1,147 @@
+"""
+Benchmark da reindexação da knowledge base (src/knowledge_index.py).
+
+Copia knowledge/ para um diretório temporário (com --copias, os TXTs do
+catálogo são replicados para simular um acervo maior) e mede, numa tabela
+LanceDB temporária:
+  - antes: kb.insert do Agno arquivo por arquivo (load_knowledge_base antigo
+    com --recreate), um embedding por trecho
+  - reindex completo: leitura em processos + embedding em lotes/threads
+  - sem alteração: nenhum arquivo mudou (só o hash dos arquivos)
+  - 1 arquivo alterado: uma linha nova num TXT do catálogo
+
+O modelo FastEmbed é substituído por um embedder determinístico com custo
+simulado: --custo-chamada por chamada ao modelo + --custo-trecho por trecho
+(o lote amortiza o custo fixo). Com --real usa o FastEmbed de verdade
+(baixa o modelo na primeira vez).
+
+Executar:
+    python benchmarks/bench_reindex.py [--copias 20] [--lote 64] [--threads 2] [--processos 4]
+"""
+import argparse
+import hashlib
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+sys.path.insert(0, ".")
+
+
+def _embedder(args):
+    from agno.knowledge.embedder.base import Embedder
+
+    if args.real:
+        from src.retrieval_cache import QueryCachedEmbedder
+        return QueryCachedEmbedder(id="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2", dimensions=384)
+
+    @dataclass
+    class SimulatedEmbedder(Embedder):
+        """Hash no lugar do ONNX, com o custo de uma chamada ao modelo."""
+        id: str = "simulado"
+        dimensions: int = 384
+        call_cost: float = 0.0
+        chunk_cost: float = 0.0
+
+        def _vector(self, text):
+            digest = hashlib.sha256(text.encode()).digest()
+            return [digest[i % len(digest)] / 255 for i in range(self.dimensions)]
+
+        def get_embedding(self, text):
+            time.sleep(self.call_cost + self.chunk_cost)
+            return self._vector(text)
+
+        def get_embedding_and_usage(self, text):
+            return self.get_embedding(text), None
+
+        def get_embeddings_batch(self, texts):
+            time.sleep(self.call_cost + self.chunk_cost * len(texts))
+            return [self._vector(t) for t in texts]
+
+    return SimulatedEmbedder(call_cost=args.custo_chamada, chunk_cost=args.custo_trecho)
+
+
+def _knowledge(uri: str, embedder):
+    from agno.knowledge.knowledge import Knowledge
+    from agno.vectordb.lancedb import SearchType
+    from src.knowledge_index import knowledge_reader
+    from src.retrieval_cache import CachedLanceDb
+
+    vector_db = CachedLanceDb(table_name="bench", uri=uri, search_type=SearchType.vector,
+                              embedder=embedder, use_tantivy=False)
+    readers = {"pdf": knowledge_reader(".pdf"), "txt": knowledge_reader(".txt")}
+    return Knowledge(name="bench", vector_db=vector_db, readers=readers)
+
+
+def _copy_knowledge(dest: Path, copies: int) -> Path:
+    shutil.copytree("knowledge", dest)
+    catalog = dest / "catalog_groups"
+    for path in sorted(catalog.glob("*.txt")):
+        text = path.read_text(encoding="utf-8")
+        for i in range(1, copies):
+            (catalog / f"{path.stem}_{i}.txt").write_text(f"{text}\nFilial {i}.", encoding="utf-8")
+    return dest
+
+
+def _legacy_insert(kb, knowledge_dir: Path) -> float:
+    """load_knowledge_base anterior: kb.insert em série, um arquivo por vez."""
+    from src.knowledge_index import knowledge_files
+
+    started = time.perf_counter()
+    kb.vector_db.create()
+    for path in knowledge_files(knowledge_dir):
+        kb.insert(path=str(path.resolve()), name=path.stem, upsert=True, skip_if_exists=False)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reindexação incremental vs. kb.insert por arquivo")
+    parser.add_argument("--copias", type=int, default=20, help="réplicas de cada TXT do catálogo")
+    parser.add_argument("--lote", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=2)
+    parser.add_argument("--processos", type=int, default=4)
+    parser.add_argument("--custo-chamada", type=float, default=0.010, help="s fixos por chamada ao modelo")
+    parser.add_argument("--custo-trecho", type=float, default=0.004, help="s por trecho")
+    parser.add_argument("--real", action="store_true", help="usa o FastEmbed de verdade")
+    parser.add_argument("--sem-antes", action="store_true", help="não mede o kb.insert por arquivo")
+    args = parser.parse_args()
+
+    from agno.utils.log import set_log_level_to_warning
+    from src.knowledge_index import reindex
+
+    set_log_level_to_warning()
+    options = {"parse_workers": args.processos, "batch_size": args.lote, "threads": args.threads}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        knowledge_dir = _copy_knowledge(Path(tmp) / "knowledge", args.copias)
+        rows = []
+        if not args.sem_antes:
+            legacy = _knowledge(str(Path(tmp) / "legacy"), _embedder(args))
+            seconds = _legacy_insert(legacy, knowledge_dir)
+            rows.append(("antes: kb.insert por arquivo", seconds, legacy.vector_db.table.count_rows(), None))
+
+        kb = _knowledge(str(Path(tmp) / "lancedb"), _embedder(args))
+        report = reindex(kb, knowledge_dir, recreate=True, **options)
+        rows.append(("reindex completo", report.total_seconds, report.embedded, report))
+
+        report = reindex(kb, knowledge_dir, **options)
+        rows.append(("sem alteração", report.total_seconds, report.embedded, report))
+
+        changed = knowledge_dir / "catalog_groups" / "ca_50.txt"
+        changed.write_text(changed.read_text(encoding="utf-8") + "\nNova bitola: 32mm.", encoding="utf-8")
+        report = reindex(kb, knowledge_dir, **options)
+        rows.append(("1 arquivo alterado", report.total_seconds, report.embedded, report))
+
+    print(f"{report.files} arquivos, {report.chunks} trechos; lote {args.lote}, {args.threads} threads, "
+          f"{args.processos} processos; embedder {'FastEmbed' if args.real else 'simulado'}\n")
+    print(f"{'cenário':<30} {'total':>8} {'embeddings':>10} {'hash':>7} {'leitura':>8} {'embed':>7} {'gravação':>9}")
+    for name, seconds, embedded, r in rows:
+        stages = (f"{r.scan_seconds:>6.2f}s {r.parse_seconds:>7.2f}s {r.embed_seconds:>6.2f}s {r.write_seconds:>8.2f}s"
+                  if r else f"{'':>7} {'':>8} {'':>7} {'':>9}")
+        print(f"{name:<30} {seconds:>7.2f}s {embedded:>10} {stages}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Benchmark dos caches da busca na knowledge base (src/retrieval_cache.py).
+
+Indexa knowledge/catalog_groups/*.txt numa tabela LanceDB temporária e
+reproduz um tráfego realista de consultas (poucas consultas muito frequentes,
+cauda longa de variações) contra:
+  - sem cache: LanceDb + embedder direto (comportamento anterior)
+  - com cache: CachedLanceDb + QueryCachedEmbedder
+
+O modelo FastEmbed é substituído por um embedder determinístico com latência
+fixa (--embed-latency), medida típica do MiniLM multilingue em CPU, para o
+benchmark rodar sem baixar o modelo. A busca híbrida no LanceDB é real.
+
+Executar:
+    python benchmarks/bench_retrieval_cache.py [--queries 2000] [--embed-latency 0.008]
+"""
+import argparse
+import hashlib
+import random
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+sys.path.insert(0, ".")
+
+# Consultas observadas no WhatsApp, da mais para a menos frequente
+QUERIES = [
+    "vergalhão 10mm",
+    "telha galvanizada",
+    "metalon",
+    "Vergalhão 8mm",
+    "ferro de construção",
+    "tela soldada",
+    "metalon 20x20",
+    "treliça para laje",
+    "chapa galvanizada",
+    "arame recozido",
+    "cantoneira",
+    "perfil u enrijecido",
+    "tubo galvanizado",
+    "vergalhão CA-60 5mm",
+    "bobina slitter",
+    "tela coluna",
+    "barra chata",
+    "perfil W",
+    "chapa A-36",
+    "tarugo",
+]
+
+
+def _replay_trace(n: int, seed: int = 42) -> list[str]:
+    """Distribuição Zipf sobre QUERIES + variações de caixa/espaço."""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(QUERIES))]
+    trace = []
+    for query in rng.choices(QUERIES, weights=weights, k=n):
+        if rng.random() < 0.3:
+            query = f"  {query.upper()} "
+        trace.append(query)
+    return trace
+
+
+def _build_db(cached: bool, uri: str, embed_latency: float):
+    from agno.knowledge.document import Document
+    from agno.knowledge.embedder.fastembed import FastEmbedEmbedder
+    from agno.vectordb.lancedb import LanceDb, SearchType
+    from src.retrieval_cache import CachedLanceDb, QueryCachedEmbedder
+
+    @dataclass
+    class SyntheticFastEmbed(FastEmbedEmbedder):
+        """FastEmbed com o ONNX trocado por hash + latência fixa."""
+        latency: float = 0.0
+
+        def get_embedding(self, text):
+            time.sleep(self.latency)
+            digest = hashlib.sha256(text.encode()).digest()
+            return [digest[i % len(digest)] / 255 for i in range(self.dimensions)]
+
+        def get_embedding_and_usage(self, text):
+            return self.get_embedding(text), None
+
+    @dataclass
+    class CachedSyntheticFastEmbed(QueryCachedEmbedder, SyntheticFastEmbed):
+        pass
+
+    if cached:
+        embedder = CachedSyntheticFastEmbed(dimensions=384, latency=embed_latency)
+        db_class = CachedLanceDb
+    else:
+        embedder = SyntheticFastEmbed(dimensions=384, latency=embed_latency)
+        db_class = LanceDb
+    db = db_class(
+        table_name="bench", uri=uri, search_type=SearchType.hybrid,
+        embedder=embedder, use_tantivy=False,
+    )
+
+    db.create()
+    docs = []
+    for path in sorted(Path("knowledge/catalog_groups").glob("*.txt")):
+        for i, chunk in enumerate(path.read_text(encoding="utf-8").split("\n\n")):
+            if chunk.strip():
+                docs.append(Document(name=f"{path.stem}-{i}", content=chunk))
+    saved_latency, embedder.latency = embedder.latency, 0  # indexação fora da medição
+    db.insert("bench", docs)
+    embedder.latency = saved_latency
+    return db, len(docs)
+
+
+def _run(cached: bool, trace: list[str], embed_latency: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db, n_docs = _build_db(cached, str(Path(tmp) / "lancedb"), embed_latency)
+        db.search("aquecimento", limit=5)  # cria o índice FTS fora da medição
+        if cached:
+            db.search_cache.clear()
+
+        latencies = []
+        for query in trace:
+            start = time.perf_counter()
+            db.search(query, limit=5)
+            latencies.append(time.perf_counter() - start)
+
+        result = {
+            "docs": n_docs,
+            "p50_ms": statistics.median(latencies) * 1000,
+            "p95_ms": statistics.quantiles(latencies, n=20)[18] * 1000,
+            "total_s": sum(latencies),
+        }
+        if cached:
+            result["embed_hit_rate"] = db.embedder.query_cache.stats.hit_rate
+            result["search_hit_rate"] = db.search_cache.stats.hit_rate
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay de consultas com e sem cache de busca")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--embed-latency", type=float, default=0.008)
+    args = parser.parse_args()
+
+    from agno.utils.log import set_log_level_to_warning
+    set_log_level_to_warning()
+
+    trace = _replay_trace(args.queries)
+    uncached = _run(False, trace, args.embed_latency)
+    cached = _run(True, trace, args.embed_latency)
+
+    print(f"{len(trace)} consultas ({len(set(trace))} textos distintos), {uncached['docs']} chunks indexados\n")
+    print(f"{'modo':<10} {'p50':>9} {'p95':>9} {'total':>9} {'hit emb':>8} {'hit busca':>10}")
+    for name, r in (("sem cache", uncached), ("com cache", cached)):
+        print(
+            f"{name:<10} {r['p50_ms']:>6.2f} ms {r['p95_ms']:>6.2f} ms {r['total_s']:>7.2f} s "
+            f"{r.get('embed_hit_rate', 0):>7.1%} {r.get('search_hit_rate', 0):>9.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark do pré-roteador determinístico (src/router.py).
+
+Reproduz um conjunto de conversas gravadas contra o /chat com um modelo falso
+de latência fixa, primeiro só com o coordenador (FAST_PATH_ROUTER desligado)
+e depois com o pré-roteador, e reporta chamadas de modelo por turno e
+latência p50/p95 por turno.
+
+O modelo falso imita o coordenador real: delega ao membro via tool call e
+redige a resposta final (3 chamadas por turno no caminho do coordenador).
+
+Executar:
+    python benchmarks/bench_router.py [--model-latency 0.2]
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ".")
+
+# Conversas gravadas: (mensagem do cliente, LeadData enviado pelo gateway naquele turno)
+_BASE = {"name": "Carlos Souza", "state": "CE"}
+CONVERSATIONS = [
+    [
+        ("Oi, bom dia", {}),
+        ("Me chamo Carlos Souza", {}),
+        ("Sou de Fortaleza, CE", {"name": "Carlos Souza"}),
+        ("meu whatsapp é 85 99999-8888", {**_BASE, "city": "Fortaleza"}),
+        ("c.souza@construtora.com.br", {**_BASE, "city": "Fortaleza", "whatsapp": "85999998888"}),
+        ("CNPJ 12.345.678/0001-95", {**_BASE, "city": "Fortaleza", "whatsapp": "85999998888", "email": "c.souza@construtora.com.br"}),
+        ("preciso de vergalhão 10mm", {**_BASE, "city": "Fortaleza", "whatsapp": "85999998888", "email": "c.souza@construtora.com.br", "cnpj": "12345678000195"}),
+        ("uns 5 toneladas", {**_BASE, "city": "Fortaleza", "whatsapp": "85999998888", "email": "c.souza@construtora.com.br", "cnpj": "12345678000195", "product_interest": "vergalhão"}),
+        ("pode fechar", {**_BASE, "city": "Fortaleza", "whatsapp": "85999998888", "email": "c.souza@construtora.com.br", "cnpj": "12345678000195", "product_interest": "vergalhão", "volume_estimate": "5 toneladas"}),
+    ],
+    [
+        ("quero metalon", {}),
+        ("quero falar com um atendente", {}),
+    ],
+    [
+        ("Boa tarde", {}),
+        ("Ana, Recife PE", {}),
+        ("ana@serralheria.com e 81 98888-7777", {"name": "Ana", "state": "PE", "city": "Recife"}),
+        ("cnpj 11.222.333/0001-81", {"name": "Ana", "state": "PE", "city": "Recife", "email": "ana@serralheria.com", "whatsapp": "81988887777"}),
+        ("tubo quadrado 30x30, 2 toneladas", {"name": "Ana", "state": "PE", "city": "Recife", "email": "ana@serralheria.com", "whatsapp": "81988887777", "cnpj": "11222333000181"}),
+        ("isso mesmo", {"name": "Ana", "state": "PE", "city": "Recife", "email": "ana@serralheria.com", "whatsapp": "81988887777", "cnpj": "11222333000181", "product_interest": "tubo quadrado", "volume_estimate": "2 toneladas"}),
+        ("me passa para o gerente", {"name": "Ana", "state": "PE", "city": "Recife", "email": "ana@serralheria.com", "whatsapp": "81988887777", "cnpj": "11222333000181", "product_interest": "tubo quadrado", "volume_estimate": "2 toneladas"}),
+    ],
+]
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run(fast_path: bool, model_latency: float) -> dict:
+    from fastapi.testclient import TestClient
+    from agno.db.sqlite import SqliteDb
+    import src.api as api
+    from src.orchestrator import create_steel_sales_team
+    from tests.fake_model import FakeModel, delegating_reply, use_fake_model
+
+    model = FakeModel(reply=delegating_reply(), delay=model_latency)
+    use_fake_model(model)
+    team = create_steel_sales_team()
+    team.db = SqliteDb(db_file=tempfile.mktemp(suffix=".db"))
+    api.get_team = lambda: team
+    api.FAST_PATH_ROUTER = fast_path
+    client = TestClient(api.app)
+
+    latencies, calls_per_turn = [], []
+    for i, conversation in enumerate(CONVERSATIONS):
+        session_id = f"bench-{'fast' if fast_path else 'coord'}-{i}"
+        for message, lead in conversation:
+            before = len(model.calls)
+            start = time.perf_counter()
+            resp = client.post("/chat", json={
+                "session_id": session_id,
+                "message": message,
+                "lead_data": {"session_id": session_id, **lead},
+            })
+            latencies.append(time.perf_counter() - start)
+            resp.raise_for_status()
+            calls_per_turn.append(len(model.calls) - before)
+
+    return {
+        "mode": "pre-router" if fast_path else "coordinator",
+        "turns": len(latencies),
+        "model_calls": sum(calls_per_turn),
+        "model_calls_per_turn": round(statistics.mean(calls_per_turn), 2),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pré-roteador")
+    parser.add_argument("--model-latency", type=float, default=0.2, help="Latência simulada por chamada de modelo (s)")
+    args = parser.parse_args()
+
+    results = [run(False, args.model_latency), run(True, args.model_latency)]
+    print(f"{'modo':<12} {'turnos':>6} {'chamadas':>9} {'chamadas/turno':>15} {'p50':>9} {'p95':>9}")
+    for r in results:
+        print(
+            f"{r['mode']:<12} {r['turns']:>6} {r['model_calls']:>9} {r['model_calls_per_turn']:>15} "
+            f"{r['p50_ms']:>6.1f} ms {r['p95_ms']:>6.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark do índice de SKUs (src/data/sku_index.py).
+
+Gera um catálogo sintético no formato da planilha (--skus linhas), grava o
+índice Arrow e mede:
+  - abertura por memory-map + montagem do índice de tokens
+  - buscar(): descrição popular → SKU + kg/un
+  - por_sap(): código SAP → SKU
+  - filtrar(): grupo + espessura (pyarrow.compute)
+
+Executar:
+    python benchmarks/bench_sku_lookup.py [--skus 20000]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, ".")
+
+_POLEGADAS = ['1/2"', '3/4"', '1"', '1 1/4"', '1 1/2"', '2"']
+_ESPESSURAS = ["0,75", "0,90", "1,20", "1,50", "2,00", "2,65"]
+
+
+def _linhas(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    for i in range(n):
+        tipo = i % 3
+        if tipo == 0:
+            pol, esp = rng.choice(_POLEGADAS), rng.choice(_ESPESSURAS)
+            desc, grupo = f"TUBO IND. {pol} {esp}mm LF {rng.choice([6000, 6480])}mm", "Tubo"
+        elif tipo == 1:
+            bitola = rng.choice(["6,3", "8,0", "10,0", "12,5", "16,0"])
+            desc, grupo = f"VERGALHAO CA50 {bitola}mm RETO {rng.choice([6, 12])}m", "CA-50"
+        else:
+            esp = rng.choice(_ESPESSURAS)
+            desc, grupo = f"CH PLANA {esp}mm GA 3000mm X {rng.choice([1000, 1200])}mm", "Chapa Plana"
+        yield {
+            "sap": 100000 + i, "descricao": f"{desc} #{i}", "grupo": grupo, "subgrupo": "",
+            "peso": f"{rng.uniform(1, 80):.2f}", "largura": None, "comprimento": "6000mm",
+        }
+
+
+def _tempo_medio(fn, repeticoes: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeticoes):
+        fn()
+    return (time.perf_counter() - start) / repeticoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latência do índice de SKUs")
+    parser.add_argument("--skus", type=int, default=20000)
+    parser.add_argument("--repeticoes", type=int, default=2000)
+    args = parser.parse_args()
+
+    from src.data.sku_index import SkuIndex, escrever_indice
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = str(Path(tmp) / "sku_index.arrow")
+        escrever_indice(_linhas(args.skus), caminho)
+        tamanho = Path(caminho).stat().st_size
+
+        start = time.perf_counter()
+        indice = SkuIndex.abrir(caminho)
+        abertura = time.perf_counter() - start
+
+        consulta = "tubo ind 1 1/4 1,20mm lf 6480mm #12"
+        casos = [
+            ("buscar (descrição)", lambda: indice.buscar(consulta)),
+            ("por_sap", lambda: indice.por_sap(100012)),
+            ("filtrar (grupo+esp.)", lambda: indice.filtrar(grupo="Tubo", espessura_mm=1.2)),
+        ]
+
+        print(f"{args.skus} SKUs, arquivo {tamanho / 1024:.0f} KB, abertura {abertura * 1000:.1f} ms\n")
+        print(f"{'operação':<22} {'média':>10}")
+        for nome, fn in casos:
+            print(f"{nome:<22} {_tempo_medio(fn, args.repeticoes) * 1e6:>7.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
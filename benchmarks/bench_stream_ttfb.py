@@ -0,0 +1,80 @@
+"""
+Benchmark de time-to-first-byte: /chat vs. /chat/stream.
+
+Sobe a API num uvicorn local com um modelo falso (latência fixa por chamada,
+coordenador que delega a um membro) e mede, para cada endpoint:
+  - TTFB: tempo até o primeiro byte do corpo da resposta
+  - total: tempo até a resposta completa
+
+Executar:
+    python benchmarks/bench_stream_ttfb.py [--model-latency 0.5] [--requests 10]
+"""
+import argparse
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, ".")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(model_latency: float) -> str:
+    import uvicorn
+    from agno.db.sqlite import SqliteDb
+    import src.api as api
+    from src.orchestrator import create_steel_sales_team
+    from tests.fake_model import FakeModel, delegating_reply, use_fake_model
+
+    use_fake_model(FakeModel(reply=delegating_reply(), delay=model_latency))
+    team = create_steel_sales_team()
+    team.db = SqliteDb(db_file=tempfile.mktemp(suffix=".db"))
+    api.get_team = lambda: team
+    api.FAST_PATH_ROUTER = False  # mede o caminho completo do coordenador
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def _measure(client, path: str, session_id: str) -> tuple[float, float]:
+    start = time.perf_counter()
+    with client.stream("POST", path, json={"session_id": session_id, "message": "quero vergalhão"}) as resp:
+        resp.raise_for_status()
+        ttfb = None
+        for _ in resp.iter_raw():
+            if ttfb is None:
+                ttfb = time.perf_counter() - start
+    return ttfb, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTFB de /chat vs /chat/stream")
+    parser.add_argument("--model-latency", type=float, default=0.5)
+    parser.add_argument("--requests", type=int, default=10)
+    args = parser.parse_args()
+
+    import httpx
+
+    base_url = _start_server(args.model_latency)
+    with httpx.Client(base_url=base_url, timeout=60) as client:
+        print(f"{'endpoint':<14} {'TTFB p50':>10} {'total p50':>10}")
+        for path in ("/chat", "/chat/stream"):
+            samples = [_measure(client, path, f"ttfb-{path}-{i}") for i in range(args.requests)]
+            ttfb = statistics.median(s[0] for s in samples)
+            total = statistics.median(s[1] for s in samples)
+            print(f"{path:<14} {ttfb * 1000:>7.0f} ms {total * 1000:>7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,15 +4,31 @@ Script para indexar documentos PDF na knowledge base.
 Executar uma vez (ou quando os PDFs mudarem):
     python scripts/build_knowledge.py
 
-Para recriar do zero (apagar e reindexar):
+Só arquivos alterados desde a última execução são relidos, e só os trechos
+novos recebem embedding (manifesto de hashes em data/lancedb/). O resultado
+vai para uma versão nova da tabela, publicada por troca atômica de ponteiro:
+pode rodar com a API no ar, que passa para a versão nova sem reiniciar.
+
+Voltar para a versão anterior (guardada por KNOWLEDGE_KEEP_VERSIONS):
+    python scripts/build_knowledge.py --rollback
+
+Para recriar do zero (versão nova reindexada do zero):
     python scripts/build_knowledge.py --recreate
+
+Paralelismo (padrões de KNOWLEDGE_PARSE_WORKERS, EMBEDDING_BATCH_SIZE e EMBEDDING_THREADS):
+    python scripts/build_knowledge.py --processos 4 --lote 64 --threads 2
+
+Build de imagem (ninguém consultando: só a versão nova fica no disco):
+    python scripts/build_knowledge.py --manter-versoes 0 --carencia 0
 """
 import sys
 import argparse
 
 sys.path.insert(0, ".")
 
-from src.knowledge_builder import load_knowledge_base
+from src.config import VECTOR_DB_PATH
+from src.knowledge_builder import KNOWLEDGE_TABLE, load_knowledge_base
+from src.knowledge_versions import rollback
 
 
 def main():
@@ -25,15 +41,35 @@ def main():
         default=False,
         help="Recriar a tabela do vector DB do zero (reindexar tudo)",
     )
+    parser.add_argument("--processos", type=int, help="processos para ler os arquivos alterados")
+    parser.add_argument("--lote", type=int, help="trechos por chamada do embedder")
+    parser.add_argument("--threads", type=int, help="lotes de embedding em paralelo")
+    parser.add_argument("--manter-versoes", type=int, help="versões anteriores guardadas para rollback")
+    parser.add_argument("--carencia", type=float, help="segundos até apagar uma versão aposentada")
+    parser.add_argument("--rollback", action="store_true", help="republica a versão anterior e sai")
     args = parser.parse_args()
 
+    if args.rollback:
+        try:
+            print(f"Versão publicada: {rollback(VECTOR_DB_PATH, KNOWLEDGE_TABLE)}")
+        except LookupError as e:
+            print(f"ERRO: {e}")
+            sys.exit(1)
+        return
+
     print("=" * 60)
     print("Iniciando indexacao da knowledge base...")
-    print(f"Modo: {'RECRIAR (drop + reindex)' if args.recreate else 'INCREMENTAL (skip se existir)'}")
+    print(f"Modo: {'RECRIAR (versão nova do zero)' if args.recreate else 'INCREMENTAL (só arquivos alterados)'}")
     print("=" * 60)
 
     try:
-        kb = load_knowledge_base(recreate=args.recreate)
+        kb = load_knowledge_base(
+            recreate=args.recreate, parse_workers=args.processos, batch_size=args.lote, threads=args.threads,
+            keep_versions=args.manter_versoes, grace=args.carencia,
+        )
+        # Sem arquivo alterado o embedder nem é usado: carrega o modelo mesmo
+        # assim, para ele ficar no cache (na imagem Docker, sem download no cold start)
+        kb.vector_db.embedder.client
         print("\n" + "=" * 60)
         print("Knowledge base criada com sucesso!")
         print("Embedder: FastEmbed (paraphrase-multilingual-MiniLM-L12-v2)")
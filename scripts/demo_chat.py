@@ -4,8 +4,10 @@ Demo interativo do sistema de agentes.
 Simula uma conversa de WhatsApp com o atendente IA.
 """
 import sys
+import uuid
 sys.path.insert(0, '.')
 
+from src.models import TurnResult
 from src.orchestrator import create_steel_sales_team
 
 
@@ -17,6 +19,7 @@ def main():
     print("Digite 'sair' para encerrar\n")
 
     team = create_steel_sales_team()
+    session_id = f"demo-{uuid.uuid4().hex[:8]}"
 
     print("Agente: Olá! Bem-vindo à Aço Cearense, sua distribuidora de aço no Nordeste. Como posso ajudá-lo hoje?\n")
 
@@ -32,9 +35,12 @@ def main():
             break
 
         try:
-            response = team.run(user_input)
+            response = team.run(user_input, session_id=session_id)
             content = response.content if hasattr(response, 'content') else str(response)
-            print(f"\nAgente: {content}\n")
+            if isinstance(content, TurnResult):
+                print(f"\nAgente: {content.message}\n[{content.classification.value} → {content.next_action.value}]\n")
+            else:
+                print(f"\nAgente: {content}\n")
             print("-" * 40)
         except Exception as e:
             print(f"\nErro: {e}\n")
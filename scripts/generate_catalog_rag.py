@@ -3,6 +3,7 @@ Gera arquivos .txt por grupo de produto para indexação no RAG.
 
 Fonte: produtos_informações_sem_inox.xlsx
 Saída: knowledge/catalog_groups/<grupo>.txt (22 arquivos)
+       knowledge/sku_index.arrow (índice colunar com todos os SKUs — src/data/sku_index.py)
 
 Executar:
     python scripts/generate_catalog_rag.py --source /caminho/para/planilha.xlsx
@@ -11,6 +12,10 @@ import sys
 import argparse
 from pathlib import Path
 
+sys.path.insert(0, ".")
+
+from src.data.sku_index import escrever_indice
+
 # Índices das colunas na planilha produtos_informações_sem_inox.xlsx
 _COL_SAP = 1
 _COL_DESC = 3
@@ -150,7 +155,11 @@ def slugify(nome: str) -> str:
     )
 
 
-def gerar_catalogo(source_path: str, output_dir: str = "knowledge/catalog_groups"):
+def gerar_catalogo(
+    source_path: str,
+    output_dir: str = "knowledge/catalog_groups",
+    index_path: str = "knowledge/sku_index.arrow",
+):
     try:
         import openpyxl
     except ImportError:
@@ -164,13 +173,25 @@ def gerar_catalogo(source_path: str, output_dir: str = "knowledge/catalog_groups
     wb = openpyxl.load_workbook(source_path)
     ws = wb.active
 
-    # Coletar produtos por grupo
+    # Coletar produtos por grupo (exemplos para o RAG) e todos os SKUs (índice)
     grupos: dict = {}
+    skus: list = []
     for row in ws.iter_rows(min_row=2, values_only=True):
         grupo = row[_COL_GRUPO]
         if not grupo:
             continue
 
+        if row[_COL_SAP] and row[_COL_DESC]:
+            skus.append({
+                "sap": row[_COL_SAP],
+                "descricao": row[_COL_DESC],
+                "grupo": grupo,
+                "subgrupo": row[_COL_SUBGRUPO],
+                "peso": row[_COL_PESO],
+                "largura": row[_COL_LARGURA],
+                "comprimento": row[_COL_COMPRIMENTO],
+            })
+
         if grupo not in grupos:
             grupos[grupo] = {"subgrupos": {}, "exemplos": []}
 
@@ -241,6 +262,9 @@ def gerar_catalogo(source_path: str, output_dir: str = "knowledge/catalog_groups
 
     print(f"\nTotal de arquivos gerados: {len(grupos)} em {output}/")
 
+    total = escrever_indice(skus, index_path)
+    print(f"Índice de SKUs: {total} produtos em {index_path}")
+
 
 def main():
     parser = argparse.ArgumentParser(description="Gera arquivos .txt do catálogo por grupo para RAG")
@@ -254,8 +278,13 @@ def main():
         default="knowledge/catalog_groups",
         help="Diretório de saída dos arquivos .txt",
     )
+    parser.add_argument(
+        "--index-output",
+        default="knowledge/sku_index.arrow",
+        help="Arquivo do índice colunar de SKUs",
+    )
     args = parser.parse_args()
-    gerar_catalogo(args.source, args.output)
+    gerar_catalogo(args.source, args.output, args.index_output)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,106 @@
+"""
+Traces de carga a partir das conversas reais (src/session_traces.py).
+
+Extrair as conversas de data/agent_sessions.db, anonimizadas, para um JSONL:
+    python scripts/replay_sessions.py extrair [--db data/agent_sessions.db] [--saida data/session_traces.jsonl]
+    python scripts/replay_sessions.py extrair --dividir-linhas   # mensagem com várias linhas vira rajada
+    python scripts/replay_sessions.py extrair --sal "$TRACE_SALT"  # mesmos pseudônimos entre extrações
+
+Sem --sal, cada extração usa um sal aleatório (não gravado): os pseudônimos
+não se repetem entre extrações e não dá para refazer os hashes.
+
+Reproduzir contra a API (10x mais rápido, até 50 conversas simultâneas):
+    python scripts/replay_sessions.py reproduzir data/session_traces.jsonl --url http://localhost:8000 \\
+        --aceleracao 10 --concorrencia 50
+
+Reproduzir contra a API no próprio processo (sem servidor; com
+MODEL_CASSETTE_MODE=replay não chama o provedor):
+    python scripts/replay_sessions.py reproduzir data/session_traces.jsonl --local
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, ".")
+
+from src.session_traces import PiiMasker, extract_traces, read_traces, replay_traces
+
+
+def extrair(args):
+    Path(args.saida).parent.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    with open(args.saida, "w", encoding="utf-8") as out:
+        stats = extract_traces(args.db, out, PiiMasker(args.sal), limit=args.limite,
+                               split_lines=args.dividir_linhas, burst_gap=args.intervalo_rajada)
+    print(f"{stats.sessions} conversas, {stats.messages} mensagens ({stats.skipped} sessões sem mensagem) "
+          f"em {time.perf_counter() - started:.1f}s → {args.saida}")
+
+
+def reproduzir(args):
+    import httpx
+
+    async def main():
+        if args.local:
+            from src.api import app
+            transport = httpx.ASGITransport(app=app)
+            client = httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=None)
+        else:
+            limits = httpx.Limits(max_connections=args.concorrencia * 2)
+            client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits)
+        async with client:
+            return await replay_traces(read_traces(args.traces), client, speedup=args.aceleracao,
+                                       concurrency=args.concorrencia, max_gap=args.pausa_maxima,
+                                       session_prefix=args.prefixo or f"replay-{int(time.time())}")
+
+    summary = asyncio.run(main()).summary()
+    print(f"{'conversas':>9} {'requests':>8} {'req/s':>7} {'ok':>6} {'p50':>9} {'p95':>9} {'p99':>9} "
+          f"{'atraso p95':>10} {'pico':>5}")
+    print(f"{summary['sessions']:>9} {summary['requests']:>8} {summary['throughput_req_s']:>7} {summary['ok']:>6} "
+          f"{summary['p50_ms']:>6.0f} ms {summary['p95_ms']:>6.0f} ms {summary['p99_ms']:>6.0f} ms "
+          f"{summary['start_lag_p95_s']:>9.1f}s {summary['peak_sessions']:>5}")
+    if set(summary["statuses"]) - {"200"}:
+        print("status: " + ", ".join(f"{k}={v}" for k, v in summary["statuses"].items()))
+    if args.saida:
+        params = {"traces": args.traces, "speedup": args.aceleracao, "concurrency": args.concorrencia,
+                  "max_gap_s": args.pausa_maxima, "target": "local" if args.local else args.url}
+        Path(args.saida).write_text(json.dumps({"params": params, "result": summary}, indent=2, ensure_ascii=False),
+                                    encoding="utf-8")
+        print(f"resultado em {args.saida}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extrai e reproduz traces de carga das conversas reais")
+    commands = parser.add_subparsers(dest="comando", required=True)
+
+    ext = commands.add_parser("extrair", help="grava as conversas anonimizadas em JSONL")
+    ext.add_argument("--db", default="data/agent_sessions.db")
+    ext.add_argument("--saida", default="data/session_traces.jsonl")
+    ext.add_argument("--limite", type=int, help="máximo de conversas")
+    ext.add_argument("--sal", help="sal dos pseudônimos (ids de sessão e dados mascarados); padrão: aleatório")
+    ext.add_argument("--dividir-linhas", action="store_true",
+                     help="mensagem com várias linhas vira uma rajada de mensagens")
+    ext.add_argument("--intervalo-rajada", type=float, default=2.0, help="segundos entre as linhas da rajada")
+    ext.set_defaults(func=extrair)
+
+    rep = commands.add_parser("reproduzir", help="dispara os traces contra o /chat")
+    rep.add_argument("traces")
+    rep.add_argument("--url", default="http://localhost:8000")
+    rep.add_argument("--local", action="store_true", help="usa src.api.app no próprio processo")
+    rep.add_argument("--aceleracao", type=float, default=1.0, help="divide os intervalos originais por este fator")
+    rep.add_argument("--concorrencia", type=int, default=20, help="conversas ativas ao mesmo tempo")
+    rep.add_argument("--pausa-maxima", type=float, default=300.0,
+                     help="intervalos maiores que isso (s, antes da aceleração) são encurtados")
+    rep.add_argument("--timeout", type=float, default=120.0)
+    rep.add_argument("--prefixo", help="prefixo dos session_id (padrão: replay-<timestamp>)")
+    rep.add_argument("--saida", help="grava o resumo em JSON")
+    rep.set_defaults(func=reproduzir)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
 """Agente de Transbordo Humanizado."""
+import itertools
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
 from agno.agent import Agent
-from src.config import get_model
+from src.config import get_model, static_prompt
 
 HANDOFF_TRIGGERS = [
     "falar com humano",
@@ -25,7 +29,7 @@ HANDOFF_TRIGGERS = [
     "gerente",
 ]
 
-HUMAN_HANDOFF_INSTRUCTIONS = """
+HUMAN_HANDOFF_INSTRUCTIONS = static_prompt("""
 Você é o Agente de Transbordo da Aço Cearense, distribuidora de produtos de aço do Nordeste com sede em Fortaleza — CE.
 
 Sua única função é informar ao cliente, de forma empática e profissional,
@@ -38,7 +42,109 @@ Gere sempre uma mensagem que:
 4. Deixe o cliente confortável para aguardar
 
 Seja cordial, breve e tranquilizador. Mencione a Aço Cearense pelo nome.
-"""
+""")
+
+
+# Fortaleza não tem horário de verão — UTC-3 fixo
+FORTALEZA_TZ = timezone(timedelta(hours=-3), "America/Fortaleza")
+
+# Horário comercial: dia da semana (0=segunda) → (abertura, fechamento) em horas
+BUSINESS_HOURS = {
+    0: (7, 18),
+    1: (7, 18),
+    2: (7, 18),
+    3: (7, 18),
+    4: (7, 18),
+    5: (7, 12),
+}
+
+HANDOFF_RETURN_MINUTES = 30
+
+# Respostas fixas do transbordo — mesmos fatos das HUMAN_HANDOFF_INSTRUCTIONS, sem chamar o modelo
+HANDOFF_TEMPLATES_IN_HOURS = [
+    (
+        "Obrigado pela paciência! 😊 Estou transferindo você agora para um consultor "
+        "especializado da Aço Cearense. Em até {minutes} minutos ele dará continuidade "
+        "ao seu atendimento por aqui."
+    ),
+    (
+        "Entendido! Já encaminhei sua conversa para um consultor da Aço Cearense. "
+        "Você terá retorno em até {minutes} minutos — fique à vontade para aguardar."
+    ),
+    (
+        "Claro! Um consultor da Aço Cearense vai assumir o seu atendimento. "
+        "O prazo de retorno é de até {minutes} minutos. Agradecemos a paciência! 🙏"
+    ),
+]
+
+HANDOFF_TEMPLATES_OFF_HOURS = [
+    (
+        "Obrigado pela paciência! 😊 Registrei seu pedido para falar com um consultor "
+        "da Aço Cearense. Nosso horário é seg-sex 7h–18h e sáb 7h–12h — um consultor "
+        "entrará em contato {next_slot}."
+    ),
+    (
+        "Entendido! Sua conversa já está na fila do time comercial da Aço Cearense. "
+        "Como estamos fora do horário de atendimento (seg-sex 7h–18h, sáb 7h–12h), "
+        "o retorno será {next_slot}."
+    ),
+    (
+        "Claro! Um consultor da Aço Cearense vai assumir o seu atendimento {next_slot}, "
+        "assim que abrirmos (seg-sex 7h–18h, sáb 7h–12h). Agradecemos a paciência! 🙏"
+    ),
+]
+
+_WEEKDAY_NAMES = [
+    "na segunda-feira", "na terça-feira", "na quarta-feira", "na quinta-feira",
+    "na sexta-feira", "no sábado", "no domingo",
+]
+_template_rotation = itertools.count()
+
+
+def is_business_hours(now: datetime) -> bool:
+    """True se `now` (horário de Fortaleza) está dentro do horário comercial."""
+    hours = BUSINESS_HOURS.get(now.weekday())
+    if hours is None:
+        return False
+    opens, closes = hours
+    return opens <= now.hour < closes
+
+
+def next_business_opening(now: datetime) -> datetime:
+    """Próxima abertura do horário comercial estritamente após `now`."""
+    day = now.replace(minute=0, second=0, microsecond=0)
+    for offset in range(8):
+        candidate = day + timedelta(days=offset)
+        hours = BUSINESS_HOURS.get(candidate.weekday())
+        if hours is None:
+            continue
+        opening = candidate.replace(hour=hours[0])
+        if opening > now:
+            return opening
+    raise RuntimeError("BUSINESS_HOURS sem nenhum dia útil configurado")
+
+
+def _describe_slot(slot: datetime, now: datetime) -> str:
+    if slot.date() == now.date():
+        return f"hoje a partir das {slot.hour}h"
+    if slot.date() == (now + timedelta(days=1)).date():
+        return f"amanhã a partir das {slot.hour}h"
+    return f"{_WEEKDAY_NAMES[slot.weekday()]} a partir das {slot.hour}h"
+
+
+def build_handoff_message(now: Optional[datetime] = None, variant: Optional[int] = None) -> str:
+    """
+    Resposta imediata de transbordo, sem chamada à IA.
+    Dentro do horário comercial promete retorno em até 30 minutos; fora dele,
+    informa o próximo horário disponível. As variações se alternam a cada chamada.
+    """
+    now = (now or datetime.now(FORTALEZA_TZ)).astimezone(FORTALEZA_TZ)
+    index = next(_template_rotation) if variant is None else variant
+    if is_business_hours(now):
+        template = HANDOFF_TEMPLATES_IN_HOURS[index % len(HANDOFF_TEMPLATES_IN_HOURS)]
+        return template.format(minutes=HANDOFF_RETURN_MINUTES)
+    template = HANDOFF_TEMPLATES_OFF_HOURS[index % len(HANDOFF_TEMPLATES_OFF_HOURS)]
+    return template.format(next_slot=_describe_slot(next_business_opening(now), now))
 
 
 def detect_handoff_trigger(message: str) -> dict:
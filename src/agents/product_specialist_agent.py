@@ -1,8 +1,9 @@
 from agno.agent import Agent
-from src.config import get_model
+from src.config import get_model, static_prompt
 from src.knowledge_builder import get_knowledge_base
+from src.catalog_tools import CATALOG_TOOLS
 
-PRODUCT_SPECIALIST_INSTRUCTIONS = """
+PRODUCT_SPECIALIST_INSTRUCTIONS = static_prompt("""
 Você é o Especialista de Produtos da Aço Cearense, distribuidora de aço do Nordeste com sede em Fortaleza — CE.
 
 Sua função é:
@@ -59,6 +60,11 @@ Priorize grupos que costumam ser comprados juntos:
 
 Consulte a knowledge base para detalhar especificações dos produtos sugeridos.
 
+## Código SAP e peso por unidade:
+Quando o cliente já informou bitola/espessura/comprimento, use `buscar_sku` (descrição ou código SAP)
+para confirmar o SKU exato e o kg/un, e `filtrar_skus` para listar variações de um grupo.
+Não estime pesos por unidade — use o valor retornado pela ferramenta.
+
 ## Formato de resposta para identificação de produto:
 
 - **Produto técnico:** [nome técnico exato conforme catálogo Aço Cearense]
@@ -67,7 +73,7 @@ Consulte a knowledge base para detalhar especificações dos produtos sugeridos.
 - **Confirmação sugerida:** "[Frase para confirmar com o cliente]"
 
 Se o produto não estiver no portfólio, informe claramente e oriente sobre o que trabalhamos.
-"""
+""")
 
 
 def create_product_specialist_agent() -> Agent:
@@ -79,5 +85,6 @@ def create_product_specialist_agent() -> Agent:
         instructions=PRODUCT_SPECIALIST_INSTRUCTIONS,
         knowledge=knowledge_base,
         search_knowledge=True,
+        tools=CATALOG_TOOLS,
         markdown=True,
     )
@@ -1,18 +1,24 @@
 from agno.agent import Agent
-from src.config import get_model
+from src.config import get_model, static_prompt
 from src.knowledge_builder import get_knowledge_base
+from src.catalog_tools import CATALOG_TOOLS
 from src.data.weight_rules import PESO_MINIMO_CIF_POR_ESTADO
 
 
 def _build_weight_table() -> str:
-    """Gera a tabela de pesos mínimos formatada para as instruções do agente."""
-    linhas = []
+    """
+    Gera a tabela de pesos mínimos formatada para as instruções do agente.
+
+    Uma linha por faixa de peso ("  1500kg: AL, BA, ...") em vez de uma por UF:
+    mesma informação em ~5 linhas no lugar de 27, no prefixo de toda chamada.
+    """
+    ufs_por_peso: dict[int, list[str]] = {}
     for uf, peso in sorted(PESO_MINIMO_CIF_POR_ESTADO.items()):
-        linhas.append(f"  {uf}: {peso}kg")
-    return "\n".join(linhas)
+        ufs_por_peso.setdefault(peso, []).append(uf)
+    return "\n".join(f"  {peso}kg: {', '.join(ufs)}" for peso, ufs in sorted(ufs_por_peso.items()))
 
 
-QUALIFIER_INSTRUCTIONS = f"""
+QUALIFIER_INSTRUCTIONS = static_prompt(f"""
 Você é o Agente Qualificador de Leads da Aço Cearense, distribuidora de produtos de aço com sede em Fortaleza, Ceará, que atende todo o Brasil.
 
 Nossos clientes são construtoras, serralheiras, revendas e indústrias que compram vergalhões, tubos, chapas, telhas, perfis e arames.
@@ -55,6 +61,7 @@ Quando já existe um orçamento e foi passado ao Closer
      3. Perfis estruturais (U, Enrijecido, W)
      4. Arames industriais ou de amarração
 3. Se o volume atingir o mínimo após sugestões aceitas → classificar como MORNO.
+4. Se o volume vier em unidades/peças/barras, use `buscar_sku` para obter o kg/un do produto e converter para kg.
 
 ## Sugestões de variações de produto:
 Quando o cliente mencionar um produto de forma genérica (ex: "quero vergalhão", "preciso de tubo", "quero telha"), antes de pedir especificações, apresente 3-4 opções disponíveis:
@@ -78,7 +85,7 @@ Apresente-se como inteligência artificial da Aço Cearense e pergunte como pode
 
 Sempre finalize suas respostas indicando o status atual do lead:
 STATUS: [FRIO|MORNO|QUENTE] - [motivo em uma linha]
-"""
+""")
 
 
 def create_qualifier_agent() -> Agent:
@@ -90,5 +97,6 @@ def create_qualifier_agent() -> Agent:
         instructions=QUALIFIER_INSTRUCTIONS,
         knowledge=knowledge_base,
         search_knowledge=True,
+        tools=CATALOG_TOOLS,
         markdown=True,
     )
@@ -1,7 +1,12 @@
+from typing import Optional
+
 from agno.agent import Agent
-from src.config import get_model
+from src.config import get_model, static_prompt
+from src.business_rules import REQUIRED_LEAD_FIELDS, find_missing_fields
+from src.data.product_catalog import resolver_produto
+from src.models import LeadData
 
-QUOTE_GENERATOR_INSTRUCTIONS = """
+QUOTE_GENERATOR_INSTRUCTIONS = static_prompt("""
 Você é o Agente Gerador de Orçamentos da Aço Cearense, distribuidora de produtos de aço do Nordeste com sede em Fortaleza — CE.
 
 Sua função é:
@@ -40,7 +45,7 @@ PRÓXIMOS PASSOS:
 - Sempre use a nomenclatura técnica correta do portfólio da Aço Cearense
 - Verifique se todos os campos obrigatórios estão presentes antes de gerar
 - O resumo é enviado internamente ao time de vendas da Aço Cearense — seja preciso e objetivo
-"""
+""")
 
 
 def create_quote_generator_agent() -> Agent:
@@ -50,3 +55,134 @@ def create_quote_generator_agent() -> Agent:
         instructions=QUOTE_GENERATOR_INSTRUCTIONS,
         markdown=True,
     )
+
+
+# Mesmo resumo de QUOTE_GENERATOR_INSTRUCTIONS, preenchido direto do LeadData (sem LLM)
+QUOTE_TEMPLATE = """═══════════════════════════════════════════
+       AÇO CEARENSE — RESUMO DO PEDIDO
+═══════════════════════════════════════════
+
+DADOS DO CLIENTE:
+• Nome: {nome}
+• CNPJ: {cnpj}
+• Contato: {whatsapp} | {email}
+• Local: {cidade} - {uf}
+• Tipo: {tipo}
+
+PEDIDO:
+• Produto: {produto}
+• Volume: {volume}
+• Urgência: {urgencia}
+
+STATUS: MORNO → Pronto para orçamento da Aço Cearense
+
+PRÓXIMOS PASSOS:
+→ Closer da Aço Cearense deve entrar em contato em até 2h
+→ Apresentar tabela de preços atualizada
+→ Confirmar disponibilidade em estoque no CD de Fortaleza
+
+═══════════════════════════════════════════"""
+
+# O resumo acima é interno (vai ao time comercial); o cliente recebe só esta confirmação
+QUOTE_CONFIRMATION = (
+    "Perfeito, {nome}! Seu pedido de {produto} ({volume}) foi encaminhado ao time comercial "
+    "da Aço Cearense. Um consultor vai falar com você pelo WhatsApp {whatsapp} em até 2h "
+    "com o orçamento e a disponibilidade em estoque."
+)
+
+PRODUCT_NORMALIZER_INSTRUCTIONS = """
+Você converte a descrição de produto informada por um cliente da Aço Cearense
+para a nomenclatura técnica do catálogo (ex: "ferro de laje" → "Vergalhão CA-50").
+Responda APENAS com o nome técnico do produto, em uma linha, sem comentários.
+"""
+
+
+class IncompleteLeadError(ValueError):
+    """Lead sem todos os campos obrigatórios para gerar o resumo de orçamento."""
+
+    def __init__(self, missing: list[str]):
+        labels = ", ".join(REQUIRED_LEAD_FIELDS[f] for f in missing)
+        super().__init__(f"Dados obrigatórios faltando para o orçamento: {labels}")
+        self.missing = missing
+
+
+def resolve_technical_product(lead: LeadData) -> Optional[str]:
+    """
+    Nome técnico do produto conforme o catálogo, sem LLM.
+    Usa technical_product se já identificado; senão resolve product_interest
+    pelo dicionário de termos populares. Retorna None se não reconhecer.
+    """
+    if lead.technical_product:
+        return lead.technical_product
+    resolved = resolver_produto(lead.product_interest)
+    if resolved is None:
+        return None
+    _, nome_tecnico = resolved
+    return f"{nome_tecnico} — {lead.product_interest}"
+
+
+def render_quote(lead: LeadData, technical_product: Optional[str] = None) -> str:
+    """
+    Renderiza o resumo de orçamento de forma determinística.
+
+    Raises:
+        IncompleteLeadError: se faltar algum campo obrigatório.
+        ValueError: se o produto não puder ser resolvido no catálogo e
+            `technical_product` não for informado.
+    """
+    missing = find_missing_fields(lead)
+    if missing:
+        raise IncompleteLeadError(missing)
+
+    produto = technical_product or resolve_technical_product(lead)
+    if not produto:
+        raise ValueError(f"Produto '{lead.product_interest}' não reconhecido no catálogo.")
+
+    return QUOTE_TEMPLATE.format(
+        nome=lead.name,
+        cnpj=lead.cnpj,
+        whatsapp=lead.whatsapp,
+        email=lead.email,
+        cidade=lead.city,
+        uf=lead.state.upper(),
+        tipo=lead.client_type.value if lead.client_type else "não informado",
+        produto=produto,
+        volume=lead.volume_estimate,
+        urgencia=lead.urgency or "não informada",
+    )
+
+
+def render_quote_confirmation(lead: LeadData) -> str:
+    """Mensagem ao cliente quando o resumo do pedido segue para o time comercial."""
+    return QUOTE_CONFIRMATION.format(
+        nome=lead.name,
+        produto=lead.product_interest or lead.technical_product,
+        volume=lead.volume_estimate,
+        whatsapp=lead.whatsapp,
+    )
+
+
+def generate_quote(lead: LeadData, normalizer: Optional[Agent] = None) -> str:
+    """
+    Gera o resumo de orçamento. Só chama o LLM quando o produto é texto livre
+    que o catálogo não reconhece — e apenas para normalizar o nome do produto.
+    """
+    missing = find_missing_fields(lead)
+    if missing:
+        raise IncompleteLeadError(missing)
+
+    produto = resolve_technical_product(lead)
+    if produto is None:
+        normalizer = normalizer or create_product_normalizer_agent()
+        response = normalizer.run(lead.product_interest)
+        produto = str(response.content if hasattr(response, "content") else response).strip()
+    return render_quote(lead, technical_product=produto)
+
+
+def create_product_normalizer_agent() -> Agent:
+    """Agente mínimo que só normaliza o nome do produto (fallback do render_quote)."""
+    return Agent(
+        name="Normalizador de Produto",
+        model=get_model(),
+        instructions=PRODUCT_NORMALIZER_INSTRUCTIONS,
+    )
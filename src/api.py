@@ -1,10 +1,100 @@
+import asyncio
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
 from fastapi import FastAPI, HTTPException
-from src.models import IncomingMessage, AgentResponse, LeadClassification, LeadData
-from src.orchestrator import create_steel_sales_team
-from src.business_rules import check_auto_disqualification, calculate_score
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from src.models import IncomingMessage, AgentResponse, LeadClassification, LeadData, NextAction, TurnResult
+from src.orchestrator import SESSION_DB_FILE, create_steel_sales_team
+from src.business_rules import check_auto_disqualification, calculate_score, find_missing_fields
 from src.followup_scheduler import FollowUpManager
+from src.followup_dispatcher import FollowUpDispatcher, LogSender
+from src.crm_sync import CRMSyncQueue, SalesforceCompositeTransport
+from src.crm_http import get_crm_http_client
+from src.turn_pool import TurnPool, TurnPoolFull
+from src.session_locks import SessionLocks
+from src.router import route_turn, build_context_block, get_member, QUOTE_GENERATOR
+from src.agents.quote_generator_agent import (
+    generate_quote,
+    render_quote,
+    render_quote_confirmation,
+    resolve_technical_product,
+)
+from src.agents.human_handoff_agent import detect_handoff_trigger, build_handoff_message
+from src.handoff_queue import HandoffQueue
+from src.streaming import format_sse, run_streaming_turn, run_blocking_turn, DONE, FAILED
+from src.knowledge_builder import knowledge_table, retrieval_cache_stats
+from src.volume_resolver import resolve_volume
+from src.lead_extractor import apply_extracted_fields, extract_lead_fields
+from src.turn_result import apply_lead_updates, parse_turn_result
+from src.prompt_cache import prompt_cache_stats, record_run
+from src.model_cassette import cassette_stats
+from src.history_compactor import ConversationHistory, HistoryCompactor
+from src.metrics import METRICS, REQUEST_SECONDS, TimedSqliteDb, count_turn, observe_stage, stage_timer, timed_turn
+from src.session_store import SessionStore, StoredSession
+from src.burst_coalescer import MERGED_ACTION, Burst, BurstCoalescer
+from src.config import (
+    MAX_CONCURRENT_TURNS,
+    MAX_QUEUED_TURNS,
+    TURN_RETRY_AFTER_SECONDS,
+    FAST_PATH_ROUTER,
+    HISTORY_COMPACTION,
+    HISTORY_RAW_TURNS,
+    HISTORY_TOKEN_BUDGET,
+    BURST_WINDOW_SECONDS,
+    BURST_MAX_WAIT_SECONDS,
+    HANDOFF_DB_PATH,
+    FOLLOWUP_DB_PATH,
+    FOLLOWUP_DISPATCH,
+    CRM_SYNC,
+    CRM_SYNC_JOURNAL_PATH,
+    METRICS_ENABLED,
+    MODEL_CASSETTE_MODE,
+)
 
-_followup_manager = FollowUpManager(dry_run=True)  # dry_run=False em produção com APScheduler
+# Follow-ups persistidos em SQLite; pendentes sobrevivem a restart/redeploy.
+# Os vencidos saem pelo dispatcher (espalhamento, limite de taxa, retry), que
+# confirma a entrega ao manager: só então a tentativa é gravada.
+_followup_dispatcher = FollowUpDispatcher(sender=LogSender(), dry_run=not FOLLOWUP_DISPATCH)
+_followup_manager = FollowUpManager(
+    dry_run=not FOLLOWUP_DISPATCH, db_path=FOLLOWUP_DB_PATH, sender=_followup_dispatcher.submit,
+    confirm_delivery=True,
+)
+_followup_dispatcher.on_delivered = _followup_manager.mark_delivered
+_followup_dispatcher.on_failed = _followup_manager.mark_failed
+
+# Status/score do lead vão ao CRM em segundo plano, em lotes (o /chat não espera o Salesforce)
+_crm_sync = CRMSyncQueue(
+    SalesforceCompositeTransport(http=get_crm_http_client()), journal_path=CRM_SYNC_JOURNAL_PATH
+) if CRM_SYNC else None
+
+# team.run é síncrono — roda em threads dedicadas para não congelar o event loop
+_turn_pool = TurnPool(
+    max_concurrent=MAX_CONCURRENT_TURNS,
+    max_queued=MAX_QUEUED_TURNS,
+    retry_after=TURN_RETRY_AFTER_SECONDS,
+)
+
+METRICS.callback("turn_pool_in_flight", "Turnos executando no TurnPool", "gauge",
+                 lambda: {(): _turn_pool.in_flight})
+METRICS.callback("turn_pool_queued", "Turnos aguardando thread no TurnPool", "gauge",
+                 lambda: {(): _turn_pool.queued})
+
+# Mensagens da mesma sessão são processadas em ordem; sessões diferentes em paralelo
+_session_locks = SessionLocks()
+
+# Conversas aguardando consultor humano (SQLite: sobrevivem a restart e valem para todos os workers)
+_handoff_queue = HandoffQueue(db_path=HANDOFF_DB_PATH)
+
+# Último LeadData e histórico compactado (últimos turnos + resumo) de cada sessão,
+# no session_state da sessão do Team: sobrevivem a restart e valem para todos os workers
+_session_store = SessionStore(TimedSqliteDb(db_file=SESSION_DB_FILE))
+_history_compactor = HistoryCompactor(raw_turns=HISTORY_RAW_TURNS, token_budget=HISTORY_TOKEN_BUDGET)
+
+# Rajadas de mensagens da mesma sessão viram um turno só (0 desliga)
+_coalescer = BurstCoalescer(window=BURST_WINDOW_SECONDS, max_wait=BURST_MAX_WAIT_SECONDS)
 
 app = FastAPI(
     title="POC Agno - Agentes de Vendas de Aço",
@@ -18,80 +108,450 @@ _team = None
 def get_team():
     global _team
     if _team is None:
-        _team = create_steel_sales_team()
+        _team = create_steel_sales_team(tool_hooks=[absorb_follow_ups], db=_session_store.db)
     return _team
 
 
-def extract_classification(response_text: str) -> LeadClassification:
-    text_upper = response_text.upper()
-    if "QUENTE" in text_upper:
-        return LeadClassification.QUENTE
-    elif "MORNO" in text_upper:
-        return LeadClassification.MORNO
-    return LeadClassification.FRIO
+def absorb_follow_ups(function_name: str, function_call: Callable, arguments: dict, run_context=None):
+    """
+    Tool hook do Team: antes de o coordenador delegar ao membro, incorpora à
+    tarefa as mensagens que o cliente mandou com o turno já em andamento.
+    """
+    if function_name.startswith("delegate_task_to_member") and run_context is not None:
+        follow_ups = _coalescer.absorb(run_context.session_id)
+        if follow_ups:
+            # Alterado no próprio dict: o Agno relê os argumentos da chamada ao executar a tool
+            task = arguments.get("task") or ""
+            arguments["task"] = f"{task}\n\nMensagens seguintes do cliente: " + "\n".join(follow_ups)
+    return function_call(**arguments)
 
 
 @app.get("/health")
 async def health_check():
-    return {"status": "ok", "service": "POC Agno Steel Agents"}
+    return {
+        "status": "ok",
+        "service": "POC Agno Steel Agents",
+        "knowledge_cache": retrieval_cache_stats(),
+        "knowledge_table": knowledge_table(),
+        "prompt_cache": prompt_cache_stats(),
+        "model_cassette": cassette_stats() if MODEL_CASSETTE_MODE != "off" else None,
+        "followup_dispatch": _followup_dispatcher.stats(),
+        "crm_sync": _crm_sync.stats() if _crm_sync else None,
+    }
 
 
-@app.post("/chat", response_model=AgentResponse)
-async def chat(message: IncomingMessage):
-    try:
-        lead_data = message.lead_data or LeadData(session_id=message.session_id)
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Métricas no formato texto do Prometheus (etapas do turno, modelo, busca, SQLite)."""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Métricas desligadas (METRICS_ENABLED=false)")
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
-        # Calcular score antes de chamar o agente
-        lead_data.score = calculate_score(
-            volume_estimate=lead_data.volume_estimate,
-            urgency=lead_data.urgency,
-        )
 
-        # Verificar desqualificação automática (sem chamar IA)
-        disq = check_auto_disqualification(
-            state=lead_data.state,
-            volume_estimate=lead_data.volume_estimate,
-            product=lead_data.technical_product or lead_data.product_interest,
-        )
+@dataclass
+class _TurnPlan:
+    """O que fazer com o turno depois das regras determinísticas (antes de qualquer LLM)."""
+    lead_data: LeadData
+    response: Optional[AgentResponse] = None  # resposta pronta (transbordo, desqualificação)
+    content: Optional[str] = None  # resumo do pedido já renderizado (caminho do orçamento)
+    runner: Optional[Callable[..., Any]] = None
+    run_input: Any = None
+    run_kwargs: dict = field(default_factory=dict)
+    streamable: bool = True
+    path: str = "team"  # caminho do turno, para chat_turns_total
+    user_id: Optional[str] = None
+    history: Optional[ConversationHistory] = None  # histórico compactado lido da sessão
 
-        if disq["disqualified"]:
-            lead_data.disqualified_reason = disq["reason"]
-            lead_data.classification = LeadClassification.FRIO
-            return AgentResponse(
-                session_id=message.session_id,
-                message=disq["reason"],
-                classification=LeadClassification.FRIO,
-                lead_data=lead_data,
-                next_action="disqualified",
-            )
-
-        # Chamar agentes apenas se não desqualificado
-        team = get_team()
-        context = message.message
-        if message.lead_data:
-            context = f"[DADOS DO LEAD: {lead_data.model_dump_json()}]\n\nMensagem do cliente: {message.message}"
 
-        response = team.run(context)
-        content = response.content if hasattr(response, "content") else str(response)
-        classification = extract_classification(content)
+# Caminhos que entregam o orçamento (uma vez por sessão: quote_sent no session_state)
+_QUOTE_PATHS = ("quote_template", "quote_llm")
+
+
+def _update_volume_and_score(lead_data: LeadData):
+    """Converte o volume para kg (kg/un do catálogo) e recalcula o score, sem IA."""
+    product = lead_data.technical_product or lead_data.product_interest
+    if lead_data.volume_estimate:
+        lead_data.volume_kg = resolve_volume(lead_data.volume_estimate, product).total_kg
+    lead_data.score = calculate_score(
+        volume_estimate=lead_data.volume_estimate,
+        urgency=lead_data.urgency,
+        product=product,
+    )
+
+
+def _stored_lead(session: StoredSession) -> Optional[LeadData]:
+    data = session.state.get("lead_data")
+    return LeadData.model_validate(data) if data else None
+
 
-        lead_data.classification = classification
+def _plan_turn(message: IncomingMessage) -> _TurnPlan:
+    # O gateway pode omitir lead_data: vale o último estado conhecido da sessão
+    session = _session_store.load(message.session_id)
+    stored = _stored_lead(session)
+    lead_data = message.lead_data or stored or LeadData(session_id=message.session_id)
+    # Mantém o user_id da sessão: o WhatsApp extraído depois não abre outra sessão no SQLite
+    user_id = session.user_id or message.user_id or lead_data.whatsapp or message.session_id
 
-        return AgentResponse(
+    # CNPJ, e-mail, WhatsApp, UF/cidade, volume e urgência extraídos por regra antes de qualquer modelo
+    extracted = apply_extracted_fields(lead_data, extract_lead_fields(message.message))
+
+    product = lead_data.technical_product or lead_data.product_interest
+    _update_volume_and_score(lead_data)
+
+    # Pedido explícito de humano: resposta fixa imediata + fila do time comercial (sem chamar IA)
+    handoff = detect_handoff_trigger(message.message)
+    if handoff["should_handoff"]:
+        _handoff_queue.enqueue(
+            session_id=message.session_id,
+            message=message.message,
+            reason=handoff["reason"],
+            trigger_found=handoff.get("trigger_found"),
+            lead_snapshot=lead_data.model_dump(mode="json"),
+        )
+        _save_session(message.session_id, user_id, lead_data)
+        _sync_crm(lead_data)
+        return _TurnPlan(lead_data, path="handoff", response=AgentResponse(
             session_id=message.session_id,
-            message=content,
-            classification=classification,
+            message=build_handoff_message(),
+            classification=lead_data.classification,
             lead_data=lead_data,
-            next_action=(
-                "collect_data" if classification == LeadClassification.FRIO else
-                "generate_quote" if classification == LeadClassification.MORNO else
-                "transfer_to_closer"
-            ),
+            next_action="transfer_to_human",
+        ))
+
+    # Verificar desqualificação automática (sem chamar IA)
+    disq = check_auto_disqualification(
+        state=lead_data.state,
+        volume_estimate=lead_data.volume_estimate,
+        product=product,
+    )
+
+    if disq["disqualified"]:
+        lead_data.disqualified_reason = disq["reason"]
+        lead_data.classification = LeadClassification.FRIO
+        _save_session(message.session_id, user_id, lead_data)
+        _sync_crm(lead_data)
+        return _TurnPlan(lead_data, path="disqualified", response=AgentResponse(
+            session_id=message.session_id,
+            message=disq["reason"],
+            classification=LeadClassification.FRIO,
+            lead_data=lead_data,
+            next_action="disqualified",
+        ))
+
+    # Chamar agentes apenas se não desqualificado
+    team = get_team()
+    lead_data.missing_fields = find_missing_fields(lead_data)
+
+    # Regras mecânicas de delegação resolvidas sem o coordenador (1 chamada de modelo a menos)
+    quote_sent = bool(session.state.get("quote_sent"))
+    decision = route_turn(message.message, lead_data, quote_sent) if FAST_PATH_ROUTER else None
+    member = get_member(team, decision.member) if decision and decision.is_fast_path else None
+
+    history = None
+    if HISTORY_COMPACTION:
+        saved = session.state.get("history")
+        history = ConversationHistory.from_dict(saved) if saved else ConversationHistory()
+
+    if member is not None and member.name == QUOTE_GENERATOR:
+        # Resumo de orçamento renderizado do LeadData; LLM só se o produto for texto livre
+        technical_product = resolve_technical_product(lead_data)
+        if technical_product is not None:
+            return _TurnPlan(lead_data, path="quote_template", user_id=user_id, history=history,
+                             content=render_quote(lead_data, technical_product))
+        return _TurnPlan(lead_data, path="quote_llm", user_id=user_id, history=history,
+                         runner=generate_quote, run_input=lead_data, streamable=False)
+
+    if member is not None:
+        # Mesma sessão/usuário do team.run; o turno é gravado na sessão do Team em _finish_turn
+        return _TurnPlan(
+            lead_data,
+            path="fast_path",
+            user_id=user_id,
+            history=history,
+            runner=member.run,
+            run_input=_history_compactor.compose(history, build_context_block(lead_data, message.message)),
+            run_kwargs={"session_id": message.session_id, "user_id": user_id},
         )
+
+    run_input = message.message
+    if message.lead_data or stored or extracted:
+        # Só os campos preenchidos + missing_fields: o modelo não reextrai o que já se sabe
+        known = lead_data.model_dump_json(exclude_defaults=True)
+        run_input = f"[DADOS DO LEAD: {known}]\n\nMensagem do cliente: {message.message}"
+    run_input = _history_compactor.compose(history, run_input)
+    # Histórico isolado por conversa: cada session_id tem suas próprias runs no SQLite
+    return _TurnPlan(
+        lead_data,
+        user_id=user_id,
+        history=history,
+        runner=team.run,
+        run_input=run_input,
+        run_kwargs={"session_id": message.session_id, "user_id": user_id},
+    )
+
+
+def _finish_turn(message: IncomingMessage, plan: _TurnPlan, content: Any) -> AgentResponse:
+    lead_data = plan.lead_data
+    if plan.path in _QUOTE_PATHS:
+        result = _hand_quote_to_sales(message, lead_data, content)
+    else:
+        # TurnResult do coordenador, ou texto livre de membro (linha STATUS)
+        result = parse_turn_result(content, lead_data.classification)
+        if apply_lead_updates(lead_data, result.lead_updates):
+            _update_volume_and_score(lead_data)
+            lead_data.missing_fields = find_missing_fields(lead_data)
+    lead_data.classification = result.classification
+    if plan.history is not None:
+        _history_compactor.record(plan.history, message.message, result.message)
+    # team.run grava a própria run; os demais caminhos entram na sessão do Team aqui
+    turn = (message.message, result.message) if plan.path != "team" else None
+    _save_session(message.session_id, plan.user_id, lead_data, plan.history, turn=turn,
+                  quote_sent=plan.path in _QUOTE_PATHS)
+    _sync_crm(lead_data)
+
+    return AgentResponse(
+        session_id=message.session_id,
+        message=result.message,
+        classification=result.classification,
+        lead_data=lead_data,
+        next_action=result.next_action.value,
+    )
+
+
+def _hand_quote_to_sales(message: IncomingMessage, lead_data: LeadData, summary: str) -> TurnResult:
+    """
+    Resumo do pedido vai para a fila do time comercial; o cliente recebe só a confirmação.
+
+    O lead fica QUENTE aqui (orçamento repassado ao Closer), sem depender da
+    linha STATUS do resumo.
+    """
+    lead_data.classification = LeadClassification.QUENTE
+    _handoff_queue.enqueue(
+        session_id=message.session_id,
+        message=message.message,
+        reason="quote_ready",
+        lead_snapshot=lead_data.model_dump(mode="json"),
+        summary=summary,
+    )
+    return TurnResult(
+        message=render_quote_confirmation(lead_data),
+        classification=LeadClassification.QUENTE,
+        next_action=NextAction.TRANSFER_TO_CLOSER,
+    )
+
+
+def _save_session(
+    session_id: str,
+    user_id: Optional[str],
+    lead_data: LeadData,
+    history: Optional[ConversationHistory] = None,
+    turn: Optional[tuple[str, str]] = None,
+    quote_sent: bool = False,
+):
+    state = {"lead_data": lead_data.model_dump(mode="json")}
+    if history is not None:
+        state["history"] = history.to_dict()
+    if quote_sent:
+        state["quote_sent"] = True  # fica gravado: os próximos turnos não repetem o orçamento
+    team_id = None
+    if turn is not None:
+        team = get_team()
+        team.set_id()  # o Agno só define o id do Team no primeiro run
+        team_id = team.id
+    _session_store.save(session_id, user_id, state, turn=turn, team_id=team_id)
+
+
+def _sync_crm(lead_data: LeadData):
+    if _crm_sync is not None:
+        _crm_sync.enqueue_lead(lead_data)
+
+
+def _queue_full(e: TurnPoolFull) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+def _merged_response(message: IncomingMessage) -> AgentResponse:
+    """Resposta da requisição cuja mensagem entrou no turno de outra (o gateway não envia nada)."""
+    stored = _stored_lead(_session_store.load(message.session_id))
+    lead_data = stored or message.lead_data or LeadData(session_id=message.session_id)
+    return AgentResponse(
+        session_id=message.session_id,
+        message="",
+        classification=lead_data.classification,
+        lead_data=lead_data,
+        next_action=MERGED_ACTION,
+    )
+
+
+def _absorbed_message(burst: Burst, plan: _TurnPlan) -> IncomingMessage:
+    """Mensagem final do turno; campos das mensagens absorvidas no meio do turno vão para o lead."""
+    if burst.absorbed:
+        late = "\n".join(m.message for m in burst.absorbed)
+        if apply_extracted_fields(plan.lead_data, extract_lead_fields(late)):
+            _update_volume_and_score(plan.lead_data)
+    return burst.merged()
+
+
+@app.post("/chat", response_model=AgentResponse)
+async def chat(message: IncomingMessage):
+    with stage_timer("/chat", REQUEST_SECONDS):
+        return await _chat(message)
+
+
+async def _chat(message: IncomingMessage) -> AgentResponse:
+    try:
+        with stage_timer("coalesce"):
+            burst = await _coalescer.collect(message)
+        if burst is None:
+            count_turn("merged")
+            return _merged_response(message)
+
+        waiting = time.perf_counter()
+        async with _session_locks.hold(message.session_id):
+            observe_stage("session_lock", time.perf_counter() - waiting)
+            if not _coalescer.begin(burst):
+                count_turn("merged")
+                return _merged_response(message)
+            try:
+                message = burst.merged()
+                with stage_timer("plan"):
+                    plan = _plan_turn(message)
+                count_turn(plan.path)
+                if plan.response is not None:
+                    return plan.response
+
+                content = plan.content
+                if content is None:
+                    try:
+                        response = await _turn_pool.run(timed_turn(plan.runner), plan.run_input, **plan.run_kwargs)
+                    except TurnPoolFull as e:
+                        raise _queue_full(e)
+                    record_run(response)
+                    content = response.content if hasattr(response, "content") else str(response)
+            finally:
+                _coalescer.finish(burst)
+
+            with stage_timer("finish"):
+                return _finish_turn(_absorbed_message(burst, plan), plan, content)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _single_event(response: AgentResponse) -> StreamingResponse:
+    async def single_event():
+        yield format_sse("final", response.model_dump(mode="json"))
+
+    return StreamingResponse(single_event(), media_type="text/event-stream")
+
+
+@app.post("/chat/stream")
+async def chat_stream(message: IncomingMessage):
+    """
+    Mesmo fluxo do /chat, transmitido como Server-Sent Events.
+    Eventos: member-started, delta, member-finished e, por último, final (AgentResponse).
+    """
+    started = time.perf_counter()
+    try:
+        response = await _chat_stream(message)
+    except BaseException:
+        _observe_request("/chat/stream", started)
+        raise
+    # Latência do request = até o último evento do stream, não só até os headers
+    response.body_iterator = _timed_body(response.body_iterator, "/chat/stream", started)
+    return response
+
+
+def _observe_request(endpoint: str, started: float):
+    if METRICS_ENABLED:
+        REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint)
+
+
+async def _timed_body(body, endpoint: str, started: float):
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        _observe_request(endpoint, started)
+
+
+async def _chat_stream(message: IncomingMessage) -> StreamingResponse:
+    with stage_timer("coalesce"):
+        burst = await _coalescer.collect(message)
+    if burst is None:
+        count_turn("merged")
+        return _single_event(_merged_response(message))
+
+    stack = AsyncExitStack()
+    waiting = time.perf_counter()
+    await stack.enter_async_context(_session_locks.hold(message.session_id))
+    observe_stage("session_lock", time.perf_counter() - waiting)
+    if not _coalescer.begin(burst):
+        await stack.aclose()
+        count_turn("merged")
+        return _single_event(_merged_response(message))
+    stack.callback(_coalescer.finish, burst)
+
+    try:
+        message = burst.merged()
+        with stage_timer("plan"):
+            plan = _plan_turn(message)
+        count_turn(plan.path)
+    except Exception as e:
+        await stack.aclose()
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if plan.response is not None:
+        await stack.aclose()
+        return _single_event(plan.response)
+    if plan.content is not None:  # orçamento pelo template: sem modelo, mas mesmo fechamento do turno
+        await stack.aclose()
+        with stage_timer("finish"):
+            return _single_event(_finish_turn(_absorbed_message(burst, plan), plan, plan.content))
+
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    def emit(event: str, data: Any):
+        loop.call_soon_threadsafe(events.put_nowait, (event, data))
+
+    worker = run_streaming_turn if plan.streamable else run_blocking_turn
+    try:
+        future = _turn_pool.submit(timed_turn(worker), plan.runner, plan.run_input, plan.run_kwargs, emit)
+    except TurnPoolFull as e:
+        await stack.aclose()
+        raise _queue_full(e)
+
+    async def event_stream():
+        try:
+            while True:
+                event, data = await events.get()
+                if event == DONE:
+                    with stage_timer("finish"):
+                        final = _finish_turn(_absorbed_message(burst, plan), plan, data)
+                    yield format_sse("final", final.model_dump(mode="json"))
+                    return
+                if event == FAILED:
+                    yield format_sse("error", {"detail": str(data)})
+                    return
+                yield format_sse(event, data)
+        finally:
+            # Cliente desconectou no meio: só libera a sessão quando o turno terminar de fato
+            await asyncio.wait({future})
+            await stack.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/followup/register")
 async def register_followup(session_id: str, lead_name: str, contact: str):
     """Registra lead para follow-ups automáticos pós-orçamento."""
@@ -106,12 +566,50 @@ async def cancel_followup(session_id: str):
     return {"status": "cancelled", "session_id": session_id}
 
 
+@app.get("/handoff/queue")
+async def list_handoff_queue():
+    """Lista as conversas aguardando consultor humano, em ordem de chegada."""
+    return {
+        "pending": [
+            {
+                "session_id": t.session_id,
+                "last_message": t.last_message,
+                "reason": t.reason,
+                "requests": t.requests,
+                "queued_at": t.queued_at.isoformat(),
+                "lead_data": t.lead_snapshot,
+                "summary": t.summary,
+            }
+            for t in _handoff_queue.pending()
+        ]
+    }
+
+
+@app.post("/handoff/next")
+async def take_next_handoff():
+    """Retira a conversa mais antiga da fila (consultor assumiu o atendimento)."""
+    ticket = _handoff_queue.pop_next()
+    if ticket is None:
+        raise HTTPException(status_code=404, detail="Nenhuma conversa aguardando atendimento humano")
+    return {
+        "session_id": ticket.session_id,
+        "last_message": ticket.last_message,
+        "reason": ticket.reason,
+        "lead_data": ticket.lead_snapshot,
+        "summary": ticket.summary,
+    }
+
+
 @app.get("/")
 async def root():
     return {
         "message": "POC Agno - Agentes de Vendas de Aço",
         "endpoints": {
             "POST /chat": "Enviar mensagem para os agentes",
+            "POST /chat/stream": "Mesmo que /chat, com resposta em Server-Sent Events",
             "GET /health": "Status da API",
+            "GET /metrics": "Métricas no formato do Prometheus",
+            "GET /handoff/queue": "Conversas aguardando consultor humano",
+            "POST /handoff/next": "Consultor assume a próxima conversa da fila",
         },
     }
@@ -0,0 +1,170 @@
+"""
+Agrupamento de rajadas de mensagens do WhatsApp em um único turno.
+
+No WhatsApp o cliente escreve "oi", "quero vergalhão", "10mm", "pra Fortaleza"
+em quatro mensagens seguidas. Sem agrupamento, cada uma vira um /chat e um
+turno multiagente, e a maioria das respostas já chega desatualizada.
+
+O BurstCoalescer segura as mensagens de cada sessão por uma janela curta
+(`window` segundos desde a última mensagem, no máximo `max_wait` desde a
+primeira) e entrega a rajada inteira a um único turno:
+
+  - a requisição da última mensagem roda o turno com o texto de todas
+  - as anteriores são respondidas na hora com next_action="merged" (o gateway
+    não envia nada ao cliente para elas)
+  - mensagens que chegam enquanto a rajada espera a vez da sessão entram nela
+  - com um turno já em andamento, a próxima rajada da sessão é absorvida por
+    ele se o membro ainda não foi chamado (`absorb`, usado no tool hook de
+    delegação do Team)
+
+Uso:
+    coalescer = BurstCoalescer(window=2.0, max_wait=6.0)
+    burst = await coalescer.collect(message)
+    if burst is None:
+        ...  # mensagem incorporada a outro turno
+    async with session_locks.hold(session_id):
+        if coalescer.begin(burst):
+            try:
+                ...  # turno com burst.merged()
+            finally:
+                coalescer.finish(burst)
+"""
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from src.models import IncomingMessage
+
+# next_action das requisições cuja mensagem foi incorporada a outro turno
+MERGED_ACTION = "merged"
+
+_OPEN, _PENDING, _RUNNING, _ABSORBED = "open", "pending", "running", "absorbed"
+
+
+def _resolve(future: asyncio.Future, value):
+    if not future.done():
+        future.set_result(value)
+
+
+@dataclass
+class Burst:
+    """Mensagens de uma sessão que serão respondidas em um só turno."""
+    session_id: str
+    messages: list[IncomingMessage]
+    deadline: float
+    hard_deadline: float
+    runner: asyncio.Future  # requisição que vai rodar o turno
+    loop: asyncio.AbstractEventLoop
+    state: str = _OPEN
+    absorbed: list[IncomingMessage] = field(default_factory=list)  # chegaram com o turno em andamento
+
+    def merged(self) -> IncomingMessage:
+        """Uma IncomingMessage com o texto de todas as mensagens e o lead_data mais recente."""
+        messages = self.messages + self.absorbed
+        lead_data = next((m.lead_data for m in reversed(messages) if m.lead_data is not None), None)
+        return messages[-1].model_copy(update={
+            "message": "\n".join(m.message for m in messages),
+            "lead_data": lead_data,
+        })
+
+
+class BurstCoalescer:
+    """
+    Janela de debounce por sessão.
+
+    Args:
+        window: Segundos de silêncio que fecham a rajada (0 desliga o agrupamento).
+        max_wait: Espera máxima desde a primeira mensagem da rajada.
+    """
+
+    def __init__(self, window: float, max_wait: float):
+        self.window = window
+        self.max_wait = max(window, max_wait)
+        self._pending: dict[str, Burst] = {}  # aberta ou esperando a vez da sessão
+        self._running: dict[str, Burst] = {}
+        # absorb() roda na thread do turno (tool hook); o resto, no event loop
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    async def collect(self, message: IncomingMessage) -> Optional[Burst]:
+        """
+        Entrega a mensagem à rajada da sessão e aguarda a janela fechar.
+
+        Retorna a Burst se esta requisição deve rodar o turno, ou None se a
+        mensagem foi incorporada ao turno de outra requisição.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        now = time.monotonic()
+        if not self.enabled:
+            return Burst(message.session_id, [message], now, now, future, loop, state=_PENDING)
+
+        with self._lock:
+            burst = self._pending.get(message.session_id)
+            if burst is None:
+                burst = Burst(message.session_id, [message], now + self.window, now + self.max_wait, future, loop)
+                self._pending[message.session_id] = burst
+                loop.create_task(self._close_when_quiet(burst))
+            elif burst.state == _OPEN:
+                burst.messages.append(message)
+                previous, burst.runner = burst.runner, future
+                burst.deadline = min(now + self.window, burst.hard_deadline)
+                _resolve(previous, None)
+            else:
+                # Rajada já fechada, esperando a vez da sessão: o texto vai junto
+                burst.messages.append(message)
+                _resolve(future, None)
+        return await future
+
+    async def _close_when_quiet(self, burst: Burst):
+        while True:
+            with self._lock:
+                if burst.state != _OPEN:
+                    return
+                delay = burst.deadline - time.monotonic()
+                if delay <= 0:
+                    burst.state = _PENDING
+                    _resolve(burst.runner, burst)
+                    return
+            await asyncio.sleep(delay)
+
+    def begin(self, burst: Burst) -> bool:
+        """Marca a rajada como em andamento (com o lock da sessão). False se já foi absorbida."""
+        if not self.enabled:
+            return True
+        with self._lock:
+            if burst.state == _ABSORBED:
+                return False
+            if self._pending.get(burst.session_id) is burst:
+                del self._pending[burst.session_id]
+            burst.state = _RUNNING
+            self._running[burst.session_id] = burst
+            return True
+
+    def finish(self, burst: Burst):
+        with self._lock:
+            if self._running.get(burst.session_id) is burst:
+                del self._running[burst.session_id]
+
+    def absorb(self, session_id: str) -> list[str]:
+        """
+        Incorpora ao turno em andamento da sessão a rajada que está esperando.
+
+        Chamado antes de o membro rodar; retorna os textos incorporados (vazio
+        se não há turno em andamento ou nada esperando). Seguro fora do event loop.
+        """
+        with self._lock:
+            running = self._running.get(session_id)
+            waiting = self._pending.get(session_id)
+            if running is None or waiting is None:
+                return []
+            del self._pending[session_id]
+            waiting.state = _ABSORBED
+            running.absorbed.extend(waiting.messages)
+        waiting.loop.call_soon_threadsafe(_resolve, waiting.runner, None)
+        return [m.message for m in waiting.messages]
@@ -1,11 +1,13 @@
 """
 Regras de negócio da Aço Cearense.
-Todas as funções são puras (sem side effects) para facilitar testes.
+Sem IA e sem I/O por turno; a conversão de volume consulta o índice de SKUs
+do catálogo, carregado do arquivo uma vez por processo (src/data/sku_index.py).
 """
-import re
 from typing import Optional
 
+from src.data.product_catalog import resolver_produto
 from src.data.weight_rules import PESO_MINIMO_CIF_POR_ESTADO, get_peso_minimo
+from src.volume_resolver import resolve_volume
 
 # Estados atendidos — todos os 27 estados cobertos pela planilha de peso mínimo CIF
 STATES_SERVED = set(PESO_MINIMO_CIF_POR_ESTADO.keys())
@@ -25,30 +27,36 @@ AVAILABLE_PRODUCTS = {
 }
 
 
-def _parse_volume_to_kg(volume_str: Optional[str]) -> float:
-    """Converte string de volume para kg. Ex: "5 toneladas" → 5000.0"""
-    if not volume_str:
-        return 0.0
-    text = volume_str.lower().strip()
-    numbers = re.findall(r"[\d.,]+", text)
-    if not numbers:
-        return 0.0
-    try:
-        amount = float(numbers[0].replace(",", "."))
-    except ValueError:
-        return 0.0
-    if "ton" in text or text.endswith("t") or " t " in text:
-        return amount * 1000
-    elif "unidade" in text or " un" in text or "pç" in text or "peça" in text:
-        return amount * 20
-    else:
-        return amount  # assume kg
-
-
-def calculate_score(volume_estimate: Optional[str], urgency: Optional[str]) -> int:
+# Campos obrigatórios para o lead ser classificado como MORNO (atributo do LeadData → rótulo)
+REQUIRED_LEAD_FIELDS = {
+    "name": "Nome",
+    "whatsapp": "WhatsApp",
+    "email": "E-mail",
+    "cnpj": "CNPJ",
+    "state": "UF",
+    "city": "Cidade",
+    "product_interest": "Produto",
+    "volume_estimate": "Volume",
+}
+
+
+def _parse_volume_to_kg(volume_str: Optional[str], product: Optional[str] = None) -> float:
+    """
+    Converte string de volume para kg. Ex: "5 toneladas" → 5000.0,
+    "50 barras de 10mm e 20 de 8mm" (vergalhão) → 464.0.
+    Unidades/peças usam o kg/un do catálogo (src/volume_resolver.py).
+    """
+    return resolve_volume(volume_str, product).total_kg
+
+
+def calculate_score(
+    volume_estimate: Optional[str],
+    urgency: Optional[str],
+    product: Optional[str] = None,
+) -> int:
     """Score de 0-100. Volume: até 70 pts. Urgência: +30 pts."""
     score = 0
-    volume_kg = _parse_volume_to_kg(volume_estimate)
+    volume_kg = _parse_volume_to_kg(volume_estimate, product)
     if volume_kg > 0:
         score += min(70, int(volume_kg / 100))
     if urgency and any(w in urgency.lower() for w in ["urgente", "imediato", "hoje", "amanhã", "semana"]):
@@ -56,9 +64,13 @@ def calculate_score(volume_estimate: Optional[str], urgency: Optional[str]) -> i
     return min(100, score)
 
 
-def check_minimum_volume(volume_estimate: Optional[str], state: Optional[str] = None) -> bool:
+def check_minimum_volume(
+    volume_estimate: Optional[str],
+    state: Optional[str] = None,
+    product: Optional[str] = None,
+) -> bool:
     """Retorna True se volume >= mínimo do estado. Usa 1500kg como fallback se estado não informado."""
-    volume_kg = _parse_volume_to_kg(volume_estimate)
+    volume_kg = _parse_volume_to_kg(volume_estimate, product)
     if state:
         minimo = get_peso_minimo(state)
         if minimo is not None:
@@ -74,11 +86,43 @@ def is_state_served(state: Optional[str]) -> bool:
 
 
 def is_product_available(product: Optional[str]) -> bool:
-    """Retorna True se produto está no portfólio."""
+    """
+    Retorna True se produto está no portfólio: termos de AVAILABLE_PRODUCTS
+    ou qualquer família do catálogo (resolver_produto — "Bobina", "Treliça",
+    nomes técnicos do Especialista).
+    """
     if not product:
         return False
     product_lower = product.lower().strip()
-    return any(p in product_lower or product_lower in p for p in AVAILABLE_PRODUCTS)
+    if any(p in product_lower or product_lower in p for p in AVAILABLE_PRODUCTS):
+        return True
+    return resolver_produto(product) is not None
+
+
+def find_product_mention(message: Optional[str]) -> Optional[str]:
+    """Retorna o produto do portfólio citado na mensagem (termo mais longo primeiro), ou None."""
+    if not message:
+        return None
+    text = message.lower()
+    for product in sorted(AVAILABLE_PRODUCTS, key=len, reverse=True):
+        if product in text:
+            return product
+    return None
+
+
+def find_missing_fields(lead) -> list[str]:
+    """
+    Lista os campos obrigatórios ainda não preenchidos no lead (nomes dos atributos do LeadData).
+    O produto conta como preenchido se houver product_interest ou technical_product.
+    """
+    missing = []
+    for field in REQUIRED_LEAD_FIELDS:
+        value = getattr(lead, field, None)
+        if field == "product_interest":
+            value = value or getattr(lead, "technical_product", None)
+        if not value or not str(value).strip():
+            missing.append(field)
+    return missing
 
 
 def check_auto_disqualification(
@@ -95,11 +139,13 @@ def check_auto_disqualification(
             "disqualified": True,
             "reason": f"Infelizmente não atendemos o estado {state.upper()}.",
         }
-    if volume_estimate and not check_minimum_volume(volume_estimate, state):
+    if volume_estimate and not check_minimum_volume(volume_estimate, state, product):
         minimo = get_peso_minimo(state) if state else MINIMUM_VOLUME_KG_FALLBACK
+        volume = resolve_volume(volume_estimate, product)
+        informado = f"{volume_estimate} ≈ {volume.total_kg:g}kg" if volume.has_units else volume_estimate
         return {
             "disqualified": True,
-            "reason": f"O volume informado ({volume_estimate}) está abaixo do mínimo de {minimo}kg por pedido para a sua região.",
+            "reason": f"O volume informado ({informado}) está abaixo do mínimo de {minimo}kg por pedido para a sua região.",
         }
     if product and not is_product_available(product):
         return {
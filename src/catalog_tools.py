@@ -0,0 +1,66 @@
+"""
+Ferramentas de consulta exata ao catálogo (índice de SKUs) para os agentes.
+
+Complementam a knowledge base: o RAG explica grupos e aplicações, estas
+ferramentas respondem código SAP, descrição exata e peso por unidade a
+partir de knowledge/sku_index.arrow (src/data/sku_index.py).
+"""
+from typing import Optional
+
+from src.data.sku_index import get_sku_index
+
+_INDICE_AUSENTE = (
+    "Índice de SKUs indisponível (execute scripts/generate_catalog_rag.py). "
+    "Use a knowledge base."
+)
+
+
+def buscar_sku(consulta: str) -> str:
+    """
+    Busca exata no catálogo de SKUs da Aço Cearense pela descrição ou código SAP.
+    Use para confirmar o produto técnico e o peso por unidade (kg/un).
+
+    Args:
+        consulta: Descrição como no catálogo (ex: 'TUBO IND 1 1/4 1,20mm',
+            'VERGALHAO CA50 10mm 12m') ou o código SAP (ex: '202497').
+
+    Returns:
+        Até 5 SKUs no formato 'Cód <SAP>: <descrição> — <kg/un> [grupo/subgrupo]'.
+    """
+    indice = get_sku_index()
+    if indice is None:
+        return _INDICE_AUSENTE
+    skus = indice.buscar(consulta)
+    if not skus:
+        return f"Nenhum SKU encontrado para '{consulta}'. Refine a descrição ou use a knowledge base."
+    return "\n".join(sku.resumo() for sku in skus)
+
+
+def filtrar_skus(
+    grupo: Optional[str] = None,
+    subgrupo: Optional[str] = None,
+    bitola: Optional[str] = None,
+    espessura_mm: Optional[float] = None,
+) -> str:
+    """
+    Lista SKUs do catálogo por grupo, subgrupo, bitola e/ou espessura.
+
+    Args:
+        grupo: Grupo do portfólio (ex: 'Tubo', 'CA-50', 'Chapa Plana').
+        subgrupo: Subgrupo (ex: 'Industrial', 'Metalons').
+        bitola: Bitola em polegadas ou mm (ex: '1 1/4"', '10mm', 'BWG 18').
+        espessura_mm: Espessura da parede/chapa em mm (ex: 1.2).
+
+    Returns:
+        Até 20 SKUs, um por linha.
+    """
+    indice = get_sku_index()
+    if indice is None:
+        return _INDICE_AUSENTE
+    skus = indice.filtrar(grupo=grupo, subgrupo=subgrupo, bitola=bitola, espessura_mm=espessura_mm)
+    if not skus:
+        return "Nenhum SKU com esses filtros."
+    return "\n".join(sku.resumo() for sku in skus)
+
+
+CATALOG_TOOLS = [buscar_sku, filtrar_skus]
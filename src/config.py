@@ -1,4 +1,7 @@
 import os
+import re
+from typing import Optional
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -16,14 +19,172 @@ MODEL_ID = os.getenv("MODEL_ID", "gemini-2.5-flash-preview-04-17")
 
 KNOWLEDGE_BASE_DIR = "knowledge"
 VECTOR_DB_PATH = "data/lancedb"
+SKU_INDEX_PATH = "knowledge/sku_index.arrow"  # gerado por scripts/generate_catalog_rag.py
+
+# Caches da busca na knowledge base (src/retrieval_cache.py): LRU de embeddings
+# de consulta e resultado da busca híbrida com TTL. Tamanho 0 desliga o cache.
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "1024"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "512"))
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "600"))
+
+# Reindexação incremental (src/knowledge_index.py): só arquivos com hash novo
+# são lidos (PDFs grandes em KNOWLEDGE_PARSE_WORKERS processos); só os trechos novos vão ao
+# embedder, em lotes de EMBEDDING_BATCH_SIZE e EMBEDDING_THREADS threads (o
+# ONNX Runtime libera o GIL). O manifesto de hashes fica ao lado da tabela.
+KNOWLEDGE_PARSE_WORKERS = int(os.getenv("KNOWLEDGE_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "2"))
+
+# Versões do índice (src/knowledge_versions.py): cada build grava uma tabela
+# nova e só então troca o ponteiro; a API confere o ponteiro a cada
+# KNOWLEDGE_SWAP_POLL_SECONDS (0 desliga) e passa a buscar na versão nova sem
+# reiniciar. Versões antigas são apagadas KNOWLEDGE_RETIRE_GRACE_SECONDS depois
+# da troca, guardando as KNOWLEDGE_KEEP_VERSIONS mais recentes para rollback.
+KNOWLEDGE_SWAP_POLL_SECONDS = float(os.getenv("KNOWLEDGE_SWAP_POLL_SECONDS", "2"))
+KNOWLEDGE_RETIRE_GRACE_SECONDS = float(os.getenv("KNOWLEDGE_RETIRE_GRACE_SECONDS", "60"))
+KNOWLEDGE_KEEP_VERSIONS = int(os.getenv("KNOWLEDGE_KEEP_VERSIONS", "1"))
+
+# Controle de admissão do /chat — cada worker do uvicorn roda no máximo
+# MAX_CONCURRENT_TURNS turnos de LLM ao mesmo tempo e deixa até
+# MAX_QUEUED_TURNS aguardando vaga. Acima disso a API responde 503 + Retry-After.
+MAX_CONCURRENT_TURNS = int(os.getenv("MAX_CONCURRENT_TURNS", "8"))
+MAX_QUEUED_TURNS = int(os.getenv("MAX_QUEUED_TURNS", "32"))
+TURN_RETRY_AFTER_SECONDS = int(os.getenv("TURN_RETRY_AFTER_SECONDS", "5"))
+
+# Pré-roteador determinístico (src/router.py): envia o turno direto ao membro
+# certo quando a regra é mecânica, pulando a chamada do coordenador.
+FAST_PATH_ROUTER = os.getenv("FAST_PATH_ROUTER", "true").lower() in ("1", "true", "yes")
+
+# Histórico compactado (src/history_compactor.py): os últimos HISTORY_RAW_TURNS
+# turnos na íntegra + uma linha por turno anterior, gravados no session_state
+# da sessão. HISTORY_TOKEN_BUDGET limita só o bloco de histórico de cada
+# chamada de modelo, não a entrada inteira. Desligado, volta ao histórico
+# bruto do Agno (runs inteiras no coordenador e nos membros).
+HISTORY_COMPACTION = os.getenv("HISTORY_COMPACTION", "true").lower() in ("1", "true", "yes")
+HISTORY_RAW_TURNS = int(os.getenv("HISTORY_RAW_TURNS", "4"))
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "600"))
+
+# Rajadas do WhatsApp (src/burst_coalescer.py): mensagens da mesma sessão com
+# menos de BURST_WINDOW_SECONDS entre si viram um turno só (espera máxima de
+# BURST_MAX_WAIT_SECONDS desde a primeira). 0 desliga — cada mensagem é um turno.
+BURST_WINDOW_SECONDS = float(os.getenv("BURST_WINDOW_SECONDS", "0"))
+BURST_MAX_WAIT_SECONDS = float(os.getenv("BURST_MAX_WAIT_SECONDS", "6"))
+
+# Fila de transbordo para o time humano (src/handoff_queue.py), em SQLite
+HANDOFF_DB_PATH = os.getenv("HANDOFF_DB_PATH", "data/handoffs.db")
+
+# Follow-ups pós-orçamento (src/followup_scheduler.py): persistidos em SQLite,
+# com só os próximos FOLLOWUP_WINDOW_SECONDS carregados em memória. A thread de
+# envio verifica os vencidos a cada FOLLOWUP_POLL_SECONDS quando
+# FOLLOWUP_DISPATCH está ligado (desligado: só registra/cancela).
+FOLLOWUP_DB_PATH = os.getenv("FOLLOWUP_DB_PATH", "data/followups.db")
+FOLLOWUP_DISPATCH = os.getenv("FOLLOWUP_DISPATCH", "false").lower() in ("1", "true", "yes")
+FOLLOWUP_WINDOW_SECONDS = float(os.getenv("FOLLOWUP_WINDOW_SECONDS", "900"))
+FOLLOWUP_POLL_SECONDS = float(os.getenv("FOLLOWUP_POLL_SECONDS", "5"))
+
+# Envio dos follow-ups (src/followup_dispatcher.py): vencimentos do mesmo
+# minuto espalhados em FOLLOWUP_SPREAD_SECONDS, no máximo FOLLOWUP_SEND_RATE
+# mensagens/s por canal (rajada de FOLLOWUP_SEND_BURST), lotes de
+# FOLLOWUP_BATCH_SIZE e até FOLLOWUP_MAX_RETRIES retentativas com backoff.
+FOLLOWUP_SEND_RATE = float(os.getenv("FOLLOWUP_SEND_RATE", "20"))
+FOLLOWUP_SEND_BURST = float(os.getenv("FOLLOWUP_SEND_BURST", "40"))
+FOLLOWUP_BATCH_SIZE = int(os.getenv("FOLLOWUP_BATCH_SIZE", "50"))
+FOLLOWUP_SPREAD_SECONDS = float(os.getenv("FOLLOWUP_SPREAD_SECONDS", "300"))
+FOLLOWUP_MAX_RETRIES = int(os.getenv("FOLLOWUP_MAX_RETRIES", "5"))
+FOLLOWUP_RETRY_BASE_SECONDS = float(os.getenv("FOLLOWUP_RETRY_BASE_SECONDS", "2"))
+# A tentativa só é gravada quando o dispatcher confirma a entrega; sem
+# confirmação em FOLLOWUP_DELIVERY_TIMEOUT_SECONDS (processo reiniciou com a
+# mensagem na fila em memória), o follow-up é reenviado.
+FOLLOWUP_DELIVERY_TIMEOUT_SECONDS = float(os.getenv("FOLLOWUP_DELIVERY_TIMEOUT_SECONDS", "900"))
+
+# Sincronização com o CRM (src/crm_sync.py): o /chat só enfileira; uma thread
+# envia em lotes de CRM_SYNC_BATCH_SIZE ou a cada CRM_SYNC_FLUSH_SECONDS. O que
+# não foi confirmado fica em CRM_SYNC_JOURNAL_PATH. Desligado por padrão.
+CRM_SYNC = os.getenv("CRM_SYNC", "false").lower() in ("1", "true", "yes")
+CRM_BASE_URL = os.getenv("CRM_BASE_URL", "")
+CRM_ACCESS_TOKEN = os.getenv("CRM_ACCESS_TOKEN", "")
+CRM_SYNC_BATCH_SIZE = int(os.getenv("CRM_SYNC_BATCH_SIZE", "200"))
+CRM_SYNC_FLUSH_SECONDS = float(os.getenv("CRM_SYNC_FLUSH_SECONDS", "2"))
+CRM_SYNC_JOURNAL_PATH = os.getenv("CRM_SYNC_JOURNAL_PATH", "data/crm_outbox.db")
+
+# Cliente HTTP do Salesforce (src/crm_http.py): OAuth client credentials
+# (CRM_CLIENT_ID/SECRET) se não houver CRM_ACCESS_TOKEN fixo; pool keep-alive
+# de CRM_MAX_CONNECTIONS; CRM_BREAKER_FAILURES falhas ou chamadas acima de
+# CRM_SLOW_CALL_SECONDS seguidas abrem o circuito por CRM_BREAKER_RESET_SECONDS.
+CRM_CLIENT_ID = os.getenv("CRM_CLIENT_ID", "")
+CRM_CLIENT_SECRET = os.getenv("CRM_CLIENT_SECRET", "")
+CRM_MAX_CONNECTIONS = int(os.getenv("CRM_MAX_CONNECTIONS", "20"))
+CRM_TIMEOUT_SECONDS = float(os.getenv("CRM_TIMEOUT_SECONDS", "5"))
+CRM_SLOW_CALL_SECONDS = float(os.getenv("CRM_SLOW_CALL_SECONDS", "3"))
+CRM_BREAKER_FAILURES = int(os.getenv("CRM_BREAKER_FAILURES", "5"))
+CRM_BREAKER_RESET_SECONDS = float(os.getenv("CRM_BREAKER_RESET_SECONDS", "30"))
+
+# Métricas do /chat no formato do Prometheus (src/metrics.py, GET /metrics):
+# tempo por etapa do turno, chamadas e tokens por agente/modelo, busca na
+# knowledge base e I/O de sessão no SQLite. Desligado, /metrics responde 404.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Cache do prefixo estático do prompt (instruções + tools). No Claude liga o
+# cache_control no system prompt; o Gemini 2.5+ faz cache implícito de
+# prefixos repetidos. PROMPT_CACHE_EXTENDED_TTL usa o TTL de 1h do Claude.
+PROMPT_CACHE = os.getenv("PROMPT_CACHE", "true").lower() in ("1", "true", "yes")
+PROMPT_CACHE_EXTENDED_TTL = os.getenv("PROMPT_CACHE_EXTENDED_TTL", "false").lower() in ("1", "true", "yes")
+
+# Cassete de chamadas de modelo (src/model_cassette.py): "record" grava cada
+# request/resposta, "replay" só reproduz (sem rede; request novo é erro),
+# "auto" reproduz o que existe e grava o resto. MODEL_CASSETTE_LATENCY é o
+# fator da latência gravada na reprodução (0 = instantâneo, 1 = original).
+MODEL_CASSETTE_MODE = os.getenv("MODEL_CASSETTE_MODE", "off").lower()
+MODEL_CASSETTE_PATH = os.getenv("MODEL_CASSETTE_PATH", "data/model_cassette.db")
+MODEL_CASSETTE_LATENCY = float(os.getenv("MODEL_CASSETTE_LATENCY", "0"))
+
+
+def prompt_cache_mode(model_id: Optional[str] = None) -> Optional[str]:
+    """
+    Tipo de cache de prompt disponível para o modelo.
+
+    "anthropic" → cache explícito do system prompt (Claude);
+    "gemini-implicit" → cache automático de prefixo (Gemini 2.5 ou mais novo);
+    None → sem cache (desligado ou modelo sem suporte).
+    """
+    model_id = model_id or MODEL_ID
+    if not PROMPT_CACHE:
+        return None
+    if model_id.startswith("claude"):
+        return "anthropic"
+    version = re.match(r"gemini-(\d+(?:\.\d+)?)", model_id)
+    if version and float(version.group(1)) >= 2.5:
+        return "gemini-implicit"
+    return None
+
+
+def static_prompt(text: str) -> str:
+    """
+    Normaliza um texto fixo de instruções para o prefixo do prompt: remove
+    espaços no fim das linhas, junta linhas em branco repetidas e apara as
+    pontas. O resultado é o mesmo byte a byte em todo turno.
+    """
+    lines = [line.rstrip() for line in text.strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
 
 
 def get_model():
-    """Retorna o modelo correto baseado no MODEL_ID configurado."""
+    """Retorna o modelo correto baseado no MODEL_ID configurado (no cassete, se ligado)."""
+    model = _provider_model()
+    if MODEL_CASSETTE_MODE != "off":
+        from src.model_cassette import CassetteModel, get_cassette
+        return CassetteModel.wrap(model, get_cassette(MODEL_CASSETTE_PATH), MODEL_CASSETTE_MODE,
+                                  MODEL_CASSETTE_LATENCY)
+    return model
+
+
+def _provider_model():
     if MODEL_ID.startswith("gemini"):
         from agno.models.google import Gemini
         return Gemini(id=MODEL_ID)
     else:
         from agno.models.anthropic import Claude
+        if prompt_cache_mode(MODEL_ID) == "anthropic":
+            return Claude(id=MODEL_ID, cache_system_prompt=True, extended_cache_time=PROMPT_CACHE_EXTENDED_TTL)
         return Claude(id=MODEL_ID)
 
@@ -0,0 +1,218 @@
+"""
+Cliente HTTP compartilhado para o Salesforce.
+
+Todo acesso ao CRM (CRMClient em modo produção e a fila de src/crm_sync.py)
+passa por um único CRMHttpClient:
+
+  - pool de conexões keep-alive (httpx.Client) com limite de conexões e
+    timeout por request — sem handshake TCP/TLS a cada atualização de lead
+  - token OAuth (client credentials) em cache de memória até expirar;
+    um 401 renova o token uma vez e repete o request
+  - circuit breaker: depois de `failure_threshold` falhas ou chamadas lentas
+    seguidas, o circuito abre e as chamadas falham na hora (CircuitOpenError)
+    por `reset_seconds`; depois, um request de teste decide se fecha de novo.
+    Quem chama decide o que fazer com a atualização (a fila guarda no diário)
+
+Uso:
+    http = get_crm_http_client()
+    response = http.request("PATCH", "/services/data/v60.0/sobjects/Lead/00Q...", json={...})
+"""
+import threading
+import time
+from typing import Callable, Optional
+
+import httpx
+
+from src.config import (
+    CRM_ACCESS_TOKEN,
+    CRM_BASE_URL,
+    CRM_BREAKER_FAILURES,
+    CRM_BREAKER_RESET_SECONDS,
+    CRM_CLIENT_ID,
+    CRM_CLIENT_SECRET,
+    CRM_MAX_CONNECTIONS,
+    CRM_SLOW_CALL_SECONDS,
+    CRM_TIMEOUT_SECONDS,
+)
+
+_CLOSED, _OPEN, _HALF_OPEN = "closed", "open", "half-open"
+
+
+class CircuitOpenError(RuntimeError):
+    """O CRM está falhando ou lento: a chamada nem foi feita."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por contagem de falhas consecutivas.
+
+    Args:
+        failure_threshold: Falhas (ou chamadas lentas) seguidas que abrem o circuito.
+        reset_seconds: Tempo aberto antes de deixar passar um request de teste.
+        slow_call_seconds: Chamada que demora mais que isso conta como falha.
+    """
+
+    def __init__(self, failure_threshold: int = CRM_BREAKER_FAILURES, reset_seconds: float = CRM_BREAKER_RESET_SECONDS,
+                 slow_call_seconds: float = CRM_SLOW_CALL_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = _CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.rejected = 0  # chamadas recusadas com o circuito aberto
+
+    def allow(self):
+        """Levanta CircuitOpenError se o circuito está aberto."""
+        with self._lock:
+            if self.state == _OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+                self.state = _HALF_OPEN
+            if self.state == _CLOSED:
+                return
+            if self.state == _HALF_OPEN and not self._probing:
+                self._probing = True  # um request de teste por vez
+                return
+            self.rejected += 1
+        raise CircuitOpenError("CRM indisponível (circuito aberto)")
+
+    def record(self, ok: bool, elapsed: float = 0.0):
+        with self._lock:
+            self._probing = False
+            if ok and elapsed <= self.slow_call_seconds:
+                self.state, self._failures = _CLOSED, 0
+                return
+            self._failures += 1
+            if self.state == _HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state, self._opened_at = _OPEN, self._clock()
+
+
+class OAuthTokenCache:
+    """
+    Token de acesso do Salesforce (OAuth 2.0 client credentials) em memória.
+
+    O Salesforce não informa a validade no token; `ttl_seconds` (padrão 1h,
+    menor que a sessão mínima da org) decide quando pedir outro.
+    """
+
+    def __init__(self, token_url: str, client_id: str, client_secret: str, ttl_seconds: float = 3600,
+                 clock: Callable[[], float] = time.monotonic):
+        self.token_url = token_url
+        self._client_id = client_id
+        self._client_secret = client_secret
+        self._ttl = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self.fetches = 0
+
+    def get(self, client: httpx.Client) -> str:
+        with self._lock:
+            if self._token is None or self._clock() >= self._expires_at:
+                response = client.post(self.token_url, data={
+                    "grant_type": "client_credentials",
+                    "client_id": self._client_id,
+                    "client_secret": self._client_secret,
+                })
+                response.raise_for_status()
+                payload = response.json()
+                self._token = payload["access_token"]
+                self._expires_at = self._clock() + float(payload.get("expires_in", self._ttl))
+                self.fetches += 1
+            return self._token
+
+    def invalidate(self, token: str):
+        with self._lock:
+            if self._token == token:  # outra thread pode já ter renovado
+                self._token = None
+
+
+class CRMHttpClient:
+    """
+    Pool HTTP keep-alive + token OAuth + circuit breaker.
+
+    Args:
+        base_url: Instância do Salesforce (https://suaempresa.my.salesforce.com).
+        token: Token fixo (dispensa OAuth); senão usa `oauth`.
+        oauth: Cache de token OAuth.
+        max_connections: Conexões simultâneas no pool (as demais esperam).
+        timeout: Timeout de cada request (conexão, leitura, escrita), em segundos.
+        breaker: Circuit breaker (padrão: configurado por CRM_BREAKER_*).
+        pooled: False cria uma conexão nova por request (só para comparação no benchmark).
+    """
+
+    def __init__(self, base_url: str, token: Optional[str] = None, oauth: Optional[OAuthTokenCache] = None,
+                 max_connections: int = CRM_MAX_CONNECTIONS, timeout: float = CRM_TIMEOUT_SECONDS,
+                 breaker: Optional[CircuitBreaker] = None, pooled: bool = True):
+        self.base_url = base_url.rstrip("/")
+        self._token = token
+        self.oauth = oauth
+        self.breaker = breaker or CircuitBreaker()
+        self._pooled = pooled
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self._timeout = httpx.Timeout(timeout)
+        self._client = httpx.Client(limits=self._limits, timeout=self._timeout)
+
+    def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """
+        Faz o request pelo pool. Levanta CircuitOpenError com o circuito aberto
+        e httpx.HTTPError em falha de rede, timeout ou status 4xx/5xx.
+        """
+        self.breaker.allow()
+        started = time.monotonic()
+        try:
+            response = self._send(method, path, **kwargs)
+        except httpx.HTTPStatusError as exc:
+            # 4xx é erro do request, não do CRM: não conta para o circuito
+            self.breaker.record(exc.response.status_code < 500, time.monotonic() - started)
+            raise
+        except Exception:  # rede, timeout, token
+            self.breaker.record(False)
+            raise
+        self.breaker.record(True, time.monotonic() - started)
+        return response
+
+    def _send(self, method: str, path: str, **kwargs) -> httpx.Response:
+        url = path if path.startswith("http") else f"{self.base_url}{path}"
+        token = self._access_token()
+        response = self._do(method, url, token, **kwargs)
+        if response.status_code == 401 and self.oauth is not None:
+            self.oauth.invalidate(token)  # sessão expirou antes do TTL: renova e repete uma vez
+            response = self._do(method, url, self._access_token(), **kwargs)
+        response.raise_for_status()
+        return response
+
+    def _do(self, method: str, url: str, token: Optional[str], **kwargs) -> httpx.Response:
+        headers = {**kwargs.pop("headers", {}), **({"Authorization": f"Bearer {token}"} if token else {})}
+        if self._pooled:
+            return self._client.request(method, url, headers=headers, **kwargs)
+        with httpx.Client(timeout=self._timeout) as client:
+            return client.request(method, url, headers=headers, **kwargs)
+
+    def _access_token(self) -> Optional[str]:
+        if self.oauth is not None:
+            return self.oauth.get(self._client)
+        return self._token
+
+    def close(self):
+        self._client.close()
+
+
+_shared_client: Optional[CRMHttpClient] = None
+_shared_lock = threading.Lock()
+
+
+def get_crm_http_client() -> CRMHttpClient:
+    """Cliente único do processo, configurado pelo .env (CRM_*)."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            oauth = None
+            if CRM_CLIENT_ID and not CRM_ACCESS_TOKEN:
+                oauth = OAuthTokenCache(f"{CRM_BASE_URL.rstrip('/')}/services/oauth2/token",
+                                        CRM_CLIENT_ID, CRM_CLIENT_SECRET)
+            _shared_client = CRMHttpClient(CRM_BASE_URL, token=CRM_ACCESS_TOKEN or None, oauth=oauth)
+        return _shared_client
@@ -1,19 +1,21 @@
 """
-Integração CRM — Stub para Salesforce.
+Integração CRM — Salesforce.
 
-Este módulo é um STUB (simulação) da integração com o Salesforce.
-Em produção, substitua os métodos _stub_* por chamadas reais usando
-a biblioteca `simple-salesforce`:
+Em desenvolvimento e testes use stub_mode=True (simula as chamadas no log).
+Em produção (stub_mode=False) as chamadas vão à REST API do Salesforce pelo
+cliente HTTP compartilhado de src/crm_http.py: pool keep-alive, token OAuth
+em cache e circuit breaker. Com o CRM fora do ar ou lento, a atualização de
+status vai para o `buffer` (uma CRMSyncQueue, que reenvia em lote) em vez de
+travar quem chamou.
 
-    pip install simple-salesforce
+    from src.crm_http import get_crm_http_client
+    from src.crm_sync import CRMSyncQueue, SalesforceCompositeTransport
 
-    from simple_salesforce import Salesforce
-    sf = Salesforce(
-        username=os.getenv("SF_USERNAME"),
-        password=os.getenv("SF_PASSWORD"),
-        security_token=os.getenv("SF_SECURITY_TOKEN"),
-    )
-    sf.Lead.update(lead_id, {"Status": status.value, "Lead_Score__c": score})
+    http = get_crm_http_client()
+    buffer = CRMSyncQueue(SalesforceCompositeTransport(http=http, key_field="Id"),
+                          journal_path="data/crm_outbox.db")
+    crm = CRMClient(stub_mode=False, http=http, buffer=buffer)
+    crm.update_lead_status(lead_id, LeadStatus.MORNO, score=60)
 
 Campos do Salesforce que serão atualizados:
     - Lead.Status → FRIO, MORNO, QUENTE, DESQUALIFICADO
@@ -23,11 +25,21 @@ Campos do Salesforce que serão atualizados:
 import uuid
 import logging
 from enum import Enum
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
+
+import httpx
+
+from src.crm_http import CircuitOpenError, CRMHttpClient, get_crm_http_client
+
+if TYPE_CHECKING:
+    from src.crm_sync import CRMSyncQueue
 
 logger = logging.getLogger(__name__)
 
 
+SALESFORCE_API = "/services/data/v60.0"
+
+
 class LeadStatus(str, Enum):
     FRIO = "FRIO"
     MORNO = "MORNO"
@@ -42,18 +54,22 @@ class CRMClient:
     Args:
         stub_mode: Se True, simula chamadas sem fazer requests reais.
                    Use True em desenvolvimento e testes.
+        http: Cliente HTTP do Salesforce (padrão: o compartilhado do processo).
+        buffer: Fila que recebe as atualizações de status quando o CRM falha.
     """
 
-    def __init__(self, stub_mode: bool = True):
+    def __init__(self, stub_mode: bool = True, http: Optional[CRMHttpClient] = None,
+                 buffer: Optional["CRMSyncQueue"] = None):
         self._stub_mode = stub_mode
+        self._http = http
+        self._buffer = buffer
         if not stub_mode:
             self._init_salesforce()
 
     def _init_salesforce(self):
-        """Inicializa conexão real com Salesforce. TODO: implementar."""
-        raise NotImplementedError(
-            "Integração Salesforce não implementada. Use stub_mode=True para desenvolvimento."
-        )
+        """Conexão real com o Salesforce pelo cliente HTTP compartilhado."""
+        if self._http is None:
+            self._http = get_crm_http_client()
 
     def update_lead_status(
         self,
@@ -81,7 +97,24 @@ class CRMClient:
             if disqualification_reason:
                 logger.info(f"[CRM STUB] reason={disqualification_reason}")
             return {"success": True, "lead_id": lead_id}
-        raise NotImplementedError("Modo produção não implementado")
+
+        fields = {"Status": status.value, "Lead_Score__c": score}
+        if disqualification_reason:
+            fields["Disqualification_Reason__c"] = disqualification_reason
+        try:
+            self._http.request("PATCH", f"{SALESFORCE_API}/sobjects/Lead/{lead_id}", json=fields)
+            return {"success": True, "lead_id": lead_id}
+        except (CircuitOpenError, httpx.TransportError, httpx.HTTPStatusError) as exc:
+            rejected = isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code < 500
+            if self._buffer is None or rejected:
+                logger.warning(f"[CRM] update_lead {lead_id} falhou: {exc}")
+                return {"success": False, "lead_id": lead_id, "error": str(exc)}
+            # CRM fora do ar ou lento: a fila reenvia quando ele voltar
+            buffered = {"status": status.value, "score": score}
+            if disqualification_reason:
+                buffered["disqualification_reason"] = disqualification_reason
+            self._buffer.enqueue(lead_id, **buffered)
+            return {"success": False, "lead_id": lead_id, "buffered": True}
 
     def create_lead(
         self,
@@ -108,4 +141,13 @@ class CRMClient:
             fake_id = f"STUB-{str(uuid.uuid4())[:8].upper()}"
             logger.info(f"[CRM STUB] create_lead: name={name} email={email} id={fake_id}")
             return {"success": True, "id": fake_id}
-        raise NotImplementedError("Modo produção não implementado")
+
+        fields = {"LastName": name, "Email": email, "Phone": phone, "Company": company or name}
+        if cnpj:
+            fields["CNPJ__c"] = cnpj
+        try:
+            response = self._http.request("POST", f"{SALESFORCE_API}/sobjects/Lead", json=fields)
+            return {"success": True, "id": response.json()["id"]}
+        except (CircuitOpenError, httpx.HTTPError) as exc:
+            logger.warning(f"[CRM] create_lead {email} falhou: {exc}")
+            return {"success": False, "error": str(exc)}
@@ -0,0 +1,345 @@
+"""
+Fila write-behind de atualizações do lead para o CRM (Salesforce).
+
+O /chat não espera o Salesforce: cada turno só enfileira os campos do lead
+(status, score, contato) e responde. Uma thread envia a fila em lotes:
+
+  - coalescência: várias atualizações do mesmo lead antes do envio viram uma
+    só, com o valor mais recente de cada campo (FRIO → MORNO → QUENTE em três
+    turnos = um registro com QUENTE)
+  - lotes de até `batch_size` registros por chamada (sObject Collections do
+    Salesforce: upsert de até 200 registros), disparados quando a fila enche
+    ou `flush_seconds` depois da atualização mais antiga
+  - diário local em SQLite: tudo que ainda não foi confirmado pelo CRM fica
+    gravado e é reenviado quando o processo volta de uma queda
+  - falha do CRM (rede, 5xx): o lote volta para a fila com backoff; registro
+    recusado individualmente (erro de validação) é descartado e contado
+
+O envio é feito por um transporte plugável — send_batch(records) -> list[bool];
+SalesforceCompositeTransport faz o upsert por External_Id__c pelo cliente HTTP
+compartilhado (src/crm_http.py), sempre com LastName e Company (obrigatórios
+para o upsert criar o lead). Com o circuito aberto o lote falha na hora e
+continua na fila/diário até o CRM voltar.
+
+Uso:
+    queue = CRMSyncQueue(SalesforceCompositeTransport(base_url, token), journal_path="data/crm_outbox.db")
+    queue.enqueue("sess-001", status="MORNO", score=60)
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional, Protocol
+
+from src.config import CRM_SYNC_BATCH_SIZE, CRM_SYNC_FLUSH_SECONDS
+from src.crm_http import CRMHttpClient
+from src.crm_integration import LeadStatus
+from src.models import LeadData
+
+logger = logging.getLogger(__name__)
+
+# Campo local → campo do Lead no Salesforce
+SALESFORCE_FIELDS = {
+    "status": "Status",
+    "score": "Lead_Score__c",
+    "disqualification_reason": "Disqualification_Reason__c",
+    "name": "LastName",
+    "email": "Email",
+    "phone": "Phone",
+    "cnpj": "CNPJ__c",
+    "state": "State",
+    "city": "City",
+}
+EXTERNAL_ID_FIELD = "External_Id__c"
+# Obrigatórios para criar um Lead no Salesforce: o upsert que cria o lead sem
+# eles volta REQUIRED_FIELD_MISSING. Company recebe o nome, como em
+# CRMClient.create_lead sem empresa; sem nome, vai o marcador até o cliente informar.
+MISSING_FIELD_PLACEHOLDER = "Não informado"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS crm_outbox (
+    lead_id TEXT PRIMARY KEY,
+    fields TEXT NOT NULL,      -- JSON com tudo que ainda não foi confirmado
+    version INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def lead_fields(lead_data: LeadData) -> dict:
+    """Campos do LeadData que vão para o CRM (só os preenchidos)."""
+    status = LeadStatus.DESQUALIFICADO if lead_data.disqualified_reason else LeadStatus(lead_data.classification.value)
+    fields = {
+        "status": status.value,
+        "score": lead_data.score,
+        "disqualification_reason": lead_data.disqualified_reason,
+        "name": lead_data.name,
+        "email": lead_data.email,
+        "phone": lead_data.whatsapp,
+        "cnpj": lead_data.cnpj,
+        "state": lead_data.state,
+        "city": lead_data.city,
+    }
+    return {k: v for k, v in fields.items() if v is not None}
+
+
+class CRMTransport(Protocol):
+    def send_batch(self, records: list[tuple[str, dict]]) -> list[bool]:
+        """
+        Envia [(lead_id, campos)] num único request; um bool por registro
+        (False = recusado pelo CRM, não adianta reenviar). Exceção = lote
+        inteiro falhou e será reenviado.
+        """
+        ...
+
+
+class SalesforceCompositeTransport:
+    """
+    Envio em lote pelas sObject Collections do Salesforce.
+
+    Com key_field="External_Id__c" (padrão) faz upsert pelo id externo (o
+    session_id): PATCH /composite/sobjects/Lead/External_Id__c. Com
+    key_field="Id", atualiza leads já existentes: PATCH /composite/sobjects.
+    Os requests passam pelo CRMHttpClient (pool, OAuth, circuit breaker).
+    """
+
+    def __init__(self, base_url: str = "", token: Optional[str] = None, api_version: str = "v60.0",
+                 http: Optional[CRMHttpClient] = None, key_field: str = EXTERNAL_ID_FIELD):
+        self.http = http or CRMHttpClient(base_url, token=token)
+        self.key_field = key_field
+        path = f"/services/data/{api_version}/composite/sobjects"
+        self.path = path if key_field == "Id" else f"{path}/Lead/{key_field}"
+
+    def send_batch(self, records: list[tuple[str, dict]]) -> list[bool]:
+        key = "id" if self.key_field == "Id" else self.key_field
+        body = {
+            "allOrNone": False,
+            "records": [
+                {"attributes": {"type": "Lead"}, key: lead_id, **self._record(fields)}
+                for lead_id, fields in records
+            ],
+        }
+        results = self.http.request("PATCH", self.path, json=body).json()
+        for (lead_id, _), result in zip(records, results):
+            if not result.get("success"):
+                logger.warning(f"[CRM SYNC] lead {lead_id} recusado: {result.get('errors')}")
+        return [bool(r.get("success")) for r in results]
+
+    def _record(self, fields: dict) -> dict:
+        """Campos do Lead no Salesforce; no upsert, com os obrigatórios para criar o lead."""
+        record = {SALESFORCE_FIELDS[k]: v for k, v in fields.items() if k in SALESFORCE_FIELDS}
+        if self.key_field != "Id":
+            record.setdefault("LastName", MISSING_FIELD_PLACEHOLDER)
+            record.setdefault("Company", fields.get("name") or MISSING_FIELD_PLACEHOLDER)
+        return record
+
+
+@dataclass
+class CRMSyncStats:
+    """Contadores da fila expostos no /health."""
+    enqueued: int = 0
+    coalesced: int = 0
+    flushed: int = 0
+    batches: int = 0
+    rejected: int = 0
+    failures: int = 0
+    recovered: int = 0
+    pending: int = 0
+
+
+@dataclass
+class _Entry:
+    fields: dict
+    version: int
+    since: float  # primeira atualização ainda não enviada
+
+
+class CRMSyncQueue:
+    """
+    Fila write-behind com coalescência por lead, envio em lote e diário local.
+
+    Args:
+        transport: Destino dos lotes (SalesforceCompositeTransport ou fake em testes).
+        journal_path: Arquivo SQLite do diário (padrão: em memória, sem recuperação).
+        batch_size: Registros por chamada; fila cheia dispara o envio.
+        flush_seconds: Espera máxima de uma atualização antes do envio.
+        retry_seconds: Primeiro intervalo do backoff quando o CRM falha.
+        dry_run: Se True, não inicia a thread de envio (chame flush()).
+    """
+
+    def __init__(
+        self,
+        transport: CRMTransport,
+        journal_path: Optional[str] = None,
+        batch_size: int = CRM_SYNC_BATCH_SIZE,
+        flush_seconds: float = CRM_SYNC_FLUSH_SECONDS,
+        retry_seconds: float = 1.0,
+        max_retry_seconds: float = 60.0,
+        dry_run: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.transport = transport
+        self._batch_size = max(1, batch_size)
+        self._flush_seconds = flush_seconds
+        self._retry_seconds = retry_seconds
+        self._max_retry_seconds = max_retry_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # um lote em voo por vez
+        self._wake = threading.Event()
+        self._pending: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._inflight: dict[str, dict] = {}
+        self._version = 0
+        self._backoff = 0.0
+        self._retry_at = 0.0
+        self._stats = CRMSyncStats()
+
+        self._db = sqlite3.connect(journal_path or ":memory:", check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._recover()
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if not dry_run:
+            self.start()
+
+    # ── Entrada ─────────────────────────────────────────────────────────────
+
+    def enqueue(self, lead_id: str, **fields):
+        """Agenda a atualização do lead; campos repetidos antes do envio ficam com o último valor."""
+        with self._lock:
+            self._version += 1
+            entry = self._pending.get(lead_id)
+            if entry is None:
+                entry = self._pending[lead_id] = _Entry({}, 0, self._clock())
+            else:
+                self._stats.coalesced += 1
+            entry.fields.update(fields)
+            entry.version = self._version
+            self._stats.enqueued += 1
+            # O diário guarda também o que está em voo: se o lote falhar ou o processo cair, nada se perde
+            journal = {**self._inflight.get(lead_id, {}), **entry.fields}
+            self._db.execute(
+                "INSERT OR REPLACE INTO crm_outbox (lead_id, fields, version, updated_at) VALUES (?, ?, ?, ?)",
+                (lead_id, json.dumps(journal), entry.version, time.time()),
+            )
+            full = len(self._pending) >= self._batch_size
+        if full:
+            self._wake.set()
+
+    def enqueue_lead(self, lead_data: LeadData):
+        self.enqueue(lead_data.session_id, **lead_fields(lead_data))
+
+    def _recover(self):
+        rows = self._db.execute("SELECT lead_id, fields, version FROM crm_outbox ORDER BY updated_at").fetchall()
+        now = self._clock()
+        for lead_id, fields, version in rows:
+            self._pending[lead_id] = _Entry(json.loads(fields), version, now)
+            self._version = max(self._version, version)
+        self._stats.recovered = len(rows)
+        if rows:
+            logger.info(f"[CRM SYNC] {len(rows)} atualizações recuperadas do diário")
+
+    # ── Envio ───────────────────────────────────────────────────────────────
+
+    def flush(self, force: bool = True) -> int:
+        """
+        Envia um lote. Sem `force`, só se a fila encheu ou a atualização mais
+        antiga já esperou `flush_seconds`. Retorna quantos registros o CRM
+        processou (aceitos ou recusados); 0 se nada foi enviado ou o envio falhou.
+        """
+        with self._flush_lock:
+            now = self._clock()
+            with self._lock:
+                if not self._pending or (not force and now < self._retry_at):
+                    return 0
+                oldest = next(iter(self._pending.values())).since
+                if not force and len(self._pending) < self._batch_size and now - oldest < self._flush_seconds:
+                    return 0
+                batch = []
+                while self._pending and len(batch) < self._batch_size:
+                    lead_id, entry = self._pending.popitem(last=False)
+                    batch.append((lead_id, entry))
+                    self._inflight[lead_id] = entry.fields
+
+            try:
+                results = list(self.transport.send_batch([(lead_id, entry.fields) for lead_id, entry in batch]))
+                if len(results) != len(batch):
+                    # Sem resultado não dá para saber o que o CRM gravou: o lote inteiro volta para a fila
+                    raise RuntimeError(f"CRM devolveu {len(results)} resultados para {len(batch)} registros")
+            except Exception as exc:
+                self._requeue(batch, exc)
+                return 0
+
+            with self._lock:
+                self._backoff, self._retry_at = 0.0, 0.0
+                for (lead_id, entry), accepted in zip(batch, results):
+                    del self._inflight[lead_id]
+                    # Versão mais nova no diário = chegou atualização durante o envio: fica para o próximo lote
+                    self._db.execute("DELETE FROM crm_outbox WHERE lead_id = ? AND version = ?",
+                                     (lead_id, entry.version))
+                    if not accepted:
+                        self._stats.rejected += 1
+                self._stats.flushed += sum(1 for ok in results if ok)
+                self._stats.batches += 1
+            return len(batch)
+
+    def _requeue(self, batch: list[tuple[str, _Entry]], exc: Exception):
+        with self._lock:
+            self._stats.failures += 1
+            self._backoff = min(self._max_retry_seconds, self._backoff * 2 or self._retry_seconds)
+            self._retry_at = self._clock() + self._backoff
+            for lead_id, entry in reversed(batch):
+                del self._inflight[lead_id]
+                newer = self._pending.pop(lead_id, None)
+                if newer is not None:  # atualização chegou durante o envio: vale por cima
+                    entry.fields.update(newer.fields)
+                    entry.version = newer.version
+                self._pending[lead_id] = entry
+                self._pending.move_to_end(lead_id, last=False)
+        logger.warning(f"[CRM SYNC] Falha no envio de {len(batch)} registros, nova tentativa em {self._backoff:.1f}s: {exc}")
+
+    # ── Estado ──────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._stats.pending = len(self._pending) + len(self._inflight)
+            return asdict(self._stats)
+
+    def start(self):
+        """Inicia a thread de envio (lotes por tamanho ou por tempo)."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="crm-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self, drain: bool = True):
+        """Para a thread e tenta enviar o que sobrou (o que falhar fica no diário)."""
+        self.stop()
+        if drain:
+            while self._pending and self.flush():
+                pass
+        self._db.close()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(timeout=min(self._flush_seconds, 1.0) / 2)
+            self._wake.clear()
+            try:
+                while self.flush(force=False):
+                    pass
+            except Exception as exc:
+                logger.warning(f"[CRM SYNC] Erro inesperado no envio: {exc}")
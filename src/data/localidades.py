@@ -0,0 +1,87 @@
+# src/data/localidades.py
+"""
+Estados e principais cidades por UF para a extração determinística de
+localização (src/lead_extractor.py).
+
+Cobre os 27 estados de PESO_MINIMO_CIF_POR_ESTADO. As cidades são a capital
+e os maiores municípios de cada estado — cidades fora da lista ainda são
+reconhecidas no formato "Cidade/UF" ou "Cidade - UF".
+
+Nomes que são palavras comuns ("Serra", "Paulista", "Santana") ficam de fora
+para não gerar falsos positivos.
+"""
+
+# Nome do estado (sem acento, minúsculo) → UF
+UF_POR_NOME_ESTADO: dict[str, str] = {
+    "acre": "AC",
+    "alagoas": "AL",
+    "amapa": "AP",
+    "amazonas": "AM",
+    "bahia": "BA",
+    "ceara": "CE",
+    "distrito federal": "DF",
+    "espirito santo": "ES",
+    "goias": "GO",
+    "maranhao": "MA",
+    "mato grosso": "MT",
+    "mato grosso do sul": "MS",
+    "minas gerais": "MG",
+    # "pará" sem acento é a preposição "para" — tratado à parte no extrator
+    "paraiba": "PB",
+    "parana": "PR",
+    "pernambuco": "PE",
+    "piaui": "PI",
+    "rio de janeiro": "RJ",
+    "rio grande do norte": "RN",
+    "rio grande do sul": "RS",
+    "rondonia": "RO",
+    "roraima": "RR",
+    "santa catarina": "SC",
+    "sao paulo": "SP",
+    "sergipe": "SE",
+    "tocantins": "TO",
+}
+
+CIDADES_POR_UF: dict[str, list[str]] = {
+    "AC": ["Rio Branco", "Cruzeiro do Sul"],
+    "AL": ["Maceió", "Arapiraca"],
+    "AP": ["Macapá", "Laranjal do Jari"],
+    "AM": ["Manaus", "Parintins", "Itacoatiara"],
+    "BA": ["Salvador", "Feira de Santana", "Vitória da Conquista", "Camaçari", "Juazeiro", "Ilhéus", "Itabuna"],
+    "CE": [
+        "Fortaleza", "Caucaia", "Juazeiro do Norte", "Maracanaú", "Sobral", "Crato",
+        "Itapipoca", "Maranguape", "Iguatu", "Quixadá", "Crateús", "Aquiraz", "Eusébio",
+        "Pacatuba", "Horizonte", "Russas", "Canindé",
+    ],
+    "DF": ["Brasília", "Taguatinga", "Ceilândia"],
+    "ES": ["Vitória", "Vila Velha", "Cariacica", "Linhares", "Cachoeiro de Itapemirim"],
+    "GO": ["Goiânia", "Aparecida de Goiânia", "Anápolis", "Rio Verde"],
+    "MA": ["São Luís", "Imperatriz", "Timon", "Caxias", "Bacabal"],
+    "MT": ["Cuiabá", "Várzea Grande", "Rondonópolis", "Sinop"],
+    "MS": ["Campo Grande", "Dourados", "Três Lagoas"],
+    "MG": ["Belo Horizonte", "Uberlândia", "Contagem", "Juiz de Fora", "Montes Claros", "Betim", "Uberaba"],
+    "PA": ["Belém", "Ananindeua", "Santarém", "Marabá", "Parauapebas"],
+    "PB": ["João Pessoa", "Campina Grande", "Santa Rita", "Bayeux"],
+    "PR": ["Curitiba", "Londrina", "Maringá", "Ponta Grossa", "Cascavel", "Foz do Iguaçu"],
+    "PE": ["Recife", "Jaboatão dos Guararapes", "Olinda", "Caruaru", "Petrolina"],
+    "PI": ["Teresina", "Parnaíba", "Picos"],
+    "RJ": ["Niterói", "São Gonçalo", "Duque de Caxias", "Nova Iguaçu", "Campos dos Goytacazes"],
+    "RN": ["Natal", "Mossoró", "Parnamirim"],
+    "RS": ["Porto Alegre", "Caxias do Sul", "Pelotas", "Canoas", "Santa Maria"],
+    "RO": ["Porto Velho", "Ji-Paraná", "Ariquemes"],
+    "RR": ["Boa Vista"],
+    "SC": ["Florianópolis", "Joinville", "Blumenau", "Chapecó", "Itajaí", "Criciúma"],
+    "SP": [
+        "Campinas", "Guarulhos", "São Bernardo do Campo", "Santo André", "Osasco",
+        "Ribeirão Preto", "Sorocaba", "Santos", "São José dos Campos",
+    ],
+    "SE": ["Aracaju", "Nossa Senhora do Socorro", "Lagarto"],
+    "TO": ["Palmas", "Araguaína", "Gurupi"],
+}
+
+# Cidades cujo nome também é palavra comum ("antes do natal", "palmas") —
+# só reconhecidas com inicial maiúscula
+CIDADES_AMBIGUAS: frozenset[str] = frozenset({
+    "Natal", "Vitória", "Horizonte", "Palmas", "Santos", "Lagarto", "Picos",
+    "Canoas", "Contagem", "Pelotas", "Cascavel", "Imperatriz", "Crato",
+})
@@ -0,0 +1,87 @@
+# src/data/product_catalog.py
+"""
+Nomenclatura técnica do portfólio da Aço Cearense por termo popular.
+
+Fonte: tabela de 22 grupos de PRODUCT_SPECIALIST_INSTRUCTIONS e
+knowledge/catalog_groups/*.txt (gerados da planilha de produtos).
+
+Mantido como dados Python (determinístico), assim como weight_rules.py,
+para que o resumo de orçamento use o nome técnico sem depender de RAG/LLM.
+"""
+import unicodedata
+from typing import Optional
+
+# (termo popular, grupo do catálogo, nome técnico) — termos mais específicos primeiro
+TERMOS_POPULARES: list[tuple[str, str, str]] = [
+    ("ferro de coluna", "CA-60", "Vergalhão CA-60"),
+    ("ca-60", "CA-60", "Vergalhão CA-60"),
+    ("ca 60", "CA-60", "Vergalhão CA-60"),
+    ("ca-50", "CA-50", "Vergalhão CA-50"),
+    ("ca 50", "CA-50", "Vergalhão CA-50"),
+    ("ferro de construcao", "CA-50", "Vergalhão CA-50"),
+    ("ferro para laje", "CA-50", "Vergalhão CA-50"),
+    ("vergalhao", "CA-50", "Vergalhão CA-50"),
+    ("trelica", "Trelica", "Treliça para Laje"),
+    ("tela coluna", "Tela Coluna", "Tela Coluna"),
+    ("tela articulada", "Articulada", "Tela Articulada"),
+    ("cerca articulada", "Articulada", "Tela Articulada"),
+    ("tela soldada", "Tela", "Tela Soldada"),
+    ("tela", "Tela", "Tela Soldada"),
+    ("metalon", "Tubo", "Metalon (Tubo Quadrado/Retangular)"),
+    ("tubo quadrado", "Tubo", "Metalon (Tubo Quadrado/Retangular)"),
+    ("tubo retangular", "Tubo", "Metalon (Tubo Quadrado/Retangular)"),
+    ("tubo galvanizado", "Tubo", "Tubo Galvanizado"),
+    ("tubo industrial", "Tubo", "Tubo Industrial"),
+    ("tubo redondo", "Tubo", "Tubo Industrial"),
+    ("cano de ferro", "Tubo", "Tubo Industrial"),
+    ("tubo", "Tubo", "Tubo Industrial"),
+    ("telha", "Telha", "Telha Trapezoidal Galvanizada"),
+    ("ferro chato", "Barra Laminada", "Barra Chata"),
+    ("barra chata", "Barra Laminada", "Barra Chata"),
+    ("l de ferro", "Barra Laminada", "Cantoneira"),
+    ("cantoneira", "Barra Laminada", "Cantoneira"),
+    ("barra", "Barra Laminada", "Barra Laminada"),
+    ("perfil w", "Perfil W", "Perfil W (Duplo T)"),
+    ("viga w", "Perfil W", "Perfil W (Duplo T)"),
+    ("duplo t", "Perfil W", "Perfil W (Duplo T)"),
+    ("perfil u", "Perfis", "Perfil U"),
+    ("enrijecido", "Perfis", "Perfil U Enrijecido"),
+    ("perfil", "Perfis", "Perfil U"),
+    ("chapa grossa", "Chapa A-36", "Chapa A-36"),
+    ("a-36", "Chapa A-36", "Chapa A-36"),
+    ("a36", "Chapa A-36", "Chapa A-36"),
+    ("chapa galvanizada", "Chapa Plana", "Chapa Plana Galvanizada"),
+    ("chapa", "Chapa Plana", "Chapa Plana"),
+    ("bobina slitter", "Bobina Slitter", "Bobina Slitter"),
+    ("tira de aco", "Bobina Slitter", "Bobina Slitter"),
+    ("bobininha", "Bobininha", "Bobininha"),
+    ("bobina", "Bobina", "Bobina de Aço"),
+    ("arame", "Arame", "Arame Recozido"),
+    ("fio-maquina", "FM", "Fio-Máquina"),
+    ("fio maquina", "FM", "Fio-Máquina"),
+    ("lambril", "Lambril", "Lambril Ondulado"),
+    ("caixilho", "Caixilho", "Caixilho"),
+    ("tarugo", "Tarugo", "Tarugo de Aço"),
+    ("sucata", "Sucata", "Sucata de Aço"),
+    ("ferro", "CA-50", "Vergalhão CA-50"),
+]
+
+
+def normalizar_texto(texto: str) -> str:
+    """Minúsculas e sem acentos — 'Vergalhão' → 'vergalhao'."""
+    sem_acento = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return " ".join(sem_acento.lower().split())
+
+
+def resolver_produto(texto: Optional[str]) -> Optional[tuple[str, str]]:
+    """
+    Resolve um termo popular para (grupo, nome técnico) do catálogo.
+    Retorna None se nenhum termo do portfólio for reconhecido.
+    """
+    if not texto:
+        return None
+    normalizado = normalizar_texto(texto)
+    for termo, grupo, nome_tecnico in TERMOS_POPULARES:
+        if termo in normalizado:
+            return grupo, nome_tecnico
+    return None
@@ -0,0 +1,355 @@
+# src/data/sku_index.py
+"""
+Índice colunar de SKUs do catálogo da Aço Cearense.
+
+Fonte: produtos_informações_sem_inox.xlsx, via scripts/generate_catalog_rag.py,
+que grava knowledge/sku_index.arrow (Arrow IPC, sem compressão) ao lado de
+knowledge/catalog_groups/*.txt. Os .txt guardam só exemplos para o RAG; o
+índice guarda a planilha inteira.
+
+Colunas: sap, descricao, grupo, subgrupo, kg_un, largura_mm, comprimento_mm,
+bitola, espessura_mm e chave (descrição normalizada em tokens).
+
+O arquivo é aberto por memory-map (zero-cópia): só o índice invertido de
+tokens (token → linhas) é montado em memória no carregamento. Uma consulta
+como 'TUBO IND 1 1/4 1,20mm' resolve SKU + peso em microssegundos, sem busca
+vetorial nem interpretação por LLM.
+
+Sem o .arrow (planilha ainda não processada), o índice é montado em memória
+a partir dos produtos representativos de knowledge/catalog_groups/*.txt.
+"""
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.data.product_catalog import normalizar_texto
+
+SCHEMA = pa.schema([
+    ("sap", pa.int64()),
+    ("descricao", pa.string()),
+    ("grupo", pa.string()),
+    ("subgrupo", pa.string()),
+    ("kg_un", pa.float64()),
+    ("largura_mm", pa.float64()),
+    ("comprimento_mm", pa.float64()),
+    ("bitola", pa.string()),
+    ("espessura_mm", pa.float64()),
+    ("chave", pa.string()),
+])
+
+# Grupos em que a medida em mm da descrição é o diâmetro (bitola), não a espessura
+GRUPOS_BITOLA_MM = {"CA-50", "CA-60", "FM", "Arame", "Tela", "Tela Coluna"}
+
+_RE_MM = re.compile(r"(\d+(?:[.,]\d+)?)\s*mm\b", re.IGNORECASE)
+_RE_POLEGADA = re.compile(r'(?<![\d/.,])(\d+[ .]\d+/\d+|\d+/\d+|\d+")')
+_RE_DECIMAL = re.compile(r"(\d+,\d+)\s*(mm|cm|m)?\b", re.IGNORECASE)
+_RE_BWG = re.compile(r"\bBWG\s*(\d+)", re.IGNORECASE)
+_RE_MEDIDA = re.compile(r"(\d+(?:[.,]\d+)?)\s*(mm|cm|m)?\b", re.IGNORECASE)
+_FATOR_MM = {"mm": 1, "cm": 10, "m": 1000}
+
+
+def _numero(texto: str) -> float:
+    return float(texto.replace(",", "."))
+
+
+def parse_float(valor: Any) -> Optional[float]:
+    """Peso da planilha (número, '3.70' ou '3,70') → float; vazio → None."""
+    if valor is None or valor == "":
+        return None
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    try:
+        return _numero(str(valor).strip())
+    except ValueError:
+        return None
+
+
+def parse_medida_mm(valor: Any) -> Optional[float]:
+    """Largura/comprimento da planilha (6480, '6480mm', '6m', '2,45m') → mm."""
+    if valor is None or valor == "":
+        return None
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    match = _RE_MEDIDA.search(str(valor))
+    if not match:
+        return None
+    return _numero(match.group(1)) * _FATOR_MM[(match.group(2) or "mm").lower()]
+
+
+def parse_bitola_espessura(descricao: str, grupo: str = "") -> tuple[Optional[str], Optional[float]]:
+    """
+    Extrai (bitola, espessura em mm) da descrição da planilha.
+
+    - Polegadas viram bitola: 'TUBO IND. 1 1/4" 1,20mm' → ('1 1/4"', 1.2)
+    - Em vergalhão, fio-máquina, arame e telas o primeiro valor em mm é a
+      bitola: 'VERGALHAO CA50 10,00mm' → ('10mm', None)
+    - Arame BWG: 'ARAME RECOZIDO BWG 18' → ('BWG 18', None)
+    - Nos demais grupos o primeiro valor decimal em mm é a espessura:
+      'CH PLANA 0,95mm GA 3000mm X 1200mm' → (None, 0.95)
+    """
+    bitola = None
+    espessura = None
+
+    bwg = _RE_BWG.search(descricao)
+    if bwg:
+        bitola = f"BWG {bwg.group(1)}"
+
+    polegada = _RE_POLEGADA.search(descricao)
+    if polegada and bitola is None:
+        valor = polegada.group(1).rstrip('"').replace(".", " ")
+        bitola = f'{valor}"'
+
+    # Decimais em mm ou sem unidade ('TELA Q113 3,8 100x100mm')
+    decimais = [
+        _numero(m.group(1)) for m in _RE_DECIMAL.finditer(descricao)
+        if (m.group(2) or "mm").lower() == "mm"
+    ]
+    if grupo in GRUPOS_BITOLA_MM:
+        medidas = decimais or [_numero(m.group(1)) for m in _RE_MM.finditer(descricao)]
+        if medidas and bitola is None:
+            bitola = f"{medidas[0]:g}mm"
+    elif decimais:
+        espessura = decimais[0]
+
+    return bitola, espessura
+
+
+def tokenizar(texto: str) -> list[str]:
+    """
+    Tokens canônicos de uma descrição ou consulta.
+
+    'TUBO IND. 1 1/4" 1,20mm LF' e 'tubo ind 1 1/4 1.2 mm lf' geram os mesmos
+    tokens: sem acento/caixa, medidas em mm com o mesmo formato, '40mmX20mm'
+    separado em '40mm 20mm' e pontuação de abreviação removida.
+    """
+    t = normalizar_texto(texto)
+    t = re.sub(r"(\d)\.(\d+/\d+)", r"\1 \2", t)  # 1.1/2 → 1 1/2
+    t = re.sub(r"(\d)\s*(mm|cm|m)?\s*x\s*(?=\d)", r"\1\2 ", t)  # 40mmx20mm → 40mm 20mm
+    t = _RE_MM.sub(lambda m: f" {_numero(m.group(1)):g}mm ", t)
+    t = re.sub(r'["()]|\.(?!\d)|,(?!\d)', " ", t)
+    return t.split()
+
+
+@dataclass
+class Sku:
+    """Um item do catálogo."""
+    sap: int
+    descricao: str
+    grupo: str
+    subgrupo: str
+    kg_un: Optional[float] = None
+    largura_mm: Optional[float] = None
+    comprimento_mm: Optional[float] = None
+    bitola: Optional[str] = None
+    espessura_mm: Optional[float] = None
+
+    def resumo(self) -> str:
+        peso = f"{self.kg_un:.2f} kg/un" if self.kg_un is not None else "peso não cadastrado"
+        grupo = f"{self.grupo}/{self.subgrupo}" if self.subgrupo else self.grupo
+        return f"Cód {self.sap}: {self.descricao} — {peso} [{grupo}]"
+
+
+def montar_tabela(linhas: Iterable[dict]) -> pa.Table:
+    """
+    Tabela Arrow do índice a partir das linhas da planilha.
+
+    Cada linha é um dict com sap, descricao, grupo, subgrupo, peso, largura e
+    comprimento (valores crus da planilha).
+    """
+    colunas: dict[str, list] = {nome: [] for nome in SCHEMA.names}
+    for linha in linhas:
+        descricao = str(linha["descricao"]).strip()
+        grupo = str(linha["grupo"])
+        bitola, espessura = parse_bitola_espessura(descricao, grupo)
+        colunas["sap"].append(int(linha["sap"]))
+        colunas["descricao"].append(descricao)
+        colunas["grupo"].append(grupo)
+        colunas["subgrupo"].append(str(linha.get("subgrupo") or ""))
+        colunas["kg_un"].append(parse_float(linha.get("peso")))
+        colunas["largura_mm"].append(parse_medida_mm(linha.get("largura")))
+        colunas["comprimento_mm"].append(parse_medida_mm(linha.get("comprimento")))
+        colunas["bitola"].append(bitola)
+        colunas["espessura_mm"].append(espessura)
+        colunas["chave"].append(" ".join(tokenizar(descricao)))
+
+    return pa.table(colunas, schema=SCHEMA)
+
+
+def escrever_indice(linhas: Iterable[dict], caminho: str) -> int:
+    """Grava o índice Arrow (ver montar_tabela). Retorna o número de SKUs gravados."""
+    tabela = montar_tabela(linhas)
+    Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+    with pa.OSFile(caminho, "wb") as sink:
+        with pa.ipc.new_file(sink, SCHEMA) as writer:
+            writer.write_table(tabela)
+    return tabela.num_rows
+
+
+_RE_LINHA_TXT = re.compile(
+    r"^- Cód (\d+): (.+?)(?: \[([^\]]*)\])?(?: — ([\d.,]+)kg/un)?$"
+)
+
+
+def linhas_de_catalog_groups(diretorio: str) -> Iterable[dict]:
+    """
+    Linhas do índice a partir de knowledge/catalog_groups/*.txt (seção
+    PRODUTOS REPRESENTATIVOS gerada por generate_catalog_rag.py).
+    """
+    for arquivo in sorted(Path(diretorio).glob("*.txt")):
+        grupo = ""
+        for texto in arquivo.read_text(encoding="utf-8").splitlines():
+            if texto.startswith("GRUPO: "):
+                grupo = texto[len("GRUPO: "):].strip()
+                continue
+            match = _RE_LINHA_TXT.match(texto.strip())
+            if not match:
+                continue
+            sap, descricao, dims, peso = match.groups()
+            medidas = [d.strip() for d in (dims or "").split("|") if d.strip()]
+            yield {
+                "sap": sap,
+                "descricao": descricao,
+                "grupo": grupo,
+                "subgrupo": "",
+                "peso": peso,
+                # O .txt junta largura e comprimento; um valor só é o comprimento
+                "largura": medidas[0] if len(medidas) == 2 else None,
+                "comprimento": medidas[-1] if medidas else None,
+            }
+
+
+class SkuIndex:
+    """Índice de SKUs aberto por memory-map, com busca exata e filtros."""
+
+    def __init__(self, tabela: pa.Table):
+        self._tabela = tabela
+        self._colunas = {
+            nome: tabela.column(nome) for nome in SCHEMA.names if nome != "chave"
+        }
+        self._grupos = pc.utf8_lower(tabela.column("grupo"))
+        self._subgrupos = pc.utf8_lower(tabela.column("subgrupo"))
+        self._por_sap: dict[int, int] = {
+            sap: i for i, sap in enumerate(tabela.column("sap").to_pylist())
+        }
+        self._por_token: dict[str, set[int]] = {}
+        self._n_tokens: list[int] = []
+        for i, chave in enumerate(tabela.column("chave").to_pylist()):
+            tokens = chave.split()
+            self._n_tokens.append(len(tokens))
+            for token in tokens:
+                self._por_token.setdefault(token, set()).add(i)
+        self._bitolas = pa.array([
+            " ".join(tokenizar(b)) if b else None
+            for b in tabela.column("bitola").to_pylist()
+        ], pa.string())
+
+    @classmethod
+    def abrir(cls, caminho: str) -> "SkuIndex":
+        """Abre o arquivo gerado por escrever_indice() sem copiar as colunas."""
+        fonte = pa.memory_map(str(caminho), "r")
+        return cls(pa.ipc.open_file(fonte).read_all())
+
+    @classmethod
+    def de_catalog_groups(cls, diretorio: str) -> "SkuIndex":
+        """Índice em memória com os produtos representativos dos .txt por grupo."""
+        return cls(montar_tabela(linhas_de_catalog_groups(diretorio)))
+
+    def __len__(self) -> int:
+        return self._tabela.num_rows
+
+    def _sku(self, linha: int) -> Sku:
+        return Sku(**{nome: coluna[linha].as_py() for nome, coluna in self._colunas.items()})
+
+    def por_sap(self, sap: int) -> Optional[Sku]:
+        linha = self._por_sap.get(int(sap))
+        return self._sku(linha) if linha is not None else None
+
+    def buscar(self, consulta: str, limite: int = 5) -> list[Sku]:
+        """
+        SKUs cuja descrição contém todos os tokens da consulta.
+
+        Aceita também o código SAP. Os mais específicos (menos tokens extras)
+        vêm primeiro — uma descrição idêntica à consulta fica no topo.
+        """
+        consulta = consulta.strip()
+        if consulta.isdigit():
+            sku = self.por_sap(int(consulta))
+            if sku is not None:
+                return [sku]
+
+        tokens = set(tokenizar(consulta))
+        if not tokens:
+            return []
+        candidatos = sorted((self._por_token.get(t, set()) for t in tokens), key=len)
+        linhas = set(candidatos[0]).intersection(*candidatos[1:])
+        ordenadas = sorted(linhas, key=lambda i: (self._n_tokens[i], i))
+        return [self._sku(i) for i in ordenadas[:limite]]
+
+    def filtrar(
+        self,
+        grupo: Optional[str] = None,
+        subgrupo: Optional[str] = None,
+        bitola: Optional[str] = None,
+        espessura_mm: Optional[float] = None,
+        limite: Optional[int] = 20,
+    ) -> list[Sku]:
+        """Filtra SKUs por grupo, subgrupo, bitola e/ou espessura (comparação exata, sem acento/caixa)."""
+        mascara = None
+
+        def combinar(condicao):
+            nonlocal mascara
+            mascara = condicao if mascara is None else pc.and_(mascara, condicao)
+
+        for coluna, valor in ((self._grupos, grupo), (self._subgrupos, subgrupo)):
+            if valor:
+                combinar(pc.equal(coluna, valor.lower()))
+        if bitola:
+            combinar(pc.equal(self._bitolas, " ".join(tokenizar(bitola))))
+        if espessura_mm is not None:
+            diferenca = pc.abs(pc.subtract(self._colunas["espessura_mm"], espessura_mm))
+            combinar(pc.less(diferenca, 0.005))
+
+        if mascara is None:
+            indices = list(range(len(self)))[:limite]
+        else:
+            indices = pc.indices_nonzero(pc.fill_null(mascara, False)).to_pylist()[:limite]
+        return [self._sku(i) for i in indices]
+
+
+_sku_index: Optional[SkuIndex] = None
+_sku_index_carregado = False
+_sku_index_lock = threading.Lock()
+
+
+def get_sku_index() -> Optional[SkuIndex]:
+    """
+    Índice compartilhado do processo (aberto uma vez).
+
+    Usa knowledge/sku_index.arrow; sem ele, os produtos representativos de
+    knowledge/catalog_groups/. Retorna None se nenhum dos dois existir.
+    """
+    global _sku_index, _sku_index_carregado
+    if not _sku_index_carregado:
+        with _sku_index_lock:
+            if not _sku_index_carregado:
+                from src import config
+                catalog_groups = Path(config.KNOWLEDGE_BASE_DIR) / "catalog_groups"
+                if Path(config.SKU_INDEX_PATH).exists():
+                    _sku_index = SkuIndex.abrir(config.SKU_INDEX_PATH)
+                elif catalog_groups.is_dir():
+                    _sku_index = SkuIndex.de_catalog_groups(str(catalog_groups))
+                _sku_index_carregado = True
+    return _sku_index
+
+
+def reset_sku_index():
+    """Descarta o índice compartilhado; o próximo get_sku_index() reabre o arquivo."""
+    global _sku_index, _sku_index_carregado
+    with _sku_index_lock:
+        _sku_index = None
+        _sku_index_carregado = False
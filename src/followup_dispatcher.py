@@ -0,0 +1,339 @@
+"""
+Envio dos follow-ups vencidos ao cliente (Blip/WhatsApp).
+
+O FollowUpManager decide *quando* um follow-up vence; o FollowUpDispatcher
+decide *como* ele sai. Quando 300 orçamentos vão às 9h, os 300 follow-ups de
+2h vencem às 11h no mesmo minuto — mandá-los de uma vez estoura o limite de
+envio do Blip e derruba tudo em 429. Aqui eles passam por:
+
+  - espalhamento: cada sessão ganha um atraso fixo em [0, spread_seconds)
+    (hash do session_id), então o mesmo minuto de vencimento vira alguns
+    minutos de envio
+  - token bucket por canal: no máximo `rate` mensagens/s, com rajada de `burst`
+  - lotes de até `batch_size` mensagens por chamada ao sender
+  - retry com backoff exponencial e jitter para as que falharem, até
+    `max_retries` tentativas
+
+O resultado volta ao FollowUpManager pelos callbacks on_delivered/on_failed
+(session_id, attempt): a tentativa só é gravada no SQLite depois de entregue,
+e as que esgotaram as retentativas ficam registradas lá, não só em `failed`.
+A fila de saída é em memória; o que se perde num restart é reenviado pelo
+manager quando vence o prazo de confirmação. Reenvio de uma mensagem que
+ainda está na fila é ignorado.
+
+O sender é plugável (send_batch(messages) -> list[bool], True = entregue).
+LogSender imprime no stdout (comportamento anterior); FakeBlipSender simula o
+Blip localmente, com limite de taxa e falhas, para testes e benchmark.
+
+Uso:
+    dispatcher = FollowUpDispatcher(sender=LogSender())
+    manager = FollowUpManager(db_path="data/followups.db", sender=dispatcher.submit, confirm_delivery=True)
+    dispatcher.on_delivered, dispatcher.on_failed = manager.mark_delivered, manager.mark_failed
+"""
+import heapq
+import itertools
+import random
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional, Protocol
+
+from src.config import (
+    FOLLOWUP_BATCH_SIZE,
+    FOLLOWUP_MAX_RETRIES,
+    FOLLOWUP_POLL_SECONDS,
+    FOLLOWUP_RETRY_BASE_SECONDS,
+    FOLLOWUP_SEND_BURST,
+    FOLLOWUP_SEND_RATE,
+    FOLLOWUP_SPREAD_SECONDS,
+)
+from src.followup_scheduler import FollowUpState
+
+DEFAULT_CHANNEL = "whatsapp"
+
+
+@dataclass
+class OutboundMessage:
+    """Mensagem de follow-up aguardando envio."""
+    session_id: str
+    contact: str
+    text: str
+    attempt: int
+    channel: str = DEFAULT_CHANNEL
+    tries: int = 0
+
+
+class Sender(Protocol):
+    def send_batch(self, messages: list[OutboundMessage]) -> list[bool]:
+        """Envia o lote; um bool por mensagem (True = entregue, False = tentar de novo)."""
+        ...
+
+
+class LogSender:
+    """Stub de envio: em produção, chamar a API de mensagens do Blip aqui."""
+
+    def send_batch(self, messages: list[OutboundMessage]) -> list[bool]:
+        for msg in messages:
+            print(f"[FOLLOW-UP] session={msg.session_id} attempt={msg.attempt} contact={msg.contact}")
+            print(f"[FOLLOW-UP] message={msg.text}")
+        return [True] * len(messages)
+
+
+class FakeBlipSender:
+    """
+    Blip/WhatsApp local para testes e benchmark.
+
+    Args:
+        rate_limit: Mensagens aceitas por segundo; as excedentes voltam False (429).
+        failure_rate: Probabilidade de falha transitória por mensagem.
+        clock: Relógio usado para o limite por segundo.
+    """
+
+    def __init__(self, rate_limit: Optional[float] = None, failure_rate: float = 0.0,
+                 clock: Callable[[], float] = time.monotonic, seed: int = 17):
+        self.rate_limit = rate_limit
+        self.failure_rate = failure_rate
+        self._clock = clock
+        self._rng = random.Random(seed)
+        self.delivered: list[tuple[float, OutboundMessage]] = []
+        self.throttled = 0
+        self.failed = 0
+        self.batches = 0
+        self._second = None
+        self._in_second = 0
+
+    def send_batch(self, messages: list[OutboundMessage]) -> list[bool]:
+        self.batches += 1
+        now = self._clock()
+        results = []
+        for msg in messages:
+            if int(now) != self._second:
+                self._second, self._in_second = int(now), 0
+            if self.rate_limit is not None and self._in_second >= self.rate_limit:
+                self.throttled += 1
+                results.append(False)
+                continue
+            self._in_second += 1
+            if self._rng.random() < self.failure_rate:
+                self.failed += 1
+                results.append(False)
+                continue
+            self.delivered.append((now, msg))
+            results.append(True)
+        return results
+
+
+class TokenBucket:
+    """Token bucket: `rate` tokens/s, acumulando no máximo `burst`."""
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+
+    def available(self) -> int:
+        """Tokens inteiros disponíveis agora."""
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        return int(self._tokens)
+
+    def take(self, n: int) -> int:
+        """Retira até n tokens e retorna quantos conseguiu."""
+        granted = min(n, self.available())
+        self._tokens -= granted
+        return granted
+
+
+@dataclass
+class DispatchStats:
+    """Contadores do dispatcher expostos no /health."""
+    submitted: int = 0
+    sent: int = 0
+    retries: int = 0
+    failed: int = 0
+    batches: int = 0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+
+
+class FollowUpDispatcher:
+    """
+    Fila de saída dos follow-ups, com espalhamento, limite de taxa, lotes e retry.
+
+    Args:
+        sender: Destino das mensagens (LogSender, FakeBlipSender ou integração real).
+        dry_run: Se True, não inicia a thread de envio (chame pump()).
+        rate / burst: Limite do token bucket de cada canal (mensagens/s).
+        rates: Limites por canal que substituem rate/burst — {"whatsapp": (20, 40)}.
+        batch_size: Mensagens por chamada ao sender.
+        spread_seconds: Janela em que vencimentos simultâneos são espalhados.
+        max_retries: Tentativas extras antes de desistir da mensagem.
+        retry_base_seconds: Primeiro intervalo do backoff exponencial.
+        on_delivered / on_failed: Chamados com (session_id, attempt) quando a
+            mensagem é entregue ou esgota as retentativas.
+    """
+
+    def __init__(
+        self,
+        sender: Sender,
+        dry_run: bool = False,
+        rate: float = FOLLOWUP_SEND_RATE,
+        burst: float = FOLLOWUP_SEND_BURST,
+        rates: Optional[dict[str, tuple[float, float]]] = None,
+        batch_size: int = FOLLOWUP_BATCH_SIZE,
+        spread_seconds: float = FOLLOWUP_SPREAD_SECONDS,
+        max_retries: int = FOLLOWUP_MAX_RETRIES,
+        retry_base_seconds: float = FOLLOWUP_RETRY_BASE_SECONDS,
+        poll_seconds: float = FOLLOWUP_POLL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+        seed: Optional[int] = None,
+        on_delivered: Optional[Callable[[str, int], None]] = None,
+        on_failed: Optional[Callable[[str, int], None]] = None,
+    ):
+        self.sender = sender
+        self.on_delivered = on_delivered
+        self.on_failed = on_failed
+        self._rate, self._burst = rate, burst
+        self._rates = rates or {}
+        self._batch_size = max(1, batch_size)
+        self._spread_seconds = spread_seconds
+        self._max_retries = max_retries
+        self._retry_base = retry_base_seconds
+        self._poll_seconds = poll_seconds
+        self._clock = clock
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._queues: dict[str, list[tuple[float, int, OutboundMessage]]] = {}
+        self._buckets: dict[str, TokenBucket] = {}
+        self._seq = itertools.count()
+        self._queued: set[tuple[str, int]] = set()  # (session_id, attempt) na fila
+        self.failed: list[OutboundMessage] = []
+        self._stats = DispatchStats()
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if not dry_run:
+            self.start()
+
+    # ── Entrada ─────────────────────────────────────────────────────────────
+
+    def submit(self, state: FollowUpState, message: str, channel: str = DEFAULT_CHANNEL):
+        """Enfileira o follow-up vencido (assinatura do sender do FollowUpManager)."""
+        key = (state.session_id, state.attempt)
+        with self._lock:
+            if key in self._queued:
+                return  # reenvio do manager (prazo de confirmação) com a mensagem ainda na fila
+            self._queued.add(key)
+            self._stats.submitted += 1
+        msg = OutboundMessage(state.session_id, state.contact, message, state.attempt, channel)
+        self._enqueue(msg, self._clock() + self._spread_offset(state.session_id))
+
+    def _spread_offset(self, session_id: str) -> float:
+        # Fixo por sessão: o mesmo lead não troca de lugar entre tentativas
+        if self._spread_seconds <= 0:
+            return 0.0
+        return (zlib.crc32(session_id.encode()) % 10_000) / 10_000 * self._spread_seconds
+
+    def _enqueue(self, msg: OutboundMessage, ready_at: float):
+        with self._lock:
+            heapq.heappush(self._queues.setdefault(msg.channel, []), (ready_at, next(self._seq), msg))
+            self._stats.queue_depth += 1
+            self._stats.max_queue_depth = max(self._stats.max_queue_depth, self._stats.queue_depth)
+
+    # ── Envio ───────────────────────────────────────────────────────────────
+
+    def pump(self) -> int:
+        """Envia o que está pronto e cabe no limite de cada canal. Retorna quantas foram entregues."""
+        now = self._clock()
+        batches = []
+        with self._lock:
+            for channel, queue in self._queues.items():
+                if not queue or queue[0][0] > now:
+                    continue
+                bucket = self._bucket(channel)
+                allowed = bucket.available()
+                taken = []
+                while queue and len(taken) < allowed and queue[0][0] <= now:
+                    taken.append(heapq.heappop(queue)[2])
+                bucket.take(len(taken))
+                self._stats.queue_depth -= len(taken)
+                for i in range(0, len(taken), self._batch_size):
+                    batches.append(taken[i:i + self._batch_size])
+
+        delivered = 0
+        for batch in batches:
+            delivered += self._send(batch, now)
+        return delivered
+
+    def _bucket(self, channel: str) -> TokenBucket:
+        if channel not in self._buckets:
+            rate, burst = self._rates.get(channel, (self._rate, self._burst))
+            self._buckets[channel] = TokenBucket(rate, burst, self._clock)
+        return self._buckets[channel]
+
+    def _send(self, batch: list[OutboundMessage], now: float) -> int:
+        try:
+            results = self.sender.send_batch(batch)
+        except Exception:
+            results = [False] * len(batch)  # lote inteiro volta para a fila
+
+        delivered, done = 0, []
+        for msg, ok in zip(batch, results):
+            if ok:
+                delivered += 1
+                done.append((msg, self.on_delivered))
+                continue
+            msg.tries += 1
+            if msg.tries > self._max_retries:
+                with self._lock:
+                    self.failed.append(msg)
+                    self._stats.failed += 1
+                done.append((msg, self.on_failed))
+                continue
+            with self._lock:
+                self._stats.retries += 1
+            self._enqueue(msg, now + self._retry_delay(msg.tries))
+        with self._lock:
+            self._stats.sent += delivered
+            self._stats.batches += 1
+            self._queued.difference_update((msg.session_id, msg.attempt) for msg, _ in done)
+        for msg, callback in done:
+            if callback is not None:
+                callback(msg.session_id, msg.attempt)
+        return delivered
+
+    def _retry_delay(self, tries: int) -> float:
+        """Backoff exponencial com jitter (±50%) para as falhas não voltarem todas juntas."""
+        return self._retry_base * 2 ** (tries - 1) * self._rng.uniform(0.5, 1.5)
+
+    # ── Estado ──────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        with self._lock:
+            return asdict(self._stats)
+
+    def start(self):
+        """Inicia a thread que chama pump() a cada fração de `poll_seconds`."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="followup-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _loop(self):
+        # Mais frequente que a verificação de vencidos: o bucket libera tokens continuamente
+        while not self._stop.wait(min(self._poll_seconds, 0.2)):
+            try:
+                self.pump()
+            except Exception as exc:
+                print(f"[FOLLOW-UP] Falha no envio: {exc}")
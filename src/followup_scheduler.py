@@ -7,17 +7,41 @@ Após envio de orçamento, agenda mensagens automáticas em:
 Se cliente responder: chamar cancel() para cancelar os follow-ups pendentes.
 Se nenhuma resposta em 48h: ticket encerrado por inatividade.
 
+Os follow-ups ficam numa tabela SQLite (uma linha por lead, indexada pelo
+próximo vencimento), então um restart ou redeploy não perde nada. Em memória
+fica só a janela seguinte (FOLLOWUP_WINDOW_SECONDS) num min-heap; o resto é
+lido do índice quando a janela avança. Cancelar é O(1): UPDATE pela chave
+primária + remoção do dicionário da janela (a entrada do heap vira lixo e é
+descartada ao sair). Ao iniciar, os vencimentos perdidos durante a parada
+entram na primeira janela e são enviados na próxima verificação — só a
+tentativa mais recente vencida, sem disparar em sequência as que passaram.
+
+Com um sender assíncrono (FollowUpDispatcher, confirm_delivery=True), a
+tentativa só é gravada quando o dispatcher confirma a entrega
+(mark_delivered). Até lá a linha fica com o attempt anterior e next_due no
+fim do prazo de entrega: se o processo cair com a mensagem na fila em
+memória do dispatcher, ela é reenviada depois do restart. Mensagens que
+esgotaram as retentativas são gravadas (mark_failed: failed_attempts) e a
+cadência segue para a próxima tentativa.
+
 Uso em produção:
-    manager = FollowUpManager()
+    manager = FollowUpManager(db_path="data/followups.db")
     manager.register(session_id="sess-001", lead_name="Carlos", contact="11999998888")
     # Quando cliente responder:
     manager.cancel("sess-001")
 
-Em testes, use dry_run=True para não inicializar o APScheduler.
+Em testes, use dry_run=True: não inicia a thread de envio (chame run_due())
+e, sem db_path, usa um banco em memória.
 """
+import heapq
+import sqlite3
+import threading
+import time
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
+from typing import Callable, Iterable, Optional
+
+from src.config import FOLLOWUP_DELIVERY_TIMEOUT_SECONDS, FOLLOWUP_POLL_SECONDS, FOLLOWUP_WINDOW_SECONDS
 
 # Intervalos em horas
 FOLLOWUP_INTERVALS_HOURS = [2, 10, 20, 48]
@@ -44,6 +68,20 @@ FOLLOWUP_MESSAGES = {
     ),
 }
 
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS followups (
+    session_id TEXT PRIMARY KEY,
+    lead_name TEXT NOT NULL,
+    contact TEXT NOT NULL,
+    registered_at REAL NOT NULL,
+    attempt INTEGER NOT NULL DEFAULT 0,  -- última tentativa enviada
+    next_due REAL,                       -- NULL: concluído ou cancelado
+    last_attempt_at REAL,
+    failed_attempts INTEGER NOT NULL DEFAULT 0  -- tentativas que o dispatcher não entregou
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_followups_next_due ON followups(next_due) WHERE next_due IS NOT NULL;
+"""
+
 
 @dataclass
 class FollowUpState:
@@ -56,6 +94,12 @@ class FollowUpState:
     completed: bool = False
     registered_at: datetime = field(default_factory=datetime.now)
     last_attempt_at: Optional[datetime] = None
+    failed_attempts: int = 0
+
+
+def _due_at(registered_at: float, attempt: int) -> float:
+    """Vencimento da tentativa N (1-indexed)."""
+    return registered_at + FOLLOWUP_INTERVALS_HOURS[attempt - 1] * 3600
 
 
 class FollowUpManager:
@@ -63,96 +107,282 @@ class FollowUpManager:
     Gerenciador de follow-ups cadenciados.
 
     Args:
-        dry_run: Se True, não inicializa APScheduler (para testes).
+        dry_run: Se True, não inicia a thread de envio (para testes).
+        db_path: Arquivo SQLite dos follow-ups (padrão: em memória).
+        clock: Relógio em segundos epoch (injetável nos testes).
+        window_seconds: Quanto do futuro fica carregado no heap.
+        poll_seconds: Intervalo da thread de envio.
+        sender: Envia a mensagem ao lead — (state, message). Padrão: log no stdout.
+        confirm_delivery: Se True, o sender só enfileira (FollowUpDispatcher.submit)
+            e a tentativa é gravada em mark_delivered/mark_failed.
+        delivery_timeout: Prazo para a confirmação; depois dele o follow-up é reenviado.
     """
 
-    def __init__(self, dry_run: bool = False):
-        self._states: dict[str, FollowUpState] = {}
+    def __init__(
+        self,
+        dry_run: bool = False,
+        db_path: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+        window_seconds: float = FOLLOWUP_WINDOW_SECONDS,
+        poll_seconds: float = FOLLOWUP_POLL_SECONDS,
+        sender: Optional[Callable[[FollowUpState, str], None]] = None,
+        confirm_delivery: bool = False,
+        delivery_timeout: float = FOLLOWUP_DELIVERY_TIMEOUT_SECONDS,
+    ):
         self._dry_run = dry_run
+        self._clock = clock
+        self._window_seconds = window_seconds
+        self._poll_seconds = poll_seconds
+        self._sender = sender or self._log_followup
+        self._confirm_delivery = confirm_delivery
+        self._delivery_timeout = delivery_timeout
+        self._lock = threading.RLock()
+
+        self._db = sqlite3.connect(db_path or ":memory:", check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(followups)")}
+        if "failed_attempts" not in columns:  # banco criado antes da confirmação de entrega
+            self._db.execute("ALTER TABLE followups ADD COLUMN failed_attempts INTEGER NOT NULL DEFAULT 0")
+
+        # Janela carregada: heap de (vencimento, session_id) + vencimento válido por sessão
+        self._heap: list[tuple[float, str]] = []
+        self._loaded: dict[str, float] = {}
+        self._window_end = float("-inf")
+        self._refill(self._clock())  # recuperação: vencidos durante a parada entram já
 
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
         if not dry_run:
-            self._init_scheduler()
-
-    def _init_scheduler(self):
-        """Inicializa APScheduler para produção."""
-        try:
-            from apscheduler.schedulers.background import BackgroundScheduler
-            self._scheduler = BackgroundScheduler()
-            self._scheduler.start()
-        except ImportError:
-            raise ImportError(
-                "APScheduler não instalado. Execute: pip install apscheduler>=3.10.0"
-            )
+            self.start()
+
+    # ── API pública ─────────────────────────────────────────────────────────
 
     def register(self, session_id: str, lead_name: str, contact: str):
         """
         Registra lead para follow-ups automáticos.
         Agenda mensagens em 2h, 10h, 20h e 48h.
         """
-        state = FollowUpState(
-            session_id=session_id,
-            lead_name=lead_name,
-            contact=contact,
-        )
-        self._states[session_id] = state
-
-        if not self._dry_run:
-            from datetime import timedelta
-            from apscheduler.triggers.date import DateTrigger
-
-            for i, hours in enumerate(FOLLOWUP_INTERVALS_HOURS, start=1):
-                run_time = datetime.now() + timedelta(hours=hours)
-                self._scheduler.add_job(
-                    func=self._execute_followup,
-                    trigger=DateTrigger(run_date=run_time),
-                    args=[session_id, i],
-                    id=f"{session_id}_attempt_{i}",
-                    replace_existing=True,
-                )
+        self.register_many([(session_id, lead_name, contact)])
+
+    def register_many(self, leads: Iterable[tuple[str, str, str]]):
+        """Registra vários leads (session_id, lead_name, contact) numa transação só."""
+        now = self._clock()
+        due = _due_at(now, 1)
+        rows = [(session_id, lead_name, contact, now, due) for session_id, lead_name, contact in leads]
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR REPLACE INTO followups (session_id, lead_name, contact, registered_at, next_due) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._db.execute("COMMIT")
+            for session_id, *_ in rows:
+                self._schedule(session_id, due)
 
     def cancel(self, session_id: str):
         """
         Cancela todos os follow-ups pendentes de um lead.
         Chamar quando o cliente responder.
         """
-        if session_id in self._states:
-            self._states[session_id].completed = True
+        with self._lock:
+            self._db.execute("UPDATE followups SET next_due = NULL WHERE session_id = ?", (session_id,))
+            self._loaded.pop(session_id, None)
+
+    def mark_delivered(self, session_id: str, attempt: int):
+        """Grava a tentativa entregue pelo dispatcher e agenda a próxima."""
+        self._commit_attempt(session_id, attempt, failed=False)
 
-        if not self._dry_run and hasattr(self, "_scheduler"):
-            for i in range(1, 5):
-                job_id = f"{session_id}_attempt_{i}"
-                try:
-                    self._scheduler.remove_job(job_id)
-                except Exception:
-                    pass
+    def mark_failed(self, session_id: str, attempt: int):
+        """Grava a tentativa que o dispatcher desistiu de entregar; a cadência segue."""
+        self._commit_attempt(session_id, attempt, failed=True)
 
     def has_pending(self, session_id: str) -> bool:
         """Retorna True se há follow-up registrado e não concluído."""
-        state = self._states.get(session_id)
+        state = self.get_state(session_id)
         return state is not None and not state.completed
 
+    def get_state(self, session_id: str) -> Optional[FollowUpState]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT session_id, lead_name, contact, attempt, next_due, registered_at, last_attempt_at, "
+                "failed_attempts FROM followups WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        sid, name, contact, attempt, next_due, registered_at, last_attempt_at, failed_attempts = row
+        return FollowUpState(
+            session_id=sid,
+            lead_name=name,
+            contact=contact,
+            attempt=attempt,
+            completed=next_due is None,
+            registered_at=datetime.fromtimestamp(registered_at),
+            last_attempt_at=datetime.fromtimestamp(last_attempt_at) if last_attempt_at else None,
+            failed_attempts=failed_attempts,
+        )
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM followups WHERE next_due IS NOT NULL").fetchone()[0]
+
+    @property
+    def loaded_count(self) -> int:
+        """Follow-ups carregados em memória (só a janela seguinte)."""
+        return len(self._loaded)
+
+    def run_due(self, now: Optional[float] = None) -> list[tuple[str, int]]:
+        """Envia os follow-ups vencidos até `now` e retorna [(session_id, tentativa)]."""
+        now = self._clock() if now is None else now
+        sent = []
+        with self._lock:
+            self._refill(now)
+            self._db.execute("BEGIN")
+            try:
+                while self._heap and self._heap[0][0] <= now:
+                    due, session_id = heapq.heappop(self._heap)
+                    if self._loaded.get(session_id) != due:
+                        continue  # cancelado ou reagendado depois de entrar no heap
+                    del self._loaded[session_id]
+                    try:
+                        attempt = self._execute_followup(session_id, now=now)
+                    except Exception:
+                        self._schedule(session_id, due)  # tenta de novo na próxima verificação
+                        raise
+                    if attempt:
+                        sent.append((session_id, attempt))
+            finally:
+                self._db.execute("COMMIT")  # o que já foi enviado fica gravado mesmo se o sender falhar
+            self._compact_heap()
+        return sent
+
+    def start(self):
+        """Inicia a thread que chama run_due() a cada `poll_seconds`."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="followup-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        self._db.close()
+
+    # ── Internos ────────────────────────────────────────────────────────────
+
+    def _loop(self):
+        while not self._stop.wait(self._poll_seconds):
+            try:
+                self.run_due()
+            except Exception as exc:
+                print(f"[FOLLOW-UP] Falha no envio, nova tentativa em {self._poll_seconds}s: {exc}")
+
+    def _schedule(self, session_id: str, due: Optional[float]):
+        """Coloca (ou tira) a sessão da janela em memória conforme o vencimento."""
+        if due is not None and due < self._window_end:
+            self._loaded[session_id] = due
+            heapq.heappush(self._heap, (due, session_id))
+        else:
+            self._loaded.pop(session_id, None)
+
+    def _refill(self, now: float):
+        """Carrega do índice os vencimentos da próxima janela quando metade dela já passou."""
+        if now + self._window_seconds / 2 < self._window_end:
+            return
+        new_end = now + self._window_seconds
+        rows = self._db.execute(
+            "SELECT session_id, next_due FROM followups "
+            "WHERE next_due IS NOT NULL AND next_due >= ? AND next_due < ?",
+            (self._window_end, new_end),
+        ).fetchall()
+        self._window_end = new_end
+        for session_id, due in rows:
+            self._schedule(session_id, due)
+
+    def _compact_heap(self):
+        # Cancelamentos deixam entradas mortas no heap; reconstrói quando passam da metade
+        if len(self._heap) > 2 * len(self._loaded) + 1024:
+            self._heap = [(due, sid) for sid, due in self._loaded.items()]
+            heapq.heapify(self._heap)
+
     def _build_message(self, lead_name: str, attempt: int) -> str:
         """Constrói mensagem personalizada para a tentativa N (1-4)."""
         template = FOLLOWUP_MESSAGES.get(attempt, FOLLOWUP_MESSAGES[4])
         return template.format(name=lead_name)
 
-    def _execute_followup(self, session_id: str, attempt: int):
+    def _execute_followup(self, session_id: str, now: Optional[float] = None) -> Optional[int]:
         """
-        Executa o follow-up (chamado pelo scheduler).
-        Stub: em produção, chamar API do Blip/WhatsApp aqui.
+        Envia o follow-up vencido da sessão e agenda o próximo.
+
+        Se várias tentativas venceram (servidor parado), envia só a mais
+        recente. Retorna o número da tentativa enviada, ou None.
         """
-        state = self._states.get(session_id)
+        now = self._clock() if now is None else now
+        state = self.get_state(session_id)
         if not state or state.completed:
-            return
+            return None
+
+        registered_at = state.registered_at.timestamp()
+        attempt = state.attempt + 1
+        while attempt < state.max_attempts and _due_at(registered_at, attempt + 1) <= now:
+            attempt += 1
 
         message = self._build_message(state.lead_name, attempt)
         state.attempt = attempt
-        state.last_attempt_at = datetime.now()
+        state.last_attempt_at = datetime.fromtimestamp(now)
+        self._sender(state, message)
+
+        if self._confirm_delivery:
+            # Só na fila do dispatcher: sem confirmação até o prazo, reenvia
+            retry_at = now + self._delivery_timeout
+            self._db.execute("UPDATE followups SET next_due = ? WHERE session_id = ?", (retry_at, session_id))
+            self._schedule(session_id, retry_at)
+            return attempt
 
-        print(f"[FOLLOW-UP] session={session_id} attempt={attempt}/{state.max_attempts}")
+        next_due = _due_at(registered_at, attempt + 1) if attempt < state.max_attempts else None
+        self._db.execute(
+            "UPDATE followups SET attempt = ?, next_due = ?, last_attempt_at = ? WHERE session_id = ?",
+            (attempt, next_due, now, session_id),
+        )
+        self._schedule(session_id, next_due)
+        return attempt
+
+    def _commit_attempt(self, session_id: str, attempt: int, failed: bool):
+        """
+        Grava a tentativa confirmada pelo dispatcher.
+
+        Ignora confirmações repetidas (tentativa já gravada). Lead cancelado
+        enquanto a mensagem estava na fila continua sem próximo vencimento.
+        """
+        now = self._clock()
+        with self._lock:
+            state = self.get_state(session_id)
+            if state is None or attempt <= state.attempt:
+                return
+            next_due = _due_at(state.registered_at.timestamp(), attempt + 1) if attempt < state.max_attempts else None
+            if state.completed:
+                next_due = None
+            self._db.execute(
+                "UPDATE followups SET attempt = ?, next_due = ?, last_attempt_at = ?, "
+                "failed_attempts = failed_attempts + ? WHERE session_id = ?",
+                (attempt, next_due, now, int(failed), session_id),
+            )
+            self._schedule(session_id, next_due)
+
+    @staticmethod
+    def _log_followup(state: FollowUpState, message: str):
+        """Stub de envio: em produção, chamar API do Blip/WhatsApp aqui."""
+        print(f"[FOLLOW-UP] session={state.session_id} attempt={state.attempt}/{state.max_attempts}")
         print(f"[FOLLOW-UP] contact={state.contact}")
         print(f"[FOLLOW-UP] message={message}")
-
-        if attempt >= state.max_attempts:
-            state.completed = True
-            print(f"[FOLLOW-UP] Ticket {session_id} encerrado por inatividade.")
+        if state.attempt >= state.max_attempts:
+            print(f"[FOLLOW-UP] Ticket {state.session_id} encerrado por inatividade.")
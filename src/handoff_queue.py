@@ -0,0 +1,158 @@
+"""
+Fila de transbordo para o time humano.
+
+Quando o cliente pede um atendente, o /chat responde na hora com uma
+mensagem fixa (build_handoff_message) e coloca a conversa nesta fila.
+O time comercial consome a fila pelo endpoint /handoff/next.
+
+Leads com todos os dados coletados também entram aqui, com o resumo do
+pedido (reason="quote_ready"): o resumo é interno, para o Closer, e o
+cliente recebe só a confirmação de que o pedido foi encaminhado.
+
+Uma sessão só entra uma vez na fila: pedidos repetidos ("atendente!!",
+"cadê o atendente?") atualizam a última mensagem do ticket existente.
+
+Os tickets ficam numa tabela SQLite (HANDOFF_DB_PATH), como as sessões, os
+follow-ups e o diário do CRM: sobrevivem a restart e todos os workers veem a
+mesma fila. Nada fica em memória — cada operação lê e grava o banco, e
+enqueue/pop_next rodam em transação (BEGIN IMMEDIATE), então dois workers
+não assumem o mesmo ticket.
+
+Em produção, substituir por integração com a fila de atendimento do Blip.
+"""
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS handoffs (
+    seq INTEGER PRIMARY KEY,           -- ordem de chegada
+    session_id TEXT NOT NULL UNIQUE,
+    last_message TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    trigger_found TEXT,
+    lead_snapshot TEXT NOT NULL,       -- JSON do LeadData no momento do transbordo
+    summary TEXT,
+    requests INTEGER NOT NULL DEFAULT 1,
+    queued_at REAL NOT NULL
+);
+"""
+
+_COLUMNS = "session_id, last_message, reason, trigger_found, lead_snapshot, summary, requests, queued_at"
+
+
+@dataclass
+class HandoffTicket:
+    """Conversa aguardando um consultor humano."""
+    session_id: str
+    last_message: str
+    reason: str
+    trigger_found: Optional[str] = None
+    lead_snapshot: dict = field(default_factory=dict)
+    summary: Optional[str] = None  # resumo do pedido (orçamento) para o Closer
+    requests: int = 1
+    queued_at: datetime = field(default_factory=datetime.now)
+
+
+def _ticket(row) -> HandoffTicket:
+    session_id, last_message, reason, trigger_found, lead_snapshot, summary, requests, queued_at = row
+    return HandoffTicket(
+        session_id=session_id,
+        last_message=last_message,
+        reason=reason,
+        trigger_found=trigger_found,
+        lead_snapshot=json.loads(lead_snapshot),
+        summary=summary,
+        requests=requests,
+        queued_at=datetime.fromtimestamp(queued_at),
+    )
+
+
+class HandoffQueue:
+    """
+    Fila FIFO de tickets de transbordo, um por sessão.
+
+    Args:
+        db_path: Arquivo SQLite da fila (padrão: em memória, para testes).
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path or ":memory:", check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA busy_timeout=5000")  # outro worker no meio de um enqueue/pop_next
+        self._db.executescript(_SCHEMA)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM handoffs").fetchone()[0]
+
+    def enqueue(
+        self,
+        session_id: str,
+        message: str,
+        reason: str,
+        trigger_found: Optional[str] = None,
+        lead_snapshot: Optional[dict] = None,
+        summary: Optional[str] = None,
+    ) -> HandoffTicket:
+        """Adiciona a sessão à fila (ou atualiza o ticket se ela já estiver esperando)."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                updated = self._db.execute(
+                    "UPDATE handoffs SET last_message = ?, requests = requests + 1,"
+                    " lead_snapshot = COALESCE(?, lead_snapshot), summary = COALESCE(?, summary)"
+                    " WHERE session_id = ?",
+                    (message, json.dumps(lead_snapshot) if lead_snapshot else None, summary or None, session_id),
+                ).rowcount
+                if not updated:
+                    self._db.execute(
+                        f"INSERT INTO handoffs ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, 1, ?)",
+                        (session_id, message, reason, trigger_found, json.dumps(lead_snapshot or {}),
+                         summary, time.time()),
+                    )
+                row = self._db.execute(
+                    f"SELECT {_COLUMNS} FROM handoffs WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return _ticket(row)
+
+    def is_waiting(self, session_id: str) -> bool:
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM handoffs WHERE session_id = ?", (session_id,)
+            ).fetchone() is not None
+
+    def pending(self) -> list[HandoffTicket]:
+        """Tickets em ordem de chegada."""
+        with self._lock:
+            rows = self._db.execute(f"SELECT {_COLUMNS} FROM handoffs ORDER BY seq").fetchall()
+        return [_ticket(row) for row in rows]
+
+    def pop_next(self) -> Optional[HandoffTicket]:
+        """Retira o ticket mais antigo da fila (consultor assumiu o atendimento)."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    f"SELECT seq, {_COLUMNS} FROM handoffs ORDER BY seq LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    self._db.execute("DELETE FROM handoffs WHERE seq = ?", (row[0],))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return _ticket(row[1:]) if row is not None else None
+
+    def close(self):
+        self._db.close()
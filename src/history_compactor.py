@@ -0,0 +1,142 @@
+"""
+Histórico da conversa compactado, com orçamento de tokens para o bloco de histórico.
+
+Antes, o Team mandava a cada chamada até 3 runs inteiras ao coordenador
+(delegações e respostas dos membros incluídas) e 5 runs de histórico a cada
+membro — conversas longas de WhatsApp ficavam mais lentas e caras a cada turno.
+
+Agora o estado da conversa vai em duas partes, sempre na mensagem do usuário
+(o prefixo de sistema continua estável para o cache de prompt):
+
+  - os dados do lead (LeadData), no bloco de dados/CONTEXTO ACUMULADO já
+    montado pela API e pelo pré-roteador
+  - o bloco ---HISTÓRICO DA CONVERSA--- deste módulo: os últimos N turnos na
+    íntegra e uma linha curta por turno mais antigo
+
+O bloco nunca passa de `token_budget` tokens: primeiro saem as linhas de
+resumo mais antigas, depois as respostas longas são cortadas e, por último,
+saem os turnos mais antigos. O orçamento vale só para o bloco de histórico:
+instruções, dados do lead, mensagem do turno e resultados de tools (busca na
+knowledge base) ficam fora dele.
+
+O ConversationHistory de cada sessão é gravado no session_state da sessão do
+Team (src/session_store.py), e não na memória do processo.
+"""
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Linhas de resumo guardadas por sessão (as mais antigas saem primeiro)
+_MAX_SUMMARY_LINES = 50
+_SUMMARY_CLIP = 80
+_RAW_CLIP = 300
+
+HISTORY_START = "---HISTÓRICO DA CONVERSA---"
+HISTORY_END = "---FIM DO HISTÓRICO---"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa de tokens (~4 caracteres por token), suficiente para o orçamento."""
+    return (len(text) + 3) // 4
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1].rstrip() + "…"
+
+
+def _first_sentence(text: str) -> str:
+    text = " ".join(text.split())
+    for end in (". ", "? ", "! "):
+        index = text.find(end)
+        if index != -1:
+            text = text[: index + 1]
+    return text
+
+
+@dataclass
+class ConversationHistory:
+    """Histórico de uma sessão: últimos turnos na íntegra + resumo dos anteriores."""
+    turns: list[tuple[str, str]] = field(default_factory=list)  # (cliente, atendente)
+    summary: deque = field(default_factory=lambda: deque(maxlen=_MAX_SUMMARY_LINES))
+    folded: int = 0  # turnos já resumidos, inclusive os que saíram de `summary`
+
+    def to_dict(self) -> dict:
+        """Forma JSON, gravada no session_state da sessão (src/session_store.py)."""
+        return {"turns": [list(t) for t in self.turns], "summary": list(self.summary), "folded": self.folded}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ConversationHistory":
+        history = cls(turns=[tuple(t) for t in data.get("turns", [])], folded=data.get("folded", 0))
+        history.summary.extend(data.get("summary", []))
+        return history
+
+
+class HistoryCompactor:
+    """
+    Mantém o ConversationHistory de cada sessão e monta o bloco de histórico.
+
+    Args:
+        raw_turns: Quantos turnos recentes vão na íntegra.
+        token_budget: Máximo de tokens do bloco de histórico em cada chamada
+            (o resto da entrada não entra na conta).
+    """
+
+    def __init__(self, raw_turns: int = 4, token_budget: int = 600):
+        self.raw_turns = max(0, raw_turns)
+        self.token_budget = token_budget
+
+    def record(self, history: ConversationHistory, client_message: str, reply: str):
+        """Acrescenta um turno e dobra no resumo os que passaram de `raw_turns`."""
+        history.turns.append((client_message.strip(), reply.strip()))
+        while len(history.turns) > self.raw_turns:
+            client, answer = history.turns.pop(0)
+            history.summary.append(
+                f"- cliente: {_clip(client, _SUMMARY_CLIP)} → atendente: {_clip(_first_sentence(answer), _SUMMARY_CLIP)}"
+            )
+            history.folded += 1
+
+    def render(self, history: Optional[ConversationHistory]) -> str:
+        """Bloco de histórico dentro do orçamento ("" se não há turnos anteriores)."""
+        if history is None or (not history.turns and not history.folded):
+            return ""
+        summary = list(history.summary)
+        turns = list(history.turns)
+        clip = None
+
+        text = self._format(history.folded, summary, turns, clip)
+        while estimate_tokens(text) > self.token_budget:
+            if summary:
+                summary.pop(0)
+            elif clip is None:
+                clip = _RAW_CLIP
+            elif len(turns) > 1:
+                turns.pop(0)
+            else:
+                break
+            text = self._format(history.folded, summary, turns, clip)
+        return text
+
+    def compose(self, history: Optional[ConversationHistory], turn_input: str) -> str:
+        """Entrada do turno precedida do bloco de histórico, quando houver."""
+        block = self.render(history)
+        return f"{block}\n\n{turn_input}" if block else turn_input
+
+    @staticmethod
+    def _format(folded: int, summary: list[str], turns: list[tuple[str, str]], clip: Optional[int]) -> str:
+        lines = [HISTORY_START]
+        if folded:
+            shown = ""
+            if not summary:
+                shown = " (resumo omitido)"
+            elif len(summary) < folded:
+                shown = f", resumo dos {len(summary)} mais recentes"
+            lines.append(f"Turnos anteriores: {folded}{shown}")
+            lines.extend(summary)
+        if turns:
+            lines.append("Últimos turnos:")
+            for client, answer in turns:
+                lines.append(f"Cliente: {_clip(client, clip) if clip else client}")
+                lines.append(f"Atendente: {_clip(answer, clip) if clip else answer}")
+        lines.append(HISTORY_END)
+        return "\n".join(lines)
@@ -5,46 +5,85 @@ Uses FastEmbedEmbedder (local ONNX-based) with multilingual support for
 Portuguese documents, combined with LanceDB for vector storage.
 
 No additional API keys required for embeddings - runs fully locally.
+
+The Knowledge instance (embedder ONNX session + LanceDB handle) is a
+process-wide singleton: every agent factory shares the same instance,
+so the embedding model is loaded only once per process.
+
+Query embeddings and hybrid search results are cached per process
+(see src/retrieval_cache.py); writes to the index invalidate the results.
+
+Indexing is incremental: a manifest of file and chunk content hashes keeps
+unchanged documents from being re-parsed or re-embedded
+(see src/knowledge_index.py). Each build is written to a new versioned
+table and published by an atomic pointer swap that running processes pick
+up on their next search (see src/knowledge_versions.py).
 """
+import threading
 from pathlib import Path
+from typing import Optional
 
 from agno.knowledge.knowledge import Knowledge
-from agno.knowledge.embedder.fastembed import FastEmbedEmbedder
-from agno.knowledge.reader.pdf_reader import PDFReader
-from agno.knowledge.reader.text_reader import TextReader
-from agno.vectordb.lancedb import LanceDb, SearchType
+from agno.vectordb.lancedb import SearchType
 
-from src.config import VECTOR_DB_PATH, KNOWLEDGE_BASE_DIR
+from src.config import (
+    VECTOR_DB_PATH,
+    KNOWLEDGE_BASE_DIR,
+    EMBEDDING_CACHE_SIZE,
+    SEARCH_CACHE_SIZE,
+    SEARCH_CACHE_TTL_SECONDS,
+    KNOWLEDGE_SWAP_POLL_SECONDS,
+)
+from src.knowledge_index import knowledge_files, knowledge_reader
+from src.knowledge_versions import PointerWatcher, build_version, cleanup_versions, current_table
+from src.retrieval_cache import CachedLanceDb, QueryCachedEmbedder
 
+KNOWLEDGE_TABLE = "steel_sales_knowledge"
 
-def get_knowledge_base() -> Knowledge:
+
+_knowledge_base: Optional[Knowledge] = None
+_knowledge_lock = threading.Lock()
+
+
+def build_knowledge_base() -> Knowledge:
     """
-    Build and return a Knowledge instance configured with PDF and TXT documents.
+    Build a new Knowledge instance configured with PDF and TXT documents.
+
+    Prefer get_knowledge_base(), which reuses a single instance per process.
+    Each call here creates a new embedder and a new LanceDB handle.
 
     Uses:
     - FastEmbedEmbedder with 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'
       for multilingual (Portuguese) text support, runs locally (no API key needed).
-    - LanceDB for vector storage with hybrid search (vector + keyword).
+      Query embeddings are kept in an LRU cache.
+    - LanceDB for vector storage with hybrid search (vector + keyword),
+      with a TTL cache of search results. Opens the published index version
+      and follows the version pointer every KNOWLEDGE_SWAP_POLL_SECONDS.
     - PDFReader for parsing PDF documents.
     - TextReader for parsing .txt catalog group files.
 
     Returns:
         Knowledge: Configured knowledge base instance ready for use.
     """
-    embedder = FastEmbedEmbedder(
+    embedder = QueryCachedEmbedder(
         id="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
         dimensions=384,
+        query_cache_size=EMBEDDING_CACHE_SIZE,
     )
 
-    vector_db = LanceDb(
-        table_name="steel_sales_knowledge",
+    vector_db = CachedLanceDb(
+        table_name=current_table(VECTOR_DB_PATH, KNOWLEDGE_TABLE),
         uri=VECTOR_DB_PATH,
         search_type=SearchType.hybrid,
         embedder=embedder,
+        search_cache_size=SEARCH_CACHE_SIZE,
+        search_cache_ttl=SEARCH_CACHE_TTL_SECONDS,
+        table_resolver=PointerWatcher(VECTOR_DB_PATH, KNOWLEDGE_TABLE) if KNOWLEDGE_SWAP_POLL_SECONDS > 0 else None,
+        resolve_interval=KNOWLEDGE_SWAP_POLL_SECONDS,
     )
 
     knowledge_base = Knowledge(
-        name="steel_sales_knowledge",
+        name=KNOWLEDGE_TABLE,
         description=(
             "Knowledge base containing product catalogs and sales processes "
             "for a Brazilian steel sales company. Includes: product dictionary "
@@ -56,8 +95,8 @@ def get_knowledge_base() -> Knowledge:
         ),
         vector_db=vector_db,
         readers={
-            "pdf": PDFReader(split_on_pages=True, sanitize_content=True),
-            "txt": TextReader(),
+            "pdf": knowledge_reader(".pdf"),
+            "txt": knowledge_reader(".txt"),
         },
         max_results=5,
     )
@@ -65,13 +104,80 @@ def get_knowledge_base() -> Knowledge:
     return knowledge_base
 
 
-def load_knowledge_base(recreate: bool = False) -> Knowledge:
+def get_knowledge_base() -> Knowledge:
+    """
+    Return the process-wide shared Knowledge instance, creating it on first use.
+
+    Thread-safe: concurrent first calls (e.g. agents created in parallel
+    threads) build the instance only once.
+
+    Returns:
+        Knowledge: Shared knowledge base instance.
+    """
+    global _knowledge_base
+    if _knowledge_base is None:
+        with _knowledge_lock:
+            if _knowledge_base is None:
+                _knowledge_base = build_knowledge_base()
+    return _knowledge_base
+
+
+def reset_knowledge_base():
+    """Discard the shared instance. The next get_knowledge_base() builds a new one."""
+    global _knowledge_base
+    with _knowledge_lock:
+        _knowledge_base = None
+
+
+def knowledge_table() -> Optional[str]:
+    """Index version the shared instance is searching (None if not built yet)."""
+    kb = _knowledge_base
+    return kb.vector_db.table_name if kb is not None else None
+
+
+def retrieval_cache_stats() -> dict:
+    """
+    Hit/miss counters of the query-embedding and search-result caches.
+
+    Returns an empty dict if the shared instance was not built yet
+    (does not build it).
+    """
+    kb = _knowledge_base
+    if kb is None:
+        return {}
+    return {
+        "query_embeddings": kb.vector_db.embedder.query_cache.stats.as_dict(),
+        "search_results": kb.vector_db.search_cache.stats.as_dict(),
+    }
+
+
+def load_knowledge_base(
+    recreate: bool = False,
+    parse_workers: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    threads: Optional[int] = None,
+    keep_versions: Optional[int] = None,
+    grace: Optional[float] = None,
+) -> Knowledge:
     """
-    Load and index all PDFs and TXT files from the knowledge directory.
+    Index all PDFs and catalog TXT files from the knowledge directory into a
+    new index version and publish it.
+
+    The published table is never written to: it is copied to a new versioned
+    table, only files whose content hash changed are re-parsed there (large
+    PDFs in a process pool) and only their new chunks are embedded (in
+    batches, across threads). The version pointer is swapped once the copy is
+    complete; running processes switch on their next search. Nothing is
+    created when no file changed.
 
     Args:
-        recreate: If True, drops and recreates the vector DB table before indexing.
-                  Use True for first run or when documents change.
+        recreate: If True, builds the new version from scratch instead of
+                  copying the published one.
+        parse_workers: Processes used to parse changed files (default: KNOWLEDGE_PARSE_WORKERS).
+        batch_size: Chunks per embedding call (default: EMBEDDING_BATCH_SIZE).
+        threads: Embedding batches run in parallel (default: EMBEDDING_THREADS).
+        keep_versions, grace: Old-version cleanup (default: KNOWLEDGE_KEEP_VERSIONS,
+                  KNOWLEDGE_RETIRE_GRACE_SECONDS); 0 and 0 keep only the new version.
 
     Returns:
         Knowledge: The loaded knowledge base instance.
@@ -84,46 +190,38 @@ def load_knowledge_base(recreate: bool = False) -> Knowledge:
             f"Knowledge directory not found: {knowledge_dir.resolve()}"
         )
 
-    # Indexar PDFs na raiz de knowledge/
-    pdf_files = list(knowledge_dir.glob("*.pdf"))
-    if not pdf_files:
+    files = knowledge_files(knowledge_dir)
+    if not any(f.suffix == ".pdf" for f in files):
         raise FileNotFoundError(
             f"No PDF files found in: {knowledge_dir.resolve()}"
         )
 
-    print(f"Found {len(pdf_files)} PDF file(s) to index:")
-    for pdf in pdf_files:
-        print(f"  - {pdf.name} ({pdf.stat().st_size / 1024:.1f} KB)")
-
-    for pdf_path in pdf_files:
-        print(f"\nIndexing: {pdf_path.name}...")
-        kb.insert(
-            path=str(pdf_path.resolve()),
-            name=pdf_path.stem,
-            upsert=True,
-            skip_if_exists=(not recreate),
-        )
-        print(f"  Done: {pdf_path.name}")
-
-    # Indexar TXTs do catálogo de grupos
-    catalog_dir = knowledge_dir / "catalog_groups"
-    if catalog_dir.exists():
-        txt_files = list(catalog_dir.glob("*.txt"))
-        print(f"\nFound {len(txt_files)} TXT catalog file(s) to index:")
-        for txt in txt_files:
-            print(f"  - {txt.name} ({txt.stat().st_size / 1024:.1f} KB)")
-
-        for txt_path in txt_files:
-            print(f"\nIndexing: {txt_path.name}...")
-            kb.insert(
-                path=str(txt_path.resolve()),
-                name=txt_path.stem,
-                upsert=True,
-                skip_if_exists=(not recreate),
-            )
-            print(f"  Done: {txt_path.name}")
-    else:
+    print(f"Found {len(files)} file(s) to check:")
+    for path in files:
+        print(f"  - {path.relative_to(knowledge_dir)} ({path.stat().st_size / 1024:.1f} KB)")
+    if not (knowledge_dir / "catalog_groups").exists():
         print("\nNenhum catálogo de grupos encontrado em knowledge/catalog_groups/")
         print("Execute: python scripts/generate_catalog_rag.py --source <planilha>")
 
+    version = build_version(
+        kb,
+        knowledge_dir,
+        recreate=recreate,
+        parse_workers=parse_workers,
+        batch_size=batch_size,
+        threads=threads,
+    )
+    print("\n" + version.report.summary())
+    if version.published:
+        print(f"Published index version: {version.table}")
+    else:
+        print(f"No changes: {version.table} stays published")
+
+    # Versions retired by earlier builds; the one just retired waits for the
+    # grace period (running processes may still be searching it)
+    dropped = cleanup_versions(VECTOR_DB_PATH, KNOWLEDGE_TABLE, keep=keep_versions, grace=grace)
+    if dropped:
+        print(f"Removed old versions: {', '.join(dropped)}")
+
+    kb.vector_db.switch_table(version.table)
     return kb
@@ -0,0 +1,343 @@
+"""
+Reindexação incremental da knowledge base por hash de conteúdo.
+
+O load_knowledge_base antigo chamava kb.insert arquivo por arquivo, em série,
+e o --recreate relia e recalculava o embedding de tudo. Aqui um manifesto
+JSON ao lado da tabela LanceDB guarda, por arquivo, o SHA-256 do conteúdo e
+a chave de cada trecho (chunk) indexado:
+
+  1. arquivo com o mesmo hash do manifesto: nada é lido
+  2. arquivos alterados são lidos e divididos em trechos (PDFs grandes num
+     pool de processos: o pypdf é CPU-bound)
+  3. trecho com chave nova (hash do arquivo de origem + texto) vai ao
+     embedder, em lotes de EMBEDDING_BATCH_SIZE distribuídos em
+     EMBEDDING_THREADS threads
+  4. trecho que já existia mas mudou só de metadados (outra página, outro
+     número de chunk) é regravado com o vetor que já estava na tabela
+  5. trechos que sumiram (e arquivos removidos) são apagados da tabela
+
+As linhas usam a chave do trecho como id e o mesmo payload do LanceDb do
+Agno, então a busca não muda (o JSON do payload vai com os acentos literais,
+e o índice FTS encontra "vergalhão" — no insert do Agno ele ia como
+"vergalh\\u00e3o"). As gravações são merge_insert pelo id: rodar
+de novo depois de uma interrupção não duplica linhas. Manifesto ausente, de
+outro embedder/configuração de readers, ou com contagem diferente da tabela
+faz uma reconstrução completa.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from agno.knowledge.reader.pdf_reader import PDFReader
+from agno.knowledge.reader.text_reader import TextReader
+
+from src.config import EMBEDDING_BATCH_SIZE, EMBEDDING_THREADS, KNOWLEDGE_PARSE_WORKERS
+
+MANIFEST_VERSION = 1
+# Mudou a configuração dos readers (knowledge_reader: chunking, sanitização)?
+# Mude aqui: o manifesto antigo deixa de valer e a próxima execução reconstrói tudo.
+READERS_VERSION = "pdf:pages+sanitize/txt:fixed-5000"
+
+_POOL_MIN_BYTES = 4 << 20  # ~3 s de pypdf; abaixo disso o spawn do pool não se paga
+_WRITE_BATCH = 1000
+_DELETE_BATCH = 500
+
+
+@dataclass
+class IndexReport:
+    """O que uma reindexação fez e quanto tempo cada etapa levou."""
+    files: int = 0
+    changed_files: int = 0
+    removed_files: int = 0
+    chunks: int = 0  # trechos na tabela ao final
+    embedded: int = 0  # trechos novos (com embedding)
+    rewritten: int = 0  # trechos reaproveitados com metadados novos (sem embedding)
+    deleted: int = 0
+    full_rebuild: bool = False
+    scan_seconds: float = 0.0
+    parse_seconds: float = 0.0
+    embed_seconds: float = 0.0
+    write_seconds: float = 0.0
+    total_seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {k: round(v, 3) if isinstance(v, float) else v for k, v in asdict(self).items()}
+
+    def summary(self) -> str:
+        mode = "reconstrução completa" if self.full_rebuild else "incremental"
+        return (
+            f"{mode}: {self.files} arquivos ({self.changed_files} alterados, {self.removed_files} removidos), "
+            f"{self.chunks} trechos ({self.embedded} com embedding novo, {self.rewritten} regravados, "
+            f"{self.deleted} apagados) em {self.total_seconds:.2f}s "
+            f"[hash {self.scan_seconds:.2f}s, leitura {self.parse_seconds:.2f}s, "
+            f"embedding {self.embed_seconds:.2f}s, gravação {self.write_seconds:.2f}s]"
+        )
+
+
+@dataclass
+class KnowledgeManifest:
+    """Hash de cada arquivo indexado e chave → digest dos metadados de cada trecho."""
+    embedder: str = ""
+    dimensions: Optional[int] = None
+    readers: str = READERS_VERSION
+    version: int = MANIFEST_VERSION
+    files: dict = field(default_factory=dict)  # caminho relativo -> {"sha256": ..., "chunks": {chave: digest}}
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["KnowledgeManifest"]:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            return cls(**data)
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(asdict(self), ensure_ascii=False, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, path)  # atômico: nunca fica um manifesto pela metade
+
+    def chunk_count(self) -> int:
+        return sum(len(entry["chunks"]) for entry in self.files.values())
+
+    def matches(self, embedder: str, dimensions: Optional[int]) -> bool:
+        return (self.version, self.embedder, self.dimensions, self.readers) == (
+            MANIFEST_VERSION, embedder, dimensions, READERS_VERSION)
+
+
+def knowledge_files(knowledge_dir: Path) -> list[Path]:
+    """PDFs na raiz de knowledge/ e TXTs de knowledge/catalog_groups/, em ordem estável."""
+    files = sorted(knowledge_dir.glob("*.pdf"))
+    catalog_dir = knowledge_dir / "catalog_groups"
+    if catalog_dir.exists():
+        files += sorted(catalog_dir.glob("*.txt"))
+    return files
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def knowledge_reader(suffix: str):
+    """Reader (com a estratégia de chunking) de um tipo de arquivo: ".pdf" ou ".txt"."""
+    if suffix.lower() == ".pdf":
+        return PDFReader(split_on_pages=True, sanitize_content=True)
+    return TextReader()
+
+
+def parse_file(path: str) -> list[dict]:
+    """Lê e divide um arquivo em trechos (roda nos processos do pool)."""
+    source = Path(path)
+    documents = knowledge_reader(source.suffix).read(source, name=source.stem)
+    return [{"name": d.name or source.stem, "content": d.content, "meta_data": d.meta_data or {}} for d in documents]
+
+
+def _chunk_key(relative: str, content: str, occurrence: int) -> str:
+    raw = f"{relative}\n{occurrence}\n{content}".encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:32]
+
+
+def _meta_digest(chunk: dict) -> str:
+    raw = json.dumps([chunk["name"], chunk["meta_data"]], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _keyed_chunks(relative: str, chunks: list[dict]) -> list[tuple[str, dict]]:
+    seen: dict[str, int] = {}
+    keyed = []
+    for chunk in chunks:
+        occurrence = seen.get(chunk["content"], 0)
+        seen[chunk["content"]] = occurrence + 1
+        keyed.append((_chunk_key(relative, chunk["content"], occurrence), chunk))
+    return keyed
+
+
+def _parse_all(paths: list[Path], workers: int) -> list[list[dict]]:
+    pdfs = [p for p in paths if p.suffix.lower() == ".pdf"]
+    parsed = {}
+    # Só PDFs grandes vão ao pool: subir os processos custa mais que ler os TXTs
+    if workers > 1 and len(pdfs) > 1 and sum(p.stat().st_size for p in pdfs) >= _POOL_MIN_BYTES:
+        # spawn: o runtime async do LanceDB não sobrevive bem a um fork
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(pdfs)), mp_context=context) as pool:
+            parsed = dict(zip(pdfs, pool.map(parse_file, map(str, pdfs))))
+    return [parsed[p] if p in parsed else parse_file(str(p)) for p in paths]
+
+
+def _embed_batch(embedder, texts: list[str]) -> list[list[float]]:
+    batch = getattr(embedder, "get_embeddings_batch", None)
+    if batch is not None:
+        return batch(texts)
+    return [embedder.get_embedding_and_usage(text)[0] for text in texts]
+
+
+def embed_texts(embedder, texts: list[str], batch_size: int, threads: int) -> list[list[float]]:
+    """Embeddings de `texts` em lotes, com até `threads` lotes ao mesmo tempo (ordem preservada)."""
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), max(1, batch_size))]
+    if threads > 1 and len(batches) > 1:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(lambda b: _embed_batch(embedder, b), batches))
+    else:
+        results = [_embed_batch(embedder, b) for b in batches]
+    return [vector for batch in results for vector in batch]
+
+
+def _in_clause(keys: list[str]) -> str:
+    return "id IN (" + ", ".join(f"'{k}'" for k in keys) + ")"
+
+
+def _existing_vectors(table, keys: list[str]) -> dict[str, list]:
+    vectors = {}
+    for i in range(0, len(keys), _DELETE_BATCH):
+        part = keys[i:i + _DELETE_BATCH]
+        rows = table.search().where(_in_clause(part)).select(["id", "vector"]).limit(len(part)).to_list()
+        vectors.update({row["id"]: row["vector"] for row in rows})
+    return vectors
+
+
+def manifest_path_for(vector_db) -> Path:
+    return Path(vector_db.uri) / f"{vector_db.table_name}.manifest.json"
+
+
+def _embedder_id(embedder) -> str:
+    return getattr(embedder, "id", None) or type(embedder).__name__
+
+
+def _valid_manifest(vector_db, manifest_path: Path) -> Optional[KnowledgeManifest]:
+    """Manifesto que descreve a tabela atual (None: a tabela precisa ser reconstruída)."""
+    manifest = KnowledgeManifest.load(manifest_path)
+    embedder = vector_db.embedder
+    if (manifest is None or not manifest.matches(_embedder_id(embedder), embedder.dimensions)
+            or not vector_db.exists() or vector_db.table.count_rows() != manifest.chunk_count()):
+        return None
+    return manifest
+
+
+def is_up_to_date(vector_db, knowledge_dir: Path, manifest_path: Optional[Path] = None) -> bool:
+    """True se a tabela já reflete `knowledge_dir` (só calcula hashes, não lê nem embeda nada)."""
+    manifest = _valid_manifest(vector_db, manifest_path or manifest_path_for(vector_db))
+    if manifest is None:
+        return False
+    indexed = {rel: entry["sha256"] for rel, entry in manifest.files.items()}
+    current = {p.relative_to(knowledge_dir).as_posix(): file_sha256(p) for p in knowledge_files(knowledge_dir)}
+    return indexed == current
+
+
+def reindex(kb, knowledge_dir: Path, recreate: bool = False, parse_workers: Optional[int] = None,
+            batch_size: Optional[int] = None, threads: Optional[int] = None,
+            manifest_path: Optional[Path] = None) -> IndexReport:
+    """
+    Atualiza a tabela de `kb` com os arquivos de `knowledge_dir`, reprocessando só o que mudou.
+
+    Args:
+        kb: Knowledge com o CachedLanceDb (src/knowledge_builder.py).
+        recreate: Apaga a tabela e o manifesto e reconstrói tudo.
+        parse_workers, batch_size, threads: Padrões de src/config.py.
+        manifest_path: Padrão: <VECTOR_DB_PATH>/<tabela>.manifest.json.
+    """
+    started = time.perf_counter()
+    parse_workers = KNOWLEDGE_PARSE_WORKERS if parse_workers is None else parse_workers
+    batch_size = batch_size or EMBEDDING_BATCH_SIZE
+    threads = EMBEDDING_THREADS if threads is None else threads
+    vector_db = kb.vector_db
+    embedder = vector_db.embedder
+    manifest_path = manifest_path or manifest_path_for(vector_db)
+    report = IndexReport()
+
+    manifest = None if recreate else _valid_manifest(vector_db, manifest_path)
+    if manifest is None:
+        report.full_rebuild = True
+        if vector_db.exists():
+            vector_db.drop()
+        vector_db.create()
+        manifest = KnowledgeManifest(embedder=_embedder_id(embedder), dimensions=embedder.dimensions)
+
+    # 1. Hash dos arquivos
+    files = knowledge_files(knowledge_dir)
+    relative = {path: path.relative_to(knowledge_dir).as_posix() for path in files}
+    hashes = {path: file_sha256(path) for path in files}
+    changed = [p for p in files if manifest.files.get(relative[p], {}).get("sha256") != hashes[p]]
+    removed = sorted(set(manifest.files) - set(relative.values()))
+    report.files, report.changed_files, report.removed_files = len(files), len(changed), len(removed)
+    report.scan_seconds = time.perf_counter() - started
+
+    # 2. Leitura dos alterados
+    t = time.perf_counter()
+    parsed = _parse_all(changed, parse_workers)
+    report.parse_seconds = time.perf_counter() - t
+
+    to_embed: list[tuple[str, str, dict]] = []  # (arquivo, chave, trecho)
+    to_rewrite: list[tuple[str, str, dict]] = []
+    to_delete: list[str] = []
+    new_entries = {}
+    for path, chunks in zip(changed, parsed):
+        rel = relative[path]
+        old = manifest.files.get(rel, {}).get("chunks", {})
+        keyed = _keyed_chunks(rel, chunks)
+        entry = {"sha256": hashes[path], "chunks": {}}
+        for key, chunk in keyed:
+            digest = _meta_digest(chunk)
+            entry["chunks"][key] = digest
+            if key not in old:
+                to_embed.append((rel, key, chunk))
+            elif old[key] != digest:
+                to_rewrite.append((rel, key, chunk))
+        to_delete.extend(k for k in old if k not in entry["chunks"])
+        new_entries[rel] = entry
+    for rel in removed:
+        to_delete.extend(manifest.files[rel]["chunks"])
+
+    # 3. Embedding dos trechos novos
+    t = time.perf_counter()
+    vectors = embed_texts(embedder, [c["content"] for _, _, c in to_embed], batch_size, threads)
+    report.embed_seconds = time.perf_counter() - t
+
+    # 4. Gravação: merge_insert pelo id, depois exclusões
+    t = time.perf_counter()
+    table = vector_db.table
+    rows = [_row(kb, rel, key, chunk, vector) for (rel, key, chunk), vector in zip(to_embed, vectors)]
+    if to_rewrite:
+        existing = _existing_vectors(table, [key for _, key, _ in to_rewrite])
+        rows += [_row(kb, rel, key, chunk, existing[key]) for rel, key, chunk in to_rewrite if key in existing]
+    for i in range(0, len(rows), _WRITE_BATCH):
+        table.merge_insert("id").when_matched_update_all().when_not_matched_insert_all().execute(rows[i:i + _WRITE_BATCH])
+    for i in range(0, len(to_delete), _DELETE_BATCH):
+        table.delete(_in_clause(to_delete[i:i + _DELETE_BATCH]))
+    report.write_seconds = time.perf_counter() - t
+
+    manifest.files.update(new_entries)
+    for rel in removed:
+        del manifest.files[rel]
+    manifest.save(manifest_path)
+
+    if rows or to_delete:
+        vector_db.invalidate_search_cache()
+        vector_db.fts_index_exists = False  # a próxima busca híbrida recria o índice FTS
+    report.embedded, report.rewritten, report.deleted = len(to_embed), len(to_rewrite), len(to_delete)
+    report.chunks = manifest.chunk_count()
+    report.total_seconds = time.perf_counter() - started
+    return report
+
+
+def _row(kb, relative: str, key: str, chunk: dict, vector) -> dict:
+    """Linha no formato do LanceDb do Agno (id, vector, payload JSON)."""
+    content = chunk["content"].replace("\x00", "\ufffd")
+    payload = {
+        "name": chunk["name"],
+        "meta_data": {**chunk["meta_data"], "linked_to": kb.name or ""},
+        "content": content,
+        "usage": None,
+        "content_id": hashlib.md5(relative.encode("utf-8")).hexdigest(),
+        "content_hash": key,
+    }
+    return {"id": key, "vector": [float(x) for x in vector], "payload": json.dumps(payload, ensure_ascii=False)}
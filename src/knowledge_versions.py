@@ -0,0 +1,299 @@
+"""
+Versões do índice da knowledge base e troca sem downtime.
+
+O build antigo reindexava a tabela que os agentes estavam consultando (ou
+exigia rebuild da imagem Docker). Aqui cada build grava uma tabela nova no
+mesmo diretório do LanceDB e só no fim aponta para ela:
+
+  1. build_version() clona a versão publicada (linhas + manifesto de hashes,
+     sem embedding) para `<base>__v<ms>` e roda o reindex incremental
+     (src/knowledge_index.py) na cópia — sem alteração, nada é criado
+  2. o índice FTS é criado na cópia, antes da publicação
+  3. publish() troca o ponteiro `<base>.current.json` com os.replace
+     (atômico); a tabela anterior entra na lista `retired`
+  4. cada processo da API segue o ponteiro (PointerWatcher, table_resolver
+     do CachedLanceDb): na próxima busca depois da troca, passa para a
+     versão nova e limpa o cache de resultados. Buscas em andamento
+     terminam na tabela antiga
+  5. cleanup_versions() apaga as versões aposentadas há mais de
+     KNOWLEDGE_RETIRE_GRACE_SECONDS, guardando as KNOWLEDGE_KEEP_VERSIONS
+     mais recentes para rollback; builds interrompidos (nunca publicados)
+     são apagados depois de ORPHAN_SECONDS
+
+Nenhuma busca vê uma tabela pela metade: a tabela nova só é publicada depois
+de completa, e o ponteiro nunca é escrito parcialmente. Sem ponteiro, a
+tabela `<base>` (layout anterior) é a versão publicada.
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from agno.knowledge.knowledge import Knowledge
+from agno.vectordb.lancedb import SearchType
+
+from src.config import KNOWLEDGE_KEEP_VERSIONS, KNOWLEDGE_RETIRE_GRACE_SECONDS
+from src.knowledge_index import IndexReport, is_up_to_date, manifest_path_for, reindex
+from src.retrieval_cache import CachedLanceDb
+
+logger = logging.getLogger(__name__)
+
+VERSION_SEP = "__v"
+# Tabela de versão nunca publicada (build interrompido) mais velha que isso é lixo
+ORPHAN_SECONDS = 6 * 3600
+
+
+@dataclass
+class IndexPointer:
+    """Conteúdo do ponteiro: versão publicada e versões aposentadas (mais recente primeiro)."""
+    table: str
+    published_at: float = 0.0
+    chunks: int = 0
+    retired: list = field(default_factory=list)  # [{"table": ..., "retired_at": ...}]
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["IndexPointer"]:
+        try:
+            return cls(**json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f"{path.suffix}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(asdict(self), ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, path)  # atômico: o leitor vê o ponteiro antigo ou o novo
+
+
+@dataclass
+class IndexVersion:
+    """Resultado de build_version()."""
+    table: str
+    report: IndexReport
+    published: bool
+
+
+def base_table_name(table_name: str) -> str:
+    """`steel_sales_knowledge__v1760...` -> `steel_sales_knowledge`."""
+    return table_name.split(VERSION_SEP, 1)[0]
+
+
+def version_table_name(base: str, now: Optional[float] = None) -> str:
+    return f"{base}{VERSION_SEP}{int((time.time() if now is None else now) * 1000)}"
+
+
+def _version_stamp(table_name: str) -> Optional[float]:
+    _, sep, stamp = table_name.partition(VERSION_SEP)
+    return int(stamp) / 1000 if sep and stamp.isdigit() else None
+
+
+def pointer_path(uri: str, base: str) -> Path:
+    return Path(uri) / f"{base}.current.json"
+
+
+def current_table(uri: str, base: str) -> str:
+    """Tabela publicada (a base, se ainda não há ponteiro)."""
+    pointer = IndexPointer.load(pointer_path(uri, base))
+    return pointer.table if pointer else base
+
+
+def _table_names(connection) -> list[str]:
+    if hasattr(connection, "list_tables"):
+        return list(connection.list_tables().tables)
+    return list(connection.table_names())
+
+
+def _handle(vector_db, table_name: str) -> CachedLanceDb:
+    """Handle de build para `table_name`, com o embedder de `vector_db` (cria a tabela se faltar)."""
+    return CachedLanceDb(
+        uri=vector_db.uri,
+        table_name=table_name,
+        connection=vector_db.connection,
+        embedder=vector_db.embedder,
+        search_type=vector_db.search_type,
+        use_tantivy=vector_db.use_tantivy,
+        search_cache_size=0,
+    )
+
+
+def _create_fts_index(vector_db):
+    if vector_db.search_type not in (SearchType.hybrid, SearchType.keyword):
+        return
+    try:
+        vector_db.table.create_fts_index("payload", use_tantivy=vector_db.use_tantivy, replace=True)
+        vector_db.fts_index_exists = True
+    except Exception as exc:
+        # Sem o índice, a primeira busca híbrida da API tenta criá-lo (comportamento anterior)
+        logger.warning(f"[KNOWLEDGE] Índice FTS não criado em {vector_db.table_name}: {exc}")
+
+
+def build_version(kb, knowledge_dir: Path, recreate: bool = False, **options) -> IndexVersion:
+    """
+    Gera e publica uma versão nova do índice a partir de `knowledge_dir`.
+
+    Args:
+        kb: Knowledge com o CachedLanceDb (define diretório, tabela base e embedder).
+        recreate: Reconstrói a versão nova do zero em vez de clonar a publicada.
+        **options: parse_workers, batch_size, threads de reindex().
+
+    Returns:
+        IndexVersion; `published=False` quando nada mudou (a versão atual continua).
+    """
+    vector_db = kb.vector_db
+    uri, base = str(vector_db.uri), base_table_name(vector_db.table_name)
+    connection = vector_db.connection
+    current = current_table(uri, base)
+    current_db = _handle(vector_db, current) if current in _table_names(connection) else None
+
+    if not recreate and current_db is not None and is_up_to_date(current_db, knowledge_dir):
+        report = reindex(Knowledge(name=kb.name, vector_db=current_db), knowledge_dir, **options)
+        return IndexVersion(current, report, published=False)
+
+    table = version_table_name(base)
+    try:
+        if not recreate and current_db is not None:
+            # Cópia das linhas com os vetores: o reindex só embeda o que mudou
+            connection.create_table(table, data=current_db.table.to_arrow())
+            if manifest_path_for(current_db).exists():
+                shutil.copyfile(manifest_path_for(current_db), Path(uri) / f"{table}.manifest.json")
+        new_db = _handle(vector_db, table)
+        report = reindex(Knowledge(name=kb.name, vector_db=new_db), knowledge_dir, recreate=recreate, **options)
+        _create_fts_index(new_db)
+    except BaseException:
+        _drop_version(connection, uri, table)
+        raise
+    publish(uri, base, table, chunks=report.chunks, connection=connection)
+    return IndexVersion(table, report, published=True)
+
+
+def publish(uri: str, base: str, table: str, chunks: int = 0, connection=None, now: Optional[float] = None):
+    """Aponta o ponteiro para `table` (já completa); a versão anterior vai para `retired`."""
+    import lancedb
+
+    connection = connection or lancedb.connect(uri)
+    now = time.time() if now is None else now
+    path = pointer_path(uri, base)
+    old = IndexPointer.load(path)
+    previous = old.table if old else base
+    retired = [{"table": previous, "retired_at": now}] if previous != table else []
+    if old:
+        retired += [r for r in old.retired if r["table"] not in (table, previous)]
+    existing = set(_table_names(connection))
+    retired = [r for r in retired if r["table"] in existing]
+    IndexPointer(table=table, published_at=now, chunks=chunks, retired=retired).save(path)
+    logger.info(f"[KNOWLEDGE] Versão publicada: {table} (anterior: {previous})")
+
+
+def rollback(uri: str, base: str, connection=None) -> str:
+    """Republica a versão aposentada mais recente. Levanta LookupError se não houver."""
+    pointer = IndexPointer.load(pointer_path(uri, base))
+    if pointer is None or not pointer.retired:
+        raise LookupError("Nenhuma versão anterior guardada")
+    table = pointer.retired[0]["table"]
+    publish(uri, base, table, connection=connection)
+    return table
+
+
+def cleanup_versions(uri: str, base: str, keep: Optional[int] = None, grace: Optional[float] = None,
+                     connection=None, now: Optional[float] = None) -> list[str]:
+    """
+    Apaga versões aposentadas há mais de `grace` segundos (menos as `keep` mais
+    recentes) e builds nunca publicados mais velhos que ORPHAN_SECONDS.
+
+    Returns:
+        Tabelas apagadas.
+    """
+    import lancedb
+
+    keep = KNOWLEDGE_KEEP_VERSIONS if keep is None else keep
+    grace = KNOWLEDGE_RETIRE_GRACE_SECONDS if grace is None else grace
+    connection = connection or lancedb.connect(uri)
+    now = time.time() if now is None else now
+    pointer = IndexPointer.load(pointer_path(uri, base))
+    current = pointer.table if pointer else base
+    retired = pointer.retired if pointer else []
+    protected = {current} | {r["table"] for r in retired[:keep]}
+    retired_at = {r["table"]: r["retired_at"] for r in retired}
+
+    dropped = []
+    for name in _table_names(connection):
+        if base_table_name(name) != base or name in protected:
+            continue
+        if name in retired_at:
+            due = retired_at[name] + grace
+        else:
+            stamp = _version_stamp(name)
+            if stamp is None:
+                continue  # tabela base ainda não aposentada por um publish
+            due = stamp + ORPHAN_SECONDS
+        if now >= due:
+            _drop_version(connection, uri, name)
+            dropped.append(name)
+    return dropped
+
+
+def _drop_version(connection, uri: str, table: str):
+    try:
+        connection.drop_table(table)
+    except Exception:
+        pass  # já apagada (por outro worker) ou nunca criada
+    (Path(uri) / f"{table}.manifest.json").unlink(missing_ok=True)
+
+
+class PointerWatcher:
+    """
+    table_resolver do CachedLanceDb: relê o ponteiro quando o arquivo muda e,
+    a cada troca observada, agenda cleanup_versions() para depois da carência.
+
+    Args:
+        uri, base: Diretório do LanceDB e tabela base.
+        cleanup: False não agenda limpeza (ex.: testes, processos só leitura).
+    """
+
+    def __init__(self, uri: str, base: str, cleanup: bool = True, grace: Optional[float] = None,
+                 keep: Optional[int] = None):
+        self.uri, self.base = uri, base
+        self.cleanup = cleanup
+        self.grace = KNOWLEDGE_RETIRE_GRACE_SECONDS if grace is None else grace
+        self.keep = keep
+        self._path = pointer_path(uri, base)
+        self._signature = None
+        self._table: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def __call__(self) -> Optional[str]:
+        try:
+            stat = self._path.stat()
+        except OSError:
+            return self._table
+        # os.replace troca o inode: a assinatura muda a cada publicação
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if signature == self._signature:
+                return self._table
+            pointer = IndexPointer.load(self._path)
+            if pointer is None:
+                return self._table
+            self._signature = signature
+            if pointer.table != self._table and self.cleanup:
+                self._schedule_cleanup()
+            self._table = pointer.table
+            return self._table
+
+    def _schedule_cleanup(self):
+        timer = threading.Timer(self.grace + 1, self._cleanup)
+        timer.daemon = True
+        timer.start()
+
+    def _cleanup(self):
+        try:
+            dropped = cleanup_versions(self.uri, self.base, keep=self.keep, grace=self.grace)
+            if dropped:
+                logger.info(f"[KNOWLEDGE] Versões antigas apagadas: {', '.join(dropped)}")
+        except Exception as exc:
+            logger.warning(f"[KNOWLEDGE] Falha na limpeza de versões: {exc}")
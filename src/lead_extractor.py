@@ -0,0 +1,333 @@
+"""
+Extração determinística dos campos do lead a partir da mensagem do cliente.
+
+O Qualificador gastava tokens para tirar da mensagem dados com formato fixo
+(CNPJ, e-mail, WhatsApp, UF, cidade, volume, urgência). Este módulo extrai
+esses campos por regras, antes de qualquer chamada de modelo, para que a API
+já aplique check_auto_disqualification no turno atual e o modelo só precise
+cuidar do que ainda falta (nome, tipo de cliente, conversa livre).
+
+  - CNPJ: 14 dígitos, com ou sem máscara, validado pelos dígitos verificadores
+  - E-mail
+  - WhatsApp: DDD válido + 8/9 dígitos, com ou sem +55, máscara e parênteses
+  - UF: sigla ("CE", "Fortaleza/CE"), nome do estado ("Ceará") ou cidade
+    conhecida (src/data/localidades.py); cidade no formato "Cidade/UF"
+  - Volume: do primeiro "número + unidade" até o fim do trecho do pedido;
+    trechos de pergunta ("quantos kg tem 1 barra de 12,5mm?") não contam
+  - Urgência: termos usados por calculate_score ("urgente", "hoje", "amanhã"...)
+
+Só preenche o que encontrou com segurança — na dúvida, deixa para o modelo.
+"""
+import re
+import unicodedata
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from src.business_rules import find_product_mention
+from src.data.localidades import CIDADES_AMBIGUAS, CIDADES_POR_UF, UF_POR_NOME_ESTADO
+from src.data.weight_rules import PESO_MINIMO_CIF_POR_ESTADO
+from src.volume_resolver import UNIT_WORDS, resolve_volume
+
+UFS = frozenset(PESO_MINIMO_CIF_POR_ESTADO)
+
+# DDDs em uso no Brasil (Anatel)
+DDDS_VALIDOS = frozenset({
+    11, 12, 13, 14, 15, 16, 17, 18, 19, 21, 22, 24, 27, 28,
+    31, 32, 33, 34, 35, 37, 38, 41, 42, 43, 44, 45, 46, 47, 48, 49,
+    51, 53, 54, 55, 61, 62, 63, 64, 65, 66, 67, 68, 69, 71, 73, 74, 75, 77, 79,
+    81, 82, 83, 84, 85, 86, 87, 88, 89, 91, 92, 93, 94, 95, 96, 97, 98, 99,
+})
+
+_RE_CNPJ = re.compile(r"(?<![\d/])\d{2}\.?\d{3}\.?\d{3}/?\d{4}-?\d{2}(?!\d)")
+_RE_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_RE_PHONE = re.compile(
+    r"(?<![\d@])(?:\+?55[\s.-]?)?\(?(\d{2})\)?[\s.-]?((?:9[\s.-]?)?\d{4})[\s.-]?(\d{4})(?!\d)"
+)
+
+_UNITS = "|".join(sorted(UNIT_WORDS, key=len, reverse=True))
+_NUMBER = r"\d{1,3}(?:\.\d{3})+|\d+(?:[.,]\d+)?"
+# Faixas ("5 a 10 toneladas", "entre 2 e 3 t") entram inteiras; o resolver usa o limite inferior
+_RE_VOLUME = re.compile(
+    rf"(?<![\w.,])(?:(?:entre\s+)?(?:{_NUMBER})\s*(?:-|\ba\b|\bate\b|\bou\b|\be\b)\s*)?(?:{_NUMBER})\s*(?:{_UNITS})\b"
+)
+# Fim do trecho do volume: pontuação, conectores que mudam de assunto ou "e" sem número depois
+_RE_VOLUME_STOP = re.compile(
+    r"[!?;\n]|\.(?=\s|$)|,(?!\d)"
+    r"|\s(?:para|pra|pro|com|sem|em|no|na|ate|urgente|hoje|amanha|entrega|meu|minha|cnpj|e-?mail|whatsapp|zap"
+    r"|sou|moro|aqui|uf|estado|cidade)\b"
+    r"|\s(?:e|mais)\b(?!\s*\d)"
+)
+_RE_VOLUME_CONTINUES = re.compile(r",\s*(?:(?:e|mais)\s+)?\d")
+# Trechos da mensagem (orações) e perguntas: terminam em "?" ou começam com interrogativo
+_RE_CLAUSE_END = re.compile(r"[!?;\n]|\.(?=\s|$)|,(?!\d)")
+_RE_INTERROGATIVO = re.compile(r"\s*(?:quant[oa]s?|qual|quais|como|quando|onde|sera)\b")
+
+# (padrão no texto sem acento, valor gravado em urgency) — negações primeiro
+_URGENCIA: list[tuple[re.Pattern, str]] = [
+    (re.compile(r"\b(?:sem|nao tenho|nao tem|nenhuma) (?:pressa|urgencia)\b"), "sem pressa"),
+    (re.compile(r"\b(?:urgente|urgencia|pra ontem|para ontem)\b"), "urgente"),
+    (re.compile(r"\bimediat[oa]s?\b|\bimediatamente\b"), "imediato"),
+    (re.compile(r"\b(?:pra|para|ate|entrega|entregar|receber) hoje\b|\bhoje (?:mesmo|ainda)\b|\bainda hoje\b"), "hoje"),
+    (re.compile(r"\b(?:pra|para|ate|entrega|entregar|receber) amanha\b|\bamanha (?:mesmo|cedo)\b"), "amanhã"),
+    (re.compile(r"\b(?:essa|esta|nesta|nessa) semana\b"), "esta semana"),
+    (re.compile(r"\b(?:proxima semana|semana que vem)\b"), "próxima semana"),
+    (re.compile(r"\b(?:proximo mes|mes que vem)\b"), "próximo mês"),
+]
+
+# Palavras que antecedem a cidade em "Sou de Iguatu/CE" e não fazem parte do nome
+_PREFIXOS_CIDADE = {"sou", "moro", "fico", "estou", "somos", "estamos", "aqui", "cidade", "em", "de", "da", "do", "na", "no"}
+_RE_CIDADE_UF = re.compile(
+    r"((?:[A-ZÀ-Ý][\wÀ-ÿ'-]*)(?:\s+(?:d[aeo]s?\s+)?[A-ZÀ-Ý][\wÀ-ÿ'-]*){0,4})"
+    r"\s*(?:/\s*([A-Za-z]{2})|\s-\s*([A-Za-z]{2})|-([A-Za-z]{2})|,?\s+([A-Z]{2}))(?![\wÀ-ÿ])"
+)
+_RE_UF_SEPARADA = re.compile(r"(?:[/-]\s*([A-Za-z]{2})|,\s*([A-Z]{2}))(?![\wÀ-ÿ])")
+_RE_UF_PALAVRA = re.compile(r"\b(?:uf|estado)\s*(?:de|do|da|:)?\s*([A-Za-z]{2})\b", re.IGNORECASE)
+_RE_UF_SOLTA = re.compile(r"(?<![\w-])([A-Z]{2})(?![\w-])")
+_RE_PARA_ESTADO = re.compile(r"\bpará\b|\bestado do para\b", re.IGNORECASE)
+
+
+def _fold(text: str) -> str:
+    """Minúsculas e sem acentos, preservando o comprimento (índices valem no texto original)."""
+    return "".join(unicodedata.normalize("NFD", c.lower())[0] for c in text)
+
+
+def _alternation(names) -> str:
+    return "|".join(re.escape(n) for n in sorted(names, key=len, reverse=True))
+
+
+_CIDADES: dict[str, tuple[str, str]] = {
+    _fold(cidade): (cidade, uf) for uf, cidades in CIDADES_POR_UF.items() for cidade in cidades
+}
+_RE_CIDADE_CONHECIDA = re.compile(rf"\b({_alternation(_CIDADES)})\b")
+_RE_NOME_ESTADO = re.compile(rf"\b({_alternation(UF_POR_NOME_ESTADO)})\b")
+
+
+@dataclass
+class ExtractedFields:
+    """Campos do LeadData encontrados na mensagem (None = não encontrado)."""
+    cnpj: Optional[str] = None
+    email: Optional[str] = None
+    whatsapp: Optional[str] = None
+    state: Optional[str] = None
+    city: Optional[str] = None
+    product_interest: Optional[str] = None
+    volume_estimate: Optional[str] = None
+    urgency: Optional[str] = None
+
+    def as_dict(self) -> dict[str, str]:
+        return {k: v for k, v in asdict(self).items() if v is not None}
+
+    def __bool__(self) -> bool:
+        return bool(self.as_dict())
+
+
+def is_valid_cnpj(cnpj: str) -> bool:
+    """Valida os dois dígitos verificadores do CNPJ (aceita com ou sem máscara)."""
+    digits = [int(d) for d in re.sub(r"\D", "", cnpj)]
+    if len(digits) != 14 or len(set(digits)) == 1:
+        return False
+    for size in (12, 13):
+        weights = list(range(size - 7, 1, -1)) + list(range(9, 1, -1))
+        remainder = sum(d * w for d, w in zip(digits[:size], weights)) % 11
+        if digits[size] != (0 if remainder < 2 else 11 - remainder):
+            return False
+    return True
+
+
+def _extract_cnpj(text: str) -> tuple[Optional[str], list[tuple[int, int]]]:
+    """Primeiro CNPJ válido e os trechos de todos os candidatos (não viram telefone)."""
+    found, spans = None, []
+    for match in _RE_CNPJ.finditer(text):
+        spans.append(match.span())
+        if found is None and is_valid_cnpj(match.group()):
+            found = re.sub(r"\D", "", match.group())
+    return found, spans
+
+
+def _extract_phone(text: str) -> Optional[str]:
+    for match in _RE_PHONE.finditer(text):
+        ddd, first, last = match.group(1), re.sub(r"\D", "", match.group(2)), match.group(3)
+        if int(ddd) not in DDDS_VALIDOS:
+            continue
+        if len(first) == 5 and first[0] != "9":
+            continue
+        if len(first) == 4 and first[0] not in "2345":  # fixo; celular sem o 9 não é aceito
+            continue
+        return f"{ddd}{first}{last}"
+    return None
+
+
+def _in_question(folded: str, pos: int) -> bool:
+    """True se a posição está num trecho de pergunta — o cliente não está informando o pedido."""
+    start = max((m.end() for m in _RE_CLAUSE_END.finditer(folded, 0, pos)), default=0)
+    end = _RE_CLAUSE_END.search(folded, pos)
+    return (end is not None and end.group() == "?") or bool(_RE_INTERROGATIVO.match(folded, start))
+
+
+def _extract_volume(text: str, folded: str) -> Optional[str]:
+    match = next((m for m in _RE_VOLUME.finditer(folded) if not _in_question(folded, m.start())), None)
+    if not match:
+        return None
+    end = match.end()
+    while True:
+        stop = _RE_VOLUME_STOP.search(folded, end)
+        if stop is None:
+            end = len(folded)
+            break
+        if _RE_VOLUME_CONTINUES.match(folded, stop.start()):
+            end = stop.end()
+            continue
+        end = stop.start()
+        break
+    return text[match.start():end].strip(" ,-") or None
+
+
+def _extract_urgency(folded: str) -> Optional[str]:
+    for pattern, value in _URGENCIA:
+        if pattern.search(folded):
+            return value
+    return None
+
+
+def _clean_city(candidate: str) -> Optional[str]:
+    words = candidate.split()
+    while words and _fold(words[0]) in _PREFIXOS_CIDADE:
+        words.pop(0)
+    if not words or not words[0][0].isupper():
+        return None
+    city = " ".join(words)
+    return _CIDADES.get(_fold(city), (city,))[0]  # grafia oficial se for cidade conhecida
+
+
+def _known_city(text: str, folded: str) -> tuple[Optional[str], Optional[str]]:
+    for match in _RE_CIDADE_CONHECIDA.finditer(folded):
+        cidade, uf = _CIDADES[match.group(1)]
+        # "natal", "palmas", "santos"... só contam com inicial maiúscula
+        if cidade in CIDADES_AMBIGUAS and not text[match.start()].isupper():
+            continue
+        return cidade, uf
+    return None, None
+
+
+def _extract_location(text: str, folded: str) -> tuple[Optional[str], Optional[str]]:
+    """(UF, cidade). Sigla explícita > nome do estado > UF implícita pela cidade."""
+    city, state = None, None
+
+    caixa_alta = text == text.upper()
+    for match in _RE_CIDADE_UF.finditer(text):
+        if caixa_alta and match.group(5):
+            continue
+        uf_text = next(g for g in match.groups()[1:] if g)
+        if uf_text.upper() in UFS and (city := _clean_city(match.group(1))):
+            state = uf_text.upper()
+            break
+
+    if state is None:
+        for pattern in (_RE_UF_PALAVRA, _RE_UF_SEPARADA):
+            for match in pattern.finditer(text):
+                if caixa_alta and pattern is _RE_UF_SEPARADA and match.group(2):
+                    continue  # ", SE PRECISAR": em CAIXA ALTA a sigla depois da vírgula pode ser palavra
+                uf_text = next(g for g in match.groups() if g)
+                if uf_text.upper() in UFS:
+                    state = uf_text.upper()
+                    break
+            if state:
+                break
+
+    if state is None:
+        match = _RE_NOME_ESTADO.search(folded)
+        if match:
+            state = UF_POR_NOME_ESTADO[match.group(1)]
+        elif _RE_PARA_ESTADO.search(text):
+            state = "PA"
+
+    # Sigla solta ("Recife PE") só em texto com minúsculas — em CAIXA ALTA "SE", "TO" são palavras
+    if state is None and not caixa_alta:
+        for match in _RE_UF_SOLTA.finditer(text):
+            if match.group(1) in UFS:
+                state = match.group(1)
+                break
+
+    if city is None:
+        known_city, known_uf = _known_city(text, folded)
+        if known_city and (state is None or state == known_uf):
+            city, state = known_city, known_uf
+
+    return state, city
+
+
+def normalize_uf(value: Optional[str]) -> Optional[str]:
+    """UF a partir da sigla ou do nome do estado ("ce", "Ceará" → "CE"); None se não reconhecer."""
+    if not value:
+        return None
+    text = value.strip()
+    if text.upper() in UFS:
+        return text.upper()
+    folded = _fold(text)
+    if folded == "para":  # campo só com o nome do estado: não é a preposição
+        return "PA"
+    return UF_POR_NOME_ESTADO.get(folded)
+
+
+def extract_lead_fields(message: Optional[str]) -> ExtractedFields:
+    """
+    Extrai da mensagem os campos do lead que têm formato reconhecível.
+
+    Args:
+        message: Texto da mensagem do cliente.
+
+    Returns:
+        ExtractedFields; campos não encontrados ficam None.
+    """
+    fields = ExtractedFields()
+    if not message:
+        return fields
+
+    fields.cnpj, cnpj_spans = _extract_cnpj(message)
+    email_match = _RE_EMAIL.search(message)
+    if email_match:
+        fields.email = email_match.group().lower().rstrip(".")
+
+    # CNPJ e e-mail saem do texto antes de procurar telefone e volume
+    masked = message
+    for start, end in cnpj_spans + ([email_match.span()] if email_match else []):
+        masked = masked[:start] + " " * (end - start) + masked[end:]
+    fields.whatsapp = _extract_phone(masked)
+
+    folded = _fold(masked)
+    fields.volume_estimate = _extract_volume(masked, folded)
+    fields.urgency = _extract_urgency(folded)
+    fields.state, fields.city = _extract_location(masked, folded)
+    fields.product_interest = find_product_mention(message)
+    return fields
+
+
+def apply_extracted_fields(lead, fields: ExtractedFields) -> list[str]:
+    """
+    Grava no LeadData os campos extraídos e retorna os nomes alterados.
+
+    Dados novos substituem os anteriores (o cliente corrigindo o e-mail ou
+    aumentando o volume); o produto só é preenchido se o lead ainda não tiver
+    um, para não trocar o produto técnico já definido pelo especialista.
+    Um volume menor que o já gravado não substitui o anterior: pode ser um
+    exemplo solto na conversa, e levaria à desqualificação automática por
+    volume mínimo. A redução fica para o modelo confirmar (lead_updates).
+    """
+    changed = []
+    for name, value in fields.as_dict().items():
+        if name == "product_interest" and (lead.product_interest or lead.technical_product):
+            continue
+        if name == "volume_estimate" and _is_smaller_volume(value, lead):
+            continue
+        if getattr(lead, name) != value:
+            setattr(lead, name, value)
+            changed.append(name)
+    return changed
+
+
+def _is_smaller_volume(volume: str, lead) -> bool:
+    """True se `volume` pesa menos que o volume já gravado no lead."""
+    if not lead.volume_estimate:
+        return False
+    product = lead.technical_product or lead.product_interest
+    return resolve_volume(volume, product).total_kg < resolve_volume(lead.volume_estimate, product).total_kg
@@ -0,0 +1,271 @@
+"""
+Métricas do pipeline do /chat no formato texto do Prometheus (GET /metrics).
+
+Sem dependência externa: contadores e histogramas em memória, um lock por
+métrica e busca binária no bucket — alguns microssegundos por observação.
+
+O que é medido:
+  - chat_stage_seconds{stage}: tempo de cada etapa do turno
+      coalesce      espera da janela de rajada (src/burst_coalescer.py)
+      session_lock  espera pelo turno anterior da mesma sessão
+      plan          regras de negócio, extração, volume, pré-roteador
+      turn_queue    espera por uma thread livre no TurnPool
+      agent_run     execução do Team/membro (modelo + tools + busca + SQLite)
+      finish        TurnResult, score, histórico e fila do CRM
+      knowledge_search  busca híbrida no LanceDB (com ou sem cache)
+      embedding     embedding da consulta no FastEmbed (só fora do cache)
+      session_read / session_write  sessão do Agno no SQLite
+  - chat_turns_total{path}: turnos por caminho (team, fast_path, quote_template...)
+  - chat_request_seconds{endpoint}: latência total do request
+  - model_calls_total{agent,model} e model_call_seconds{agent,model}
+  - model_tokens_total{agent,model,kind}: input, output e cached
+  - knowledge_search_results_total, knowledge_cache_total{cache,result}
+  - turn_pool_in_flight / turn_pool_queued
+
+Uso:
+    with stage_timer("plan"):
+        plan = _plan_turn(message)
+    METRICS.render()  # texto do /metrics
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, Optional
+
+from agno.db.sqlite import SqliteDb
+
+from src.config import METRICS_ENABLED
+
+# Do cache (sub-milissegundo) à chamada de modelo lenta (dezenas de segundos)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    """Contador monotônico com labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Histogram:
+    """Histograma cumulativo (buckets do Prometheus) com labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple, list] = {}  # labels -> [contagem por bucket..., +Inf, soma]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def sum(self, *labels: str) -> float:
+        series = self._series.get(labels)
+        return series[-1] if series else 0.0
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = 'le="%s"' % _number(bound)
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-1])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class CallbackMetric:
+    """Valores lidos na hora do scrape (gauges e contadores mantidos por outro módulo)."""
+
+    def __init__(self, name: str, help: str, kind: str, labelnames: Iterable[str], read: Callable[[], dict]):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._read = read
+
+    def samples(self) -> Iterator[str]:
+        try:
+            values = self._read()
+        except Exception:  # o scrape nunca derruba o /metrics
+            return
+        for labels, value in values.items():
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Registry:
+    """Conjunto de métricas renderizado no formato texto 0.0.4 do Prometheus."""
+
+    def __init__(self):
+        self._metrics: dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name: str, help: str, kind: str, read: Callable[[], dict], labelnames: Iterable[str] = ()):
+        return self.register(CallbackMetric(name, help, kind, labelnames, read))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Registry()
+
+STAGE_SECONDS = METRICS.histogram("chat_stage_seconds", "Tempo de cada etapa do turno do /chat", ["stage"])
+REQUEST_SECONDS = METRICS.histogram("chat_request_seconds", "Latência total do request", ["endpoint"])
+TURNS = METRICS.counter("chat_turns_total", "Turnos por caminho no pipeline", ["path"])
+MODEL_CALLS = METRICS.counter("model_calls_total", "Chamadas de modelo por agente e modelo", ["agent", "model"])
+MODEL_CALL_SECONDS = METRICS.histogram("model_call_seconds", "Duração de cada chamada de modelo", ["agent", "model"])
+MODEL_TOKENS = METRICS.counter("model_tokens_total", "Tokens por agente, modelo e tipo (input, output, cached)",
+                               ["agent", "model", "kind"])
+KNOWLEDGE_RESULTS = METRICS.counter("knowledge_search_results_total", "Documentos devolvidos pelas buscas na knowledge base")
+
+
+def observe_stage(stage: str, seconds: float):
+    if METRICS_ENABLED:
+        STAGE_SECONDS.observe(seconds, stage)
+
+
+@contextmanager
+def stage_timer(stage: str, histogram: Optional[Histogram] = None):
+    """Mede o bloco em chat_stage_seconds{stage} (ou no histograma indicado, com `stage` como label)."""
+    if not METRICS_ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        (histogram or STAGE_SECONDS).observe(time.perf_counter() - started, stage)
+
+
+def count_search_results(documents: int):
+    if METRICS_ENABLED:
+        KNOWLEDGE_RESULTS.inc(amount=documents)
+
+
+def count_turn(path: str):
+    if METRICS_ENABLED:
+        TURNS.inc(path)
+
+
+def timed_turn(func: Callable, stage: str = "agent_run") -> Callable:
+    """
+    Envolve o runner enviado ao TurnPool: mede a espera na fila (do envio até a
+    thread começar, em turn_queue) e a execução (em `stage`).
+    """
+    submitted = time.perf_counter()
+
+    def run(*args, **kwargs):
+        observe_stage("turn_queue", time.perf_counter() - submitted)
+        with stage_timer(stage):
+            return func(*args, **kwargs)
+
+    return run
+
+
+def record_model_calls(usages: Iterable) -> None:
+    """Contadores por chamada de modelo (CallUsage de src/prompt_cache.py)."""
+    if not METRICS_ENABLED:
+        return
+    for usage in usages:
+        MODEL_CALLS.inc(usage.agent, usage.model)
+        MODEL_TOKENS.inc(usage.agent, usage.model, "input", amount=usage.input_tokens)
+        MODEL_TOKENS.inc(usage.agent, usage.model, "output", amount=usage.output_tokens)
+        MODEL_TOKENS.inc(usage.agent, usage.model, "cached", amount=usage.cached_tokens)
+        if usage.duration is not None:
+            MODEL_CALL_SECONDS.observe(usage.duration, usage.agent, usage.model)
+
+
+class TimedSqliteDb(SqliteDb):
+    """SqliteDb do Agno com a leitura e a gravação da sessão medidas em chat_stage_seconds."""
+
+    def get_session(self, *args, **kwargs):
+        with stage_timer("session_read"):
+            return super().get_session(*args, **kwargs)
+
+    def upsert_session(self, *args, **kwargs):
+        with stage_timer("session_write"):
+            return super().upsert_session(*args, **kwargs)
+
+
+def _knowledge_cache_counts() -> dict:
+    from src.knowledge_builder import retrieval_cache_stats  # evita import circular
+    values = {}
+    for cache, stats in retrieval_cache_stats().items():
+        values[(cache, "hit")] = stats["hits"]
+        values[(cache, "miss")] = stats["misses"]
+    return values
+
+
+METRICS.callback("knowledge_cache_total", "Acertos e erros dos caches de embedding e de busca", "counter",
+                 _knowledge_cache_counts, ["cache", "result"])
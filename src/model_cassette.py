@@ -0,0 +1,427 @@
+"""
+Gravação e reprodução (cassete) das chamadas de modelo.
+
+Rodar conversas contra o Gemini/Claude de verdade é lento, caro e não
+determinístico. Com MODEL_CASSETTE_MODE ligado, get_model() devolve o modelo
+do provedor envolvido num CassetteModel:
+
+  - record: sempre chama o provedor e grava a resposta
+  - replay: só reproduz; request sem gravação levanta CassetteMiss
+  - auto:   reproduz o que existe e grava o que falta
+
+A chave de cada chamada é o hash do request normalizado — id do modelo,
+mensagens (papel, texto, tool calls), tools, formato de saída e stream —
+com espaços colapsados e UUIDs/horários mascarados. As respostas ficam numa
+tabela SQLite (MODEL_CASSETTE_PATH) comprimidas com zlib, junto com a
+latência original; MODEL_CASSETTE_LATENCY reproduz essa latência (1 = igual,
+0 = instantâneo).
+
+Cada chamada não encontrada entra no relatório de misses (/health e
+`python -m src.model_cassette report`) com o motivo: `prompt_changed` quando
+o cassete tem gravações do mesmo agente com outro prefixo estático
+(instruções + tools — ver src/prompt_cache.py), `new_request` quando é só
+uma conversa que ainda não foi gravada.
+"""
+import argparse
+import base64
+import copy
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from agno.models.base import Model
+from agno.models.response import ModelResponse
+
+from src.prompt_cache import prefix_digest
+
+MODES = ("off", "record", "replay", "auto")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cassette (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    agent TEXT NOT NULL,        -- primeira linha do system prompt
+    prefix TEXT NOT NULL,       -- digest de instruções + tools
+    responses BLOB NOT NULL,    -- JSON das ModelResponse (uma por delta no stream), zlib
+    latency REAL NOT NULL,      -- segundos da chamada original
+    recorded_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_cassette_agent ON cassette(agent, model);
+"""
+
+_UUID = re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.IGNORECASE)
+_TIMESTAMP = re.compile(r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?([+-]\d{2}:?\d{2}|Z)?\b")
+
+
+class CassetteMiss(LookupError):
+    """Request sem gravação no modo replay."""
+
+
+def _normalize_text(text: str) -> str:
+    text = _UUID.sub("<uuid>", text)
+    text = _TIMESTAMP.sub("<timestamp>", text)
+    return " ".join(text.split())
+
+
+def _canonical_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _normalize_arguments(arguments: Any) -> Any:
+    if isinstance(arguments, str):
+        try:
+            return json.loads(arguments)
+        except ValueError:
+            return _normalize_text(arguments)
+    return arguments
+
+
+def _normalize_message(message: Any) -> dict:
+    content = message.content
+    if not isinstance(content, str):
+        content = _canonical_json(content) if content is not None else ""
+    normalized = {"role": message.role, "content": _normalize_text(content)}
+    if message.tool_calls:
+        # ids de tool call são gerados pelo provedor: ficam fora da chave
+        normalized["tool_calls"] = [
+            [call.get("function", {}).get("name"), _normalize_arguments(call.get("function", {}).get("arguments"))]
+            for call in message.tool_calls
+        ]
+    if getattr(message, "tool_name", None):
+        normalized["tool_name"] = message.tool_name
+    return normalized
+
+
+def _response_format(response_format: Any) -> Any:
+    if isinstance(response_format, type) and hasattr(response_format, "model_json_schema"):
+        return response_format.model_json_schema()
+    return response_format
+
+
+def request_key(model_id: str, messages: list, tools: Optional[list] = None, response_format: Any = None,
+                stream: bool = False) -> str:
+    """Hash do request normalizado: mesma conversa, mesmas instruções e tools → mesma chave."""
+    payload = {
+        "model": model_id,
+        "messages": [_normalize_message(m) for m in messages],
+        "tools": tools or [],
+        "response_format": _response_format(response_format),
+        "stream": stream,
+    }
+    return hashlib.sha256(_canonical_json(payload).encode("utf-8")).hexdigest()[:32]
+
+
+def agent_label(messages: list) -> str:
+    """Primeira linha do system prompt — identifica o agente no relatório."""
+    if messages and messages[0].role == "system":
+        for line in str(messages[0].content or "").splitlines():
+            if line.strip():
+                return line.strip()[:80]
+    return "(sem system prompt)"
+
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, bytes):  # assinaturas de raciocínio do Gemini em provider_data
+        return {"__b64__": base64.b64encode(value).decode("ascii")}
+    return str(value)
+
+
+def _decode_hook(obj: dict) -> Any:
+    if set(obj) == {"__b64__"}:
+        return base64.b64decode(obj["__b64__"])
+    return obj
+
+
+def _dump_responses(responses: list[ModelResponse]) -> bytes:
+    items = []
+    for response in responses:
+        data = response.to_dict()
+        data.pop("parsed", None)  # saída estruturada é reconstruída do texto pelo Agno
+        if isinstance(data.get("response_usage"), dict):
+            data["response_usage"].pop("timer", None)
+        items.append(data)
+    return zlib.compress(json.dumps(items, ensure_ascii=False, default=_encode_default).encode("utf-8"))
+
+
+def _load_responses(blob: bytes) -> list[ModelResponse]:
+    return [ModelResponse.from_dict(item) for item in json.loads(zlib.decompress(blob), object_hook=_decode_hook)]
+
+
+@dataclass
+class CassetteStats:
+    hits: int = 0
+    misses: int = 0
+    recorded: int = 0
+    last_misses: deque = field(default_factory=lambda: deque(maxlen=50))
+
+    def as_dict(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "recorded": self.recorded,
+                "last_misses": list(self.last_misses)}
+
+
+class Cassette:
+    """
+    Arquivo SQLite com as respostas gravadas.
+
+    Args:
+        path: Arquivo do cassete (":memory:" nos testes).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.stats = CassetteStats()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def get(self, key: str) -> Optional[tuple[list[ModelResponse], float]]:
+        with self._lock:
+            row = self._db.execute("SELECT responses, latency FROM cassette WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return _load_responses(row[0]), row[1]
+
+    def put(self, key: str, model: str, agent: str, prefix: str, responses: list[ModelResponse], latency: float):
+        blob = _dump_responses(responses)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO cassette (key, model, agent, prefix, responses, latency, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, agent, prefix, blob, latency, time.time()),
+            )
+            self.stats.recorded += 1
+
+    def hit(self):
+        with self._lock:
+            self.stats.hits += 1
+
+    def miss(self, key: str, model: str, agent: str, prefix: str, messages: list):
+        """Registra o miss e classifica o motivo."""
+        with self._lock:
+            prefixes = {row[0] for row in self._db.execute(
+                "SELECT DISTINCT prefix FROM cassette WHERE agent = ? AND model = ?", (agent, model))}
+            reason = "prompt_changed" if prefixes and prefix not in prefixes else "new_request"
+            last = next((m for m in reversed(messages) if m.role == "user"), None)
+            self.stats.misses += 1
+            self.stats.last_misses.append({
+                "key": key,
+                "model": model,
+                "agent": agent,
+                "reason": reason,
+                "last_user_message": _normalize_text(str(last.content or ""))[:120] if last else "",
+            })
+        return reason
+
+    def summary(self) -> list[dict]:
+        """Gravações por agente, modelo e prefixo."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT agent, model, prefix, COUNT(*), SUM(LENGTH(responses)), AVG(latency), MAX(recorded_at) "
+                "FROM cassette GROUP BY agent, model, prefix ORDER BY agent, MAX(recorded_at)"
+            ).fetchall()
+        return [{"agent": a, "model": m, "prefix": p, "entries": n, "bytes": b, "avg_latency": round(lat, 3),
+                 "last_recorded_at": last} for a, m, p, n, b, lat, last in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_cassettes: dict[str, Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(path: str) -> Cassette:
+    """Um Cassette (uma conexão) por arquivo no processo."""
+    with _cassettes_lock:
+        if path not in _cassettes:
+            _cassettes[path] = Cassette(path)
+        return _cassettes[path]
+
+
+def cassette_stats() -> dict:
+    """Acertos, gravações e últimos misses de cada cassete aberto (para o /health)."""
+    with _cassettes_lock:
+        return {path: cassette.stats.as_dict() for path, cassette in _cassettes.items()}
+
+
+@dataclass
+class CassetteModel(Model):
+    """
+    Modelo que grava/reproduz as chamadas de `inner` num Cassette.
+
+    id, provider e o suporte a saída estruturada são os do modelo real, então
+    o Agno monta exatamente o mesmo request com e sem cassete.
+
+    Args:
+        inner: Modelo do provedor (chamado só em record/auto).
+        cassette: Onde ficam as gravações.
+        mode: "record", "replay" ou "auto".
+        replay_latency: Fator da latência gravada na reprodução (0 = instantâneo).
+        log_requests: Guarda as mensagens de cada chamada em `calls` (benchmarks).
+    """
+
+    id: str = "cassette"
+    name: str = "Cassette"
+    provider: str = "Cassette"
+    inner: Optional[Model] = None
+    cassette: Optional[Cassette] = None
+    mode: str = "replay"
+    replay_latency: float = 0.0
+    log_requests: bool = False
+    calls: list = field(default_factory=list)
+
+    @classmethod
+    def wrap(cls, inner: Model, cassette: Cassette, mode: str, replay_latency: float = 0.0, **kwargs) -> "CassetteModel":
+        if mode not in MODES[1:]:
+            raise ValueError(f"modo de cassete inválido: {mode!r} (use record, replay ou auto)")
+        return cls(
+            id=inner.id,
+            name=inner.name,
+            provider=inner.provider,
+            inner=inner,
+            cassette=cassette,
+            mode=mode,
+            replay_latency=replay_latency,
+            supports_native_structured_outputs=inner.supports_native_structured_outputs,
+            supports_json_schema_outputs=inner.supports_json_schema_outputs,
+            **kwargs,
+        )
+
+    def __deepcopy__(self, memo):
+        # O Agno copia modelos entre runs; a conexão do cassete e o cliente do provedor são compartilhados
+        return copy.copy(self)
+
+    # ── Chamadas ─────────────────────────────────────────────────────────────
+
+    def _lookup(self, messages: list, tools, response_format, stream: bool):
+        if self.log_requests:
+            self.calls.append(list(messages))
+        key = request_key(self.id, messages, tools, response_format, stream)
+        agent, prefix = agent_label(messages), prefix_digest(messages, tools)
+        recorded = self.cassette.get(key) if self.mode != "record" else None
+        if recorded is not None:
+            self.cassette.hit()
+            return key, agent, prefix, recorded
+        if self.mode == "replay":
+            reason = self.cassette.miss(key, self.id, agent, prefix, messages)
+            raise CassetteMiss(f"sem gravação para {agent!r} ({reason}, chave {key})")
+        if self.mode == "auto":
+            self.cassette.miss(key, self.id, agent, prefix, messages)
+        return key, agent, prefix, None
+
+    def invoke(self, messages, assistant_message=None, response_format=None, tools=None, **kwargs) -> ModelResponse:
+        key, agent, prefix, recorded = self._lookup(messages, tools, response_format, stream=False)
+        if recorded is not None:
+            responses, latency = recorded
+            if self.replay_latency:
+                time.sleep(latency * self.replay_latency)
+            return responses[0]
+        started = time.perf_counter()
+        response = self.inner.invoke(messages, assistant_message, response_format=response_format, tools=tools,
+                                     **kwargs)
+        self.cassette.put(key, self.id, agent, prefix, [response], time.perf_counter() - started)
+        return response
+
+    async def ainvoke(self, messages, assistant_message=None, response_format=None, tools=None,
+                      **kwargs) -> ModelResponse:
+        key, agent, prefix, recorded = self._lookup(messages, tools, response_format, stream=False)
+        if recorded is not None:
+            import asyncio
+            responses, latency = recorded
+            if self.replay_latency:
+                await asyncio.sleep(latency * self.replay_latency)
+            return responses[0]
+        started = time.perf_counter()
+        response = await self.inner.ainvoke(messages, assistant_message, response_format=response_format,
+                                            tools=tools, **kwargs)
+        self.cassette.put(key, self.id, agent, prefix, [response], time.perf_counter() - started)
+        return response
+
+    def invoke_stream(self, messages, assistant_message=None, response_format=None, tools=None, **kwargs):
+        key, agent, prefix, recorded = self._lookup(messages, tools, response_format, stream=True)
+        if recorded is not None:
+            responses, latency = recorded
+            pause = latency * self.replay_latency / max(1, len(responses))
+            for response in responses:
+                if pause:
+                    time.sleep(pause)
+                yield response
+            return
+        started = time.perf_counter()
+        deltas = []
+        for delta in self.inner.invoke_stream(messages, assistant_message, response_format=response_format,
+                                              tools=tools, **kwargs):
+            deltas.append(delta)
+            yield delta
+        self.cassette.put(key, self.id, agent, prefix, deltas, time.perf_counter() - started)
+
+    async def ainvoke_stream(self, messages, assistant_message=None, response_format=None, tools=None, **kwargs):
+        key, agent, prefix, recorded = self._lookup(messages, tools, response_format, stream=True)
+        if recorded is not None:
+            import asyncio
+            responses, latency = recorded
+            pause = latency * self.replay_latency / max(1, len(responses))
+            for response in responses:
+                if pause:
+                    await asyncio.sleep(pause)
+                yield response
+            return
+        started = time.perf_counter()
+        deltas = []
+        async for delta in self.inner.ainvoke_stream(messages, assistant_message, response_format=response_format,
+                                                     tools=tools, **kwargs):
+            deltas.append(delta)
+            yield delta
+        self.cassette.put(key, self.id, agent, prefix, deltas, time.perf_counter() - started)
+
+    # invoke* do modelo real já devolvem ModelResponse prontas
+    def _parse_provider_response(self, response, **kwargs) -> ModelResponse:
+        return response
+
+    def _parse_provider_response_delta(self, response) -> ModelResponse:
+        return response
+
+    # Formatação específica do provedor (resultado de tools no Gemini, system prompt no Claude)
+
+    def format_function_call_results(self, *args, **kwargs):
+        return self.inner.format_function_call_results(*args, **kwargs)
+
+    def get_system_message_for_model(self, *args, **kwargs):
+        return self.inner.get_system_message_for_model(*args, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Relatório de um cassete de chamadas de modelo")
+    parser.add_argument("command", choices=["report"])
+    parser.add_argument("path", nargs="?", default=None, help="arquivo do cassete (padrão: MODEL_CASSETTE_PATH)")
+    args = parser.parse_args()
+
+    from src.config import MODEL_CASSETTE_PATH
+
+    cassette = Cassette(args.path or MODEL_CASSETTE_PATH)
+    rows = cassette.summary()
+    print(f"{'agente':<50} {'modelo':<28} {'prefixo':<17} {'gravações':>9} {'KB':>8} {'latência':>9}")
+    for row in rows:
+        print(f"{row['agent'][:50]:<50} {row['model'][:28]:<28} {row['prefix']:<17} {row['entries']:>9} "
+              f"{row['bytes'] / 1024:>8.1f} {row['avg_latency']:>8.2f}s")
+    stale = {}
+    for row in rows:
+        stale.setdefault((row["agent"], row["model"]), []).append(row["prefix"])
+    for (agent, model), prefixes in stale.items():
+        if len(prefixes) > 1:
+            print(f"\n{agent} ({model}): {len(prefixes)} prefixos — gravações antigas de prompt alterado "
+                  f"(o mais recente é {prefixes[-1]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 from enum import Enum
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 
 
@@ -35,6 +35,7 @@ class LeadData(BaseModel):
     product_interest: Optional[str] = None
     technical_product: Optional[str] = None
     volume_estimate: Optional[str] = None
+    volume_kg: Optional[float] = None  # volume_estimate convertido (src/volume_resolver.py)
     urgency: Optional[str] = None
     classification: LeadClassification = LeadClassification.FRIO
     missing_fields: list[str] = []
@@ -42,9 +43,41 @@ class LeadData(BaseModel):
     disqualified_reason: Optional[str] = None
 
 
+class NextAction(str, Enum):
+    COLLECT_DATA = "collect_data"
+    GENERATE_QUOTE = "generate_quote"
+    TRANSFER_TO_CLOSER = "transfer_to_closer"
+    TRANSFER_TO_HUMAN = "transfer_to_human"
+    DISQUALIFIED = "disqualified"
+
+
+class LeadUpdates(BaseModel):
+    """Campos do lead informados ou corrigidos no turno (None = sem mudança)."""
+    name: Optional[str] = None
+    whatsapp: Optional[str] = None
+    email: Optional[str] = None
+    cnpj: Optional[str] = None
+    state: Optional[str] = Field(None, description="Sigla da UF, ex.: CE")
+    city: Optional[str] = None
+    client_type: Optional[ClientType] = None
+    product_interest: Optional[str] = None
+    technical_product: Optional[str] = None
+    volume_estimate: Optional[str] = None
+    urgency: Optional[str] = None
+
+
+class TurnResult(BaseModel):
+    """Saída estruturada do coordenador ao fim de cada turno (output_schema do Team)."""
+    message: str = Field(description="Resposta ao cliente, só o texto da conversa")
+    classification: LeadClassification
+    lead_updates: LeadUpdates = Field(default_factory=LeadUpdates)
+    next_action: NextAction
+
+
 class IncomingMessage(BaseModel):
     session_id: str
     message: str
+    user_id: Optional[str] = None
     lead_data: Optional[LeadData] = None
 
 
@@ -1,13 +1,20 @@
+from typing import Callable, Optional
+
+from agno.db.base import BaseDb
 from agno.team import Team
 from agno.team.team import TeamMode
-from agno.db.sqlite import SqliteDb
-from src.config import get_model
+from src.config import get_model, static_prompt, HISTORY_COMPACTION
+from src.metrics import TimedSqliteDb
+from src.prompt_cache import record_run
+from src.models import TurnResult
 from src.agents.qualifier_agent import create_qualifier_agent
 from src.agents.product_specialist_agent import create_product_specialist_agent
 from src.agents.quote_generator_agent import create_quote_generator_agent
 from src.agents.human_handoff_agent import create_human_handoff_agent
 
-ORCHESTRATOR_INSTRUCTIONS = """
+SESSION_DB_FILE = "data/agent_sessions.db"
+
+ORCHESTRATOR_INSTRUCTIONS = static_prompt("""
 Você é o Orquestrador do sistema de atendimento da Aço Cearense, distribuidora de produtos de aço com sede em Fortaleza — CE. Atendemos todo o Brasil com pedidos mínimos que variam por estado (de 250kg no CE até 10.000kg em estados remotos).
 
 Coordene os agentes especializados para qualificar leads e gerar orçamentos:
@@ -37,6 +44,7 @@ Tentativas incoerentes: [número de 0 a 3]
 ---
 
 Nunca delegue sem esse bloco. O agente membro NÃO tem memória própria — você é o único guardião do estado da conversa.
+O histórico chega na mensagem, no bloco ---HISTÓRICO DA CONVERSA--- (últimos turnos na íntegra e resumo dos anteriores): use-o para montar o contexto, sem copiá-lo inteiro para o membro.
 
 ## Fluxo de decisão:
 - Cliente pede humano / atendente / gerente → Agente de Transbordo (IMEDIATO)
@@ -50,10 +58,34 @@ Nunca delegue sem esse bloco. O agente membro NÃO tem memória própria — voc
 - NUNCA reinicie a conversa do zero
 - Atualize o bloco CONTEXTO ACUMULADO a cada turno com as novas informações recebidas
 - Incremente "Tentativas incoerentes" quando o cliente der respostas sem sentido
-"""
 
+## Resposta final (formato estruturado):
+- `message`: só o texto para o cliente — sem linha de STATUS nem bloco de contexto
+- `classification`: FRIO, MORNO ou QUENTE, conforme os critérios do Qualificador
+- `lead_updates`: apenas os campos que o cliente informou ou corrigiu neste turno (os demais ficam nulos)
+- `next_action`: collect_data (FRIO), generate_quote (MORNO), transfer_to_closer (QUENTE) ou transfer_to_human (transbordo)
+""")
+
+
+def create_steel_sales_team(
+    compact_history: Optional[bool] = None,
+    tool_hooks: Optional[list[Callable]] = None,
+    db: Optional[BaseDb] = None,
+) -> Team:
+    """
+    Monta o Team de vendas.
+
+    `tool_hooks` envolvem as tools do coordenador, inclusive a delegação aos
+    membros (a API usa para incorporar mensagens que chegam no meio do turno).
+    `db` é o banco das sessões (padrão: SQLite em SESSION_DB_FILE); a API passa
+    o mesmo em que grava o session_state (src/session_store.py).
 
-def create_steel_sales_team() -> Team:
+    Com o histórico compactado (padrão, HISTORY_COMPACTION), a API manda o
+    histórico na própria mensagem e o Agno não anexa runs anteriores nem ao
+    coordenador nem aos membros; as runs continuam gravadas no SQLite.
+    """
+    if compact_history is None:
+        compact_history = HISTORY_COMPACTION
     qualifier = create_qualifier_agent()
     product_specialist = create_product_specialist_agent()
     quote_generator = create_quote_generator_agent()
@@ -65,12 +97,15 @@ def create_steel_sales_team() -> Team:
         model=get_model(),
         members=[qualifier, product_specialist, quote_generator, human_handoff],
         instructions=ORCHESTRATOR_INSTRUCTIONS,
-        db=SqliteDb(db_file="data/agent_sessions.db"),
-        add_history_to_context=True,
+        db=db if db is not None else TimedSqliteDb(db_file=SESSION_DB_FILE),
+        add_history_to_context=not compact_history,
         store_history_messages=True,
-        add_team_history_to_members=True,
+        add_team_history_to_members=not compact_history,
         num_team_history_runs=5,
         markdown=True,
+        output_schema=TurnResult,
+        tool_hooks=tool_hooks,
+        post_hooks=[record_run],  # chamadas dos membros, antes de o Agno descartá-las
     )
 
     return team
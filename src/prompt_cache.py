@@ -0,0 +1,180 @@
+"""
+Cache de prefixo do prompt: tokens de entrada em cache vs. fora do cache.
+
+As instruções dos agentes (ORCHESTRATOR_INSTRUCTIONS, QUALIFIER_INSTRUCTIONS,
+a tabela de 22 grupos do Especialista...) são o prefixo estático de toda
+chamada. Com o prefixo idêntico byte a byte entre turnos, o provedor cobra
+esses tokens como cache (src/config.py liga o cache do Claude; o Gemini 2.5+
+faz cache implícito). Os dados do lead e do turno vão sempre na mensagem do
+usuário, depois do prefixo.
+
+Este módulo registra, por chamada de modelo, quantos tokens de entrada vieram
+do cache, e monta o prefixo estático (tools + system) para a checagem offline
+em tests/test_prompt_cache.py. Cada chamada também vai para os contadores do
+/metrics (src/metrics.py).
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass
+from types import SimpleNamespace
+from typing import Any, Iterable, Optional
+
+from src.metrics import record_model_calls
+
+# Provedores em que input_tokens NÃO inclui os tokens lidos/gravados no cache
+_CACHE_EXCLUDED_FROM_INPUT = {"Anthropic"}
+
+
+@dataclass
+class CallUsage:
+    """Tokens e duração de uma chamada de modelo."""
+    agent: str
+    provider: str
+    model: str
+    input_tokens: int  # total de entrada, com ou sem cache
+    cached_tokens: int
+    cache_write_tokens: int = 0
+    output_tokens: int = 0
+    duration: Optional[float] = None  # segundos (ausente nos eventos de stream)
+
+    @property
+    def uncached_tokens(self) -> int:
+        return max(0, self.input_tokens - self.cached_tokens)
+
+
+def call_usage(agent: str, provider: Optional[str], model: Optional[str], metrics: Any) -> CallUsage:
+    """Normaliza as métricas do Agno (MessageMetrics ou evento de request) para CallUsage."""
+    provider = provider or ""
+    input_tokens = getattr(metrics, "input_tokens", 0) or 0
+    cached = getattr(metrics, "cache_read_tokens", 0) or 0
+    written = getattr(metrics, "cache_write_tokens", 0) or 0
+    if provider in _CACHE_EXCLUDED_FROM_INPUT:
+        input_tokens += cached + written
+    output_tokens = getattr(metrics, "output_tokens", 0) or 0
+    return CallUsage(agent, provider, model or "", input_tokens, cached, written, output_tokens,
+                     getattr(metrics, "duration", None))
+
+
+def collect_call_usage(run_output: Any) -> list[CallUsage]:
+    """Uma CallUsage por resposta do modelo no run (coordenador e membros)."""
+    calls = []
+    agent = getattr(run_output, "team_name", None) or getattr(run_output, "agent_name", None) or ""
+    provider = getattr(run_output, "model_provider", None)
+    model = getattr(run_output, "model", None)
+    for message in getattr(run_output, "messages", None) or []:
+        if message.role == "assistant" and message.metrics is not None and message.metrics.input_tokens:
+            calls.append(call_usage(agent, provider, model, message.metrics))
+    for member in getattr(run_output, "member_responses", None) or []:
+        calls.extend(collect_call_usage(member))
+    return calls
+
+
+class PromptCacheStats:
+    """Totais e últimas chamadas, para o /health."""
+
+    def __init__(self, keep_last: int = 20):
+        self.calls = 0
+        self.input_tokens = 0
+        self.cached_tokens = 0
+        self._last: deque = deque(maxlen=keep_last)
+        self._lock = threading.Lock()
+
+    def record(self, usages: Iterable[CallUsage]):
+        with self._lock:
+            for usage in usages:
+                self.calls += 1
+                self.input_tokens += usage.input_tokens
+                self.cached_tokens += usage.cached_tokens
+                self._last.append(usage)
+
+    @property
+    def cached_ratio(self) -> float:
+        return self.cached_tokens / self.input_tokens if self.input_tokens else 0.0
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "input_tokens": self.input_tokens,
+                "cached_tokens": self.cached_tokens,
+                "uncached_tokens": self.input_tokens - self.cached_tokens,
+                "cached_ratio": round(self.cached_ratio, 3),
+                "last_calls": [{**asdict(u), "uncached_tokens": u.uncached_tokens} for u in self._last],
+            }
+
+
+_stats = PromptCacheStats()
+
+# run_id já contabilizados: o mesmo run chega pelo post-hook do Team, pelo
+# retorno do team.run e pelos eventos do stream, e só pode contar uma vez
+_seen_runs: "OrderedDict[str, None]" = OrderedDict()
+_seen_lock = threading.Lock()
+_SEEN_RUNS_MAX = 4096
+
+
+def _first_time(run_id: Optional[str]) -> bool:
+    if not run_id:
+        return True
+    with _seen_lock:
+        if run_id in _seen_runs:
+            return False
+        _seen_runs[run_id] = None
+        if len(_seen_runs) > _SEEN_RUNS_MAX:
+            _seen_runs.popitem(last=False)
+        return True
+
+
+def _new_call_usage(run_output: Any) -> list[CallUsage]:
+    calls = []
+    if _first_time(getattr(run_output, "run_id", None)):
+        calls = collect_call_usage(SimpleNamespace(
+            team_name=getattr(run_output, "team_name", None),
+            agent_name=getattr(run_output, "agent_name", None),
+            model_provider=getattr(run_output, "model_provider", None),
+            model=getattr(run_output, "model", None),
+            messages=getattr(run_output, "messages", None),
+        ))
+    for member in getattr(run_output, "member_responses", None) or []:
+        calls.extend(_new_call_usage(member))
+    return calls
+
+
+def record_run(run_output: Any):
+    """
+    Registra as chamadas de um RunOutput/TeamRunOutput (caminho sem stream).
+
+    Também é post-hook do Team (src/orchestrator.py): o Agno descarta as
+    respostas dos membros antes de devolver o run, e o hook ainda as vê.
+    """
+    usages = _new_call_usage(run_output)
+    _stats.record(usages)
+    record_model_calls(usages)
+
+
+def record_request_event(event: Any):
+    """Registra um evento ModelRequestCompleted (caminho com stream)."""
+    _first_time(getattr(event, "run_id", None))
+    agent = getattr(event, "team_name", None) or getattr(event, "agent_name", None) or ""
+    usages = [call_usage(agent, event.model_provider, event.model, event)]
+    _stats.record(usages)
+    record_model_calls(usages)
+
+
+def prompt_cache_stats() -> dict:
+    return _stats.as_dict()
+
+
+def static_prefix(messages: list, tools: Optional[list] = None) -> str:
+    """Prefixo estático de uma chamada: definições de tools + mensagens de sistema iniciais."""
+    parts = [json.dumps(tools or [], sort_keys=True, ensure_ascii=False, default=str)]
+    for message in messages:
+        if message.role != "system":
+            break
+        parts.append(str(message.content))
+    return "\n".join(parts)
+
+
+def prefix_digest(messages: list, tools: Optional[list] = None) -> str:
+    return hashlib.sha256(static_prefix(messages, tools).encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,372 @@
+"""
+Caches da busca na knowledge base (embedding da consulta + resultado híbrido).
+
+Os clientes repetem as mesmas perguntas o dia inteiro ("vergalhão 10mm",
+"telha galvanizada", "metalon"), e cada busca do Qualificador ou do
+Especialista de Produtos embeda a consulta no FastEmbed e roda uma busca
+híbrida no LanceDB. Dois caches evitam esse trabalho repetido:
+
+  - QueryCachedEmbedder: LRU de embeddings de consulta, por texto normalizado.
+    Só a consulta passa pelo cache — os chunks de documento indexados em
+    load_knowledge_base() são embedados direto, sem poluir o LRU.
+  - CachedLanceDb: cache com TTL do top-k híbrido, chaveado por
+    (consulta normalizada, limite, filtros, versão da tabela). Qualquer
+    escrita pelo próprio handle (insert/upsert/drop/delete) limpa o cache,
+    então um reindex invalida os resultados automaticamente. Com
+    table_resolver, o handle segue a versão publicada do índice
+    (src/knowledge_versions.py) e troca de tabela sem reiniciar o processo.
+
+Os contadores de acerto/erro ficam em CacheStats e são expostos em /health
+e /metrics; o tempo de busca e de embedding vai para src/metrics.py.
+"""
+import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from agno.knowledge.document import Document
+from agno.knowledge.embedder.fastembed import FastEmbedEmbedder
+from agno.vectordb.lancedb import LanceDb
+from fastembed import TextEmbedding
+
+from src.metrics import count_search_results, stage_timer
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def normalize_query(text: str) -> str:
+    """Forma canônica da consulta para chave de cache: NFC, casefold, espaços colapsados.
+
+    Acentos são mantidos — "vergalhão" e "vergalhao" geram embeddings diferentes.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).casefold().split())
+
+
+@dataclass
+class CacheStats:
+    """Contadores de um cache."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+
+class LRUCache:
+    """
+    Cache LRU thread-safe com TTL opcional por entrada.
+
+    Args:
+        maxsize: Máximo de entradas; a menos usada recentemente sai primeiro.
+        ttl: Segundos de validade de cada entrada (None = sem expiração).
+        clock: Relógio monotônico (injetável nos testes).
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if maxsize < 0:
+            raise ValueError("maxsize deve ser >= 0")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at is None or self._clock() < expires_at:
+                    self._data.move_to_end(key)
+                    self.stats.hits += 1
+                    return value
+                del self._data[key]
+            self.stats.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any):
+        if self.maxsize == 0:
+            return
+        expires_at = self._clock() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self):
+        """Descarta todas as entradas (os contadores de acerto/erro são mantidos)."""
+        with self._lock:
+            self._data.clear()
+            self.stats.invalidations += 1
+
+
+@dataclass
+class QueryCachedEmbedder(FastEmbedEmbedder):
+    """FastEmbedEmbedder com LRU de embeddings de consulta (get_embedding)."""
+
+    query_cache_size: int = 1024
+    query_cache: LRUCache = field(init=False, repr=False)
+    _client_lock: threading.Lock = field(init=False, repr=False, default_factory=threading.Lock)
+
+    def __post_init__(self):
+        self.query_cache = LRUCache(self.query_cache_size)
+
+    @property
+    def client(self) -> TextEmbedding:
+        # O client do FastEmbed é criado sem trava: buscas simultâneas na
+        # primeira consulta carregariam o modelo ONNX mais de uma vez
+        if self.fastembed_client is None:
+            with self._client_lock:
+                if self.fastembed_client is None:
+                    self.fastembed_client = TextEmbedding(model_name=self.id)
+        return self.fastembed_client
+
+    def get_embedding(self, text: str) -> List[float]:
+        # Texto normalizado só na chave: o modelo recebe a consulta original
+        key = normalize_query(text)
+        embedding = self.query_cache.get(key)
+        if embedding is None:
+            with stage_timer("embedding"):
+                embedding = super().get_embedding(text)
+            if embedding:
+                self.query_cache.put(key, embedding)
+        return embedding
+
+    def get_embedding_and_usage(self, text: str) -> Tuple[List[float], Optional[Dict]]:
+        # Caminho de indexação (Document.embed): texto integral, sem cache
+        return super().get_embedding(text), None
+
+    def get_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        """Indexação em lote (src/knowledge_index.py): um embed() do FastEmbed por lote, sem cache."""
+        return [vector.tolist() for vector in self.client.embed(texts, batch_size=len(texts))]
+
+
+class CachedLanceDb(LanceDb):
+    """
+    LanceDb com cache TTL do resultado de search().
+
+    Args:
+        search_cache_size: Máximo de consultas distintas em cache.
+        search_cache_ttl: Segundos de validade de cada resultado.
+        table_resolver: Devolve a tabela que as buscas devem usar (None: mantém
+            a atual); consultado no máximo a cada `resolve_interval` segundos.
+        Demais argumentos: os mesmos de LanceDb.
+    """
+
+    def __init__(
+        self,
+        *args,
+        search_cache_size: int = 512,
+        search_cache_ttl: float = 600,
+        table_resolver: Optional[Callable[[], Optional[str]]] = None,
+        resolve_interval: float = 2.0,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.search_cache = LRUCache(search_cache_size, ttl=search_cache_ttl)
+        self.table_resolver = table_resolver
+        self.resolve_interval = resolve_interval
+        self._next_resolve = 0.0
+        self._switch_lock = threading.Lock()
+        # Handle em que as buscas rodam. Quem segue versões busca num handle
+        # separado desde o início: a troca nunca muda a tabela de uma busca em andamento
+        self._view: LanceDb = self
+        if table_resolver is not None and self.table is not None:
+            self._view = self._open_view(self.table_name)
+
+    def table_version(self) -> Optional[int]:
+        """Versão atual da tabela LanceDB (None se ela ainda não existe)."""
+        return _table_version(self)
+
+    def invalidate_search_cache(self):
+        self.search_cache.clear()
+
+    def switch_table(self, table_name: str) -> bool:
+        """
+        Passa a buscar em `table_name` (outra versão do índice, já completa).
+
+        Buscas em andamento terminam na tabela antiga: cada busca usa o handle
+        que estava ativo quando começou. Levanta ValueError se a tabela não existe.
+
+        Returns:
+            False se `table_name` já era a tabela ativa.
+        """
+        with self._switch_lock:
+            if table_name == self._view.table_name:
+                return False
+            if table_name not in self._get_table_names(self.connection):
+                raise ValueError(f"Tabela {table_name!r} não existe em {self.uri}")
+            view = self._open_view(table_name)
+            # Escritas e contagens pelo próprio handle também vão para a versão nova
+            self.table, self.table_name, self.fts_index_exists = view.table, view.table_name, view.fts_index_exists
+            self._view = view
+        self.invalidate_search_cache()
+        logger.info(f"[KNOWLEDGE] Buscas agora na tabela {table_name}")
+        return True
+
+    def _open_view(self, table_name: str) -> LanceDb:
+        view = LanceDb(
+            uri=self.uri,
+            table_name=table_name,
+            connection=self.connection,
+            embedder=self.embedder,
+            search_type=self.search_type,
+            use_tantivy=self.use_tantivy,
+            reranker=self.reranker,
+            nprobes=self.nprobes,
+        )
+        view.fts_index_exists = _has_fts_index(view.table)
+        return view
+
+    def _follow_table(self):
+        if self.table_resolver is None:
+            return
+        now = time.monotonic()
+        if now < self._next_resolve:
+            return
+        self._next_resolve = now + self.resolve_interval
+        try:
+            table_name = self.table_resolver()
+            if table_name:
+                self.switch_table(table_name)
+        except Exception as exc:
+            # Ponteiro ilegível ou tabela sumida: segue na tabela atual
+            logger.warning(f"[KNOWLEDGE] Troca de tabela ignorada: {exc}")
+
+    def search(self, query: str, limit: int = 5, filters: Optional[Any] = None) -> List[Document]:
+        self._follow_table()
+        with stage_timer("knowledge_search"):
+            results = self._cached_search(query, limit, filters)
+        count_search_results(len(results))
+        return results
+
+    def _cached_search(self, query: str, limit: int, filters: Optional[Any]) -> List[Document]:
+        view = self._view
+        query_key = (
+            normalize_query(query),
+            limit,
+            repr(sorted(filters.items())) if isinstance(filters, dict) else repr(filters),
+        )
+        # A chave leva a tabela do handle usado: resultado de uma busca que
+        # terminou depois de uma troca não é servido para a versão nova
+        results = self.search_cache.get((*query_key, view.table_name, _table_version(view)))
+        if results is None:
+            if view is self:
+                results = super().search(query=query, limit=limit, filters=filters)
+            else:
+                results = view.search(query=query, limit=limit, filters=filters)
+            # A primeira busca híbrida cria o índice FTS e muda a versão da tabela
+            self.search_cache.put((*query_key, view.table_name, _table_version(view)), results)
+        return list(results)
+
+    # Escritas no índice invalidam os resultados em cache
+
+    def insert(self, content_hash: str, documents: List[Document], filters: Optional[Dict[str, Any]] = None) -> None:
+        try:
+            super().insert(content_hash, documents, filters)
+        finally:
+            self.invalidate_search_cache()
+
+    async def async_insert(
+        self, content_hash: str, documents: List[Document], filters: Optional[Dict[str, Any]] = None
+    ) -> None:
+        try:
+            await super().async_insert(content_hash, documents, filters)
+        finally:
+            self.invalidate_search_cache()
+
+    def upsert(self, content_hash: str, documents: List[Document], filters: Optional[Dict[str, Any]] = None) -> None:
+        try:
+            super().upsert(content_hash, documents, filters)
+        finally:
+            self.invalidate_search_cache()
+
+    async def async_upsert(
+        self, content_hash: str, documents: List[Document], filters: Optional[Dict[str, Any]] = None
+    ) -> None:
+        try:
+            await super().async_upsert(content_hash, documents, filters)
+        finally:
+            self.invalidate_search_cache()
+
+    def drop(self) -> None:
+        try:
+            super().drop()
+        finally:
+            self.invalidate_search_cache()
+
+    async def async_drop(self) -> None:
+        try:
+            await super().async_drop()
+        finally:
+            self.invalidate_search_cache()
+
+    def delete_by_id(self, id: str) -> bool:
+        try:
+            return super().delete_by_id(id)
+        finally:
+            self.invalidate_search_cache()
+
+    def delete_by_name(self, name: str) -> bool:
+        try:
+            return super().delete_by_name(name)
+        finally:
+            self.invalidate_search_cache()
+
+    def delete_by_metadata(self, metadata: Dict[str, Any]) -> bool:
+        try:
+            return super().delete_by_metadata(metadata)
+        finally:
+            self.invalidate_search_cache()
+
+    def delete_by_content_id(self, content_id: str) -> bool:
+        try:
+            return super().delete_by_content_id(content_id)
+        finally:
+            self.invalidate_search_cache()
+
+
+def _table_version(db: LanceDb) -> Optional[int]:
+    if db.table is None:
+        return None
+    try:
+        return db.table.version
+    except Exception:
+        return None
+
+
+def _has_fts_index(table) -> bool:
+    """True se a tabela já tem o índice FTS do payload (criado no build da versão)."""
+    try:
+        return any(index.index_type == "FTS" and "payload" in index.columns for index in table.list_indices())
+    except Exception:
+        return False
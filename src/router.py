@@ -0,0 +1,120 @@
+"""
+Pré-roteador determinístico na frente do Team.
+
+No modo `coordinate`, todo turno custa pelo menos duas chamadas de modelo:
+o coordenador decide para quem delegar e depois o membro responde (e o
+coordenador ainda redige a resposta final). A maior parte das regras do
+"Fluxo de decisão" de ORCHESTRATOR_INSTRUCTIONS é mecânica, então este
+módulo as aplica sem IA e envia o turno direto ao membro certo:
+
+  1. Pedido explícito de humano (HANDOFF_TRIGGERS)  → Agente de Transbordo
+  2. Todos os campos obrigatórios coletados         → Gerador de Orçamentos
+  3. Produto citado e só faltam dados do pedido     → Especialista de Produtos
+  4. Dados incompletos, nenhum produto citado       → Qualificador de Leads
+
+Os casos ambíguos (lead completo citando outro produto, produto citado com
+dados de contato faltando, orçamento já enviado) voltam para o coordenador.
+O orçamento sai uma vez por sessão: depois dele, mesmo com o lead completo
+(e o gateway reenviando um lead_data antigo), os turnos seguintes vão para
+o coordenador, que conversa com o cliente até o Closer assumir. Citar
+o próprio produto do lead — que o extrator de campos acabou de gravar a
+partir da mesma mensagem — não é ambíguo.
+
+Como o membro não tem memória própria, o turno é enviado com o bloco
+---CONTEXTO ACUMULADO--- montado a partir do LeadData, no mesmo formato
+que o coordenador usaria.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from src.agents.human_handoff_agent import detect_handoff_trigger
+from src.business_rules import REQUIRED_LEAD_FIELDS, find_missing_fields, find_product_mention
+from src.data.product_catalog import resolver_produto
+from src.models import LeadClassification, LeadData
+
+QUALIFIER = "Qualificador de Leads"
+PRODUCT_SPECIALIST = "Especialista de Produtos"
+QUOTE_GENERATOR = "Gerador de Orçamentos"
+HUMAN_HANDOFF = "Agente de Transbordo"
+
+# Campos que o Especialista de Produtos ajuda a completar
+_ORDER_FIELDS = {"product_interest", "volume_estimate"}
+
+
+@dataclass
+class RouteDecision:
+    """Resultado do pré-roteamento. member=None significa: deixar o coordenador decidir."""
+    member: Optional[str]
+    reason: str
+
+    @property
+    def is_fast_path(self) -> bool:
+        return self.member is not None
+
+
+def route_turn(message: str, lead: LeadData, quote_sent: bool = False) -> RouteDecision:
+    """
+    Decide, sem chamar modelo, qual membro deve atender o turno.
+
+    Args:
+        quote_sent: True se a sessão já recebeu o orçamento (session_state).
+    """
+    if detect_handoff_trigger(message)["should_handoff"]:
+        return RouteDecision(HUMAN_HANDOFF, "explicit_request")
+
+    if quote_sent or lead.classification == LeadClassification.QUENTE:
+        return RouteDecision(None, "quote_already_sent")
+
+    missing = find_missing_fields(lead)
+    product = find_product_mention(message)
+
+    if not missing:
+        if product and not _is_lead_product(product, lead):
+            return RouteDecision(None, "complete_lead_mentions_product")
+        return RouteDecision(QUOTE_GENERATOR, "all_fields_collected")
+
+    if product:
+        if set(missing) <= _ORDER_FIELDS:
+            return RouteDecision(PRODUCT_SPECIALIST, "product_mentioned")
+        return RouteDecision(None, "product_mentioned_with_missing_contact")
+
+    return RouteDecision(QUALIFIER, "missing_fields")
+
+
+def _is_lead_product(product: str, lead: LeadData) -> bool:
+    """True se o produto citado é do mesmo grupo do catálogo que o produto do lead."""
+    cited = resolver_produto(product)
+    current = resolver_produto(lead.technical_product or lead.product_interest)
+    return cited is not None and current is not None and cited[0] == current[0]
+
+
+def build_context_block(lead: LeadData, message: str, incoherent_attempts: int = 0) -> str:
+    """Monta o bloco ---CONTEXTO ACUMULADO--- (formato de ORCHESTRATOR_INSTRUCTIONS)."""
+
+    def value(v: Optional[str]) -> str:
+        return v if v else "não informado"
+
+    missing = [REQUIRED_LEAD_FIELDS[f] for f in find_missing_fields(lead)]
+    return "\n".join([
+        "---CONTEXTO ACUMULADO---",
+        f"Nome: {value(lead.name)}",
+        f"WhatsApp: {value(lead.whatsapp)}",
+        f"E-mail: {value(lead.email)}",
+        f"CNPJ: {value(lead.cnpj)}",
+        f"UF: {value(lead.state)}",
+        f"Cidade: {value(lead.city)}",
+        f"Produto: {value(lead.technical_product or lead.product_interest)}",
+        f"Volume: {value(lead.volume_estimate)}",
+        f"Status atual: {lead.classification.value}",
+        f"Dados faltantes: {', '.join(missing) if missing else 'nenhum'}",
+        f"Tentativas incoerentes: {incoherent_attempts}",
+        "---FIM DO CONTEXTO---",
+        "",
+        f"Última mensagem do cliente: {message}",
+        "---",
+    ])
+
+
+def get_member(team, name: str):
+    """Retorna o membro do Team pelo nome, ou None."""
+    return next((m for m in team.members if m.name == name), None)
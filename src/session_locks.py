@@ -0,0 +1,48 @@
+"""
+Locks por sessão para o /chat.
+
+Duas mensagens do mesmo cliente (mesmo session_id) precisam ser processadas
+em ordem: a segunda só pode rodar depois que o histórico da primeira foi
+gravado em data/agent_sessions.db. Sessões diferentes continuam em paralelo.
+
+Os locks são criados sob demanda e descartados quando ninguém mais os usa,
+então o dicionário não cresce com o número de sessões já atendidas.
+
+Uso:
+    locks = SessionLocks()
+    async with locks.hold(session_id):
+        ...
+"""
+import asyncio
+from contextlib import asynccontextmanager
+
+
+class SessionLocks:
+    """Registro de asyncio.Lock por session_id com contagem de referências."""
+
+    def __init__(self):
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._waiters: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    def is_locked(self, session_id: str) -> bool:
+        lock = self._locks.get(session_id)
+        return lock is not None and lock.locked()
+
+    @asynccontextmanager
+    async def hold(self, session_id: str):
+        """Aguarda a vez da sessão e mantém o lock durante o bloco."""
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = self._locks[session_id] = asyncio.Lock()
+        self._waiters[session_id] = self._waiters.get(session_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._waiters[session_id] -= 1
+            if self._waiters[session_id] == 0:
+                del self._waiters[session_id]
+                del self._locks[session_id]
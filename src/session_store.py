@@ -0,0 +1,100 @@
+"""
+Estado da conversa gravado na sessão do Team (SQLite do Agno).
+
+O Agno já guarda uma TeamSession por session_id em data/agent_sessions.db,
+com as runs do coordenador. A API grava no session_state dessa mesma linha
+o que precisa entre um turno e outro — o último LeadData e o histórico
+compactado (últimos turnos + resumo) —, então o estado sobrevive a
+restart/redeploy e é o mesmo para todos os workers do uvicorn que abrem o
+mesmo arquivo.
+
+Turnos respondidos sem o coordenador (membro chamado pelo pré-roteador,
+orçamento renderizado) entram na mesma sessão como runs do Team: com o
+histórico bruto do Agno (HISTORY_COMPACTION desligado), o coordenador e os
+membros continuam vendo a conversa inteira.
+
+A sessão é lida sem filtro de user_id (session_id já é único) e o user_id
+gravado no primeiro turno é mantido: o WhatsApp extraído no meio da conversa
+não cria outra sessão para o mesmo cliente.
+"""
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from agno.db.base import BaseDb, SessionType
+from agno.models.message import Message
+from agno.run.base import RunStatus
+from agno.run.team import TeamRunInput, TeamRunOutput
+from agno.session.team import TeamSession
+
+
+@dataclass
+class StoredSession:
+    """O que a API guardou da sessão: user_id e session_state."""
+    session_id: str
+    user_id: Optional[str] = None
+    state: dict = field(default_factory=dict)
+
+
+class SessionStore:
+    """Lê e grava o session_state da TeamSession de cada conversa."""
+
+    def __init__(self, db: BaseDb):
+        self.db = db
+
+    def _session(self, session_id: str) -> Optional[TeamSession]:
+        return self.db.get_session(session_id=session_id, session_type=SessionType.TEAM)
+
+    def load(self, session_id: str) -> StoredSession:
+        """Estado da sessão (vazio se a conversa ainda não existe)."""
+        session = self._session(session_id)
+        if session is None:
+            return StoredSession(session_id)
+        state = (session.session_data or {}).get("session_state") or {}
+        return StoredSession(session_id, session.user_id, dict(state))
+
+    def save(
+        self,
+        session_id: str,
+        user_id: Optional[str],
+        updates: dict[str, Any],
+        turn: Optional[tuple[str, str]] = None,
+        team_id: Optional[str] = None,
+    ):
+        """
+        Grava `updates` no session_state, preservando o resto da sessão.
+
+        Args:
+            turn: (mensagem do cliente, resposta) de um turno que não passou
+                pelo team.run, gravado como run do Team.
+            team_id: Id do Team, para a sessão e a run criadas aqui.
+
+        Relê a sessão antes de gravar: o team.run do mesmo turno pode ter
+        acrescentado runs depois do load().
+        """
+        session = self._session(session_id)
+        if session is None:
+            session = TeamSession(
+                session_id=session_id, team_id=team_id, user_id=user_id, session_data={}, created_at=int(time.time())
+            )
+        session.session_data = session.session_data or {}
+        state = session.session_data.setdefault("session_state", {})
+        state.update(updates)
+        if turn is not None:
+            session.upsert_run(_turn_run(session, team_id, *turn))
+        self.db.upsert_session(session)
+
+
+def _turn_run(session: TeamSession, team_id: Optional[str], client_message: str, reply: str) -> TeamRunOutput:
+    """Run concluída com só a mensagem do cliente e a resposta (sem chamadas de modelo do Team)."""
+    return TeamRunOutput(
+        run_id=str(uuid.uuid4()),
+        team_id=team_id,
+        session_id=session.session_id,
+        user_id=session.user_id,
+        input=TeamRunInput(input_content=client_message),
+        content=reply,
+        messages=[Message(role="user", content=client_message), Message(role="assistant", content=reply)],
+        status=RunStatus.completed,
+    )
@@ -0,0 +1,386 @@
+"""
+Traces de carga a partir das conversas reais de data/agent_sessions.db.
+
+Extração: percorre a tabela de sessões do Agno uma linha por vez (cursor
+SQLite, arquivo aberto só para leitura) e grava um JSONL com uma linha por
+conversa:
+
+    {"session_id": "trace-3f9c...", "start": 812.0,
+     "messages": [{"gap": 0.0, "text": "Boa tarde"}, {"gap": 16.0, "text": "..."}]}
+
+  - session_id: pseudônimo estável (hash do id original com --sal; sem
+    --sal, um sal aleatório por extração)
+  - start: segundos desde o início da primeira conversa extraída
+  - gap: segundos desde a mensagem anterior da mesma conversa
+  - text: só a mensagem do cliente (sem histórico nem bloco de contexto que a
+    API acrescenta), com CNPJ, CPF, e-mail, telefone e nomes mascarados
+
+Os dados mascarados mantêm o formato (CNPJ com dígitos verificadores
+válidos, telefone com o DDD original), então a extração determinística da
+API (src/lead_extractor.py) se comporta como na conversa real. Nomes vêm do
+próprio histórico da sessão: "Nome: ..." nos resumos, "Olá Pedro," nas
+respostas, "meu nome é ..." nas mensagens e o campo name dos dados do lead.
+
+Reprodução: lê o JSONL sob demanda e dispara as conversas contra o /chat
+respeitando os intervalos originais divididos por `speedup`, com no máximo
+`concurrency` conversas ativas. As mensagens de uma conversa saem no horário
+mesmo que a anterior ainda não tenha resposta — como no WhatsApp, rajadas
+chegam sobrepostas. CLI em scripts/replay_sessions.py.
+"""
+import asyncio
+import hashlib
+import json
+import re
+import secrets
+import sqlite3
+import statistics
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator, Optional
+
+from src.business_rules import find_product_mention
+from src.lead_extractor import DDDS_VALIDOS, _RE_CNPJ, _RE_EMAIL, _RE_PHONE
+
+# Mensagem do cliente dentro da entrada do turno montada pela API
+_RE_ULTIMA_MENSAGEM = re.compile(r"Última mensagem do cliente:\s*(.*?)\n---\s*$", re.DOTALL)
+_RE_MENSAGEM_LEGADO = re.compile(r"\n\nMensagem do cliente:\s*(.*)$", re.DOTALL)
+
+# Onde aparecem nomes numa sessão
+_RE_NOME_CAMPO = re.compile(r"\bNome(?: completo)?:\s*\**\s*([^\n(*]+)")
+_RE_NOME_JSON = re.compile(r'"name"\s*:\s*"([^"]+)"')
+_RE_NOME_VOCATIVO = re.compile(
+    r"\b(?:Olá|Oi|Ótimo|Perfeito|Excelente|Prezad[oa]|Obrigad[oa]|Certo|Entendi|Entendido|Combinado|Maravilha"
+    r"|Bom dia|Boa tarde|Boa noite),?\s+(?:Sr\.?\s+|Sra\.?\s+)?([A-ZÀ-Ý][a-zà-ÿ]+(?:\s+[A-ZÀ-Ý][a-zà-ÿ]+){0,2})\s*[!,.?]"
+)
+_RE_NOME_CLIENTE = re.compile(
+    r"\b(?:meu nome(?:\s+é|\s+e)?|me chamo|aqui é(?:\s+[oa])?|sou (?:o|a))\s+([A-Za-zÀ-ÿ]+(?:\s+[A-Za-zÀ-ÿ]+){0,2})",
+    re.IGNORECASE,
+)
+# Palavras que os padrões acima capturam e não são nome
+_NAO_NOMES = {
+    "não", "nao", "informado", "cliente", "senhor", "senhora", "empresa", "da", "de", "do", "das", "dos",
+    "que", "para", "pra", "com", "quero", "queria", "gostaria", "preciso", "vou", "sou", "aqui", "seu",
+    "sua", "agradeço", "obrigado", "obrigada", "tudo", "bem", "sim", "ok", "confirmado", "ltda", "eireli",
+}
+_PSEUDONIMOS = ["Ana", "Bruno", "Carla", "Diego", "Elisa", "Fábio", "Gabriela", "Heitor", "Iara", "Júlio",
+                "Karina", "Lucas", "Marina", "Nelson", "Olívia", "Paulo", "Renata", "Sérgio", "Tânia", "Vítor"]
+
+_RE_PII = re.compile(
+    f"(?P<cnpj>{_RE_CNPJ.pattern})"
+    f"|(?P<email>{_RE_EMAIL.pattern})"
+    r"|(?P<cpf>(?<!\d)\d{3}\.\d{3}\.\d{3}-\d{2}(?!\d))"
+    f"|(?P<phone>{_RE_PHONE.pattern})"
+    r"|(?P<digits>(?<!\d)\d{8,}(?!\d))"
+)
+
+
+def customer_message(run_input: Any) -> str:
+    """Texto que o cliente mandou, a partir do input gravado de um run do Agno."""
+    if isinstance(run_input, dict):
+        run_input = run_input.get("input_content")
+    text = str(run_input or "")
+    for pattern in (_RE_ULTIMA_MENSAGEM, _RE_MENSAGEM_LEGADO):
+        match = pattern.search(text)
+        if match:
+            return match.group(1).strip()
+    return text.strip()
+
+
+def _digits(seed: str, count: int) -> str:
+    out = ""
+    counter = 0
+    while len(out) < count:
+        out += str(int(hashlib.sha256(f"{seed}:{counter}".encode()).hexdigest(), 16))
+        counter += 1
+    return out[:count]
+
+
+def fake_cnpj(seed: str, formatted: bool = False) -> str:
+    """CNPJ fictício determinístico com dígitos verificadores válidos."""
+    digits = [int(d) for d in _digits(seed, 12)]
+    if len(set(digits)) == 1:
+        digits[0] = (digits[0] + 1) % 10
+    for size in (12, 13):
+        weights = list(range(size - 7, 1, -1)) + list(range(9, 1, -1))
+        remainder = sum(d * w for d, w in zip(digits, weights)) % 11
+        digits.append(0 if remainder < 2 else 11 - remainder)
+    cnpj = "".join(map(str, digits))
+    if formatted:
+        return f"{cnpj[:2]}.{cnpj[2:5]}.{cnpj[5:8]}/{cnpj[8:12]}-{cnpj[12:]}"
+    return cnpj
+
+
+class PiiMasker:
+    """
+    Troca dados pessoais por valores fictícios do mesmo formato.
+
+    O mesmo valor original vira sempre o mesmo valor fictício (hash com o
+    sal), então uma conversa que repete o e-mail continua coerente.
+
+    Args:
+        salt: Sal dos hashes; traces gerados com sais diferentes não se cruzam.
+            Padrão: aleatório por instância. Sal vazio não é aceito — sem ele,
+            quem tem uma lista de CNPJs, e-mails ou telefones refaz os hashes
+            e desfaz o mascaramento.
+    """
+
+    def __init__(self, salt: Optional[str] = None):
+        if salt is None:
+            salt = secrets.token_hex(16)
+        if not salt:
+            raise ValueError("Sal vazio torna o mascaramento reversível; omita para usar um sal aleatório.")
+        self.salt = salt
+
+    def _seed(self, value: str) -> str:
+        return f"{self.salt}:{value.lower()}"
+
+    def pseudonym(self, value: str) -> str:
+        index = int(hashlib.sha256(self._seed(value).encode()).hexdigest(), 16) % len(_PSEUDONIMOS)
+        return _PSEUDONIMOS[index]
+
+    def session_id(self, session_id: str) -> str:
+        return "trace-" + hashlib.sha256(self._seed(session_id).encode()).hexdigest()[:12]
+
+    def _replace(self, match: re.Match) -> str:
+        value = match.group()
+        seed = self._seed(re.sub(r"\W", "", value))
+        if match.group("cnpj"):
+            return fake_cnpj(seed, formatted=not value.isdigit())
+        if match.group("email"):
+            return f"cliente{_digits(seed, 6)}@exemplo.com"
+        if match.group("cpf"):
+            d = _digits(seed, 11)
+            return f"{d[:3]}.{d[3:6]}.{d[6:9]}-{d[9:]}"
+        if match.group("phone"):
+            phone = _RE_PHONE.fullmatch(value)
+            ddd = phone.group(1) if phone and int(phone.group(1)) in DDDS_VALIDOS else "85"
+            mobile = phone is None or len(re.sub(r"\D", "", phone.group(2))) == 5
+            local = ("9" + _digits(seed, 8)) if mobile else ("3" + _digits(seed, 7))
+            return f"{ddd} {local[:-4]}-{local[-4:]}"
+        return _digits(seed, len(value))
+
+    def mask(self, text: str, names: Iterable[str] = ()) -> str:
+        """Mascara documentos, contatos e os `names` (tokens de nome da sessão)."""
+        text = _RE_PII.sub(self._replace, text)
+        tokens = sorted({n.lower() for n in names}, key=len, reverse=True)
+        if tokens:
+            pattern = re.compile(r"(?<![\wÀ-ÿ])(" + "|".join(map(re.escape, tokens)) + r")(?![\wÀ-ÿ])", re.IGNORECASE)
+
+            def name(match: re.Match) -> str:
+                fake = self.pseudonym(match.group())
+                return fake if match.group()[0].isupper() else fake.lower()
+
+            text = pattern.sub(name, text)
+        return text
+
+
+def _name_tokens(candidates: Iterable[str]) -> set[str]:
+    tokens = set()
+    for candidate in candidates:
+        for token in re.findall(r"[A-Za-zÀ-ÿ]+", candidate):
+            if len(token) >= 3 and token.lower() not in _NAO_NOMES and not find_product_mention(token):
+                tokens.add(token)
+    return tokens
+
+
+def session_names(texts: Iterable[str]) -> set[str]:
+    """Tokens de nome de pessoa citados em qualquer texto da sessão (entradas e respostas)."""
+    candidates = []
+    for text in texts:
+        for pattern in (_RE_NOME_CAMPO, _RE_NOME_JSON, _RE_NOME_VOCATIVO, _RE_NOME_CLIENTE):
+            candidates.extend(m.group(1) for m in pattern.finditer(text))
+    return _name_tokens(candidates)
+
+
+def _content_text(content: Any) -> str:
+    if isinstance(content, dict):  # TurnResult serializado
+        name = (content.get("lead_updates") or {}).get("name")
+        return f"{content.get('message', '')}\nNome: {name}" if name else str(content.get("message", ""))
+    return str(content or "")
+
+
+def _load_runs(raw: Any) -> list:
+    runs = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+    if isinstance(runs, str):  # o SqliteDb do Agno grava o JSON como string JSON
+        runs = json.loads(runs)
+    return runs or []
+
+
+def iter_session_rows(db_path: str) -> Iterator[tuple[str, list]]:
+    """(session_id, runs) de cada sessão, em ordem de criação, uma linha por vez."""
+    db = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        cursor = db.execute("SELECT session_id, runs FROM agno_sessions ORDER BY created_at")
+        for session_id, raw in cursor:
+            yield session_id, _load_runs(raw)
+    finally:
+        db.close()
+
+
+@dataclass
+class ExtractStats:
+    sessions: int = 0
+    messages: int = 0
+    skipped: int = 0  # sessões sem mensagem do cliente
+
+
+def session_trace(session_id: str, runs: list, masker: PiiMasker, split_lines: bool = False,
+                  burst_gap: float = 2.0) -> Optional[tuple[float, dict]]:
+    """(início em epoch, trace) de uma sessão; None se não houver mensagem do cliente."""
+    turns = sorted((r for r in runs if not r.get("parent_run_id")), key=lambda r: float(r.get("created_at") or 0))
+    messages = [(float(r.get("created_at") or 0), customer_message(r.get("input"))) for r in turns]
+    messages = [(at, text) for at, text in messages if text]
+    if not messages:
+        return None
+
+    texts = [str((r.get("input") or {}).get("input_content", "")) if isinstance(r.get("input"), dict)
+             else str(r.get("input") or "") for r in runs]
+    texts += [_content_text(r.get("content")) for r in runs]
+    names = session_names(texts)
+
+    trace_messages = []
+    previous = messages[0][0]
+    for at, text in messages:
+        gap = at - previous
+        previous = at
+        parts = [p for p in text.splitlines() if p.strip()] if split_lines else [text]
+        for i, part in enumerate(parts):
+            trace_messages.append({"gap": gap if i == 0 else burst_gap, "text": masker.mask(part, names)})
+    return messages[0][0], {"session_id": masker.session_id(session_id), "messages": trace_messages}
+
+
+def extract_traces(db_path: str, out, masker: Optional[PiiMasker] = None, limit: Optional[int] = None,
+                   split_lines: bool = False, burst_gap: float = 2.0) -> ExtractStats:
+    """
+    Grava em `out` (arquivo texto) um trace JSONL por sessão de `db_path`.
+
+    Args:
+        limit: Máximo de conversas extraídas.
+        split_lines: Uma mensagem com várias linhas vira uma rajada (uma
+            mensagem por linha, `burst_gap` segundos entre elas) — é o que o
+            agrupador de rajadas junta com "\\n".
+    """
+    masker = masker or PiiMasker()
+    stats = ExtractStats()
+    first_start = None
+    for session_id, runs in iter_session_rows(db_path):
+        result = session_trace(session_id, runs, masker, split_lines, burst_gap)
+        if result is None:
+            stats.skipped += 1
+            continue
+        started, trace = result
+        first_start = started if first_start is None else first_start
+        out.write(json.dumps({"session_id": trace["session_id"], "start": started - first_start,
+                              "messages": trace["messages"]}, ensure_ascii=False) + "\n")
+        stats.sessions += 1
+        stats.messages += len(trace["messages"])
+        if limit and stats.sessions >= limit:
+            break
+    return stats
+
+
+def read_traces(path: str) -> Iterator[dict]:
+    """Traces do JSONL, uma linha por vez."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))] if ordered else 0.0
+
+
+@dataclass
+class ReplayReport:
+    """Resultado de uma reprodução de traces."""
+    sessions: int = 0
+    sent: int = 0
+    statuses: Counter = field(default_factory=Counter)  # status HTTP (ou "erro de conexão")
+    latencies: list = field(default_factory=list)
+    start_lags: list = field(default_factory=list)  # atraso do início das conversas (falta de vaga)
+    peak_sessions: int = 0
+    duration: float = 0.0
+
+    def summary(self) -> dict:
+        return {
+            "sessions": self.sessions,
+            "requests": self.sent,
+            "throughput_req_s": round(self.sent / self.duration, 2) if self.duration else 0.0,
+            "ok": self.statuses.get(200, 0),
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items(), key=lambda kv: str(kv[0]))},
+            "p50_ms": round(_percentile(self.latencies, 50) * 1000, 1),
+            "p95_ms": round(_percentile(self.latencies, 95) * 1000, 1),
+            "p99_ms": round(_percentile(self.latencies, 99) * 1000, 1),
+            "mean_ms": round(statistics.mean(self.latencies) * 1000, 1) if self.latencies else 0.0,
+            "start_lag_p95_s": round(_percentile(self.start_lags, 95), 2),
+            "peak_sessions": self.peak_sessions,
+            "duration_s": round(self.duration, 1),
+        }
+
+
+async def replay_traces(traces: Iterable[dict], client, speedup: float = 1.0, concurrency: int = 20,
+                        max_gap: float = 300.0, session_prefix: str = "replay") -> ReplayReport:
+    """
+    Reproduz `traces` com `client` (httpx.AsyncClient apontado para a API).
+
+    Intervalos (entre mensagens e entre inícios de conversa) acima de
+    `max_gap` segundos são encurtados para `max_gap` antes da aceleração —
+    uma conversa retomada no dia seguinte não trava a reprodução.
+    """
+    loop = asyncio.get_running_loop()
+    report = ReplayReport()
+    slots = asyncio.Semaphore(concurrency)
+    active = 0
+    running: set = set()
+
+    async def sleep_until(deadline: float):
+        delay = deadline - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def send(session_id: str, text: str):
+        started = time.perf_counter()
+        try:
+            response = await client.post("/chat", json={"session_id": session_id, "message": text})
+            report.statuses[response.status_code] += 1
+        except Exception:
+            report.statuses["erro de conexão"] += 1
+        report.latencies.append(time.perf_counter() - started)
+
+    async def conversation(trace: dict):
+        nonlocal active
+        active += 1
+        report.peak_sessions = max(report.peak_sessions, active)
+        try:
+            started, offset, sends = loop.time(), 0.0, []
+            for message in trace["messages"]:
+                offset += min(float(message["gap"]), max_gap)
+                await sleep_until(started + offset / speedup)
+                report.sent += 1
+                sends.append(asyncio.create_task(send(f"{session_prefix}-{trace['session_id']}", message["text"])))
+            await asyncio.gather(*sends)
+        finally:
+            active -= 1
+            slots.release()
+
+    began = loop.time()
+    virtual, previous_start = 0.0, None
+    for trace in traces:
+        start = float(trace.get("start", 0.0))
+        virtual += 0.0 if previous_start is None else min(max(0.0, start - previous_start), max_gap)
+        previous_start = start
+        scheduled = began + virtual / speedup
+        await sleep_until(scheduled)
+        await slots.acquire()
+        report.start_lags.append(max(0.0, loop.time() - scheduled))
+        report.sessions += 1
+        task = asyncio.create_task(conversation(trace))
+        running.add(task)
+        task.add_done_callback(running.discard)
+    if running:
+        await asyncio.gather(*running)
+    report.duration = loop.time() - began
+    return report
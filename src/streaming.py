@@ -0,0 +1,113 @@
+"""
+Streaming de turnos via Server-Sent Events (POST /chat/stream).
+
+Converte os eventos do Agno (Team e membros) em eventos SSE enxutos para o
+gateway WhatsApp/Blip e o Agent UI:
+
+  event: member-started   data: {"member": "Qualificador de Leads"}
+  event: delta            data: {"source": "Qualificador de Leads" | "coordinator", "content": "..."}
+  event: member-finished  data: {"member": "Qualificador de Leads"}
+  event: final            data: AgentResponse (JSON)
+  event: error            data: {"detail": "..."}
+
+O turno roda numa thread do TurnPool (o Agno é síncrono); cada evento é
+repassado ao event loop por `emit`, que deve ser thread-safe.
+"""
+import json
+from typing import Any, Callable, Optional
+
+from agno.run.agent import RunEvent
+from agno.run.team import TeamRunEvent
+
+from src.models import TurnResult
+from src.prompt_cache import record_request_event, record_run
+
+COORDINATOR = "coordinator"
+
+# Marcadores internos de fim do turno (nunca enviados ao cliente)
+DONE = "__done__"
+FAILED = "__failed__"
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Serializa um evento no formato text/event-stream."""
+    payload = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False)
+    lines = "".join(f"data: {line}\n" for line in payload.splitlines() or [""])
+    return f"event: {event}\n{lines}\n"
+
+
+def map_run_event(event: Any) -> Optional[tuple[str, dict]]:
+    """Traduz um evento do Agno para (nome SSE, dados), ou None se não interessa ao cliente."""
+    kind = getattr(event, "event", None)
+    member = getattr(event, "agent_name", None)
+
+    if kind == RunEvent.run_started.value:
+        return "member-started", {"member": member}
+    if kind == RunEvent.run_completed.value:
+        return "member-finished", {"member": member}
+    if kind == RunEvent.run_content.value and event.content:
+        return "delta", {"source": member, "content": str(event.content)}
+    if kind == TeamRunEvent.run_content.value and event.content:
+        # Com output_schema o coordenador chega inteiro como TurnResult: só o texto vai ao cliente
+        content = event.content.message if isinstance(event.content, TurnResult) else str(event.content)
+        return "delta", {"source": COORDINATOR, "content": content}
+    return None
+
+
+def _final_content(event: Any) -> Any:
+    """Conteúdo de um evento de conclusão (texto ou TurnResult), ou None."""
+    kind = getattr(event, "event", None)
+    if kind in (RunEvent.run_completed.value, TeamRunEvent.run_completed.value):
+        return event.content if event.content is not None else ""
+    return None
+
+
+def _is_model_request_completed(event: Any) -> bool:
+    kind = getattr(event, "event", None)
+    return kind in (RunEvent.model_request_completed.value, TeamRunEvent.model_request_completed.value)
+
+
+def run_streaming_turn(
+    runner: Callable[..., Any],
+    run_input: Any,
+    run_kwargs: dict,
+    emit: Callable[[str, Any], None],
+):
+    """
+    Executa `runner` em modo stream, emitindo os eventos mapeados.
+
+    Termina sempre com (DONE, conteúdo final) ou (FAILED, exceção). O conteúdo
+    final é o do último evento de conclusão — o do Team, quando o turno passa
+    pelo coordenador, ou o do membro, no caminho rápido do pré-roteador.
+    Os tokens de entrada de cada chamada de modelo (em cache ou não) vão para
+    src/prompt_cache.py.
+    """
+    try:
+        final = None
+        for event in runner(run_input, stream=True, stream_events=True, **run_kwargs):
+            if _is_model_request_completed(event):
+                record_request_event(event)
+            mapped = map_run_event(event)
+            if mapped is not None:
+                emit(*mapped)
+            content = _final_content(event)
+            if content is not None:
+                final = content
+        emit(DONE, final or "")
+    except Exception as e:
+        emit(FAILED, e)
+
+
+def run_blocking_turn(
+    runner: Callable[..., Any],
+    run_input: Any,
+    run_kwargs: dict,
+    emit: Callable[[str, Any], None],
+):
+    """Executa um runner sem suporte a stream e emite só o resultado final."""
+    try:
+        response = runner(run_input, **run_kwargs)
+        record_run(response)
+        emit(DONE, response.content if hasattr(response, "content") else str(response))
+    except Exception as e:
+        emit(FAILED, e)
@@ -0,0 +1,104 @@
+"""
+Pool limitado para executar turnos do Team fora do event loop.
+
+`team.run` é síncrono (chamada HTTP ao Gemini/Claude + busca no LanceDB +
+embedding FastEmbed). Chamado direto dentro de um endpoint `async`, ele
+congela o worker do uvicorn inteiro — /health e todas as outras sessões
+ficam esperando o modelo responder.
+
+O TurnPool executa cada turno em um ThreadPoolExecutor dedicado e aplica
+controle de admissão:
+  - no máximo `max_concurrent` turnos de LLM em andamento
+  - no máximo `max_queued` turnos aguardando uma vaga
+  - acima disso, TurnPoolFull é levantada imediatamente (a API responde 503)
+
+Uso:
+    pool = TurnPool(max_concurrent=8, max_queued=32)
+    response = await pool.run(team.run, context)
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+
+
+class TurnPoolFull(Exception):
+    """Fila de espera cheia — o cliente deve tentar novamente após `retry_after` segundos."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Atendimento sobrecarregado. Tente novamente em {retry_after}s.")
+        self.retry_after = retry_after
+
+
+class TurnPool:
+    """
+    Executor de turnos com limite de concorrência e fila limitada.
+
+    Args:
+        max_concurrent: Máximo de turnos executando ao mesmo tempo (threads do pool).
+        max_queued: Máximo de turnos aguardando vaga antes de rejeitar.
+        retry_after: Segundos sugeridos ao cliente no header Retry-After.
+    """
+
+    def __init__(self, max_concurrent: int, max_queued: int, retry_after: int = 5):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent deve ser >= 1")
+        if max_queued < 0:
+            raise ValueError("max_queued deve ser >= 0")
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrent, thread_name_prefix="team-turn"
+        )
+        self._admitted = 0
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        """Turnos executando agora."""
+        return min(self._admitted, self.max_concurrent)
+
+    @property
+    def queued(self) -> int:
+        """Turnos admitidos aguardando uma thread livre."""
+        return max(0, self._admitted - self.max_concurrent)
+
+    def _admit(self):
+        with self._lock:
+            if self._admitted >= self.max_concurrent + self.max_queued:
+                raise TurnPoolFull(self.retry_after)
+            self._admitted += 1
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._admitted -= 1
+
+    def submit(self, func: Callable[..., Any], *args, **kwargs) -> asyncio.Future:
+        """
+        Admite o turno imediatamente e agenda `func(*args, **kwargs)` no pool.
+
+        A vaga só é liberada quando a função termina de fato — se o cliente
+        desconectar no meio do turno, a thread continua ocupada e continua
+        contando para o limite.
+
+        Raises:
+            TurnPoolFull: se já há `max_concurrent + max_queued` turnos admitidos.
+        """
+        self._admit()
+        try:
+            future = self._executor.submit(partial(func, *args, **kwargs))
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return asyncio.wrap_future(future)
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Executa `func(*args, **kwargs)` em uma thread do pool sem bloquear o event loop."""
+        return await self.submit(func, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True):
+        """Encerra o executor (usar no shutdown da aplicação)."""
+        self._executor.shutdown(wait=wait)
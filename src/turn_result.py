@@ -0,0 +1,98 @@
+"""
+Leitura do resultado de um turno: classificação, campos do lead e próxima ação.
+
+O coordenador responde com TurnResult (output_schema do Team), já validado
+pelo Agno. Os caminhos sem coordenador — membro chamado direto pelo
+pré-roteador, orçamento renderizado — devolvem texto livre; nesses casos a
+classificação vem da linha "STATUS: FRIO|MORNO|QUENTE" que os membros
+escrevem no fim da resposta, e nunca de uma palavra solta no meio do texto
+("ainda não está QUENTE").
+
+Os lead_updates do modelo passam pelas mesmas regras do extrator antes de
+gravar no lead, porque a desqualificação automática do turno seguinte lê
+esses campos: UF normalizada para a sigla ("Ceará" → "CE") e produto só se
+for do portfólio; valores que não se encaixam são descartados.
+"""
+import json
+import re
+from typing import Any
+
+from pydantic import ValidationError
+
+from src.business_rules import is_product_available
+from src.lead_extractor import normalize_uf
+from src.models import LeadClassification, LeadData, LeadUpdates, NextAction, TurnResult
+
+# Linha de status dos membros: "STATUS: MORNO - motivo" / "**STATUS:** QUENTE → ..."
+_RE_STATUS_LINE = re.compile(r"^[ \t*_]*STATUS[ \t*_]*:[ \t*_]*(FRIO|MORNO|QUENTE)\b.*$\n?", re.MULTILINE)
+_RE_JSON_FENCE = re.compile(r"^```(?:json)?\s*(.*?)\s*```$", re.DOTALL)
+
+NEXT_ACTION_BY_CLASSIFICATION = {
+    LeadClassification.FRIO: NextAction.COLLECT_DATA,
+    LeadClassification.MORNO: NextAction.GENERATE_QUOTE,
+    LeadClassification.QUENTE: NextAction.TRANSFER_TO_CLOSER,
+}
+
+
+def _from_json(text: str) -> TurnResult | None:
+    fence = _RE_JSON_FENCE.match(text.strip())
+    candidate = fence.group(1) if fence else text.strip()
+    if not candidate.startswith("{"):
+        return None
+    try:
+        return TurnResult.model_validate_json(candidate)
+    except (ValidationError, json.JSONDecodeError):
+        return None
+
+
+def parse_turn_result(content: Any, current: LeadClassification = LeadClassification.FRIO) -> TurnResult:
+    """
+    Converte o conteúdo da resposta do runner em TurnResult.
+
+    Args:
+        content: TurnResult (Team com output_schema), dict/JSON com o mesmo
+            formato, ou texto livre de um membro.
+        current: Classificação atual do lead, mantida quando o texto livre
+            não traz linha de STATUS.
+    """
+    if isinstance(content, TurnResult):
+        return content
+    if isinstance(content, dict):
+        return TurnResult.model_validate(content)
+
+    text = "" if content is None else str(content)
+    parsed = _from_json(text)
+    if parsed is not None:
+        return parsed
+
+    statuses = _RE_STATUS_LINE.findall(text)
+    classification = LeadClassification(statuses[-1]) if statuses else current
+    return TurnResult(
+        message=_RE_STATUS_LINE.sub("", text).strip(),
+        classification=classification,
+        next_action=NEXT_ACTION_BY_CLASSIFICATION[classification],
+    )
+
+
+def _validated(name: str, value: Any) -> Any:
+    """Valor do modelo pronto para o LeadData, ou None se não passar nas regras."""
+    if name == "state":
+        return normalize_uf(value)
+    if name in ("product_interest", "technical_product") and not is_product_available(value):
+        return None
+    return value
+
+
+def apply_lead_updates(lead: LeadData, updates: LeadUpdates) -> list[str]:
+    """Grava no lead os campos informados pelo modelo e retorna os nomes alterados."""
+    changed = []
+    for name, value in updates.model_dump(exclude_none=True).items():
+        if isinstance(value, str) and not value.strip():
+            continue
+        value = _validated(name, value)
+        if value is None:
+            continue
+        if getattr(lead, name) != value:
+            setattr(lead, name, value)
+            changed.append(name)
+    return changed
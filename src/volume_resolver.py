@@ -0,0 +1,194 @@
+"""
+Conversão do volume informado pelo cliente para kg, item a item.
+
+O cliente raramente fala em kg: "50 barras de 10mm e 20 de 8mm",
+"30 tubos 1 1/4 1,20mm", "2 toneladas de vergalhão". Cada trecho do pedido
+vira um VolumeItem; unidades/peças são convertidas pelo kg/un do SKU no
+índice do catálogo (src/data/sku_index.py):
+
+  1. SKUs do grupo com a mesma bitola/espessura/comprimento → mediana do kg/un
+  2. Busca pelos tokens do trecho ("metalon 20x20")
+  3. Vergalhão sem SKU no índice → peso teórico da barra (0,00617 × d² kg/m)
+  4. Mediana do kg/un do grupo
+  5. 20 kg/un (estimativa antiga, último recurso)
+
+Determinístico e sem IA — roda na checagem de desqualificação antes do LLM.
+"""
+import re
+import statistics
+from dataclasses import dataclass, field
+from typing import Optional
+
+from src.data.product_catalog import normalizar_texto, resolver_produto
+from src.data.sku_index import SkuIndex, get_sku_index, parse_bitola_espessura
+
+DEFAULT_KG_PER_UNIT = 20.0
+STANDARD_BAR_LENGTH_M = 12.0
+ROUND_BAR_GROUPS = {"CA-50", "CA-60"}
+
+_MASS_UNITS = {
+    "toneladas": 1000, "tonelada": 1000, "ton": 1000, "t": 1000,
+    "quilos": 1, "quilo": 1, "kilos": 1, "kilo": 1, "kgs": 1, "kg": 1,
+}
+# Unidades de contagem que também identificam o produto ("30 tubos")
+_PRODUCT_UNITS = {
+    "tubos", "tubo", "telhas", "telha", "chapas", "chapa", "bobinas", "bobina",
+    "cantoneiras", "cantoneira", "metalons", "metalon", "telas", "tela",
+    "perfis", "perfil", "trelicas", "trelica",
+}
+_COUNT_UNITS = {
+    "barras", "barra", "varas", "vara", "unidades", "unidade", "und", "un",
+    "pecas", "peca", "pcs", "pc", "rolos", "rolo",
+} | _PRODUCT_UNITS
+
+# Unidades reconhecidas no texto (também usadas pelo extrator de campos do lead)
+UNIT_WORDS = frozenset(_MASS_UNITS.keys() | _COUNT_UNITS)
+
+_UNIT_PATTERN = "|".join(sorted(UNIT_WORDS, key=len, reverse=True))
+_NUMBER = r"\d{1,3}(?:\.\d{3})+|\d+(?:[.,]\d+)?"
+_RE_SEGMENT = re.compile(
+    rf"^\D*?({_NUMBER})\s*({_UNIT_PATTERN})?\b\s*(?:de\s+)?(.*)$"
+)
+# Faixa ou alternativa com a unidade só no fim ("5 a 10 toneladas", "2 ou 3 t",
+# "entre 2 e 3 toneladas"): é uma quantidade só, e vale o limite inferior
+_RE_RANGE = re.compile(
+    rf"(?:\bentre\s+)?(?<![\d.,])({_NUMBER})\s*(?:-|\ba\b|\bate\b|\bou\b|\be\b)\s*(?:{_NUMBER})"
+    rf"(?=\s*(?:{_UNIT_PATTERN})\b)"
+)
+_RE_SPLIT = re.compile(r"\s*(?:,(?!\d)|;|\+|\be\b|\bmais\b)\s*")
+_RE_LENGTH_M = re.compile(r"(\d+(?:[.,]\d+)?)\s*m\b")
+
+
+@dataclass
+class VolumeItem:
+    """Um trecho do pedido convertido para kg."""
+    quantity: float
+    unit: str  # "kg" ou "un"
+    description: str
+    group: Optional[str] = None
+    kg_per_unit: Optional[float] = None
+    kg: float = 0.0
+    source: str = "kg"
+
+
+@dataclass
+class VolumeResolution:
+    """Pedido completo: itens resolvidos e total em kg."""
+    items: list[VolumeItem] = field(default_factory=list)
+
+    @property
+    def total_kg(self) -> float:
+        return round(sum(item.kg for item in self.items), 2)
+
+    @property
+    def has_units(self) -> bool:
+        return any(item.unit == "un" for item in self.items)
+
+
+def _amount(text: str) -> float:
+    if re.fullmatch(r"\d{1,3}(?:\.\d{3})+", text):  # 5.000 → milhar
+        return float(text.replace(".", ""))
+    return float(text.replace(",", "."))
+
+
+def _length_mm(spec: str) -> Optional[float]:
+    match = _RE_LENGTH_M.search(spec)
+    return _amount(match.group(1)) * 1000 if match else None
+
+
+def _median_weight(skus, length_mm: Optional[float] = None) -> tuple[Optional[float], int]:
+    if length_mm is not None:
+        skus = [s for s in skus if s.comprimento_mm and abs(s.comprimento_mm - length_mm) < 1]
+    weights = [s.kg_un for s in skus if s.kg_un]
+    if not weights:
+        return None, 0
+    return statistics.median(weights), len(weights)
+
+
+def _kg_per_unit(group: Optional[str], spec: str, index: Optional[SkuIndex]) -> tuple[float, str]:
+    """kg/un para o trecho `spec` do grupo `group` e a origem do valor."""
+    bitola, espessura = parse_bitola_espessura(spec, group or "")
+    length_mm = _length_mm(spec)
+
+    if index is not None and group and (bitola or espessura is not None):
+        skus = index.filtrar(grupo=group, bitola=bitola, espessura_mm=espessura, limite=None)
+        for length in (length_mm, None) if length_mm else (None,):
+            weight, n = _median_weight(skus, length)
+            if weight:
+                return weight, "sku" if n == 1 else f"sku (mediana de {n})"
+
+    if index is not None and re.search(r"[a-z]{3,}", spec):
+        skus = [s for s in index.buscar(spec, limite=20) if group is None or s.grupo == group]
+        weight, n = _median_weight(skus, length_mm)
+        if weight:
+            return weight, "sku" if n == 1 else f"sku (mediana de {n})"
+
+    if group in ROUND_BAR_GROUPS and bitola and bitola.endswith("mm"):
+        diameter = float(bitola[:-2])
+        length_m = (length_mm / 1000) if length_mm else STANDARD_BAR_LENGTH_M
+        return round(0.00617 * diameter ** 2 * length_m, 2), "peso teórico da barra"
+
+    if index is not None and group:
+        weight, n = _median_weight(index.filtrar(grupo=group, limite=None))
+        if weight:
+            return weight, f"mediana do grupo {group}"
+
+    return DEFAULT_KG_PER_UNIT, "estimativa padrão"
+
+
+def resolve_volume(
+    volume_text: Optional[str],
+    product: Optional[str] = None,
+    index: Optional[SkuIndex] = None,
+) -> VolumeResolution:
+    """
+    Converte o volume do pedido em itens com kg.
+
+    Args:
+        volume_text: Volume como o cliente escreveu ("50 barras de 10mm e 20 de 8mm").
+        product: Produto do lead (product_interest/technical_product), usado
+            nos trechos que não citam produto.
+        index: Índice de SKUs (padrão: get_sku_index()).
+
+    Returns:
+        VolumeResolution; sem número reconhecível, items fica vazio (total 0).
+    """
+    resolution = VolumeResolution()
+    if not volume_text:
+        return resolution
+    if index is None:
+        index = get_sku_index()
+
+    lead_group = (resolver_produto(product) or (None, None))[0]
+    previous_group = None
+    previous_unit = None
+
+    text = _RE_RANGE.sub(r"\1", normalizar_texto(volume_text))
+    for segment in _RE_SPLIT.split(text):
+        match = _RE_SEGMENT.match(segment)
+        if not match:
+            continue
+        quantity = _amount(match.group(1))
+        unit_word, spec = match.group(2), match.group(3).strip()
+
+        product_text = f"{unit_word} {spec}" if unit_word in _PRODUCT_UNITS else spec
+        group = (resolver_produto(product_text) or (None, None))[0] or previous_group or lead_group
+
+        if unit_word in _MASS_UNITS:
+            kg = quantity * _MASS_UNITS[unit_word]
+            resolution.items.append(VolumeItem(quantity, "kg", segment, group, kg=kg))
+            previous_unit = "kg"
+        elif unit_word in _COUNT_UNITS or (unit_word is None and spec and previous_unit == "un"):
+            kg_per_unit, source = _kg_per_unit(group, spec, index)
+            resolution.items.append(VolumeItem(
+                quantity, "un", segment, group,
+                kg_per_unit=kg_per_unit, kg=round(quantity * kg_per_unit, 2), source=source,
+            ))
+            previous_unit = "un"
+        else:
+            # Número sem unidade: kg (mesmo comportamento de antes)
+            resolution.items.append(VolumeItem(quantity, "kg", segment, group, kg=quantity))
+            previous_unit = "kg"
+        previous_group = group
+
+    return resolution
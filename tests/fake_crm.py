@@ -0,0 +1,195 @@
+"""
+Servidor HTTP falso do Salesforce para testes e benchmarks sem CRM real.
+
+Atende, numa porta local:
+  - POST /services/oauth2/token (client credentials)
+  - PATCH .../composite/sobjects/Lead/External_Id__c (upsert em lote) e
+    PATCH .../composite/sobjects (update em lote por Id)
+  - PATCH .../sobjects/Lead/<id> e POST .../sobjects/Lead (um registro)
+
+Guarda os leads recebidos e registra cada request — tamanho do lote,
+latência e conexão de origem — para os testes inspecionarem o que chegaria
+ao CRM. Latência e falhas são injetáveis: `delay` por request, `fail_next`
+requests com 503, `error_rate` de 503 aleatórios, leads recusados
+individualmente (`reject_ids`) e tokens expirados (`expire_tokens()`).
+Como o Salesforce, recusa com REQUIRED_FIELD_MISSING o registro que criaria
+um lead sem LastName ou Company (upsert por External_Id__c e POST).
+"""
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # benchmarks abrem centenas de conexões de uma vez
+
+
+@dataclass
+class CRMRequest:
+    method: str
+    path: str
+    batch_size: int
+    latency: float
+    client_port: int
+    status: int
+
+
+_SINGLE_LEAD = re.compile(r"/sobjects/Lead/([^/]+)$")
+REQUIRED_ON_CREATE = ("LastName", "Company")
+
+
+class FakeCRMServer:
+    """
+    Uso:
+        with FakeCRMServer(delay=0.05) as crm:
+            transport = SalesforceCompositeTransport(crm.url)
+            ...
+            crm.batch_sizes  # [200, 200, 37]
+
+    Args:
+        delay: Latência de cada request (s).
+        fail_next: Próximos N requests respondem 503.
+        error_rate: Probabilidade de 503 em cada request.
+        reject_ids: Leads recusados com erro de validação.
+        require_auth: Exige Bearer emitido por /services/oauth2/token.
+    """
+
+    def __init__(self, delay: float = 0.0, fail_next: int = 0, error_rate: float = 0.0,
+                 reject_ids: Optional[set] = None, require_auth: bool = False, seed: int = 19):
+        self.delay = delay
+        self.fail_next = fail_next
+        self.error_rate = error_rate
+        self.reject_ids = reject_ids or set()
+        self.require_auth = require_auth
+        self.leads: dict[str, dict] = {}
+        self.requests: list[CRMRequest] = []
+        self.tokens_issued = 0
+        self._tokens: set[str] = set()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    @property
+    def batch_sizes(self) -> list[int]:
+        return [r.batch_size for r in self.requests if r.status == 200 and "/composite/" in r.path]
+
+    @property
+    def connections(self) -> int:
+        """Conexões TCP distintas usadas pelos clientes."""
+        return len({r.client_port for r in self.requests})
+
+    def expire_tokens(self):
+        """Invalida os tokens emitidos (sessão expirada no Salesforce)."""
+        with self._lock:
+            self._tokens.clear()
+
+    def __enter__(self) -> "FakeCRMServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # ── Rotas ───────────────────────────────────────────────────────────────
+
+    def _route(self, method: str, path: str, headers, raw: bytes) -> tuple[int, object, int]:
+        """(status, payload, registros no request)."""
+        if method == "POST" and path.endswith("/services/oauth2/token"):
+            form = parse_qs(raw.decode())
+            if form.get("grant_type") != ["client_credentials"]:
+                return 400, {"error": "unsupported_grant_type"}, 0
+            token = uuid.uuid4().hex
+            with self._lock:
+                self._tokens.add(token)
+                self.tokens_issued += 1
+            return 200, {"access_token": token, "instance_url": self.url, "token_type": "Bearer"}, 0
+
+        if self.require_auth:
+            token = (headers.get("Authorization") or "").removeprefix("Bearer ")
+            with self._lock:
+                if token not in self._tokens:
+                    return 401, [{"message": "Session expired or invalid", "errorCode": "INVALID_SESSION_ID"}], 0
+
+        with self._lock:
+            failing = self.fail_next > 0 or self._rng.random() < self.error_rate
+            if self.fail_next > 0:
+                self.fail_next -= 1
+        if failing:
+            return 503, [{"message": "Service Unavailable", "errorCode": "SERVER_UNAVAILABLE"}], 0
+
+        body = json.loads(raw or b"{}")
+        if method == "PATCH" and "/composite/sobjects" in path:
+            key = "id" if path.endswith("/composite/sobjects") else path.rsplit("/", 1)[-1]
+            records = body.get("records", [])
+            return 200, [self._save(r.get(key), r, upsert=key != "id") for r in records], len(records)
+        match = _SINGLE_LEAD.search(path)
+        if method == "PATCH" and match:
+            result = self._save(match.group(1), body)
+            return (204, None, 1) if result["success"] else (400, result["errors"], 1)
+        if method == "POST" and path.endswith("/sobjects/Lead"):
+            lead_id = f"00Q{uuid.uuid4().hex[:15]}"
+            result = self._save(lead_id, body, upsert=True)
+            return (201, result, 1) if result["success"] else (400, result["errors"], 1)
+        return 404, [{"message": "not found"}], 0
+
+    def _save(self, lead_id: str, record: dict, upsert: bool = False) -> dict:
+        """Grava o registro; com upsert, um lead novo precisa dos campos obrigatórios."""
+        if lead_id in self.reject_ids:
+            return {"success": False, "errors": [
+                {"statusCode": "FIELD_CUSTOM_VALIDATION_EXCEPTION", "message": "registro inválido"}]}
+        fields = {k: v for k, v in record.items() if k not in ("attributes", "id", "External_Id__c")}
+        with self._lock:
+            created = lead_id not in self.leads
+            missing = [f for f in REQUIRED_ON_CREATE if not fields.get(f)] if upsert and created else []
+            if missing:
+                return {"success": False, "errors": [{
+                    "statusCode": "REQUIRED_FIELD_MISSING",
+                    "message": f"Required fields are missing: [{', '.join(missing)}]",
+                    "fields": missing,
+                }]}
+            self.leads.setdefault(lead_id, {}).update(fields)
+        return {"id": lead_id, "success": True, "created": created, "errors": []}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def _serve(self):
+                started = time.perf_counter()
+                raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if fake.delay:
+                    time.sleep(fake.delay)
+                status, payload, size = fake._route(self.command, self.path, self.headers, raw)
+                with fake._lock:  # registrado antes da resposta: o cliente já enxerga ao retornar
+                    fake.requests.append(CRMRequest(self.command, self.path, size, time.perf_counter() - started,
+                                                    self.client_address[1], status))
+                data = b"" if payload is None else json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_PATCH = do_POST = _serve
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,147 @@
+"""
+Modelo falso para testes sem API key.
+
+Implementa a interface de `agno.models.base.Model` respondendo sempre com
+texto (sem tool calls) e registrando as mensagens (e tools) recebidas em cada chamada,
+para que os testes possam inspecionar o prompt que chegaria ao provedor.
+"""
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from agno.metrics import MessageMetrics
+from agno.models.base import Model
+from agno.models.response import ModelResponse
+
+
+@dataclass
+class FakeModel(Model):
+    id: str = "fake-model"
+    name: str = "FakeModel"
+    provider: str = "Fake"
+    # Resposta fixa ou função (messages) -> str | ModelResponse (para simular tool calls)
+    reply: "str | Callable[[list], str | ModelResponse]" = "Olá! Como posso ajudar? STATUS: FRIO"
+    delay: float = 0.0
+    report_usage: bool = False  # devolve tokens estimados (~4 caracteres/token) como um provedor real
+    calls: list = field(default_factory=list)
+    call_tools: list = field(default_factory=list)  # tools enviadas em cada chamada (paralelo a calls)
+
+    def invoke(self, messages, assistant_message=None, **kwargs) -> ModelResponse:
+        self.calls.append(list(messages))
+        self.call_tools.append(kwargs.get("tools"))
+        if self.delay:
+            time.sleep(self.delay)
+        content = self.reply(messages) if callable(self.reply) else self.reply
+        response = content if isinstance(content, ModelResponse) else ModelResponse(role="assistant", content=content)
+        if self.report_usage and response.response_usage is None:
+            response.response_usage = MessageMetrics(
+                input_tokens=prompt_tokens(messages),
+                output_tokens=estimate_tokens(str(response.content or "")),
+            )
+        return response
+
+    async def ainvoke(self, *args, **kwargs) -> ModelResponse:
+        return self.invoke(*args, **kwargs)
+
+    def invoke_stream(self, *args, **kwargs):
+        response = self.invoke(*args, **kwargs)
+        if response.tool_calls or not response.content:
+            yield response
+            return
+        # Uma palavra por delta, como um provedor real em modo stream
+        for chunk in re.findall(r"\S+\s*", response.content):
+            yield ModelResponse(role="assistant", content=chunk)
+
+    async def ainvoke_stream(self, *args, **kwargs):
+        for response in self.invoke_stream(*args, **kwargs):
+            yield response
+
+    def _parse_provider_response(self, response, **kwargs) -> ModelResponse:
+        return response
+
+    def _parse_provider_response_delta(self, response) -> ModelResponse:
+        return response
+
+
+# Módulos que importam `get_model` diretamente de src.config
+_GET_MODEL_MODULES = [
+    "src.config",
+    "src.orchestrator",
+    "src.agents.qualifier_agent",
+    "src.agents.product_specialist_agent",
+    "src.agents.quote_generator_agent",
+    "src.agents.human_handoff_agent",
+]
+
+
+def use_fake_model(model: "FakeModel", monkeypatch=None):
+    """Faz todas as fábricas de agentes/Team usarem `model` no lugar de get_model()."""
+    import importlib
+    for name in _GET_MODEL_MODULES:
+        module = importlib.import_module(name)
+        if monkeypatch is not None:
+            monkeypatch.setattr(module, "get_model", lambda: model)
+        else:
+            module.get_model = lambda: model
+
+
+def delegating_reply(
+    member_id: str = "qualificador-de-leads",
+    member_reply: str = "Qual o seu nome? STATUS: FRIO",
+    final_reply: "str | None" = None,
+):
+    """
+    Roteiro que imita o coordenador real: a 1ª chamada delega a tarefa ao membro
+    (tool call), o membro responde e a 2ª chamada do coordenador redige a resposta
+    final — `final_reply` (ex.: TurnResult em JSON) ou, se None, o texto do membro.
+    """
+
+    def reply(messages):
+        is_coordinator = "Orquestrador" in str(messages[0].content)
+        if not is_coordinator:
+            return member_reply
+        if messages[-1].role == "tool":
+            return final_reply if final_reply is not None else str(messages[-1].content)
+        return ModelResponse(
+            role="assistant",
+            content="",
+            tool_calls=[{
+                "id": f"call_{len(messages)}",
+                "type": "function",
+                "function": {
+                    "name": "delegate_task_to_member",
+                    "arguments": json.dumps({"member_id": member_id, "task": str(messages[-1].content)}),
+                },
+            }],
+        )
+
+    return reply
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa grosseira de tokens (~4 caracteres por token)."""
+    return (len(text) + 3) // 4
+
+
+def prompt_tokens(messages: list) -> int:
+    """Tokens estimados de todas as mensagens enviadas numa chamada."""
+    return sum(estimate_tokens(str(m.content or "")) for m in messages)
+
+
+def history_tokens(messages: list) -> int:
+    """Tokens de histórico enviados ao modelo.
+
+    Soma as mensagens de histórico do Agno (tudo menos o system prompt e a
+    mensagem atual) e o bloco ---HISTÓRICO DA CONVERSA--- da mensagem atual.
+    """
+    from src.history_compactor import HISTORY_END, HISTORY_START
+
+    history = [m for m in messages if m.role != "system"][:-1]
+    tokens = sum(estimate_tokens(str(m.content or "")) for m in history)
+    current = str(messages[-1].content or "")
+    if HISTORY_START in current:
+        start = current.index(HISTORY_START)
+        tokens += estimate_tokens(current[start:current.index(HISTORY_END, start) + len(HISTORY_END)])
+    return tokens
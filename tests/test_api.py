@@ -82,3 +82,462 @@ def test_low_volume_lead_gets_disqualified():
     data = response.json()
     assert data["next_action"] == "disqualified"
     assert data["lead_data"]["disqualified_reason"] is not None
+
+
+class _BlockingTeam:
+    """Team falso: simula um modelo síncrono (bloqueante) que só responde quando liberado."""
+
+    def __init__(self):
+        import threading
+        self.release = threading.Event()
+
+    def run(self, input, **kwargs):
+        from types import SimpleNamespace
+        self.release.wait(timeout=10)
+        return SimpleNamespace(content="Olá! Qual o seu nome? STATUS: FRIO")
+
+
+def test_health_answers_while_chat_turns_block(monkeypatch):
+    """
+    Teste de carga: 50 /chat simultâneos contra um modelo travado não podem
+    travar o event loop — o p99 do /health com os turnos em andamento fica
+    próximo do p99 ocioso.
+    """
+    import asyncio
+    import statistics
+    import time
+    import httpx
+    import src.api as api
+    from src.turn_pool import TurnPool
+
+    team = _BlockingTeam()
+    pool = TurnPool(max_concurrent=8, max_queued=12, retry_after=3)
+    monkeypatch.setattr(api, "get_team", lambda: team)
+    monkeypatch.setattr(api, "_turn_pool", pool)
+
+    async def health_p99(client) -> float:
+        latencies = []
+        for _ in range(50):
+            started = time.perf_counter()
+            resp = await asyncio.wait_for(client.get("/health"), timeout=1)
+            latencies.append(time.perf_counter() - started)
+            assert resp.status_code == 200
+        return statistics.quantiles(latencies, n=100)[98]
+
+    async def main():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            idle_p99 = await health_p99(client)
+            chats = [
+                client.post("/chat", json={"session_id": f"load-{i}", "message": "Quero vergalhão"})
+                for i in range(50)
+            ]
+            chat_task = asyncio.gather(*chats)
+            try:
+                for _ in range(500):
+                    if pool.in_flight == 8 and pool.queued == 12:
+                        break
+                    await asyncio.sleep(0.01)
+                assert pool.in_flight == 8
+
+                # Um turno bloqueante no event loop impediria estas respostas
+                blocked_p99 = await health_p99(client)
+                assert not chat_task.done()
+                # Folga larga (20x, piso de 100ms) para não oscilar em máquina carregada
+                assert blocked_p99 < max(idle_p99 * 20, 0.1), (idle_p99, blocked_p99)
+            finally:
+                team.release.set()
+            return await chat_task
+
+    responses = asyncio.run(main())
+
+    statuses = [r.status_code for r in responses]
+    assert statuses.count(200) == 20  # 8 executando + 12 na fila
+    assert statuses.count(503) == 30
+    rejected = next(r for r in responses if r.status_code == 503)
+    assert rejected.headers["Retry-After"] == "3"
+
+
+def test_chat_history_is_isolated_per_session(monkeypatch, tmp_path):
+    """
+    O histórico de uma sessão não pode crescer por causa de outras conversas:
+    o /chat roda o Team com session_id, então cada cliente só vê as próprias runs.
+    """
+    from agno.db.sqlite import SqliteDb
+    import src.api as api
+    import src.orchestrator as orchestrator
+    from src.session_store import SessionStore
+    from tests.fake_model import FakeModel, history_tokens
+
+    # Todos os turnos pelo coordenador — é o histórico do Team que está em teste
+    monkeypatch.setattr(api, "FAST_PATH_ROUTER", False)
+
+    def run_conversation(db_file, noisy: bool) -> int:
+        model = FakeModel(reply="Certo! Pode me informar seu nome? STATUS: FRIO")
+        monkeypatch.setattr(orchestrator, "get_model", lambda: model)
+        team = orchestrator.create_steel_sales_team()
+        team.db = SqliteDb(db_file=str(db_file))
+        monkeypatch.setattr(api, "get_team", lambda: team)
+        monkeypatch.setattr(api, "_session_store", SessionStore(team.db))
+        client = TestClient(api.app)
+
+        client.post("/chat", json={"session_id": "cliente-a", "message": "Oi, quero vergalhão"})
+        if noisy:
+            for i in range(6):
+                client.post("/chat", json={"session_id": f"outro-{i}", "message": f"Quero telha {i}"})
+        client.post("/chat", json={"session_id": "cliente-a", "message": "10mm"})
+
+        # Última chamada ao coordenador = segundo turno do cliente-a
+        return history_tokens(model.calls[-1])
+
+    quiet = run_conversation(tmp_path / "quiet.db", noisy=False)
+    noisy = run_conversation(tmp_path / "noisy.db", noisy=True)
+    assert quiet > 0  # o primeiro turno do cliente-a está no histórico
+    assert noisy == quiet
+
+
+def test_fast_path_skips_coordinator(monkeypatch, tmp_path):
+    """Turno com regra mecânica vai direto ao membro: 1 chamada de modelo em vez de 3."""
+    from agno.db.sqlite import SqliteDb
+    import src.api as api
+    from src.orchestrator import create_steel_sales_team
+    from tests.fake_model import FakeModel, delegating_reply, use_fake_model
+
+    model = FakeModel(reply=delegating_reply())
+    use_fake_model(model, monkeypatch)
+    team = create_steel_sales_team()
+    team.db = SqliteDb(db_file=str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(api, "get_team", lambda: team)
+    client = TestClient(api.app)
+
+    lead = {"session_id": "fast-1", "name": "Carlos", "state": "CE"}
+    response = client.post("/chat", json={"session_id": "fast-1", "message": "meu e-mail é c@x.com", "lead_data": lead})
+    assert response.status_code == 200
+    assert len(model.calls) == 1
+    assert "---CONTEXTO ACUMULADO---" in str(model.calls[0][-1].content)
+    assert "whatsapp" in response.json()["lead_data"]["missing_fields"]
+
+    monkeypatch.setattr(api, "FAST_PATH_ROUTER", False)
+    model.calls.clear()
+    client.post("/chat", json={"session_id": "fast-2", "message": "meu e-mail é c@x.com", "lead_data": lead})
+    assert len(model.calls) == 3  # coordenador → membro → coordenador
+
+
+def test_fast_path_turn_is_recorded_in_team_session(monkeypatch, tmp_path):
+    """Sem histórico compactado, o coordenador vê no histórico do Agno os turnos do caminho rápido."""
+    from agno.db.sqlite import SqliteDb
+    import src.api as api
+    from src.orchestrator import create_steel_sales_team
+    from src.session_store import SessionStore
+    from tests.fake_model import FakeModel, delegating_reply, use_fake_model
+
+    model = FakeModel(reply=delegating_reply())
+    use_fake_model(model, monkeypatch)
+    team = create_steel_sales_team(compact_history=False, db=SqliteDb(db_file=str(tmp_path / "sessions.db")))
+    monkeypatch.setattr(api, "get_team", lambda: team)
+    monkeypatch.setattr(api, "_session_store", SessionStore(team.db))
+    monkeypatch.setattr(api, "HISTORY_COMPACTION", False)
+    client = TestClient(api.app)
+
+    lead = {"session_id": "fast-hist", "name": "Carlos", "state": "CE"}
+    client.post("/chat", json={"session_id": "fast-hist", "message": "meu e-mail é c@x.com", "lead_data": lead})
+    assert len(model.calls) == 1  # caminho rápido
+
+    runs = team.get_session("fast-hist").runs
+    assert [run.input.input_content for run in runs] == ["meu e-mail é c@x.com"]
+
+    monkeypatch.setattr(api, "FAST_PATH_ROUTER", False)
+    client.post("/chat", json={"session_id": "fast-hist", "message": "Quero vergalhão"})
+    coordinator_history = [str(m.content) for m in model.calls[1] if m.role == "user"]
+    assert "meu e-mail é c@x.com" in coordinator_history
+    top_level = [run for run in team.get_session("fast-hist").runs if run.parent_run_id is None]
+    assert len(top_level) == 2
+
+
+def test_complete_lead_gets_rendered_quote_without_model(monkeypatch, tmp_path):
+    from agno.db.sqlite import SqliteDb
+    import src.api as api
+    from src.handoff_queue import HandoffQueue
+    from src.orchestrator import create_steel_sales_team
+    from src.session_store import SessionStore
+    from tests.fake_model import FakeModel, delegating_reply, use_fake_model
+
+    model = FakeModel(reply=delegating_reply())
+    use_fake_model(model, monkeypatch)
+    team = create_steel_sales_team()
+    team.db = SqliteDb(db_file=str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(api, "get_team", lambda: team)
+    monkeypatch.setattr(api, "_session_store", SessionStore(team.db))
+    monkeypatch.setattr(api, "_handoff_queue", HandoffQueue())
+
+    lead = {
+        "session_id": "quote-api", "name": "Carlos", "whatsapp": "85999998888",
+        "email": "c@x.com", "cnpj": "12345678000195", "state": "CE", "city": "Fortaleza",
+        "product_interest": "vergalhão", "volume_estimate": "5 toneladas",
+    }
+    response = TestClient(api.app).post("/chat", json={"session_id": "quote-api", "message": "pode fechar", "lead_data": lead})
+    assert response.status_code == 200
+    data = response.json()
+    # Resumo interno vai para o time comercial; o cliente recebe só a confirmação
+    assert "RESUMO DO PEDIDO" not in data["message"]
+    assert "STATUS" not in data["message"]
+    assert "Carlos" in data["message"]
+    assert data["classification"] == "QUENTE"
+    assert data["next_action"] == "transfer_to_closer"
+    assert model.calls == []
+
+    ticket = api._handoff_queue.pending()[0]
+    assert ticket.reason == "quote_ready"
+    assert "RESUMO DO PEDIDO" in ticket.summary
+    assert ticket.lead_snapshot["classification"] == "QUENTE"
+
+
+def test_quote_is_sent_once_per_session(monkeypatch, tmp_path):
+    """Depois do orçamento, o gateway reenviando o lead completo não gera outro orçamento."""
+    from agno.db.sqlite import SqliteDb
+    import src.api as api
+    from src.orchestrator import create_steel_sales_team
+    from src.session_store import SessionStore
+    from tests.fake_model import FakeModel, delegating_reply, use_fake_model
+
+    model = FakeModel(reply=delegating_reply(final_reply="O Closer já está com o seu pedido."))
+    use_fake_model(model, monkeypatch)
+    team = create_steel_sales_team()
+    team.db = SqliteDb(db_file=str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(api, "get_team", lambda: team)
+    monkeypatch.setattr(api, "_session_store", SessionStore(team.db))
+    client = TestClient(api.app)
+
+    lead = {
+        "session_id": "quote-once", "name": "Carlos", "whatsapp": "85999998888",
+        "email": "c@x.com", "cnpj": "12345678000195", "state": "CE", "city": "Fortaleza",
+        "product_interest": "vergalhão", "volume_estimate": "5 toneladas",
+    }
+    first = client.post("/chat", json={"session_id": "quote-once", "message": "pode fechar", "lead_data": lead})
+    assert first.json()["next_action"] == "transfer_to_closer"
+    assert model.calls == []
+
+    second = client.post("/chat", json={"session_id": "quote-once", "message": "e o prazo?", "lead_data": lead})
+    assert second.json()["message"] == "O Closer já está com o seu pedido."
+    assert model.calls  # turno foi para o coordenador
+
+
+def test_fields_in_message_disqualify_before_model(monkeypatch):
+    """UF e volume só na mensagem (sem lead_data): desqualificação sem chamar o Team."""
+    import src.api as api
+
+    def fail_get_team():
+        raise AssertionError("o Team não deve ser chamado")
+
+    monkeypatch.setattr(api, "get_team", fail_get_team)
+    response = TestClient(api.app).post("/chat", json={
+        "session_id": "extract-1",
+        "message": "Sou de Manaus/AM, preciso de 500kg de vergalhão, cnpj 11.222.333/0001-81",
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert data["next_action"] == "disqualified"
+    assert data["lead_data"]["state"] == "AM"
+    assert data["lead_data"]["city"] == "Manaus"
+    assert data["lead_data"]["cnpj"] == "11222333000181"
+    assert data["lead_data"]["product_interest"] == "vergalhão"
+
+
+def test_question_about_weight_does_not_replace_volume(monkeypatch, tmp_path):
+    """Pergunta com "1 barra" não troca o volume do lead nem o desqualifica por volume mínimo."""
+    from agno.db.sqlite import SqliteDb
+    import src.api as api
+    from src.orchestrator import create_steel_sales_team
+    from src.session_store import SessionStore
+    from tests.fake_model import FakeModel, delegating_reply, use_fake_model
+
+    model = FakeModel(reply=delegating_reply())
+    use_fake_model(model, monkeypatch)
+    team = create_steel_sales_team()
+    team.db = SqliteDb(db_file=str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(api, "get_team", lambda: team)
+    monkeypatch.setattr(api, "_session_store", SessionStore(team.db))
+
+    lead = {"session_id": "weight-q", "name": "Ana", "state": "PI", "city": "Teresina",
+            "product_interest": "vergalhão", "volume_estimate": "5 toneladas"}
+    response = TestClient(api.app).post("/chat", json={
+        "session_id": "weight-q", "message": "quantos kg tem 1 barra de 12,5mm?", "lead_data": lead,
+    })
+    data = response.json()
+    assert data["next_action"] != "disqualified"
+    assert data["lead_data"]["volume_estimate"] == "5 toneladas"
+
+
+def test_last_missing_field_in_message_renders_quote(monkeypatch, tmp_path):
+    from agno.db.sqlite import SqliteDb
+    import src.api as api
+    from src.orchestrator import create_steel_sales_team
+    from src.session_store import SessionStore
+    from tests.fake_model import FakeModel, delegating_reply, use_fake_model
+
+    model = FakeModel(reply=delegating_reply())
+    use_fake_model(model, monkeypatch)
+    team = create_steel_sales_team()
+    team.db = SqliteDb(db_file=str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(api, "get_team", lambda: team)
+    monkeypatch.setattr(api, "_session_store", SessionStore(team.db))
+
+    lead = {
+        "session_id": "extract-2", "name": "Carlos", "whatsapp": "85999998888",
+        "cnpj": "12345678000195", "state": "CE", "city": "Fortaleza",
+    }
+    response = TestClient(api.app).post("/chat", json={
+        "session_id": "extract-2",
+        "message": "c.souza@construtora.com.br, quero 5 toneladas de vergalhão",
+        "lead_data": lead,
+    })
+    data = response.json()
+    assert data["next_action"] == "transfer_to_closer"
+    assert data["lead_data"]["email"] == "c.souza@construtora.com.br"
+    assert model.calls == []
+
+
+def test_structured_result_updates_lead_and_keeps_message_separate(monkeypatch, tmp_path):
+    from agno.db.sqlite import SqliteDb
+    import src.api as api
+    from src.models import LeadUpdates, TurnResult
+    from src.orchestrator import create_steel_sales_team
+    from tests.fake_model import FakeModel, delegating_reply, use_fake_model
+
+    final = TurnResult(
+        message="Obrigado, Carlos! Seu pedido ainda não está QUENTE: qual o seu CNPJ?",
+        classification="MORNO",
+        lead_updates=LeadUpdates(name="Carlos Souza", client_type="Construtora"),
+        next_action="collect_data",
+    )
+    model = FakeModel(reply=delegating_reply(final_reply=final.model_dump_json()))
+    use_fake_model(model, monkeypatch)
+    team = create_steel_sales_team()
+    team.db = SqliteDb(db_file=str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(api, "get_team", lambda: team)
+    monkeypatch.setattr(api, "FAST_PATH_ROUTER", False)
+    client = TestClient(api.app)
+
+    response = client.post("/chat", json={"session_id": "structured-1", "message": "sou o Carlos Souza, da construtora"})
+    data = response.json()
+    assert data["message"] == final.message
+    assert data["classification"] == "MORNO"
+    assert data["next_action"] == "collect_data"
+    assert data["lead_data"]["name"] == "Carlos Souza"
+    assert data["lead_data"]["client_type"] == "Construtora"
+    assert "name" not in data["lead_data"]["missing_fields"]
+
+    # Próximo turno sem lead_data: a API usa o estado guardado da sessão
+    before = len(model.calls)
+    client.post("/chat", json={"session_id": "structured-1", "message": "meu email é c@x.com"})
+    assert '"name":"Carlos Souza"' in str(model.calls[before][-1].content)
+
+
+def test_state_name_from_model_does_not_disqualify_lead(monkeypatch, tmp_path):
+    """lead_updates com o nome do estado ("Ceará") vira UF, não desqualificação."""
+    from agno.db.sqlite import SqliteDb
+    import src.api as api
+    from src.models import LeadUpdates, TurnResult
+    from src.orchestrator import create_steel_sales_team
+    from src.session_store import SessionStore
+    from tests.fake_model import FakeModel, delegating_reply, use_fake_model
+
+    final = TurnResult(
+        message="Certo! Qual a quantidade de Bobina?",
+        classification="MORNO",
+        lead_updates=LeadUpdates(state="Ceará", technical_product="Bobina"),
+        next_action="collect_data",
+    )
+    use_fake_model(FakeModel(reply=delegating_reply(final_reply=final.model_dump_json())), monkeypatch)
+    team = create_steel_sales_team()
+    team.db = SqliteDb(db_file=str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(api, "get_team", lambda: team)
+    monkeypatch.setattr(api, "FAST_PATH_ROUTER", False)
+    monkeypatch.setattr(api, "_session_store", SessionStore(team.db))
+    client = TestClient(api.app)
+
+    data = client.post("/chat", json={"session_id": "uf-1", "message": "sou de Fortaleza/CE, preciso de bobina"}).json()
+    assert data["lead_data"]["state"] == "CE"
+    assert data["lead_data"]["technical_product"] == "Bobina"
+
+    data = client.post("/chat", json={"session_id": "uf-1", "message": "ok"}).json()
+    assert data["next_action"] != "disqualified"
+    assert "não atendemos" not in data["message"]
+
+
+def test_handoff_request_answers_without_team(monkeypatch):
+    """Pedido de humano: resposta fixa, entra na fila e o Team nunca é chamado."""
+    import src.api as api
+    from src.handoff_queue import HandoffQueue
+
+    def fail_get_team():
+        raise AssertionError("o Team não deve ser chamado no transbordo")
+
+    monkeypatch.setattr(api, "get_team", fail_get_team)
+    monkeypatch.setattr(api, "_handoff_queue", HandoffQueue())
+    client = TestClient(api.app)
+
+    response = client.post("/chat", json={"session_id": "handoff-1", "message": "quero falar com um atendente"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["next_action"] == "transfer_to_human"
+    assert "Aço Cearense" in data["message"]
+
+    queue = client.get("/handoff/queue").json()["pending"]
+    assert [t["session_id"] for t in queue] == ["handoff-1"]
+    assert client.post("/handoff/next").json()["session_id"] == "handoff-1"
+    assert client.post("/handoff/next").status_code == 404
+
+
+def _parse_sse(body: str) -> list[tuple[str, str]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = block.splitlines()
+        name = lines[0].removeprefix("event: ")
+        data = "\n".join(line.removeprefix("data: ") for line in lines[1:])
+        events.append((name, data))
+    return events
+
+
+def test_chat_stream_emits_member_deltas_and_final_response(monkeypatch, tmp_path):
+    import json
+    from agno.db.sqlite import SqliteDb
+    import src.api as api
+    from src.orchestrator import create_steel_sales_team
+    from tests.fake_model import FakeModel, delegating_reply, use_fake_model
+
+    model = FakeModel(reply=delegating_reply(member_reply="Qual o seu nome? STATUS: FRIO"))
+    use_fake_model(model, monkeypatch)
+    team = create_steel_sales_team()
+    team.db = SqliteDb(db_file=str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(api, "get_team", lambda: team)
+    client = TestClient(api.app)
+
+    response = client.post("/chat/stream", json={"session_id": "sse-1", "message": "quero vergalhão"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = _parse_sse(response.text)
+    names = [name for name, _ in events]
+    assert names[0] == "member-started"
+    assert "delta" in names
+    assert "member-finished" in names
+    assert names[-1] == "final"
+
+    final = json.loads(events[-1][1])
+    assert final["session_id"] == "sse-1"
+    assert final["message"] == "Qual o seu nome? STATUS: FRIO"
+    assert final["classification"] == "FRIO"
+    assert final["next_action"] == "collect_data"
+
+
+def test_chat_stream_static_answer_is_single_final_event(monkeypatch):
+    import json
+    import src.api as api
+    from src.handoff_queue import HandoffQueue
+
+    monkeypatch.setattr(api, "_handoff_queue", HandoffQueue())
+    response = TestClient(api.app).post("/chat/stream", json={"session_id": "sse-2", "message": "quero falar com o gerente"})
+    events = _parse_sse(response.text)
+    assert [name for name, _ in events] == ["final"]
+    assert json.loads(events[0][1])["next_action"] == "transfer_to_human"
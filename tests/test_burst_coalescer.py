@@ -0,0 +1,191 @@
+"""
+Testes do agrupamento de rajadas de mensagens por sessão.
+"""
+import asyncio
+
+from src.burst_coalescer import MERGED_ACTION, BurstCoalescer
+from src.models import IncomingMessage
+
+
+def _msg(text: str, session_id: str = "sess-a") -> IncomingMessage:
+    return IncomingMessage(session_id=session_id, message=text)
+
+
+async def _send(coalescer, texts, gap: float, session_id: str = "sess-a"):
+    async def request(text):
+        burst = await coalescer.collect(_msg(text, session_id))
+        if burst is not None and coalescer.begin(burst):  # sessão livre: o turno começa na hora
+            coalescer.finish(burst)
+        return burst
+
+    tasks = []
+    for text in texts:
+        tasks.append(asyncio.ensure_future(request(text)))
+        await asyncio.sleep(gap)
+    return await asyncio.gather(*tasks)
+
+
+def test_messages_within_window_become_one_turn():
+    coalescer = BurstCoalescer(window=0.05, max_wait=1.0)
+    results = asyncio.run(_send(coalescer, ["oi", "quero vergalhão", "10mm"], gap=0.01))
+    assert results[:2] == [None, None]
+    assert results[2].merged().message == "oi\nquero vergalhão\n10mm"
+
+
+def test_quiet_gap_starts_a_new_burst():
+    coalescer = BurstCoalescer(window=0.03, max_wait=1.0)
+    results = asyncio.run(_send(coalescer, ["oi", "10mm"], gap=0.08))
+    assert [r.merged().message for r in results] == ["oi", "10mm"]
+
+
+def test_max_wait_caps_a_long_burst():
+    coalescer = BurstCoalescer(window=0.05, max_wait=0.1)
+    results = asyncio.run(_send(coalescer, [f"m{i}" for i in range(10)], gap=0.03))
+    runners = [r for r in results if r is not None]
+    assert len(runners) >= 2  # a rajada contínua não segura o cliente para sempre
+    assert "\n".join(r.merged().message for r in runners) == "\n".join(f"m{i}" for i in range(10))
+
+
+def test_sessions_do_not_mix():
+    coalescer = BurstCoalescer(window=0.03, max_wait=1.0)
+
+    async def main():
+        return await asyncio.gather(
+            coalescer.collect(_msg("oi", "sess-a")), coalescer.collect(_msg("olá", "sess-b")))
+
+    a, b = asyncio.run(main())
+    assert (a.merged().message, b.merged().message) == ("oi", "olá")
+
+
+def test_disabled_window_passes_messages_through():
+    coalescer = BurstCoalescer(window=0, max_wait=0)
+
+    async def main():
+        burst = await coalescer.collect(_msg("oi"))
+        return burst, coalescer.begin(burst), coalescer.absorb("sess-a")
+
+    burst, started, absorbed = asyncio.run(main())
+    assert burst.merged().message == "oi"
+    assert started is True and absorbed == []
+
+
+def test_running_turn_absorbs_next_burst():
+    coalescer = BurstCoalescer(window=0.02, max_wait=1.0)
+
+    async def main():
+        first = await coalescer.collect(_msg("quero vergalhão"))
+        assert coalescer.begin(first)
+        waiting = asyncio.ensure_future(coalescer.collect(_msg("pra Fortaleza")))
+        await asyncio.sleep(0.05)  # a rajada seguinte fechou e espera a vez da sessão
+        absorbed = coalescer.absorb("sess-a")
+        second = await waiting
+        coalescer.finish(first)
+        return first, second, absorbed
+
+    first, second, absorbed = asyncio.run(main())
+    assert absorbed == ["pra Fortaleza"]
+    assert coalescer.begin(second) is False  # a requisição dela responde "merged"
+    assert first.merged().message == "quero vergalhão\npra Fortaleza"
+
+
+def test_api_burst_runs_a_single_team_turn(monkeypatch, tmp_path):
+    import httpx
+    from agno.db.sqlite import SqliteDb
+    import src.api as api
+    from src.orchestrator import create_steel_sales_team
+    from src.session_store import SessionStore
+    from tests.fake_model import FakeModel, delegating_reply, use_fake_model
+
+    model = FakeModel(reply=delegating_reply())
+    use_fake_model(model, monkeypatch)
+    team = create_steel_sales_team(tool_hooks=[api.absorb_follow_ups])
+    team.db = SqliteDb(db_file=str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(api, "get_team", lambda: team)
+    monkeypatch.setattr(api, "FAST_PATH_ROUTER", False)
+    monkeypatch.setattr(api, "_session_store", SessionStore(team.db))
+    monkeypatch.setattr(api, "_coalescer", BurstCoalescer(window=0.1, max_wait=1.0))
+
+    async def main():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            tasks = []
+            for text in ["oi", "quero vergalhão", "sou de Fortaleza/CE"]:
+                tasks.append(asyncio.ensure_future(
+                    client.post("/chat", json={"session_id": "rajada", "message": text})))
+                await asyncio.sleep(0.02)
+            return [r.json() for r in await asyncio.gather(*tasks)]
+
+    responses = asyncio.run(main())
+    assert [r["next_action"] for r in responses[:2]] == [MERGED_ACTION, MERGED_ACTION]
+    assert responses[2]["message"]
+    assert responses[2]["lead_data"]["state"] == "CE"
+    assert len(model.calls) == 3  # um turno: coordenador → membro → coordenador
+    assert "oi\nquero vergalhão\nsou de Fortaleza/CE" in str(model.calls[0][-1].content)
+
+
+def test_api_in_flight_turn_absorbs_follow_up_before_member(monkeypatch, tmp_path):
+    import httpx
+    from agno.db.sqlite import SqliteDb
+    import src.api as api
+    from src.orchestrator import create_steel_sales_team
+    from src.session_store import SessionStore
+    from tests.fake_model import FakeModel, delegating_reply, use_fake_model
+
+    model = FakeModel(reply=delegating_reply(), delay=0.3)
+    use_fake_model(model, monkeypatch)
+    team = create_steel_sales_team(tool_hooks=[api.absorb_follow_ups])
+    team.db = SqliteDb(db_file=str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(api, "get_team", lambda: team)
+    monkeypatch.setattr(api, "FAST_PATH_ROUTER", False)
+    monkeypatch.setattr(api, "_session_store", SessionStore(team.db))
+    monkeypatch.setattr(api, "_coalescer", BurstCoalescer(window=0.05, max_wait=1.0))
+
+    async def main():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.ensure_future(client.post("/chat", json={"session_id": "meio", "message": "quero vergalhão"}))
+            await asyncio.sleep(0.15)  # coordenador já está na 1ª chamada
+            second = asyncio.ensure_future(client.post("/chat", json={"session_id": "meio", "message": "sou de Recife/PE"}))
+            return (await first).json(), (await second).json()
+
+    first, second = asyncio.run(main())
+    assert second["next_action"] == MERGED_ACTION
+    assert len(model.calls) == 3
+    member_task = str(model.calls[1][-1].content)
+    assert "Mensagens seguintes do cliente: sou de Recife/PE" in member_task
+    assert first["lead_data"]["state"] == "PE"
+
+
+def test_stream_quote_burst_records_merged_message(monkeypatch, tmp_path):
+    """/chat/stream pelo template do orçamento grava a rajada inteira, como o /chat."""
+    import httpx
+    from agno.db.sqlite import SqliteDb
+    import src.api as api
+    from src.handoff_queue import HandoffQueue
+    from src.orchestrator import create_steel_sales_team
+    from src.session_store import SessionStore
+
+    team = create_steel_sales_team()
+    team.db = SqliteDb(db_file=str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(api, "_session_store", SessionStore(team.db))
+    monkeypatch.setattr(api, "_handoff_queue", HandoffQueue())
+    monkeypatch.setattr(api, "_coalescer", BurstCoalescer(window=0.1, max_wait=1.0))
+    lead = {
+        "session_id": "rajada-sse", "name": "Carlos", "whatsapp": "85999998888",
+        "email": "c@x.com", "cnpj": "12345678000195", "state": "CE", "city": "Fortaleza",
+        "product_interest": "vergalhão", "volume_estimate": "5 toneladas",
+    }
+
+    async def main():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            tasks = []
+            for text in ["ok", "pode fechar"]:
+                tasks.append(asyncio.ensure_future(client.post(
+                    "/chat/stream", json={"session_id": "rajada-sse", "message": text, "lead_data": lead})))
+                await asyncio.sleep(0.02)
+            return await asyncio.gather(*tasks)
+
+    responses = asyncio.run(main())
+    assert "transfer_to_closer" in responses[1].text
+    assert api._handoff_queue.pending()[0].last_message == "ok\npode fechar"
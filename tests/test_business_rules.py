@@ -9,7 +9,11 @@ from src.business_rules import (
     is_state_served,
     is_product_available,
     check_auto_disqualification,
+    find_missing_fields,
+    find_product_mention,
+    REQUIRED_LEAD_FIELDS,
 )
+from src.models import LeadData
 
 
 class TestScoring:
@@ -53,6 +57,21 @@ class TestVolumeMinimum:
         assert check_minimum_volume("500kg") is False
         assert check_minimum_volume("2 toneladas") is True
 
+    def test_units_use_catalog_weight_not_20kg(self):
+        # 20 barras de vergalhão 10mm (7,40 kg/un) = 148kg — abaixo dos 250kg do CE
+        # (com a estimativa antiga de 20 kg/un seriam 400kg)
+        assert check_minimum_volume("20 barras de 10mm", state="CE", product="vergalhão") is False
+        assert check_minimum_volume("50 barras de 10mm", state="CE", product="vergalhão") is True
+
+
+class TestVolumeDisqualification:
+    def test_reason_shows_converted_weight_for_units(self):
+        result = check_auto_disqualification(
+            state="CE", volume_estimate="20 barras de 10mm", product="vergalhão"
+        )
+        assert result["disqualified"] is True
+        assert "148kg" in result["reason"]
+
 
 class TestStateServed:
     def test_ceara_is_served(self):
@@ -90,6 +109,10 @@ class TestProductAvailable:
     def test_unknown_product_returns_false(self):
         assert is_product_available("produto_inexistente_xyz") is False
 
+    def test_catalog_groups_are_available(self):
+        for group in ("Bobina", "Tela Soldada", "Treliça", "Chapa Xadrez"):
+            assert is_product_available(group) is True, group
+
 
 class TestAutoDisqualification:
     def test_disqualify_invalid_state(self):
@@ -128,8 +151,45 @@ class TestAutoDisqualification:
         )
         assert result["disqualified"] is False
 
+    def test_volume_range_uses_lower_bound_in_tons(self):
+        # "5 a 10 toneladas" é 5.000kg, não 5kg
+        result = check_auto_disqualification(
+            state="CE", volume_estimate="5 a 10 toneladas", product="vergalhão"
+        )
+        assert result["disqualified"] is False
+
     def test_qualify_valid_lead_sp(self):
         result = check_auto_disqualification(
             state="SP", volume_estimate="5 toneladas", product="Vergalhão"
         )
         assert result["disqualified"] is False
+
+
+class TestLeadCompleteness:
+    def test_empty_lead_misses_all_required_fields(self):
+        lead = LeadData(session_id="t")
+        assert find_missing_fields(lead) == list(REQUIRED_LEAD_FIELDS)
+
+    def test_technical_product_counts_as_product(self):
+        lead = LeadData(session_id="t", technical_product="CA-50 Reto 10mm")
+        assert "product_interest" not in find_missing_fields(lead)
+
+    def test_complete_lead_has_no_missing_fields(self):
+        lead = LeadData(
+            session_id="t", name="Carlos", whatsapp="85999998888", email="c@x.com",
+            cnpj="12345678000100", state="CE", city="Fortaleza",
+            product_interest="vergalhão", volume_estimate="5 toneladas",
+        )
+        assert find_missing_fields(lead) == []
+
+
+class TestProductMention:
+    def test_finds_product_in_message(self):
+        assert find_product_mention("Bom dia, preciso de vergalhão 10mm") == "vergalhão"
+
+    def test_prefers_longest_term(self):
+        assert find_product_mention("quero tubo quadrado 30x30") == "tubo quadrado"
+
+    def test_no_product(self):
+        assert find_product_mention("meu CNPJ é 12.345.678/0001-00") is None
+        assert find_product_mention(None) is None
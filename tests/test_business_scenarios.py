@@ -108,6 +108,12 @@ class TestAgentesEstrutura:
         assert response.json()["status"] == "ok"
 
 
+def _text(response) -> str:
+    """Texto para o cliente: o Team responde com TurnResult (output_schema)."""
+    content = response.content if hasattr(response, 'content') else response
+    return getattr(content, "message", None) or str(content)
+
+
 class TestFluxoQualificacao:
     """Testes de integração - requerem API key"""
 
@@ -116,7 +122,7 @@ class TestFluxoQualificacao:
         from src.orchestrator import create_steel_sales_team
         team = create_steel_sales_team()
         response = team.run("Quero comprar aço")
-        content = response.content if hasattr(response, 'content') else str(response)
+        content = _text(response)
         assert any(w in content.lower() for w in ["nome", "empresa", "cnpj", "dados"])
 
     @needs_api
@@ -124,7 +130,7 @@ class TestFluxoQualificacao:
         from src.agents.product_specialist_agent import create_product_specialist_agent
         agent = create_product_specialist_agent()
         response = agent.run("Preciso de ferro para laje, uns 10mm, umas 5 toneladas")
-        content = response.content if hasattr(response, 'content') else str(response)
+        content = _text(response)
         assert any(w in content.lower() for w in ["vergalhão", "ca 60", "si 50"])
 
     @needs_api
@@ -132,7 +138,7 @@ class TestFluxoQualificacao:
         from src.agents.product_specialist_agent import create_product_specialist_agent
         agent = create_product_specialist_agent()
         response = agent.run("Quero metalon 30x30mm")
-        content = response.content if hasattr(response, 'content') else str(response)
+        content = _text(response)
         assert any(w in content.lower() for w in ["tubo", "quadrado"])
 
     @needs_api
@@ -150,6 +156,6 @@ class TestFluxoQualificacao:
         Urgência: até 30 dias
         """
         response = team.run(mensagem)
-        content = response.content if hasattr(response, 'content') else str(response)
+        content = _text(response)
         assert any(w in content.lower() for w in ["morno", "orçamento", "resumo", "pedido", "carlos"])
 
@@ -0,0 +1,167 @@
+"""
+Testes do cliente HTTP do Salesforce: pool keep-alive, OAuth em cache e circuit breaker.
+"""
+import threading
+import time
+
+import httpx
+import pytest
+
+from src.crm_http import CircuitBreaker, CircuitOpenError, CRMHttpClient, OAuthTokenCache
+from src.crm_integration import CRMClient, LeadStatus
+from src.crm_sync import CRMSyncQueue, SalesforceCompositeTransport
+from tests.fake_crm import FakeCRMServer
+
+LEAD_PATH = "/services/data/v60.0/sobjects/Lead"
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def crm():
+    with FakeCRMServer() as server:
+        yield server
+
+
+def _oauth(crm, **kwargs):
+    return OAuthTokenCache(f"{crm.url}/services/oauth2/token", "client-id", "secret", **kwargs)
+
+
+def test_pooled_client_reuses_connection(crm):
+    http = CRMHttpClient(crm.url)
+    for i in range(20):
+        http.request("PATCH", f"{LEAD_PATH}/00Q{i}", json={"Status": "FRIO"})
+    assert crm.connections == 1
+
+
+def test_unpooled_client_opens_connection_per_request(crm):
+    http = CRMHttpClient(crm.url, pooled=False)
+    for i in range(5):
+        http.request("PATCH", f"{LEAD_PATH}/00Q{i}", json={"Status": "FRIO"})
+    assert crm.connections == 5
+
+
+def test_pool_bounds_concurrent_connections(crm):
+    crm.delay = 0.05
+    http = CRMHttpClient(crm.url, max_connections=3)
+    threads = [threading.Thread(target=http.request, args=("PATCH", f"{LEAD_PATH}/00Q{i}"),
+                                kwargs={"json": {"Status": "FRIO"}}) for i in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(crm.requests) == 12
+    assert crm.connections <= 3
+
+
+def test_oauth_token_is_cached(crm):
+    crm.require_auth = True
+    http = CRMHttpClient(crm.url, oauth=_oauth(crm))
+    for i in range(10):
+        http.request("PATCH", f"{LEAD_PATH}/00Q{i}", json={"Status": "FRIO"})
+    assert crm.tokens_issued == 1
+
+
+def test_oauth_token_refreshes_after_ttl(crm):
+    crm.require_auth = True
+    clock = _Clock()
+    http = CRMHttpClient(crm.url, oauth=_oauth(crm, ttl_seconds=60, clock=clock))
+    http.request("PATCH", f"{LEAD_PATH}/00Q1", json={"Status": "FRIO"})
+    clock.now = 61
+    http.request("PATCH", f"{LEAD_PATH}/00Q1", json={"Status": "MORNO"})
+    assert crm.tokens_issued == 2
+
+
+def test_expired_session_renews_token_and_retries_once(crm):
+    crm.require_auth = True
+    http = CRMHttpClient(crm.url, oauth=_oauth(crm))
+    http.request("PATCH", f"{LEAD_PATH}/00Q1", json={"Status": "FRIO"})
+    crm.expire_tokens()
+    http.request("PATCH", f"{LEAD_PATH}/00Q1", json={"Status": "MORNO"})
+    assert crm.tokens_issued == 2
+    assert crm.leads["00Q1"]["Status"] == "MORNO"
+
+
+def test_breaker_opens_after_failures_and_fails_fast(crm):
+    clock = _Clock()
+    http = CRMHttpClient(crm.url, breaker=CircuitBreaker(failure_threshold=3, reset_seconds=30, clock=clock))
+    crm.fail_next = 3
+    for _ in range(3):
+        with pytest.raises(httpx.HTTPStatusError):
+            http.request("PATCH", f"{LEAD_PATH}/00Q1", json={"Status": "FRIO"})
+    with pytest.raises(CircuitOpenError):
+        http.request("PATCH", f"{LEAD_PATH}/00Q1", json={"Status": "FRIO"})
+    assert len(crm.requests) == 3  # a 4ª nem saiu
+    assert http.breaker.rejected == 1
+
+    clock.now = 31  # passa um request de teste; sucesso fecha o circuito
+    http.request("PATCH", f"{LEAD_PATH}/00Q1", json={"Status": "MORNO"})
+    assert http.breaker.state == "closed"
+
+
+def test_failed_probe_reopens_breaker(crm):
+    clock = _Clock()
+    http = CRMHttpClient(crm.url, breaker=CircuitBreaker(failure_threshold=1, reset_seconds=10, clock=clock))
+    crm.fail_next = 2
+    with pytest.raises(httpx.HTTPStatusError):
+        http.request("PATCH", f"{LEAD_PATH}/00Q1", json={})
+    clock.now = 11
+    with pytest.raises(httpx.HTTPStatusError):
+        http.request("PATCH", f"{LEAD_PATH}/00Q1", json={})
+    with pytest.raises(CircuitOpenError):
+        http.request("PATCH", f"{LEAD_PATH}/00Q1", json={})
+
+
+def test_slow_calls_open_breaker(crm):
+    crm.delay = 0.1
+    http = CRMHttpClient(crm.url, breaker=CircuitBreaker(failure_threshold=2, slow_call_seconds=0.05))
+    http.request("PATCH", f"{LEAD_PATH}/00Q1", json={})
+    http.request("PATCH", f"{LEAD_PATH}/00Q1", json={})
+    with pytest.raises(CircuitOpenError):
+        http.request("PATCH", f"{LEAD_PATH}/00Q1", json={})
+
+
+def test_request_timeout(crm):
+    crm.delay = 0.3
+    http = CRMHttpClient(crm.url, timeout=0.05)
+    with pytest.raises(httpx.TimeoutException):
+        http.request("PATCH", f"{LEAD_PATH}/00Q1", json={})
+
+
+def test_client_errors_do_not_open_breaker(crm):
+    http = CRMHttpClient(crm.url, breaker=CircuitBreaker(failure_threshold=1))
+    with pytest.raises(httpx.HTTPStatusError):
+        http.request("POST", "/nao-existe", json={})
+    assert http.breaker.state == "closed"
+
+
+def test_crm_client_production_mode(crm):
+    crm_client = CRMClient(stub_mode=False, http=CRMHttpClient(crm.url))
+    created = crm_client.create_lead(name="Carlos", email="c@obra.com", phone="85999998888", cnpj="11222333000181")
+    assert created["success"] is True
+    result = crm_client.update_lead_status(created["id"], LeadStatus.QUENTE, score=90)
+    assert result == {"success": True, "lead_id": created["id"]}
+    assert crm.leads[created["id"]]["Status"] == "QUENTE"
+    assert crm.leads[created["id"]]["CNPJ__c"] == "11222333000181"
+
+
+def test_crm_client_buffers_updates_while_breaker_open(crm):
+    http = CRMHttpClient(crm.url, breaker=CircuitBreaker(failure_threshold=1, reset_seconds=0.05))
+    buffer = CRMSyncQueue(SalesforceCompositeTransport(http=http, key_field="Id"), dry_run=True)
+    crm_client = CRMClient(stub_mode=False, http=http, buffer=buffer)
+
+    crm.fail_next = 1
+    first = crm_client.update_lead_status("00Q1", LeadStatus.MORNO, score=60)
+    second = crm_client.update_lead_status("00Q1", LeadStatus.QUENTE, score=90)  # circuito aberto: nem tenta
+    assert first["buffered"] and second["buffered"]
+    assert len(crm.requests) == 1
+
+    time.sleep(0.06)
+    assert buffer.flush() == 1
+    assert crm.leads["00Q1"] == {"Status": "QUENTE", "Lead_Score__c": 90}
@@ -0,0 +1,191 @@
+"""
+Testes da fila write-behind do CRM contra o servidor falso do Salesforce.
+"""
+import time
+
+import pytest
+
+from src.crm_sync import CRMSyncQueue, SalesforceCompositeTransport, lead_fields
+from src.models import LeadClassification, LeadData
+from tests.fake_crm import FakeCRMServer
+
+
+@pytest.fixture
+def crm():
+    with FakeCRMServer() as server:
+        yield server
+
+
+def _queue(crm, **kwargs):
+    kwargs.setdefault("dry_run", True)
+    return CRMSyncQueue(SalesforceCompositeTransport(crm.url), **kwargs)
+
+
+def _wait_for(condition, timeout: float = 3.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_repeated_updates_coalesce_into_latest_value(crm):
+    queue = _queue(crm)
+    queue.enqueue("sess-1", status="FRIO", score=10)
+    queue.enqueue("sess-2", status="FRIO", score=5)
+    queue.enqueue("sess-1", status="MORNO", score=60, email="c@obra.com")
+    queue.enqueue("sess-1", status="QUENTE", score=90)
+    assert queue.flush() == 2
+    assert crm.batch_sizes == [2]
+    assert crm.leads["sess-1"] == {
+        "Status": "QUENTE", "Lead_Score__c": 90, "Email": "c@obra.com",
+        "LastName": "Não informado", "Company": "Não informado",
+    }
+    assert queue.stats()["coalesced"] == 2
+
+
+def test_full_queue_triggers_bulk_flush(crm):
+    queue = _queue(crm, batch_size=10, flush_seconds=60, dry_run=False)
+    for i in range(25):
+        queue.enqueue(f"sess-{i}", status="FRIO", score=i)
+    assert _wait_for(lambda: len(crm.batch_sizes) >= 2)
+    time.sleep(0.1)
+    assert crm.batch_sizes == [10, 10]  # os 5 restantes esperam o tempo ou o próximo lote cheio
+    queue.close()
+    assert crm.batch_sizes == [10, 10, 5]
+
+
+def test_time_trigger_flushes_partial_batch(crm):
+    queue = _queue(crm, batch_size=200, flush_seconds=0.1, dry_run=False)
+    queue.enqueue("sess-1", status="MORNO", score=60)
+    queue.enqueue("sess-2", status="FRIO", score=0)
+    assert _wait_for(lambda: crm.batch_sizes == [2])
+    queue.stop()
+
+
+def test_unflushed_updates_survive_crash(crm, tmp_path):
+    journal = str(tmp_path / "crm_outbox.db")
+    queue = _queue(crm, journal_path=journal)
+    queue.enqueue("sess-1", status="FRIO", score=10)
+    queue.enqueue("sess-1", status="MORNO", score=60)
+    queue.enqueue("sess-2", status="QUENTE", score=95)
+    queue.close(drain=False)  # processo caiu antes do envio
+
+    restarted = _queue(crm, journal_path=journal)
+    assert restarted.stats()["recovered"] == 2
+    assert restarted.flush() == 2
+    assert crm.leads["sess-1"]["Status"] == "MORNO"
+    restarted.close()
+    assert _queue(crm, journal_path=journal).stats()["pending"] == 0  # confirmado = fora do diário
+
+
+def test_crm_failure_requeues_batch_with_backoff(crm):
+    crm.fail_next = 1
+    queue = _queue(crm, retry_seconds=30)
+    queue.enqueue("sess-1", status="MORNO", score=60)
+    assert queue.flush() == 0
+    stats = queue.stats()
+    assert (stats["failures"], stats["pending"]) == (1, 1)
+    assert queue.flush(force=False) == 0  # ainda no backoff
+    assert queue.flush() == 1
+    assert crm.leads["sess-1"]["Status"] == "MORNO"
+
+
+def test_update_during_flight_is_not_lost(crm, tmp_path):
+    journal = str(tmp_path / "crm_outbox.db")
+    transport = SalesforceCompositeTransport(crm.url)
+    queue = CRMSyncQueue(transport, journal_path=journal, dry_run=True)
+    send = transport.send_batch
+
+    def send_and_update(records):
+        queue.enqueue("sess-1", status="QUENTE", score=90)  # turno terminou durante o envio
+        return send(records)
+
+    queue.enqueue("sess-1", status="MORNO", score=60, email="c@obra.com")
+    transport.send_batch = send_and_update
+    queue.flush()
+    transport.send_batch = send
+    queue.close(drain=False)
+
+    restarted = CRMSyncQueue(SalesforceCompositeTransport(crm.url), journal_path=journal, dry_run=True)
+    assert restarted.flush() == 1
+    assert crm.leads["sess-1"]["Status"] == "QUENTE"
+    assert crm.leads["sess-1"]["Email"] == "c@obra.com"
+
+
+def test_rejected_record_is_dropped(crm):
+    crm.reject_ids = {"sess-bad"}
+    queue = _queue(crm)
+    queue.enqueue("sess-bad", status="FRIO", score=0)
+    queue.enqueue("sess-ok", status="FRIO", score=0)
+    assert queue.flush() == 2
+    stats = queue.stats()
+    assert (stats["flushed"], stats["rejected"], stats["pending"]) == (1, 1, 0)
+
+
+def test_short_result_list_requeues_whole_batch(crm):
+    transport = SalesforceCompositeTransport(crm.url)
+    queue = CRMSyncQueue(transport, dry_run=True)
+    send = transport.send_batch
+    transport.send_batch = lambda records: send(records)[:1]  # resposta truncada do CRM
+
+    queue.enqueue("sess-1", status="FRIO", score=0)
+    queue.enqueue("sess-2", status="MORNO", score=60)
+    assert queue.flush() == 0
+    stats = queue.stats()
+    assert (stats["failures"], stats["pending"]) == (1, 2)
+
+    transport.send_batch = send
+    assert queue.flush() == 2
+    assert queue.stats()["pending"] == 0
+
+
+def test_upsert_sends_required_fields_to_create_lead(crm):
+    queue = _queue(crm)
+    queue.enqueue("sess-1", status="FRIO", score=0)
+    assert queue.flush() == 1
+    assert queue.stats()["rejected"] == 0
+    assert crm.leads["sess-1"]["LastName"] == "Não informado"
+
+    queue.enqueue("sess-2", status="MORNO", score=60, name="Carlos Souza")
+    queue.enqueue("sess-1", status="MORNO", score=60, name="Ana Lima")
+    assert queue.flush() == 2
+    assert (crm.leads["sess-2"]["LastName"], crm.leads["sess-2"]["Company"]) == ("Carlos Souza", "Carlos Souza")
+    assert crm.leads["sess-1"]["LastName"] == "Ana Lima"
+
+
+def test_fake_crm_rejects_lead_created_without_required_fields(crm):
+    transport = SalesforceCompositeTransport(crm.url)
+    response = transport.http.request("PATCH", transport.path, json={"allOrNone": False, "records": [
+        {"attributes": {"type": "Lead"}, "External_Id__c": "sess-1", "Status": "FRIO"},
+    ]})
+    assert response.json()[0]["errors"][0]["statusCode"] == "REQUIRED_FIELD_MISSING"
+    assert "sess-1" not in crm.leads
+
+
+def test_lead_fields_maps_disqualification():
+    lead = LeadData(session_id="s", name="Carlos", classification=LeadClassification.FRIO,
+                    disqualified_reason="Estado não atendido")
+    fields = lead_fields(lead)
+    assert fields["status"] == "DESQUALIFICADO"
+    assert fields["disqualification_reason"] == "Estado não atendido"
+    assert "email" not in fields
+
+
+def test_chat_enqueues_without_waiting_for_crm(monkeypatch, tmp_path):
+    from agno.db.sqlite import SqliteDb
+    from fastapi.testclient import TestClient
+    import src.api as api
+    from src.session_store import SessionStore
+
+    with FakeCRMServer(delay=0.5) as crm:
+        queue = _queue(crm)
+        monkeypatch.setattr(api, "_crm_sync", queue)
+        monkeypatch.setattr(api, "_session_store", SessionStore(SqliteDb(db_file=str(tmp_path / "sessions.db"))))
+        client = TestClient(api.app)
+        started = time.perf_counter()
+        response = client.post("/chat", json={"session_id": "crm-1", "message": "quero falar com um atendente"})
+        assert response.status_code == 200
+        assert time.perf_counter() - started < 0.5  # o CRM lento não entra na latência do turno
+        assert crm.requests == []
+        assert queue.flush() == 1
+        assert crm.leads["crm-1"]["Status"] == "FRIO"
@@ -0,0 +1,194 @@
+"""
+Testes do envio dos follow-ups: espalhamento, limite de taxa, lotes e retry.
+"""
+from src.followup_dispatcher import FakeBlipSender, FollowUpDispatcher, TokenBucket
+from src.followup_scheduler import FollowUpManager, FollowUpState
+
+
+class _Clock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _state(i: int, attempt: int = 1) -> FollowUpState:
+    return FollowUpState(session_id=f"sess-{i}", lead_name="Carlos", contact="11999998888", attempt=attempt)
+
+
+def _dispatcher(clock, sender, **kwargs):
+    kwargs.setdefault("spread_seconds", 0)
+    return FollowUpDispatcher(sender=sender, dry_run=True, clock=clock, seed=1, **kwargs)
+
+
+def _run(dispatcher, clock, seconds: float, step: float = 0.1):
+    for _ in range(int(seconds / step)):
+        clock.now += step
+        dispatcher.pump()
+
+
+def test_token_bucket_refills_at_rate():
+    clock = _Clock()
+    bucket = TokenBucket(rate=10, burst=5, clock=clock)
+    assert bucket.take(8) == 5
+    assert bucket.take(1) == 0
+    clock.now += 0.35
+    assert bucket.take(8) == 3
+    clock.now += 10
+    assert bucket.take(100) == 5  # não acumula além do burst
+
+
+def test_rate_limit_caps_sends_per_second():
+    clock = _Clock()
+    sender = FakeBlipSender(clock=clock)
+    dispatcher = _dispatcher(clock, sender, rate=10, burst=10, batch_size=4)
+    for i in range(100):
+        dispatcher.submit(_state(i), "oi")
+    dispatcher.pump()
+    assert len(sender.delivered) == 10
+    assert sender.batches == 3  # 10 mensagens em lotes de até 4
+    assert dispatcher.stats()["queue_depth"] == 90
+    _run(dispatcher, clock, 9.5)
+    assert len(sender.delivered) == 100
+    per_second = {}
+    for t, _ in sender.delivered:
+        per_second[int(t)] = per_second.get(int(t), 0) + 1
+    assert max(per_second.values()) <= 20  # burst inicial + taxa
+
+
+def test_failed_messages_are_retried_with_backoff():
+    clock = _Clock()
+    sender = FakeBlipSender(failure_rate=1.0, clock=clock)
+    dispatcher = _dispatcher(clock, sender, max_retries=2, retry_base_seconds=1)
+    dispatcher.submit(_state(1), "oi")
+    dispatcher.pump()
+    assert dispatcher.stats()["retries"] == 1
+    _run(dispatcher, clock, 0.4)
+    assert sender.failed == 1  # jitter mínimo de 0,5 s antes da 2ª tentativa
+    _run(dispatcher, clock, 5)
+    stats = dispatcher.stats()
+    assert (sender.failed, stats["retries"], stats["failed"]) == (3, 2, 1)
+    assert dispatcher.failed[0].session_id == "sess-1"
+    assert stats["queue_depth"] == 0
+
+
+def test_transient_failures_eventually_deliver():
+    clock = _Clock()
+    sender = FakeBlipSender(failure_rate=0.3, clock=clock)
+    dispatcher = _dispatcher(clock, sender, rate=100, burst=100, retry_base_seconds=0.5)
+    for i in range(200):
+        dispatcher.submit(_state(i), "oi")
+    _run(dispatcher, clock, 60)
+    assert len({m.session_id for _, m in sender.delivered}) == 200
+    assert dispatcher.stats()["retries"] > 0
+
+
+def test_same_minute_deadlines_are_spread():
+    clock = _Clock()
+    sender = FakeBlipSender(clock=clock)
+    dispatcher = _dispatcher(clock, sender, rate=1000, burst=1000, spread_seconds=60)
+    for i in range(300):
+        dispatcher.submit(_state(i), "oi")
+    _run(dispatcher, clock, 61, step=1)
+    times = sorted(t for t, _ in sender.delivered)
+    assert len(times) == 300
+    assert times[-1] - times[0] > 45  # não sai tudo no mesmo segundo
+    assert max(times.count(t) for t in set(times)) < 30
+
+
+def test_spread_offset_is_stable_per_session():
+    dispatcher = _dispatcher(_Clock(), FakeBlipSender(), spread_seconds=300)
+    assert dispatcher._spread_offset("sess-1") == dispatcher._spread_offset("sess-1")
+    assert 0 <= dispatcher._spread_offset("sess-2") < 300
+
+
+def test_sender_exception_requeues_batch():
+    clock = _Clock()
+
+    class FlakySender:
+        calls = 0
+
+        def send_batch(self, messages):
+            self.calls += 1
+            if self.calls == 1:
+                raise ConnectionError("Blip fora do ar")
+            return [True] * len(messages)
+
+    sender = FlakySender()
+    dispatcher = _dispatcher(clock, sender, retry_base_seconds=1)
+    dispatcher.submit(_state(1), "oi")
+    dispatcher.submit(_state(2), "oi")
+    assert dispatcher.pump() == 0
+    _run(dispatcher, clock, 2)
+    assert dispatcher.stats()["sent"] == 2
+
+
+def test_manager_due_follow_ups_flow_through_dispatcher():
+    clock = _Clock(1_000_000.0)
+    sender = FakeBlipSender(clock=clock)
+    dispatcher = _dispatcher(clock, sender)
+    manager = FollowUpManager(dry_run=True, clock=clock, sender=dispatcher.submit)
+    manager.register("sess-001", "Carlos", "11999998888")
+    clock.now += 2 * 3600
+    manager.run_due()
+    dispatcher.pump()
+    (_, msg), = sender.delivered
+    assert (msg.session_id, msg.attempt, msg.contact) == ("sess-001", 1, "11999998888")
+    assert "Carlos" in msg.text
+
+
+def _confirmed(clock, sender, db_path=None, **kwargs):
+    dispatcher = _dispatcher(clock, sender, **kwargs)
+    manager = FollowUpManager(dry_run=True, clock=clock, db_path=db_path, sender=dispatcher.submit,
+                              confirm_delivery=True, delivery_timeout=600)
+    dispatcher.on_delivered, dispatcher.on_failed = manager.mark_delivered, manager.mark_failed
+    return dispatcher, manager
+
+
+def test_attempt_is_recorded_only_after_delivery():
+    clock = _Clock(1_000_000.0)
+    sender = FakeBlipSender(clock=clock)
+    dispatcher, manager = _confirmed(clock, sender)
+    manager.register("sess-001", "Carlos", "11999998888")
+    clock.now += 2 * 3600
+    manager.run_due()
+    assert manager.get_state("sess-001").attempt == 0  # ainda na fila do dispatcher
+    dispatcher.pump()
+    state = manager.get_state("sess-001")
+    assert (state.attempt, state.completed) == (1, False)
+
+
+def test_message_lost_in_restart_is_sent_again(tmp_path):
+    db_path = str(tmp_path / "followups.db")
+    clock = _Clock(1_000_000.0)
+    _, manager = _confirmed(clock, FakeBlipSender(clock=clock), db_path=db_path)
+    manager.register("sess-001", "Carlos", "11999998888")
+    clock.now += 2 * 3600
+    manager.run_due()
+    manager.close()  # caiu antes do pump(): a mensagem estava só na memória
+
+    sender = FakeBlipSender(clock=clock)
+    dispatcher, restarted = _confirmed(clock, sender, db_path=db_path)
+    assert restarted.run_due() == []
+    clock.now += 600
+    assert restarted.run_due() == [("sess-001", 1)]
+    clock.now += 600
+    restarted.run_due()  # prazo venceu de novo com a mensagem ainda na fila: não duplica
+    assert dispatcher.stats()["submitted"] == 1
+    dispatcher.pump()
+    assert [m.attempt for _, m in sender.delivered] == [1]
+    assert restarted.get_state("sess-001").attempt == 1
+
+
+def test_exhausted_retries_are_persisted():
+    clock = _Clock(1_000_000.0)
+    dispatcher, manager = _confirmed(clock, FakeBlipSender(clock=clock, failure_rate=1.0),
+                                     max_retries=1, retry_base_seconds=1)
+    manager.register("sess-001", "Carlos", "11999998888")
+    clock.now += 2 * 3600
+    manager.run_due()
+    _run(dispatcher, clock, 5)
+    state = manager.get_state("sess-001")
+    assert (state.attempt, state.failed_attempts, state.completed) == (1, 1, False)
+    assert len(dispatcher.failed) == 1
@@ -53,3 +53,116 @@ class TestFollowUpManager:
     def test_unregistered_session_not_pending(self):
         manager = FollowUpManager(dry_run=True)
         assert manager.has_pending("session-inexistente") is False
+
+
+class _Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, hours: float):
+        self.now += hours * 3600
+
+
+def _manager(clock, db_path=None, sent=None, **kwargs):
+    sender = (lambda state, message: sent.append((state.session_id, state.attempt, message))) if sent is not None else None
+    return FollowUpManager(dry_run=True, db_path=db_path, clock=clock, sender=sender, **kwargs)
+
+
+class TestFollowUpScheduling:
+    def test_sends_each_attempt_at_its_interval(self):
+        clock, sent = _Clock(), []
+        manager = _manager(clock, sent=sent)
+        manager.register("sess-001", "Carlos", "11999998888")
+
+        for hours in [2, 8, 10, 28]:  # chega a 2h, 10h, 20h e 48h
+            assert manager.run_due() == []
+            clock.advance(hours - 0.01)
+            assert manager.run_due() == []
+            clock.advance(0.01)
+            manager.run_due()
+
+        assert [attempt for _, attempt, _ in sent] == [1, 2, 3, 4]
+        assert "Carlos" in sent[0][2]
+        assert manager.has_pending("sess-001") is False
+        assert manager.get_state("sess-001").attempt == 4
+
+    def test_cancelled_lead_is_not_sent(self):
+        clock, sent = _Clock(), []
+        manager = _manager(clock, sent=sent)
+        manager.register("sess-001", "Carlos", "11999998888")
+        manager.register("sess-002", "Ana", "11988887777")
+        manager.cancel("sess-001")
+        clock.advance(2)
+        assert manager.run_due() == [("sess-002", 1)]
+
+    def test_only_next_window_is_loaded(self):
+        clock = _Clock()
+        manager = _manager(clock, window_seconds=3600)
+        manager.register("sess-001", "Carlos", "11999998888")
+        assert manager.pending_count() == 1
+        assert manager.loaded_count == 0  # vence em 2h, fora da janela de 1h
+        clock.advance(1.5)
+        manager.run_due()
+        assert manager.loaded_count == 1
+
+    def test_pending_follow_ups_survive_restart(self, tmp_path):
+        db_path = str(tmp_path / "followups.db")
+        clock, sent = _Clock(), []
+        manager = _manager(clock, db_path=db_path)
+        manager.register("sess-001", "Carlos", "11999998888")
+        manager.register("sess-002", "Ana", "11988887777")
+        manager.cancel("sess-002")
+        manager.close()
+
+        clock.advance(2)
+        restarted = _manager(clock, db_path=db_path, sent=sent)
+        assert restarted.has_pending("sess-001") is True
+        assert restarted.has_pending("sess-002") is False
+        assert restarted.run_due() == [("sess-001", 1)]
+
+    def test_missed_deadlines_send_only_latest_attempt(self, tmp_path):
+        db_path = str(tmp_path / "followups.db")
+        clock, sent = _Clock(), []
+        manager = _manager(clock, db_path=db_path)
+        manager.register("sess-001", "Carlos", "11999998888")
+        manager.close()
+
+        clock.advance(21)  # servidor parado durante as tentativas de 2h, 10h e 20h
+        restarted = _manager(clock, db_path=db_path, sent=sent)
+        assert restarted.run_due() == [("sess-001", 3)]
+        clock.advance(27)
+        assert restarted.run_due() == [("sess-001", 4)]
+        assert restarted.has_pending("sess-001") is False
+
+    def test_register_again_restarts_cadence(self):
+        clock, sent = _Clock(), []
+        manager = _manager(clock, sent=sent)
+        manager.register("sess-001", "Carlos", "11999998888")
+        clock.advance(2)
+        manager.run_due()
+        clock.advance(1)
+        manager.register("sess-001", "Carlos", "11999998888")  # novo orçamento
+        clock.advance(1.9)
+        assert manager.run_due() == []
+        clock.advance(0.1)  # 2h do segundo registro: volta à primeira mensagem
+        assert manager.run_due() == [("sess-001", 1)]
+        assert [attempt for _, attempt, _ in sent] == [1, 1]
+
+    def test_failed_send_is_retried(self):
+        clock, calls = _Clock(), []
+
+        def flaky_sender(state, message):
+            calls.append(state.attempt)
+            if len(calls) == 1:
+                raise ConnectionError("Blip fora do ar")
+
+        manager = FollowUpManager(dry_run=True, clock=clock, sender=flaky_sender)
+        manager.register("sess-001", "Carlos", "11999998888")
+        clock.advance(2)
+        with pytest.raises(ConnectionError):
+            manager.run_due()
+        assert manager.run_due() == [("sess-001", 1)]
+        assert calls == [1, 1]
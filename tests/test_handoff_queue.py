@@ -0,0 +1,56 @@
+from src.handoff_queue import HandoffQueue
+
+
+def test_enqueue_and_pop_in_order():
+    queue = HandoffQueue()
+    queue.enqueue("sess-1", "quero atendente", reason="explicit_request")
+    queue.enqueue("sess-2", "falar com gerente", reason="explicit_request")
+    assert len(queue) == 2
+    assert queue.pop_next().session_id == "sess-1"
+    assert queue.pop_next().session_id == "sess-2"
+    assert queue.pop_next() is None
+
+
+def test_repeated_request_updates_existing_ticket():
+    queue = HandoffQueue()
+    queue.enqueue("sess-1", "quero atendente", reason="explicit_request")
+    ticket = queue.enqueue("sess-1", "cadê o atendente?", reason="explicit_request")
+    assert len(queue) == 1
+    assert ticket.requests == 2
+    assert ticket.last_message == "cadê o atendente?"
+
+
+def test_is_waiting():
+    queue = HandoffQueue()
+    queue.enqueue("sess-1", "quero atendente", reason="explicit_request", lead_snapshot={"name": "Ana"})
+    assert queue.is_waiting("sess-1")
+    assert queue.pending()[0].lead_snapshot == {"name": "Ana"}
+    queue.pop_next()
+    assert not queue.is_waiting("sess-1")
+
+
+def test_quote_summary_is_kept_on_ticket():
+    queue = HandoffQueue()
+    queue.enqueue("sess-1", "pode fechar", reason="quote_ready", summary="RESUMO DO PEDIDO")
+    ticket = queue.enqueue("sess-1", "quero atendente", reason="explicit_request")
+    assert ticket.reason == "quote_ready"
+    assert ticket.summary == "RESUMO DO PEDIDO"
+
+
+def test_tickets_survive_restart_and_are_shared(tmp_path):
+    path = str(tmp_path / "handoffs.db")
+    queue = HandoffQueue(db_path=path)
+    queue.enqueue("sess-1", "pode fechar", reason="quote_ready", lead_snapshot={"name": "Ana"}, summary="RESUMO")
+    queue.enqueue("sess-2", "quero atendente", reason="explicit_request")
+
+    # Outro worker (ou o processo depois do restart) vê a mesma fila
+    other = HandoffQueue(db_path=path)
+    assert [t.session_id for t in other.pending()] == ["sess-1", "sess-2"]
+    ticket = other.pop_next()
+    assert (ticket.reason, ticket.summary, ticket.lead_snapshot) == ("quote_ready", "RESUMO", {"name": "Ana"})
+
+    assert not queue.is_waiting("sess-1")
+    assert queue.pop_next().session_id == "sess-2"
+    assert len(other) == 0
+    queue.close()
+    other.close()
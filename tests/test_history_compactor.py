@@ -0,0 +1,121 @@
+"""
+Testes do histórico compactado com orçamento de tokens.
+"""
+from fastapi.testclient import TestClient
+
+from src.history_compactor import (
+    HISTORY_END,
+    HISTORY_START,
+    ConversationHistory,
+    HistoryCompactor,
+    estimate_tokens,
+)
+
+
+def _conversation(compactor: HistoryCompactor, turns: int, reply_size: int = 40) -> ConversationHistory:
+    history = ConversationHistory()
+    for i in range(turns):
+        compactor.record(history, f"mensagem {i} do cliente", f"Resposta {i}. " + "detalhe " * reply_size)
+    return history
+
+
+def test_keeps_last_turns_raw_and_folds_older_ones():
+    compactor = HistoryCompactor(raw_turns=2, token_budget=10_000)
+    history = _conversation(compactor, 5)
+    assert [client for client, _ in history.turns] == ["mensagem 3 do cliente", "mensagem 4 do cliente"]
+    assert history.folded == 3
+
+    block = compactor.render(history)
+    assert block.startswith(HISTORY_START) and block.endswith(HISTORY_END)
+    assert "Turnos anteriores: 3" in block
+    # Turno dobrado: só a mensagem e a primeira frase da resposta
+    assert "- cliente: mensagem 0 do cliente → atendente: Resposta 0." in block
+    assert "Cliente: mensagem 4 do cliente" in block
+
+
+def test_block_respects_token_budget():
+    compactor = HistoryCompactor(raw_turns=4, token_budget=250)
+    for turns in (1, 5, 30, 200):
+        assert estimate_tokens(compactor.render(_conversation(compactor, turns, reply_size=200))) <= 250
+
+
+def test_budget_drops_summary_before_recent_turns():
+    compactor = HistoryCompactor(raw_turns=2, token_budget=120)
+    block = compactor.render(_conversation(compactor, 20, reply_size=5))
+    assert "Cliente: mensagem 19 do cliente" in block
+    assert "Cliente: mensagem 18 do cliente" in block
+    assert "mensagem 0 do cliente" not in block
+    assert "Turnos anteriores: 18, resumo dos" in block
+
+
+def test_empty_history_composes_input_unchanged():
+    compactor = HistoryCompactor()
+    assert compactor.render(None) == ""
+    assert compactor.compose(ConversationHistory(), "Oi") == "Oi"
+
+
+def test_api_sends_compacted_history_to_coordinator_and_fast_path(monkeypatch, tmp_path):
+    from agno.db.sqlite import SqliteDb
+    import src.api as api
+    from src.orchestrator import create_steel_sales_team
+    from src.session_store import SessionStore
+    from tests.fake_model import FakeModel, delegating_reply, history_tokens, use_fake_model
+
+    model = FakeModel(reply=delegating_reply(member_reply="Perfeito, anotado! " + "Detalhes. " * 60 + "STATUS: FRIO"))
+    use_fake_model(model, monkeypatch)
+    team = create_steel_sales_team()
+    team.db = SqliteDb(db_file=str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(api, "get_team", lambda: team)
+    monkeypatch.setattr(api, "_session_store", SessionStore(team.db))
+    monkeypatch.setattr(api, "_history_compactor", HistoryCompactor(raw_turns=2, token_budget=300))
+    monkeypatch.setattr(api, "FAST_PATH_ROUTER", False)
+    client = TestClient(api.app)
+
+    sizes = []
+    for i in range(12):
+        client.post("/chat", json={"session_id": "longa", "message": f"pergunta número {i}"})
+        sizes.append(history_tokens(model.calls[-3]))  # coordenador, 1ª chamada do turno
+
+    assert sizes[0] == 0
+    assert max(sizes) <= 300
+    assert "Turnos anteriores: 9" in str(model.calls[-3][-1].content)
+
+    # Caminho rápido: o membro recebe o mesmo bloco antes do CONTEXTO ACUMULADO
+    monkeypatch.setattr(api, "FAST_PATH_ROUTER", True)
+    lead = {"session_id": "longa", "name": "Carlos", "state": "CE"}
+    client.post("/chat", json={"session_id": "longa", "message": "meu e-mail é c@x.com", "lead_data": lead})
+    content = str(model.calls[-1][-1].content)
+    assert content.index(HISTORY_START) < content.index("---CONTEXTO ACUMULADO---")
+
+
+def test_history_round_trips_through_dict():
+    compactor = HistoryCompactor(raw_turns=2, token_budget=10_000)
+    history = _conversation(compactor, 5)
+    restored = ConversationHistory.from_dict(history.to_dict())
+    assert compactor.render(restored) == compactor.render(history)
+    assert restored.summary.maxlen == history.summary.maxlen
+
+
+def test_api_history_and_lead_survive_restart(monkeypatch, tmp_path):
+    """Histórico e LeadData ficam no session_state do SQLite, não na memória do processo."""
+    from agno.db.sqlite import SqliteDb
+    import src.api as api
+    from src.orchestrator import create_steel_sales_team
+    from src.session_store import SessionStore
+    from tests.fake_model import FakeModel, delegating_reply, use_fake_model
+
+    model = FakeModel(reply=delegating_reply())
+    use_fake_model(model, monkeypatch)
+    db_file = str(tmp_path / "sessions.db")
+    team = create_steel_sales_team(db=SqliteDb(db_file=db_file))
+    monkeypatch.setattr(api, "get_team", lambda: team)
+    monkeypatch.setattr(api, "FAST_PATH_ROUTER", False)
+    monkeypatch.setattr(api, "_session_store", SessionStore(team.db))
+    TestClient(api.app).post("/chat", json={"session_id": "reinicio", "message": "Sou de Fortaleza/CE, quero vergalhão"})
+
+    # "Restart": store novo sobre o mesmo arquivo, sem nada em memória
+    monkeypatch.setattr(api, "_session_store", SessionStore(SqliteDb(db_file=db_file)))
+    response = TestClient(api.app).post("/chat", json={"session_id": "reinicio", "message": "meu nome é Carlos"})
+    assert response.json()["lead_data"]["state"] == "CE"
+    content = str(model.calls[-3][-1].content)  # coordenador, 1ª chamada do 2º turno
+    assert "Cliente: Sou de Fortaleza/CE, quero vergalhão" in content
@@ -31,3 +31,48 @@ class TestHandoffDetection:
 
     def test_handoff_triggers_list_not_empty(self):
         assert len(HANDOFF_TRIGGERS) > 0
+
+
+class TestHandoffMessage:
+    """Resposta fixa de transbordo (sem chamada à IA), ciente do horário comercial."""
+
+    def _at(self, year, month, day, hour, minute=0):
+        from datetime import datetime
+        from src.agents.human_handoff_agent import FORTALEZA_TZ
+        return datetime(year, month, day, hour, minute, tzinfo=FORTALEZA_TZ)
+
+    def test_business_hours(self):
+        from src.agents.human_handoff_agent import is_business_hours
+        assert is_business_hours(self._at(2026, 10, 19, 7))        # segunda 7h
+        assert not is_business_hours(self._at(2026, 10, 19, 18))   # segunda 18h
+        assert is_business_hours(self._at(2026, 10, 24, 11, 59))   # sábado 11h59
+        assert not is_business_hours(self._at(2026, 10, 24, 12))   # sábado 12h
+        assert not is_business_hours(self._at(2026, 10, 25, 10))   # domingo
+
+    def test_in_hours_promises_30_minutes(self):
+        from src.agents.human_handoff_agent import build_handoff_message
+        msg = build_handoff_message(now=self._at(2026, 10, 20, 10), variant=0)
+        assert "30 minutos" in msg
+        assert "Aço Cearense" in msg
+
+    def test_before_opening_returns_same_day(self):
+        from src.agents.human_handoff_agent import build_handoff_message
+        msg = build_handoff_message(now=self._at(2026, 10, 20, 5), variant=0)
+        assert "hoje a partir das 7h" in msg
+
+    def test_after_closing_returns_next_day(self):
+        from src.agents.human_handoff_agent import build_handoff_message
+        msg = build_handoff_message(now=self._at(2026, 10, 20, 19), variant=1)
+        assert "amanhã a partir das 7h" in msg
+
+    def test_saturday_afternoon_returns_monday(self):
+        from src.agents.human_handoff_agent import build_handoff_message, next_business_opening
+        now = self._at(2026, 10, 24, 15)
+        assert next_business_opening(now) == self._at(2026, 10, 26, 7)
+        assert "na segunda-feira a partir das 7h" in build_handoff_message(now=now, variant=2)
+
+    def test_templates_rotate(self):
+        from src.agents.human_handoff_agent import build_handoff_message
+        now = self._at(2026, 10, 20, 10)
+        messages = {build_handoff_message(now=now) for _ in range(3)}
+        assert len(messages) == 3
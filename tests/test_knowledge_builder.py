@@ -0,0 +1,62 @@
+"""
+Testes da knowledge base compartilhada (singleton por processo).
+"""
+import threading
+
+import pytest
+from src import knowledge_builder
+from src.knowledge_builder import get_knowledge_base, reset_knowledge_base
+
+
+@pytest.fixture(autouse=True)
+def fresh_singleton():
+    reset_knowledge_base()
+    yield
+    reset_knowledge_base()
+
+
+def test_get_knowledge_base_returns_same_instance():
+    assert get_knowledge_base() is get_knowledge_base()
+
+
+def test_reset_creates_new_instance():
+    first = get_knowledge_base()
+    reset_knowledge_base()
+    assert get_knowledge_base() is not first
+
+
+def test_concurrent_first_calls_build_only_once(monkeypatch):
+    builds = []
+    original = knowledge_builder.build_knowledge_base
+
+    def counting_build():
+        builds.append(1)
+        return original()
+
+    monkeypatch.setattr(knowledge_builder, "build_knowledge_base", counting_build)
+
+    barrier = threading.Barrier(8)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(get_knowledge_base())
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(builds) == 1
+    assert all(kb is results[0] for kb in results)
+
+
+def test_agents_share_knowledge_and_embedder():
+    from src.agents.qualifier_agent import create_qualifier_agent
+    from src.agents.product_specialist_agent import create_product_specialist_agent
+
+    qualifier = create_qualifier_agent()
+    specialist = create_product_specialist_agent()
+    assert qualifier.knowledge is specialist.knowledge
+    assert qualifier.knowledge.vector_db.embedder is specialist.knowledge.vector_db.embedder
@@ -0,0 +1,218 @@
+"""
+Testes da reindexação incremental da knowledge base (src/knowledge_index.py).
+"""
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pytest
+from agno.knowledge.embedder.base import Embedder
+from agno.knowledge.knowledge import Knowledge
+from agno.vectordb.lancedb import SearchType
+
+from src.knowledge_index import KnowledgeManifest, embed_texts, manifest_path_for, reindex
+from src.retrieval_cache import CachedLanceDb
+
+
+@dataclass
+class BatchHashEmbedder(Embedder):
+    """Embedder determinístico (sem modelo) com lote, que registra os textos recebidos."""
+    dimensions: int = 8
+    embedded: list = field(default_factory=list)
+    batches: list = field(default_factory=list)
+
+    def get_embedding(self, text):
+        digest = hashlib.sha256(text.encode()).digest()
+        return [b / 255 for b in digest[: self.dimensions]]
+
+    def get_embedding_and_usage(self, text):
+        return self.get_embedding(text), None
+
+    def get_embeddings_batch(self, texts):
+        self.batches.append(len(texts))
+        self.embedded.extend(texts)
+        return [self.get_embedding(t) for t in texts]
+
+
+def _paragraphs(prefix: str, n: int = 3) -> str:
+    # O TextReader divide em trechos de ~5000 caracteres: 3 parágrafos de 4800 dão 3 trechos
+    return "\n\n".join(f"{prefix} parágrafo {i}. " + "vergalhão CA-50 " * 300 for i in range(n))
+
+
+@pytest.fixture
+def knowledge_dir(tmp_path):
+    root = tmp_path / "knowledge"
+    (root / "catalog_groups").mkdir(parents=True)
+    (root / "catalog_groups" / "vergalhao.txt").write_text(_paragraphs("Vergalhão"), encoding="utf-8")
+    (root / "catalog_groups" / "telha.txt").write_text(_paragraphs("Telha"), encoding="utf-8")
+    (root / "catalog_groups" / "metalon.txt").write_text("Metalon tubo quadrado 20x20", encoding="utf-8")
+    return root
+
+
+@pytest.fixture
+def kb(tmp_path):
+    vector_db = CachedLanceDb(
+        table_name="test_index",
+        uri=str(tmp_path / "lancedb"),
+        search_type=SearchType.vector,
+        embedder=BatchHashEmbedder(),
+        use_tantivy=False,
+    )
+    return Knowledge(name="test_index", vector_db=vector_db)
+
+
+def _reindex(kb, knowledge_dir, **kwargs):
+    kwargs.setdefault("parse_workers", 1)
+    return reindex(kb, knowledge_dir, **kwargs)
+
+
+def _ids(kb) -> list:
+    return sorted(kb.vector_db.table.to_arrow()["id"].to_pylist())
+
+
+def test_first_run_builds_and_second_run_is_noop(kb, knowledge_dir):
+    first = _reindex(kb, knowledge_dir)
+    assert first.full_rebuild and first.files == 3 and first.chunks == first.embedded == 7
+    assert kb.vector_db.table.count_rows() == 7
+
+    embedder = kb.vector_db.embedder
+    embedder.embedded.clear()
+    second = _reindex(kb, knowledge_dir)
+    assert not second.full_rebuild
+    assert (second.changed_files, second.embedded, second.deleted, second.chunks) == (0, 0, 0, 7)
+    assert embedder.embedded == []
+
+
+def test_rows_keep_agno_payload_and_are_searchable(kb, knowledge_dir):
+    _reindex(kb, knowledge_dir)
+    results = kb.vector_db.search("Metalon tubo quadrado 20x20", limit=1)
+    assert results[0].name == "metalon" and results[0].content == "Metalon tubo quadrado 20x20"
+    assert results[0].meta_data["linked_to"] == "test_index"
+    payloads = [row["payload"] for row in kb.vector_db.table.search().limit(20).to_list()]
+    assert any("vergalhão" in payload for payload in payloads)  # acentos literais no JSON (FTS)
+
+
+def test_changed_file_embeds_only_new_chunks(kb, knowledge_dir):
+    _reindex(kb, knowledge_dir)
+    before = set(_ids(kb))
+    embedder = kb.vector_db.embedder
+    embedder.embedded.clear()
+
+    path = knowledge_dir / "catalog_groups" / "vergalhao.txt"
+    path.write_text(path.read_text(encoding="utf-8") + " Nova bitola: 32mm.", encoding="utf-8")
+
+    report = _reindex(kb, knowledge_dir)
+    assert (report.changed_files, report.embedded, report.deleted, report.chunks) == (1, 1, 1, 7)
+    assert len(embedder.embedded) == 1 and embedder.embedded[0].endswith("Nova bitola: 32mm.")
+    after = set(_ids(kb))
+    assert len(after) == 7 and len(after - before) == 1
+
+
+def test_shifted_pages_reuse_their_vectors(kb, knowledge_dir, monkeypatch):
+    import src.knowledge_index as knowledge_index
+
+    pages = {"catalogo.pdf": ["Página de bobinas", "Página de telhas"]}
+    (knowledge_dir / "catalogo.pdf").write_bytes(b"v1")
+
+    original = knowledge_index.parse_file
+
+    def fake_parse(path):
+        if Path(path).suffix != ".pdf":
+            return original(path)
+        return [{"name": "catalogo", "content": text, "meta_data": {"page": i + 1}}
+                for i, text in enumerate(pages[Path(path).name])]
+
+    monkeypatch.setattr(knowledge_index, "parse_file", fake_parse)
+    _reindex(kb, knowledge_dir)
+    embedder = kb.vector_db.embedder
+    embedder.embedded.clear()
+
+    # Página nova no início: as outras só mudam de número
+    pages["catalogo.pdf"].insert(0, "Capa")
+    (knowledge_dir / "catalogo.pdf").write_bytes(b"v2")
+    report = _reindex(kb, knowledge_dir)
+    assert (report.embedded, report.rewritten, report.deleted) == (1, 2, 0)
+    assert embedder.embedded == ["Capa"]
+    rows = kb.vector_db.table.search().where("payload LIKE '%telhas%'").limit(2).to_list()
+    assert json.loads(rows[0]["payload"])["meta_data"]["page"] == 3
+    assert rows[0]["vector"] == pytest.approx(embedder.get_embedding("Página de telhas"))
+
+
+def test_removed_file_deletes_its_chunks(kb, knowledge_dir):
+    _reindex(kb, knowledge_dir)
+    (knowledge_dir / "catalog_groups" / "telha.txt").unlink()
+
+    report = _reindex(kb, knowledge_dir)
+    assert (report.removed_files, report.deleted, report.embedded, report.chunks) == (1, 3, 0, 4)
+    assert kb.vector_db.table.count_rows() == 4
+    manifest = KnowledgeManifest.load(manifest_path_for(kb.vector_db))
+    assert "catalog_groups/telha.txt" not in manifest.files
+
+
+def test_recreate_and_stale_manifest_rebuild_everything(kb, knowledge_dir):
+    _reindex(kb, knowledge_dir)
+    assert _reindex(kb, knowledge_dir, recreate=True).embedded == 7
+
+    # Linhas gravadas por fora (ex.: kb.insert) deixam a contagem diferente do manifesto
+    kb.vector_db.table.delete("id IS NOT NULL")
+    report = _reindex(kb, knowledge_dir)
+    assert report.full_rebuild and report.embedded == 7 and kb.vector_db.table.count_rows() == 7
+
+    manifest_path = manifest_path_for(kb.vector_db)
+    data = json.loads(manifest_path.read_text(encoding="utf-8"))
+    data["embedder"] = "outro-modelo"
+    manifest_path.write_text(json.dumps(data), encoding="utf-8")
+    assert _reindex(kb, knowledge_dir).full_rebuild
+
+
+def test_interrupted_run_does_not_duplicate_rows(kb, knowledge_dir):
+    _reindex(kb, knowledge_dir)
+    manifest_path = manifest_path_for(kb.vector_db)
+    manifest = KnowledgeManifest.load(manifest_path)
+    # Simula uma execução que gravou a tabela mas morreu antes de salvar o manifesto
+    manifest.files["catalog_groups/metalon.txt"] = {"sha256": "antigo", "chunks": {}}
+    manifest.save(manifest_path)
+
+    report = _reindex(kb, knowledge_dir)
+    assert report.full_rebuild  # a contagem não bate: reconstrói em vez de duplicar
+    assert _ids(kb) == sorted(set(_ids(kb))) and len(_ids(kb)) == 7
+
+
+def test_pdfs_are_parsed_in_process_pool(kb, knowledge_dir, monkeypatch):
+    import shutil
+
+    import src.knowledge_index as knowledge_index
+
+    for pdf in ("estrategia_captacao.pdf", "processo_classificacao.pdf"):
+        shutil.copy(Path("knowledge") / pdf, knowledge_dir / pdf)
+    serial = _reindex(kb, knowledge_dir)
+
+    monkeypatch.setattr(knowledge_index, "_POOL_MIN_BYTES", 0)
+    pooled = _reindex(kb, knowledge_dir, recreate=True, parse_workers=2)
+    assert pooled.chunks == serial.chunks == 11
+    assert KnowledgeManifest.load(manifest_path_for(kb.vector_db)).chunk_count() == 11
+
+
+def test_embed_texts_keeps_order_across_batches_and_threads():
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    @dataclass
+    class SlowEmbedder(BatchHashEmbedder):
+        def get_embeddings_batch(self, texts):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            return super().get_embeddings_batch(texts)
+
+    embedder = SlowEmbedder()
+    texts = [f"trecho {i}" for i in range(10)]
+    vectors = embed_texts(embedder, texts, batch_size=3, threads=2)
+    assert vectors == [embedder.get_embedding(t) for t in texts]
+    assert sorted(embedder.batches) == [1, 3, 3, 3] and peak[0] == 2
@@ -0,0 +1,178 @@
+"""
+Testes das versões do índice e da troca sem downtime (src/knowledge_versions.py).
+"""
+import threading
+
+import pytest
+from agno.knowledge.knowledge import Knowledge
+from agno.vectordb.lancedb import LanceDb, SearchType
+
+import src.knowledge_versions as knowledge_versions
+from src.knowledge_versions import (
+    ORPHAN_SECONDS,
+    IndexPointer,
+    PointerWatcher,
+    build_version,
+    cleanup_versions,
+    current_table,
+    pointer_path,
+    rollback,
+)
+from src.retrieval_cache import CachedLanceDb
+from tests.test_knowledge_index import BatchHashEmbedder
+
+BASE = "test_kb"
+
+
+@pytest.fixture
+def knowledge_dir(tmp_path):
+    root = tmp_path / "knowledge"
+    (root / "catalog_groups").mkdir(parents=True)
+    (root / "catalog_groups" / "metalon.txt").write_text("Metalon tubo quadrado 20x20", encoding="utf-8")
+    (root / "catalog_groups" / "telha.txt").write_text("Telha trapezoidal galvanizada", encoding="utf-8")
+    return root
+
+
+@pytest.fixture
+def uri(tmp_path):
+    return str(tmp_path / "lancedb")
+
+
+def _facade(uri, follow=True) -> CachedLanceDb:
+    """Handle como o da API: abre a versão publicada e segue o ponteiro a cada busca."""
+    return CachedLanceDb(
+        table_name=current_table(uri, BASE),
+        uri=uri,
+        search_type=SearchType.vector,
+        embedder=BatchHashEmbedder(),
+        use_tantivy=False,
+        table_resolver=PointerWatcher(uri, BASE, cleanup=False) if follow else None,
+        resolve_interval=0,
+    )
+
+
+def _build(uri, knowledge_dir, **kwargs):
+    return build_version(Knowledge(name=BASE, vector_db=_facade(uri, follow=False)), knowledge_dir,
+                         parse_workers=1, **kwargs)
+
+
+def _tables(uri) -> set:
+    return set(_facade(uri, follow=False).connection.list_tables().tables)
+
+
+def _edit(knowledge_dir, text):
+    (knowledge_dir / "catalog_groups" / "metalon.txt").write_text(text, encoding="utf-8")
+
+
+def test_build_publishes_new_version_and_running_reader_switches(uri, knowledge_dir):
+    first = _build(uri, knowledge_dir)
+    assert first.published and first.table.startswith(f"{BASE}__v") and first.report.full_rebuild
+    assert IndexPointer.load(pointer_path(uri, BASE)).table == first.table
+
+    reader = _facade(uri)
+    assert reader.search("Metalon tubo quadrado 20x20", limit=1)[0].content == "Metalon tubo quadrado 20x20"
+
+    _edit(knowledge_dir, "Metalon tubo retangular 20x30")
+    second = _build(uri, knowledge_dir)
+    assert second.published and second.table != first.table
+    assert (second.report.full_rebuild, second.report.embedded, second.report.deleted) == (False, 1, 1)
+
+    # Mesma consulta: não vem do cache da versão anterior
+    results = reader.search("Metalon tubo quadrado 20x20", limit=2)
+    assert reader.table_name == second.table
+    assert "Metalon tubo quadrado 20x20" not in [d.content for d in results]
+    assert reader.search_cache.stats.hits == 0
+
+
+def test_unchanged_build_creates_nothing(uri, knowledge_dir):
+    first = _build(uri, knowledge_dir)
+    tables = _tables(uri)
+    again = _build(uri, knowledge_dir)
+    assert not again.published and again.table == first.table and again.report.embedded == 0
+    assert _tables(uri) == tables
+
+
+def test_in_flight_search_finishes_on_old_version(uri, knowledge_dir):
+    first = _build(uri, knowledge_dir)
+    reader = _facade(uri)
+    reader.search("aquecimento", limit=1)
+    old_view = reader._view
+    entered, release = threading.Event(), threading.Event()
+
+    def slow_search(**kwargs):
+        entered.set()
+        release.wait(5)
+        return LanceDb.search(old_view, **kwargs)
+
+    old_view.search = slow_search
+    result = {}
+    worker = threading.Thread(target=lambda: result.update(docs=reader.search("Metalon tubo quadrado 20x20", limit=1)))
+    worker.start()
+    assert entered.wait(5)
+
+    _edit(knowledge_dir, "Metalon tubo retangular 20x30")
+    second = _build(uri, knowledge_dir)
+    fresh = reader.search("Metalon tubo quadrado 20x20", limit=1)  # troca enquanto a outra busca roda
+    release.set()
+    worker.join(5)
+
+    assert result["docs"][0].content == "Metalon tubo quadrado 20x20"  # terminou na versão antiga
+    assert fresh[0].content != "Metalon tubo quadrado 20x20"
+    assert reader.table_name == second.table != first.table
+    # O resultado antigo, gravado depois da troca, não é servido na versão nova
+    assert reader.search("Metalon tubo quadrado 20x20", limit=1)[0].content == fresh[0].content
+
+
+def test_failed_build_is_never_published(uri, knowledge_dir, monkeypatch):
+    first = _build(uri, knowledge_dir)
+    tables = _tables(uri)
+
+    def broken(vector_db):
+        raise RuntimeError("disco cheio")
+
+    monkeypatch.setattr(knowledge_versions, "_create_fts_index", broken)
+    _edit(knowledge_dir, "Metalon tubo retangular 20x30")
+    with pytest.raises(RuntimeError):
+        _build(uri, knowledge_dir)
+    assert current_table(uri, BASE) == first.table
+    assert _tables(uri) == tables
+
+
+def test_cleanup_keeps_current_and_recent_versions(uri, knowledge_dir):
+    versions = []
+    for text in ("v1", "v2", "v3"):
+        _edit(knowledge_dir, text)
+        versions.append(_build(uri, knowledge_dir).table)
+    orphan = knowledge_versions.version_table_name(BASE, now=0)
+    _facade(uri, follow=False).connection.create_table(orphan, data=[{"id": "x", "vector": [0.0] * 8, "payload": "{}"}])
+
+    # Dentro da carência só sai o build interrompido há mais de ORPHAN_SECONDS
+    assert cleanup_versions(uri, BASE, keep=1, grace=3600) == [orphan]
+
+    dropped = cleanup_versions(uri, BASE, keep=1, grace=0)
+    assert set(dropped) == {BASE, versions[0]}  # a tabela base (criada pelo handle) e a v1
+    assert {versions[1], versions[2]} <= _tables(uri)
+
+    assert rollback(uri, BASE) == versions[1]
+    assert current_table(uri, BASE) == versions[1]
+    assert IndexPointer.load(pointer_path(uri, BASE)).retired[0]["table"] == versions[2]
+
+
+def test_fresh_orphan_survives_cleanup(uri, knowledge_dir):
+    _build(uri, knowledge_dir)
+    building = knowledge_versions.version_table_name(BASE)
+    _facade(uri, follow=False).connection.create_table(building, data=[{"id": "x", "vector": [0.0] * 8, "payload": "{}"}])
+    assert building not in cleanup_versions(uri, BASE, keep=0, grace=0)
+    assert building in cleanup_versions(uri, BASE, keep=0, grace=0, now=knowledge_versions.time.time() + ORPHAN_SECONDS + 1)
+
+
+def test_watcher_rereads_pointer_only_when_it_changes(uri, knowledge_dir, monkeypatch):
+    watcher = PointerWatcher(uri, BASE, cleanup=False)
+    assert watcher() is None  # sem ponteiro: mantém a tabela atual
+    first = _build(uri, knowledge_dir).table
+    assert watcher() == first
+
+    loads = []
+    original = IndexPointer.load
+    monkeypatch.setattr(IndexPointer, "load", classmethod(lambda cls, path: loads.append(path) or original(path)))
+    assert watcher() == first and loads == []
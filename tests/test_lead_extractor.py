@@ -0,0 +1,124 @@
+"""
+Testes da extração determinística dos campos do lead.
+"""
+import pytest
+
+from src.lead_extractor import apply_extracted_fields, extract_lead_fields, is_valid_cnpj
+from src.models import LeadData
+
+
+@pytest.mark.parametrize("cnpj,valido", [
+    ("11.222.333/0001-81", True),
+    ("12345678000195", True),
+    ("12.345.678/0001-00", False),
+    ("11111111111111", False),
+    ("1122233300018", False),
+])
+def test_is_valid_cnpj(cnpj, valido):
+    assert is_valid_cnpj(cnpj) is valido
+
+
+def test_cnpj_is_stored_as_digits_and_invalid_is_ignored():
+    assert extract_lead_fields("CNPJ 11.222.333/0001-81").cnpj == "11222333000181"
+    fields = extract_lead_fields("cnpj 12.345.678/0001-00")
+    assert fields.cnpj is None
+    assert fields.whatsapp is None  # dígitos do CNPJ não viram telefone
+
+
+def test_email_is_lowercased():
+    assert extract_lead_fields("meu email: C.Souza@Construtora.com.br.").email == "c.souza@construtora.com.br"
+
+
+@pytest.mark.parametrize("texto,esperado", [
+    ("meu whatsapp é 85 99999-8888", "85999998888"),
+    ("(81) 98888-7777", "81988887777"),
+    ("+55 85 9 8888-7777", "85988887777"),
+    ("tel 85 3222-1234", "8532221234"),
+    ("20 99999-8888", None),  # DDD inexistente
+    ("85 8888-7777", None),  # celular sem o 9
+])
+def test_phone_formats(texto, esperado):
+    assert extract_lead_fields(texto).whatsapp == esperado
+
+
+@pytest.mark.parametrize("texto,uf,cidade", [
+    ("Sou de Fortaleza, CE", "CE", "Fortaleza"),
+    ("Ana, Recife PE", "PE", "Recife"),
+    ("entrega em Iguatu/CE", "CE", "Iguatu"),
+    ("Joao Pessoa - pb", "PB", "João Pessoa"),
+    ("Moro em Canindé, Ceará", "CE", "Canindé"),
+    ("moro em são paulo", "SP", None),
+    ("sou do Pará", "PA", None),
+    ("estado: mg", "MG", None),
+    ("sou de juazeiro do norte", "CE", "Juazeiro do Norte"),
+])
+def test_location(texto, uf, cidade):
+    fields = extract_lead_fields(texto)
+    assert (fields.state, fields.city) == (uf, cidade)
+
+
+@pytest.mark.parametrize("texto", [
+    "preciso para amanhã",  # 'para' não é o Pará
+    "vou mandar antes do natal",
+    "QUERO VERGALHAO PARA SE POSSIVEL",  # 'SE' em caixa alta é palavra
+    "EMPRESA LTDA, SE PRECISAR LIGUE",  # idem depois da vírgula
+    "CA-50 de 10mm",
+])
+def test_location_false_positives(texto):
+    fields = extract_lead_fields(texto)
+    assert (fields.state, fields.city) == (None, None)
+
+
+@pytest.mark.parametrize("texto,volume", [
+    ("uns 5 toneladas", "5 toneladas"),
+    ("50 barras de 10mm e 20 de 8mm pra entrega amanhã", "50 barras de 10mm e 20 de 8mm"),
+    ("1 tonelada de vergalhão, 10 chapas 0,95mm urgente", "1 tonelada de vergalhão, 10 chapas 0,95mm"),
+    ("tubo quadrado 30x30, 2 toneladas. Meu email é a@b.com", "2 toneladas"),
+    ("5.000 kg sem pressa", "5.000 kg"),
+    ("vergalhão 10mm", None),
+    ("quantos kg tem 1 barra de 12,5mm?", None),
+    ("qual o peso de 10 barras de 8mm", None),
+    ("preciso de 5 toneladas, quanto custa?", "5 toneladas"),
+    ("tem 10 barras? quero 2 toneladas", "2 toneladas"),
+    ("preciso de 5 a 10 toneladas de vergalhão", "5 a 10 toneladas de vergalhão"),
+    ("entre 2 e 3 toneladas pra Fortaleza", "entre 2 e 3 toneladas"),
+])
+def test_volume_phrase(texto, volume):
+    assert extract_lead_fields(texto).volume_estimate == volume
+
+
+@pytest.mark.parametrize("texto,urgencia", [
+    ("é urgente", "urgente"),
+    ("preciso pra amanhã cedo", "amanhã"),
+    ("entrega hoje mesmo", "hoje"),
+    ("até o fim dessa semana", None),
+    ("nessa semana", "esta semana"),
+    ("sem urgência", "sem pressa"),
+    ("bom dia, hoje queria um orçamento", None),
+])
+def test_urgency(texto, urgencia):
+    assert extract_lead_fields(texto).urgency == urgencia
+
+
+def test_apply_overwrites_data_but_keeps_product():
+    lead = LeadData(session_id="x", email="velho@x.com", product_interest="metalon")
+    fields = extract_lead_fields("corrigindo: novo@x.com, quero vergalhão, 3 toneladas")
+    changed = apply_extracted_fields(lead, fields)
+    assert lead.email == "novo@x.com"
+    assert lead.product_interest == "metalon"
+    assert lead.volume_estimate == "3 toneladas"
+    assert set(changed) == {"email", "volume_estimate"}
+
+
+def test_apply_keeps_larger_stored_volume():
+    lead = LeadData(session_id="x", state="PI", product_interest="vergalhão", volume_estimate="5 toneladas")
+    assert apply_extracted_fields(lead, extract_lead_fields("e 1 barra de 12,5mm, pesa quanto")) == []
+    assert lead.volume_estimate == "5 toneladas"
+
+    assert apply_extracted_fields(lead, extract_lead_fields("na verdade são 8 toneladas")) == ["volume_estimate"]
+    assert lead.volume_estimate == "8 toneladas"
+
+
+def test_empty_message_extracts_nothing():
+    assert not extract_lead_fields("")
+    assert not extract_lead_fields("Oi, bom dia")
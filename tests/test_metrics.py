@@ -0,0 +1,140 @@
+"""
+Testes das métricas do /metrics (formato Prometheus e instrumentação do turno).
+"""
+import re
+from types import SimpleNamespace
+
+from agno.db.base import SessionType
+from agno.metrics import MessageMetrics
+from fastapi.testclient import TestClient
+
+from src.metrics import MODEL_CALLS, MODEL_TOKENS, STAGE_SECONDS, TURNS, Registry, TimedSqliteDb, stage_timer
+from src.prompt_cache import record_run
+
+
+def _sample(text: str, line_prefix: str) -> float:
+    match = re.search(rf"^{re.escape(line_prefix)} (\S+)$", text, re.MULTILINE)
+    assert match, f"{line_prefix} ausente"
+    return float(match.group(1))
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.histogram("etapa_seconds", "Tempo por etapa", ["stage"], buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.7, 3):
+        histogram.observe(value, "plan")
+    text = registry.render()
+    assert "# TYPE etapa_seconds histogram" in text
+    assert _sample(text, 'etapa_seconds_bucket{stage="plan",le="0.1"}') == 1
+    assert _sample(text, 'etapa_seconds_bucket{stage="plan",le="1"}') == 3
+    assert _sample(text, 'etapa_seconds_bucket{stage="plan",le="+Inf"}') == 4
+    assert _sample(text, 'etapa_seconds_count{stage="plan"}') == 4
+    assert _sample(text, 'etapa_seconds_sum{stage="plan"}') == 4.25
+
+
+def test_counter_escapes_label_values():
+    registry = Registry()
+    counter = registry.counter("calls_total", "Chamadas", ["agent"])
+    counter.inc('Agente "X"')
+    counter.inc('Agente "X"', amount=2)
+    assert 'calls_total{agent="Agente \\"X\\""} 3' in registry.render()
+
+
+def test_callback_metric_is_read_at_scrape_time():
+    registry = Registry()
+    state = {"queued": 0}
+    registry.callback("fila", "Fila", "gauge", lambda: {(): state["queued"]})
+    state["queued"] = 7
+    assert "fila 7" in registry.render()
+
+
+def test_stage_timer_observes_block():
+    before = STAGE_SECONDS.count("teste")
+    with stage_timer("teste"):
+        pass
+    assert STAGE_SECONDS.count("teste") == before + 1
+
+
+def test_model_calls_counted_per_agent_and_model():
+    member = SimpleNamespace(agent_name="Qualificador de Leads", model_provider="Google", model="gemini-x",
+                             messages=[SimpleNamespace(role="assistant", metrics=MessageMetrics(
+                                 input_tokens=900, output_tokens=40, cache_read_tokens=600, duration=1.2))],
+                             member_responses=None)
+    run = SimpleNamespace(team_name="Time", model_provider="Google", model="gemini-x", member_responses=[member],
+                          messages=[SimpleNamespace(role="assistant", metrics=MessageMetrics(
+                              input_tokens=1500, output_tokens=80, duration=0.8))])
+    calls = MODEL_CALLS.value("Qualificador de Leads", "gemini-x")
+    output = MODEL_TOKENS.value("Time", "gemini-x", "output")
+    record_run(run)
+    assert MODEL_CALLS.value("Qualificador de Leads", "gemini-x") == calls + 1
+    assert MODEL_TOKENS.value("Time", "gemini-x", "output") == output + 80
+    assert MODEL_TOKENS.value("Qualificador de Leads", "gemini-x", "cached") >= 600
+
+
+def test_session_io_is_timed(tmp_path):
+    db = TimedSqliteDb(db_file=str(tmp_path / "sessions.db"))
+    before = STAGE_SECONDS.count("session_read")
+    assert db.get_session("nao-existe", SessionType.TEAM) is None
+    assert STAGE_SECONDS.count("session_read") == before + 1
+
+
+def test_metrics_endpoint_reports_turn_stages(monkeypatch, tmp_path):
+    from agno.db.sqlite import SqliteDb
+    import src.api as api
+    from src.handoff_queue import HandoffQueue
+    from src.session_store import SessionStore
+
+    monkeypatch.setattr(api, "_handoff_queue", HandoffQueue())
+    monkeypatch.setattr(api, "_session_store", SessionStore(SqliteDb(db_file=str(tmp_path / "sessions.db"))))
+    client = TestClient(api.app)
+    handoffs = TURNS.value("handoff")
+    response = client.post("/chat", json={"session_id": "metrics-1", "message": "quero falar com um atendente"})
+    assert response.status_code == 200
+
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200
+    assert metrics.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = metrics.text
+    assert _sample(text, 'chat_turns_total{path="handoff"}') == handoffs + 1
+    assert _sample(text, 'chat_stage_seconds_count{stage="plan"}') >= 1
+    assert _sample(text, 'chat_request_seconds_count{endpoint="/chat"}') >= 1
+    assert "turn_pool_in_flight 0" in text
+
+
+def test_stream_request_is_timed(monkeypatch, tmp_path):
+    from agno.db.sqlite import SqliteDb
+    import src.api as api
+    from src.handoff_queue import HandoffQueue
+    from src.metrics import REQUEST_SECONDS
+    from src.session_store import SessionStore
+
+    monkeypatch.setattr(api, "_handoff_queue", HandoffQueue())
+    monkeypatch.setattr(api, "_session_store", SessionStore(SqliteDb(db_file=str(tmp_path / "sessions.db"))))
+    before = REQUEST_SECONDS.count("/chat/stream")
+    response = TestClient(api.app).post("/chat/stream", json={"session_id": "metrics-sse", "message": "quero falar com um atendente"})
+    assert response.status_code == 200
+    assert "event: final" in response.text
+    assert REQUEST_SECONDS.count("/chat/stream") == before + 1
+
+
+def test_fake_model_usage_reaches_model_counters(monkeypatch, tmp_path):
+    from agno.db.sqlite import SqliteDb
+    import src.api as api
+    from src.orchestrator import create_steel_sales_team
+    from src.session_store import SessionStore
+    from tests.fake_model import FakeModel, delegating_reply, use_fake_model
+
+    model = FakeModel(id="fake-usage", reply=delegating_reply(), report_usage=True)
+    use_fake_model(model, monkeypatch)
+    team = create_steel_sales_team()
+    team.db = SqliteDb(db_file=str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(api, "get_team", lambda: team)
+    monkeypatch.setattr(api, "FAST_PATH_ROUTER", False)
+    monkeypatch.setattr(api, "_session_store", SessionStore(team.db))
+
+    response = TestClient(api.app).post("/chat", json={"session_id": "metrics-2", "message": "Oi, quero vergalhão"})
+    assert response.status_code == 200
+    text = TestClient(api.app).get("/metrics").text
+    assert _sample(text, 'model_calls_total{agent="Time de Vendas Aço Cearense",model="fake-usage"}') == 2
+    assert _sample(text, 'model_tokens_total{agent="Qualificador de Leads",model="fake-usage",kind="input"}') > 0
+    assert _sample(text, 'chat_stage_seconds_count{stage="agent_run"}') >= 1
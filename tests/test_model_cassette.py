@@ -0,0 +1,119 @@
+"""
+Testes do cassete de chamadas de modelo (gravação, reprodução e relatório de misses).
+"""
+import time
+
+import pytest
+from agno.models.message import Message
+
+from src.model_cassette import Cassette, CassetteMiss, CassetteModel, request_key
+from tests.fake_model import FakeModel, delegating_reply, use_fake_model
+
+
+def _messages(system: str = "Você é o Agente Qualificador.\nRegras...", user: str = "Oi, quero vergalhão"):
+    return [Message(role="system", content=system), Message(role="user", content=user)]
+
+
+def _exploding_model():
+    def reply(messages):
+        raise AssertionError("o provedor não pode ser chamado em replay")
+    return FakeModel(reply=reply)
+
+
+def test_key_ignores_ids_whitespace_and_timestamps():
+    a = _messages(user="sessão 3f2b8c1e-1111-4a2b-9c3d-0123456789ab  às 2026-10-18T10:00:00Z")
+    b = _messages(user="sessão 9a9a9a9a-2222-4b2b-8c3d-ba9876543210 às 2026-10-19 08:30:12")
+    assert request_key("m", a) == request_key("m", b)
+    assert request_key("m", a) != request_key("outro", a)
+    assert request_key("m", a) != request_key("m", a, stream=True)
+    assert request_key("m", a) != request_key("m", _messages(user="Oi, quero telha"))
+
+
+def test_record_then_replay_without_provider():
+    cassette = Cassette(":memory:")
+    recorder = CassetteModel.wrap(FakeModel(reply="Qual o seu nome? STATUS: FRIO"), cassette, "record")
+    recorded = recorder.invoke(_messages())
+    assert cassette.stats.recorded == 1
+
+    player = CassetteModel.wrap(_exploding_model(), cassette, "replay")
+    replayed = player.invoke(_messages())
+    assert replayed.content == recorded.content
+    assert cassette.stats.hits == 1
+
+
+def test_stream_replay_yields_recorded_deltas():
+    cassette = Cassette(":memory:")
+    recorder = CassetteModel.wrap(FakeModel(reply="Temos vergalhão CA-50 em estoque"), cassette, "record")
+    recorded = [d.content for d in recorder.invoke_stream(_messages())]
+    player = CassetteModel.wrap(_exploding_model(), cassette, "replay")
+    assert [d.content for d in player.invoke_stream(_messages())] == recorded
+    assert len(recorded) > 1
+
+
+def test_replay_miss_raises_and_prompt_change_is_reported():
+    cassette = Cassette(":memory:")
+    CassetteModel.wrap(FakeModel(), cassette, "record").invoke(_messages())
+    player = CassetteModel.wrap(_exploding_model(), cassette, "replay")
+
+    with pytest.raises(CassetteMiss):
+        player.invoke(_messages(user="outra conversa"))
+    with pytest.raises(CassetteMiss):
+        player.invoke(_messages(system="Você é o Agente Qualificador.\nRegras novas..."))
+
+    reasons = [miss["reason"] for miss in cassette.stats.last_misses]
+    assert reasons == ["new_request", "prompt_changed"]
+    assert cassette.stats.last_misses[0]["last_user_message"] == "outra conversa"
+
+
+def test_auto_mode_records_only_misses():
+    cassette = Cassette(":memory:")
+    inner = FakeModel()
+    model = CassetteModel.wrap(inner, cassette, "auto")
+    model.invoke(_messages())
+    model.invoke(_messages())
+    assert len(inner.calls) == 1
+    assert (cassette.stats.misses, cassette.stats.hits, cassette.stats.recorded) == (1, 1, 1)
+
+
+def test_replay_latency_factor():
+    cassette = Cassette(":memory:")
+    CassetteModel.wrap(FakeModel(delay=0.1), cassette, "record").invoke(_messages())
+
+    started = time.perf_counter()
+    CassetteModel.wrap(_exploding_model(), cassette, "replay").invoke(_messages())
+    assert time.perf_counter() - started < 0.05
+
+    started = time.perf_counter()
+    CassetteModel.wrap(_exploding_model(), cassette, "replay", replay_latency=0.5).invoke(_messages())
+    assert time.perf_counter() - started >= 0.045
+
+
+def test_team_conversation_replays_offline(monkeypatch, tmp_path):
+    from agno.db.sqlite import SqliteDb
+    from src.orchestrator import create_steel_sales_team
+
+    cassette = Cassette(str(tmp_path / "cassette.db"))
+
+    def run_conversation(model, db_name):
+        use_fake_model(model, monkeypatch)
+        team = create_steel_sales_team()
+        team.db = SqliteDb(db_file=str(tmp_path / db_name))
+        return [team.run(text, session_id="cassete-1").content for text in ("Oi, quero vergalhão", "sou de Recife/PE")]
+
+    inner = FakeModel(reply=delegating_reply())
+    recorded = run_conversation(CassetteModel.wrap(inner, cassette, "record"), "gravacao.db")
+    assert cassette.stats.recorded == len(inner.calls) == 6
+
+    replayed = run_conversation(CassetteModel.wrap(_exploding_model(), cassette, "replay"), "reproducao.db")
+    assert [str(r) for r in replayed] == [str(r) for r in recorded]
+    assert cassette.stats.hits == 6 and cassette.stats.misses == 0
+
+
+def test_get_model_wraps_provider_model(monkeypatch, tmp_path):
+    import src.config as config
+
+    monkeypatch.setattr(config, "MODEL_CASSETTE_MODE", "replay")
+    monkeypatch.setattr(config, "MODEL_CASSETTE_PATH", str(tmp_path / "cassette.db"))
+    model = config.get_model()
+    assert isinstance(model, CassetteModel)
+    assert model.id == config.MODEL_ID and model.inner.id == config.MODEL_ID
@@ -15,14 +15,22 @@ def test_team_has_db():
 
 
 def test_team_has_history_enabled():
-    """Team deve ter histórico ativado."""
-    team = create_steel_sales_team()
+    """Histórico bruto do Agno quando a compactação está desligada."""
+    team = create_steel_sales_team(compact_history=False)
     assert team.add_history_to_context is True
     assert team.store_history_messages is True
     assert team.add_team_history_to_members is True
     assert team.num_team_history_runs == 5
 
 
+def test_compacted_history_replaces_agno_history():
+    """Com o histórico compactado a API manda o histórico na mensagem; as runs continuam gravadas."""
+    team = create_steel_sales_team(compact_history=True)
+    assert team.add_history_to_context is False
+    assert team.add_team_history_to_members is False
+    assert team.store_history_messages is True
+
+
 def test_sqlite_db_file_path_configured():
     """Sessão deve estar apontando para o arquivo correto."""
     team = create_steel_sales_team()
@@ -0,0 +1,23 @@
+from src.data.product_catalog import normalizar_texto, resolver_produto
+
+
+def test_normalizar_texto_remove_acentos():
+    assert normalizar_texto("  Vergalhão  CA-50 ") == "vergalhao ca-50"
+
+
+def test_resolve_termos_populares():
+    assert resolver_produto("ferro de coluna") == ("CA-60", "Vergalhão CA-60")
+    assert resolver_produto("Ferro para laje") == ("CA-50", "Vergalhão CA-50")
+    assert resolver_produto("telha de zinco") == ("Telha", "Telha Trapezoidal Galvanizada")
+    assert resolver_produto("L de ferro") == ("Barra Laminada", "Cantoneira")
+
+
+def test_termo_mais_especifico_vence():
+    assert resolver_produto("tela coluna")[0] == "Tela Coluna"
+    assert resolver_produto("tubo galvanizado 1\"")[1] == "Tubo Galvanizado"
+    assert resolver_produto("bobina slitter")[0] == "Bobina Slitter"
+
+
+def test_produto_desconhecido():
+    assert resolver_produto("parafuso sextavado") is None
+    assert resolver_produto(None) is None
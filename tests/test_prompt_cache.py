@@ -0,0 +1,131 @@
+"""
+Testes do cache de prefixo do prompt.
+
+A checagem principal roda offline com o FakeModel: vários turnos, sessões e
+leads diferentes, pelo coordenador e pelo pré-roteador — o prefixo estático
+(tools + mensagens de sistema) de cada agente tem que ser o mesmo byte a byte
+em todas as chamadas. Se algum dado do turno vazar para o system prompt, o
+cache do provedor deixa de acertar e este teste falha.
+"""
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.prompt_cache import PromptCacheStats, call_usage, collect_call_usage, prefix_digest
+
+# Primeira linha das instruções de cada agente → nome do agente
+_AGENT_MARKERS = {
+    "Você é o Orquestrador": "coordenador",
+    "Você é o Agente Qualificador": "Qualificador de Leads",
+    "Especialista de Produtos": "Especialista de Produtos",
+    "Gerador de Orçamentos": "Gerador de Orçamentos",
+    "Transbordo": "Agente de Transbordo",
+}
+
+_TURNOS = [
+    ("cache-1", "Oi, quero vergalhão", None),
+    ("cache-1", "sou de Fortaleza/CE, 5 toneladas", None),
+    ("cache-2", "meu e-mail é ana@obra.com.br", {"session_id": "cache-2", "name": "Ana Lima", "state": "PE"}),
+    ("cache-3", "vocês têm metalon 30x30?", {"session_id": "cache-3", "name": "João", "city": "Natal", "state": "RN"}),
+    ("cache-2", "zap 81 98888-7777", None),
+]
+
+
+def _agent_of(messages) -> str:
+    system = str(messages[0].content) if messages and messages[0].role == "system" else ""
+    for marker, agent in _AGENT_MARKERS.items():
+        if marker in system:
+            return agent
+    return "desconhecido"
+
+
+@pytest.mark.parametrize("fast_path", [True, False])
+def test_static_prefix_is_byte_stable_across_turns(monkeypatch, tmp_path, fast_path):
+    from agno.db.sqlite import SqliteDb
+    import src.api as api
+    from src.orchestrator import create_steel_sales_team
+    from tests.fake_model import FakeModel, delegating_reply, use_fake_model
+
+    model = FakeModel(reply=delegating_reply())
+    use_fake_model(model, monkeypatch)
+    team = create_steel_sales_team()
+    team.db = SqliteDb(db_file=str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(api, "get_team", lambda: team)
+    monkeypatch.setattr(api, "FAST_PATH_ROUTER", fast_path)
+    client = TestClient(api.app)
+
+    for session_id, text, lead in _TURNOS:
+        response = client.post("/chat", json={"session_id": session_id, "message": text, "lead_data": lead})
+        assert response.status_code == 200
+
+    digests: dict[str, set] = {}
+    for messages, tools in zip(model.calls, model.call_tools):
+        digests.setdefault(_agent_of(messages), set()).add(prefix_digest(messages, tools))
+        system = "\n".join(str(m.content) for m in messages if m.role == "system")
+        for dado in ("ana@obra.com.br", "Ana Lima", "98888-7777", "cache-1", "cache-2", "cache-3"):
+            assert dado not in system, f"dado do turno no system prompt: {dado}"
+
+    assert "desconhecido" not in digests
+    assert len(model.calls) >= len(_TURNOS)
+    for agent, seen in digests.items():
+        assert len(seen) == 1, f"prefixo de {agent} mudou entre turnos"
+
+
+def test_anthropic_input_tokens_include_cache():
+    metrics = SimpleNamespace(input_tokens=200, cache_read_tokens=3000, cache_write_tokens=0)
+    usage = call_usage("coordenador", "Anthropic", "claude-sonnet-4-6", metrics)
+    assert (usage.input_tokens, usage.cached_tokens, usage.uncached_tokens) == (3200, 3000, 200)
+
+
+def test_gemini_input_tokens_already_include_cache():
+    metrics = SimpleNamespace(input_tokens=3200, cache_read_tokens=3000, cache_write_tokens=None)
+    usage = call_usage("coordenador", "Google", "gemini-2.5-flash", metrics)
+    assert (usage.input_tokens, usage.cached_tokens, usage.uncached_tokens) == (3200, 3000, 200)
+
+
+def test_collect_call_usage_walks_member_responses():
+    def assistant(tokens, cached):
+        return SimpleNamespace(role="assistant", metrics=SimpleNamespace(
+            input_tokens=tokens, cache_read_tokens=cached, cache_write_tokens=0))
+
+    member = SimpleNamespace(agent_name="Qualificador de Leads", model_provider="Google", model="g",
+                             messages=[SimpleNamespace(role="user", metrics=None), assistant(1000, 800)])
+    team = SimpleNamespace(team_name="Time", model_provider="Google", model="g",
+                           messages=[assistant(2000, 1500), assistant(2500, 1500)], member_responses=[member])
+
+    calls = collect_call_usage(team)
+    assert [c.agent for c in calls] == ["Time", "Time", "Qualificador de Leads"]
+
+    stats = PromptCacheStats()
+    stats.record(calls)
+    summary = stats.as_dict()
+    assert (summary["calls"], summary["input_tokens"], summary["cached_tokens"]) == (3, 5500, 3800)
+    assert summary["last_calls"][-1]["uncached_tokens"] == 200
+
+
+@pytest.mark.parametrize("model_id,mode", [
+    ("claude-sonnet-4-6", "anthropic"),
+    ("gemini-2.5-flash-preview-04-17", "gemini-implicit"),
+    ("gemini-2.0-flash", None),
+])
+def test_prompt_cache_mode(model_id, mode):
+    from src.config import prompt_cache_mode
+    assert prompt_cache_mode(model_id) == mode
+
+
+def test_prompt_cache_can_be_disabled(monkeypatch):
+    import src.config as config
+    monkeypatch.setattr(config, "PROMPT_CACHE", False)
+    assert config.prompt_cache_mode("claude-sonnet-4-6") is None
+
+
+def test_claude_model_caches_system_prompt(monkeypatch):
+    import src.config as config
+    monkeypatch.setattr(config, "MODEL_ID", "claude-haiku-4-5-20251001")
+    assert config.get_model().cache_system_prompt is True
+
+
+def test_static_prompt_normalizes_whitespace():
+    from src.config import static_prompt
+    assert static_prompt("\n  Linha 1   \n\n\n\nLinha 2\t\n- item \n") == "Linha 1\n\nLinha 2\n- item"
@@ -6,3 +6,127 @@ def test_quote_generator_created():
     agent = create_quote_generator_agent()
     assert agent is not None
     assert agent.name == "Gerador de Orçamentos"
+
+
+from src.agents.quote_generator_agent import (
+    IncompleteLeadError,
+    QUOTE_GENERATOR_INSTRUCTIONS,
+    generate_quote,
+    render_quote,
+    render_quote_confirmation,
+    resolve_technical_product,
+)
+from src.models import ClientType, LeadData
+
+GOLDEN_QUOTE_CE = """═══════════════════════════════════════════
+       AÇO CEARENSE — RESUMO DO PEDIDO
+═══════════════════════════════════════════
+
+DADOS DO CLIENTE:
+• Nome: Carlos Souza
+• CNPJ: 12.345.678/0001-95
+• Contato: 85999998888 | carlos@construtora.com.br
+• Local: Fortaleza - CE
+• Tipo: Construtora
+
+PEDIDO:
+• Produto: Vergalhão CA-50 — vergalhão 10mm
+• Volume: 5 toneladas
+• Urgência: esta semana
+
+STATUS: MORNO → Pronto para orçamento da Aço Cearense
+
+PRÓXIMOS PASSOS:
+→ Closer da Aço Cearense deve entrar em contato em até 2h
+→ Apresentar tabela de preços atualizada
+→ Confirmar disponibilidade em estoque no CD de Fortaleza
+
+═══════════════════════════════════════════"""
+
+
+@pytest.fixture
+def morno_lead():
+    return LeadData(
+        session_id="quote-1",
+        name="Carlos Souza",
+        whatsapp="85999998888",
+        email="carlos@construtora.com.br",
+        cnpj="12.345.678/0001-95",
+        state="ce",
+        city="Fortaleza",
+        client_type=ClientType.CONSTRUTORA,
+        product_interest="vergalhão 10mm",
+        volume_estimate="5 toneladas",
+        urgency="esta semana",
+    )
+
+
+def test_render_quote_golden_output(morno_lead):
+    assert render_quote(morno_lead) == GOLDEN_QUOTE_CE
+
+
+def test_render_quote_matches_instructions_template(morno_lead):
+    """O resumo renderizado tem as mesmas linhas fixas do template das instruções."""
+    rendered = render_quote(morno_lead)
+    for line in QUOTE_GENERATOR_INSTRUCTIONS.splitlines():
+        if line.startswith(("═", "STATUS:", "→", "DADOS DO CLIENTE:", "PEDIDO:", "PRÓXIMOS PASSOS:")):
+            assert line in rendered
+
+
+def test_render_quote_optional_fields(morno_lead):
+    morno_lead.client_type = None
+    morno_lead.urgency = None
+    rendered = render_quote(morno_lead)
+    assert "• Tipo: não informado" in rendered
+    assert "• Urgência: não informada" in rendered
+
+
+def test_render_quote_prefers_identified_technical_product(morno_lead):
+    morno_lead.technical_product = "VERGALHAO CA50 10,00mm RETO 12m"
+    assert "• Produto: VERGALHAO CA50 10,00mm RETO 12m" in render_quote(morno_lead)
+
+
+def test_confirmation_for_customer_has_no_internal_summary(morno_lead):
+    message = render_quote_confirmation(morno_lead)
+    assert "Carlos Souza" in message
+    assert "vergalhão 10mm (5 toneladas)" in message
+    assert "RESUMO DO PEDIDO" not in message
+    assert "STATUS" not in message
+
+
+def test_render_quote_rejects_incomplete_lead(morno_lead):
+    morno_lead.cnpj = None
+    morno_lead.email = ""
+    with pytest.raises(IncompleteLeadError) as exc:
+        render_quote(morno_lead)
+    assert exc.value.missing == ["email", "cnpj"]
+
+
+def test_resolve_popular_names():
+    lead = LeadData(session_id="t", product_interest="metalon 30x30")
+    assert resolve_technical_product(lead) == "Metalon (Tubo Quadrado/Retangular) — metalon 30x30"
+    assert resolve_technical_product(LeadData(session_id="t", product_interest="parafuso")) is None
+
+
+class _Normalizer:
+    def __init__(self):
+        self.calls = []
+
+    def run(self, text):
+        from types import SimpleNamespace
+        self.calls.append(text)
+        return SimpleNamespace(content="Cantoneira Abas Iguais\n")
+
+
+def test_generate_quote_skips_llm_for_known_product(morno_lead):
+    normalizer = _Normalizer()
+    assert generate_quote(morno_lead, normalizer=normalizer) == GOLDEN_QUOTE_CE
+    assert normalizer.calls == []
+
+
+def test_generate_quote_normalizes_free_text_product(morno_lead):
+    morno_lead.product_interest = "aquele ângulo de serralheiro"
+    normalizer = _Normalizer()
+    rendered = generate_quote(morno_lead, normalizer=normalizer)
+    assert normalizer.calls == ["aquele ângulo de serralheiro"]
+    assert "• Produto: Cantoneira Abas Iguais" in rendered
@@ -0,0 +1,170 @@
+"""
+Testes dos caches da busca na knowledge base (embedding de consulta + resultado).
+"""
+import hashlib
+from dataclasses import dataclass, field
+
+import pytest
+from agno.knowledge.document import Document
+from agno.knowledge.embedder.base import Embedder
+from agno.knowledge.embedder.fastembed import FastEmbedEmbedder
+from agno.vectordb.lancedb import SearchType
+
+from src.retrieval_cache import CachedLanceDb, LRUCache, QueryCachedEmbedder, normalize_query
+
+
+@dataclass
+class HashEmbedder(Embedder):
+    """Embedder determinístico (sem modelo) que conta as chamadas."""
+    dimensions: int = 8
+    calls: list = field(default_factory=list)
+
+    def get_embedding(self, text):
+        self.calls.append(text)
+        digest = hashlib.sha256(text.encode()).digest()
+        return [b / 255 for b in digest[: self.dimensions]]
+
+    def get_embedding_and_usage(self, text):
+        return self.get_embedding(text), None
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalize_query_keeps_accents():
+    assert normalize_query("  Vergalhão   10MM ") == "vergalhão 10mm"
+    assert normalize_query("vergalhao") != normalize_query("vergalhão")
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats.evictions == 1
+
+
+def test_lru_ttl_expires_entries():
+    clock = FakeClock()
+    cache = LRUCache(10, ttl=60, clock=clock)
+    cache.put("k", "v")
+    clock.now = 59
+    assert cache.get("k") == "v"
+    clock.now = 61
+    assert cache.get("k") is None
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_lru_size_zero_disables_cache():
+    cache = LRUCache(0)
+    cache.put("k", "v")
+    assert cache.get("k") is None
+
+
+def test_query_embedder_caches_normalized_queries(monkeypatch):
+    calls = []
+    monkeypatch.setattr(FastEmbedEmbedder, "get_embedding", lambda self, text: calls.append(text) or [0.1, 0.2])
+    embedder = QueryCachedEmbedder(query_cache_size=10)
+
+    embedder.get_embedding("Metalon")
+    embedder.get_embedding("  metalon ")
+
+    assert calls == ["Metalon"]  # embeda o texto original, não a chave casefold
+    assert embedder.query_cache.stats.hits == 1
+
+
+def test_concurrent_first_queries_load_model_once(monkeypatch):
+    import threading
+    import time
+    from src import retrieval_cache
+
+    loads = []
+
+    def slow_model(model_name):
+        loads.append(model_name)
+        time.sleep(0.05)
+        return object()
+
+    monkeypatch.setattr(retrieval_cache, "TextEmbedding", slow_model)
+    embedder = QueryCachedEmbedder(query_cache_size=10)
+    barrier = threading.Barrier(8)
+    clients = []
+
+    def worker():
+        barrier.wait()
+        clients.append(embedder.client)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(loads) == 1
+    assert all(c is clients[0] for c in clients)
+
+
+def test_document_embeddings_bypass_query_cache(monkeypatch):
+    monkeypatch.setattr(FastEmbedEmbedder, "get_embedding", lambda self, text: [0.1, 0.2])
+    embedder = QueryCachedEmbedder(query_cache_size=10)
+
+    embedder.get_embedding_and_usage("conteúdo de um chunk do catálogo")
+
+    assert len(embedder.query_cache) == 0
+
+
+@pytest.fixture
+def vector_db(tmp_path):
+    db = CachedLanceDb(
+        table_name="test_cache",
+        uri=str(tmp_path / "lancedb"),
+        search_type=SearchType.hybrid,
+        embedder=HashEmbedder(),
+        use_tantivy=False,
+        search_cache_size=16,
+        search_cache_ttl=600,
+    )
+    db.create()
+    db.insert("hash-1", [
+        Document(name="ca50", content="Vergalhão CA-50 barra de 12 metros"),
+        Document(name="metalon", content="Metalon tubo quadrado 20x20"),
+    ])
+    return db
+
+
+def test_repeated_search_is_served_from_cache(vector_db):
+    embedder = vector_db.embedder
+    first = vector_db.search("Metalon", limit=2)
+    calls_after_first = len(embedder.calls)
+    second = vector_db.search("  metalon", limit=2)
+
+    assert [d.name for d in second] == [d.name for d in first]
+    assert len(embedder.calls) == calls_after_first
+    assert vector_db.search_cache.stats.hits == 1
+
+
+def test_limit_and_filters_are_part_of_the_key(vector_db):
+    vector_db.search("metalon", limit=1)
+    vector_db.search("metalon", limit=2)
+    vector_db.search("metalon", limit=2, filters={"grupo": "Tubo"})
+    assert vector_db.search_cache.stats.hits == 0
+
+
+def test_insert_invalidates_cached_results(vector_db):
+    vector_db.search("telha", limit=5)
+    version_before = vector_db.table_version()
+
+    vector_db.insert("hash-2", [Document(name="telha", content="Telha trapezoidal galvanizada")])
+    results = vector_db.search("telha", limit=5)
+
+    assert vector_db.table_version() != version_before
+    assert vector_db.search_cache.stats.hits == 0
+    assert "telha" in [d.name for d in results]
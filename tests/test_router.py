@@ -0,0 +1,80 @@
+"""
+Testes do pré-roteador determinístico — sem chamadas à API.
+"""
+import pytest
+from src.models import LeadClassification, LeadData
+from src.router import (
+    HUMAN_HANDOFF,
+    PRODUCT_SPECIALIST,
+    QUALIFIER,
+    QUOTE_GENERATOR,
+    build_context_block,
+    route_turn,
+)
+
+
+@pytest.fixture
+def complete_lead():
+    return LeadData(
+        session_id="t", name="Carlos", whatsapp="85999998888", email="c@x.com",
+        cnpj="12345678000100", state="CE", city="Fortaleza",
+        product_interest="vergalhão", volume_estimate="5 toneladas",
+    )
+
+
+def test_handoff_request_goes_to_handoff_agent(complete_lead):
+    decision = route_turn("quero falar com um atendente", complete_lead)
+    assert decision.member == HUMAN_HANDOFF
+    assert decision.is_fast_path
+
+
+def test_complete_lead_goes_to_quote_generator(complete_lead):
+    assert route_turn("pode seguir", complete_lead).member == QUOTE_GENERATOR
+
+
+def test_complete_lead_citing_new_product_is_ambiguous(complete_lead):
+    decision = route_turn("quero também metalon", complete_lead)
+    assert decision.member is None
+    assert decision.is_fast_path is False
+
+
+def test_complete_lead_citing_its_own_product_goes_to_quote(complete_lead):
+    assert route_turn("pode ser o vergalhão 10mm mesmo", complete_lead).member == QUOTE_GENERATOR
+
+
+def test_quente_lead_goes_to_coordinator(complete_lead):
+    complete_lead.classification = LeadClassification.QUENTE
+    assert route_turn("e o prazo?", complete_lead).member is None
+
+
+def test_complete_lead_after_quote_goes_to_coordinator(complete_lead):
+    """Orçamento já enviado: o lead completo não volta ao Gerador a cada mensagem."""
+    decision = route_turn("e o prazo de entrega?", complete_lead, quote_sent=True)
+    assert decision.member is None
+    assert decision.reason == "quote_already_sent"
+
+
+def test_product_with_only_order_fields_missing_goes_to_specialist(complete_lead):
+    complete_lead.product_interest = None
+    complete_lead.volume_estimate = None
+    assert route_turn("preciso de metalon 30x30", complete_lead).member == PRODUCT_SPECIALIST
+
+
+def test_product_with_contact_missing_is_ambiguous():
+    decision = route_turn("quero vergalhão", LeadData(session_id="t"))
+    assert decision.member is None
+
+
+def test_incomplete_lead_without_product_goes_to_qualifier():
+    assert route_turn("Oi, bom dia", LeadData(session_id="t")).member == QUALIFIER
+
+
+def test_context_block_format(complete_lead):
+    complete_lead.email = None
+    block = build_context_block(complete_lead, "segue meu contato")
+    assert block.startswith("---CONTEXTO ACUMULADO---")
+    assert "Nome: Carlos" in block
+    assert "E-mail: não informado" in block
+    assert "Dados faltantes: E-mail" in block
+    assert "Status atual: FRIO" in block
+    assert "Última mensagem do cliente: segue meu contato" in block
@@ -0,0 +1,56 @@
+"""
+Testes dos locks por sessão.
+"""
+import asyncio
+
+from src.session_locks import SessionLocks
+
+
+def test_same_session_runs_in_order():
+    locks = SessionLocks()
+    events = []
+
+    async def turn(session_id, name, delay):
+        async with locks.hold(session_id):
+            events.append(f"{name}:start")
+            await asyncio.sleep(delay)
+            events.append(f"{name}:end")
+
+    async def main():
+        first = asyncio.ensure_future(turn("sess-a", "m1", 0.05))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(turn("sess-a", "m2", 0.0))
+        await asyncio.gather(first, second)
+
+    asyncio.run(main())
+    assert events == ["m1:start", "m1:end", "m2:start", "m2:end"]
+
+
+def test_different_sessions_run_in_parallel():
+    locks = SessionLocks()
+    events = []
+
+    async def turn(session_id, delay):
+        async with locks.hold(session_id):
+            events.append(f"{session_id}:start")
+            await asyncio.sleep(delay)
+            events.append(f"{session_id}:end")
+
+    async def main():
+        await asyncio.gather(turn("sess-a", 0.05), turn("sess-b", 0.05))
+
+    asyncio.run(main())
+    assert events[:2] == ["sess-a:start", "sess-b:start"]
+
+
+def test_locks_are_discarded_after_use():
+    locks = SessionLocks()
+
+    async def main():
+        async with locks.hold("sess-a"):
+            assert locks.is_locked("sess-a")
+            assert len(locks) == 1
+
+    asyncio.run(main())
+    assert len(locks) == 0
+    assert locks.is_locked("sess-a") is False
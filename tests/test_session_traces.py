@@ -0,0 +1,135 @@
+"""
+Testes da extração e reprodução de traces de carga (src/session_traces.py).
+"""
+import asyncio
+import io
+import json
+
+import httpx
+import pytest
+
+from src.lead_extractor import extract_lead_fields, is_valid_cnpj
+from src.session_traces import (
+    PiiMasker,
+    customer_message,
+    extract_traces,
+    fake_cnpj,
+    replay_traces,
+    session_names,
+)
+
+
+def test_customer_message_strips_api_blocks():
+    assert customer_message({"input_content": "Boa tarde"}) == "Boa tarde"
+    legacy = '[DADOS DO LEAD: {"name": null}]\n\nMensagem do cliente: Quero vergalhão'
+    assert customer_message({"input_content": legacy}) == "Quero vergalhão"
+    current = ("---HISTÓRICO DA CONVERSA---\nCliente: oi\n---FIM DO HISTÓRICO---\n\n---CONTEXTO ACUMULADO---\n"
+               "Nome: não informado\n---FIM DO CONTEXTO---\n\nÚltima mensagem do cliente: 5 toneladas\nde CA-50\n---")
+    assert customer_message(current) == "5 toneladas\nde CA-50"
+
+
+def test_masked_values_keep_their_format():
+    masker = PiiMasker("sal")
+    text = "Pedro 81 99194-9468 pedro@gmail.com 90.841.296/0001-66 CPF 123.456.789-09 sou de Recife/PE"
+    masked = masker.mask(text, names={"Pedro"})
+    for secret in ("Pedro", "99194-9468", "pedro@gmail.com", "90.841.296/0001-66", "123.456.789-09"):
+        assert secret not in masked
+    assert "Recife/PE" in masked
+    assert masked == masker.mask(text, names={"Pedro"})  # determinístico
+
+    fields = extract_lead_fields(masked)
+    assert is_valid_cnpj(fields.cnpj)
+    assert fields.whatsapp.startswith("81") and fields.email.endswith("@exemplo.com")
+    assert is_valid_cnpj(fake_cnpj("x")) and is_valid_cnpj(fake_cnpj("y", formatted=True))
+
+
+def test_masker_salt_is_random_by_default_and_never_empty():
+    assert PiiMasker().session_id("s1") != PiiMasker().session_id("s1")
+    assert PiiMasker("sal").session_id("s1") == PiiMasker("sal").session_id("s1")
+    with pytest.raises(ValueError):
+        PiiMasker("")
+
+
+def test_session_names_from_replies_and_messages():
+    texts = ["Olá Pedro, você deseja comprar vergalhão?", "meu nome é joana", "• Nome: Igor Souza Silva (Loja)",
+             '[DADOS DO LEAD: {"name": "Ana Lima"}]', "Ótimo, Vergalhão!"]
+    assert session_names(texts) == {"Pedro", "joana", "Igor", "Souza", "Silva", "Ana", "Lima"}
+
+
+def _record_sessions(monkeypatch, tmp_path):
+    from agno.db.sqlite import SqliteDb
+    from src.orchestrator import create_steel_sales_team
+    from tests.fake_model import FakeModel, use_fake_model
+
+    use_fake_model(FakeModel(reply="Olá Marcos, qual o seu CNPJ? STATUS: FRIO"), monkeypatch)
+    team = create_steel_sales_team()
+    db_path = str(tmp_path / "sessions.db")
+    team.db = SqliteDb(db_file=db_path)
+    team.run("Boa tarde", session_id="s1")
+    team.run("sou o Marcos, zap 85 98877-6655 e marcos@obra.com.br", session_id="s1")
+    team.run("quero vergalhão", session_id="s2")
+    return db_path
+
+
+def test_extract_traces_from_agno_sessions(monkeypatch, tmp_path):
+    db_path = _record_sessions(monkeypatch, tmp_path)
+    out = io.StringIO()
+    stats = extract_traces(db_path, out, PiiMasker())
+    assert (stats.sessions, stats.messages, stats.skipped) == (2, 3, 0)
+
+    traces = [json.loads(line) for line in out.getvalue().splitlines()]
+    first = traces[0]
+    assert first["start"] == 0 and first["session_id"].startswith("trace-") and "s1" not in first["session_id"]
+    assert [m["text"] for m in first["messages"]][0] == "Boa tarde"
+    assert first["messages"][0]["gap"] == 0 and first["messages"][1]["gap"] >= 0
+    dump = out.getvalue()
+    for secret in ("Marcos", "98877-6655", "marcos@obra.com.br"):
+        assert secret not in dump
+    assert traces[1]["messages"] == [{"gap": 0.0, "text": "quero vergalhão"}]
+
+
+def test_extract_splits_multiline_messages_into_bursts(monkeypatch, tmp_path):
+    from agno.db.sqlite import SqliteDb
+    from src.orchestrator import create_steel_sales_team
+    from tests.fake_model import FakeModel, use_fake_model
+
+    use_fake_model(FakeModel(), monkeypatch)
+    team = create_steel_sales_team()
+    db_path = str(tmp_path / "sessions.db")
+    team.db = SqliteDb(db_file=db_path)
+    team.run("oi\nquero vergalhão\n10mm", session_id="rajada")
+
+    out = io.StringIO()
+    extract_traces(db_path, out, split_lines=True, burst_gap=1.5)
+    messages = json.loads(out.getvalue())["messages"]
+    assert messages == [{"gap": 0.0, "text": "oi"}, {"gap": 1.5, "text": "quero vergalhão"},
+                        {"gap": 1.5, "text": "10mm"}]
+
+
+def test_replay_respects_speedup_gaps_and_concurrency():
+    received = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        received.append((json.loads(request.content), asyncio.get_event_loop().time()))
+        return httpx.Response(200, json={"ok": True})
+
+    traces = [
+        {"session_id": "a", "start": 0.0, "messages": [{"gap": 0, "text": "oi"}, {"gap": 2.0, "text": "10mm"}]},
+        {"session_id": "b", "start": 0.0, "messages": [{"gap": 0, "text": "bom dia"}]},
+        {"session_id": "c", "start": 3600.0, "messages": [{"gap": 0, "text": "tarde"}]},
+    ]
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://api") as client:
+            return await replay_traces(iter(traces), client, speedup=20, concurrency=1, max_gap=5.0,
+                                       session_prefix="t")
+
+    report = asyncio.run(main())
+    summary = report.summary()
+    assert summary["requests"] == summary["ok"] == 4 and summary["peak_sessions"] == 1
+    sessions = [body["session_id"] for body, _ in received]
+    assert sessions == ["t-a", "t-a", "t-b", "t-c"]  # uma conversa por vez: "b" espera "a" terminar
+    times = {body["message"]: at for body, at in received}
+    assert times["10mm"] - times["oi"] >= 0.09  # 2 s de intervalo / 20
+    assert report.start_lags[1] >= 0.09  # "b" atrasou por falta de vaga
+    assert summary["duration_s"] < 2  # o intervalo de 1h entre conversas foi encurtado
@@ -0,0 +1,157 @@
+"""
+Testes do índice colunar de SKUs e das ferramentas de consulta ao catálogo.
+"""
+import pytest
+
+from src.data import sku_index
+from src.data.sku_index import (
+    SkuIndex,
+    escrever_indice,
+    parse_bitola_espessura,
+    parse_medida_mm,
+    tokenizar,
+)
+
+LINHAS = [
+    {"sap": 202497, "descricao": 'TUBO IND. 1 1/4" 1,20mm LF 6000mm (B)', "grupo": "Tubo",
+     "subgrupo": "Industrial", "peso": "5.40", "largura": None, "comprimento": "6000mm"},
+    {"sap": 202498, "descricao": 'TUBO IND. 1 1/4" 1,50mm LF 6000mm (B)', "grupo": "Tubo",
+     "subgrupo": "Industrial", "peso": "6.70", "largura": None, "comprimento": "6000mm"},
+    {"sap": 202467, "descricao": 'TUBO IND. 1 1/4" 0,75mm LF 6480mm', "grupo": "Tubo",
+     "subgrupo": "Industrial", "peso": "3.70", "largura": None, "comprimento": "6480mm"},
+    {"sap": 200028, "descricao": "VERGALHAO CA50 10,0mm DOBRADO 12m", "grupo": "CA-50",
+     "subgrupo": "Dobrado", "peso": 7.4, "largura": None, "comprimento": "12000mm"},
+    {"sap": 215777, "descricao": "CH PLANA 0,95mm GA 3000mm X 1200mm(B)", "grupo": "Chapa Plana",
+     "subgrupo": "Galvanizada", "peso": "26.90", "largura": "1200mm", "comprimento": "3000mm"},
+    {"sap": 200144, "descricao": "ARAME RECOZIDO BWG 18 ROLO 35kg", "grupo": "Arame",
+     "subgrupo": "Recozido", "peso": None, "largura": None, "comprimento": None},
+]
+
+
+@pytest.fixture
+def indice(tmp_path):
+    caminho = tmp_path / "sku_index.arrow"
+    assert escrever_indice(LINHAS, str(caminho)) == len(LINHAS)
+    return SkuIndex.abrir(str(caminho))
+
+
+@pytest.mark.parametrize("descricao,grupo,esperado", [
+    ('TUBO IND. 1 1/4" 1,20mm LF 6000mm (B)', "Tubo", ('1 1/4"', 1.2)),
+    ("VERGALHAO CA50 10,00mm RETO 6m", "CA-50", ("10mm", None)),
+    ("TELA Q113 3,8 100x100mm 6,40m x 2,45m", "Tela", ("3.8mm", None)),
+    ("CHAPA PRETA 1.1/2 A-36 12000mmX2300mm", "Chapa A-36", ('1 1/2"', None)),
+    ("CH PLANA 0,95mm GA 3000mm X 1200mm(B)", "Chapa Plana", (None, 0.95)),
+    ("ARAME RECOZIDO BWG 18 ROLO 35kg", "Arame", ("BWG 18", None)),
+])
+def test_parse_bitola_espessura(descricao, grupo, esperado):
+    assert parse_bitola_espessura(descricao, grupo) == esperado
+
+
+def test_parse_medida_mm_converts_units():
+    assert parse_medida_mm("6480mm") == 6480
+    assert parse_medida_mm("2,45m") == 2450
+    assert parse_medida_mm(6000) == 6000
+    assert parse_medida_mm("") is None
+
+
+def test_tokenizar_is_format_insensitive():
+    assert tokenizar("TUBO IND 1 1/4 1,20mm") == tokenizar("tubo ind. 1 1/4\" 1.2 mm")
+    assert tokenizar("METALON 40mmX20mm") == ["metalon", "40mm", "20mm"]
+
+
+def test_buscar_resolves_popular_spec_to_exact_sku(indice):
+    skus = indice.buscar("TUBO IND 1 1/4 1,20mm")
+    assert [s.sap for s in skus] == [202497]
+    assert skus[0].kg_un == pytest.approx(5.4)
+    assert skus[0].comprimento_mm == 6000
+
+
+def test_buscar_ranks_most_specific_first(indice):
+    skus = indice.buscar("tubo ind 1 1/4")
+    assert {s.sap for s in skus} == {202497, 202498, 202467}
+    assert skus[0].sap == 202467  # descrição sem o sufixo '(B)'
+
+
+def test_buscar_by_sap_code(indice):
+    assert indice.buscar("200028")[0].descricao == "VERGALHAO CA50 10,0mm DOBRADO 12m"
+    assert indice.por_sap(999999) is None
+
+
+def test_buscar_without_match_returns_empty(indice):
+    assert indice.buscar("telha trapezoidal") == []
+
+
+def test_filtrar_by_group_and_thickness(indice):
+    assert {s.sap for s in indice.filtrar(grupo="tubo")} == {202497, 202498, 202467}
+    assert [s.sap for s in indice.filtrar(grupo="Tubo", espessura_mm=1.5)] == [202498]
+    assert [s.sap for s in indice.filtrar(bitola="10mm")] == [200028]
+    assert [s.sap for s in indice.filtrar(bitola="1 1/4", espessura_mm=0.75)] == [202467]
+
+
+def test_missing_weight_is_kept_as_null(indice):
+    assert indice.por_sap(200144).kg_un is None
+
+
+def test_catalog_tools_use_shared_index(tmp_path, monkeypatch):
+    from src import config
+    from src.catalog_tools import buscar_sku, filtrar_skus
+
+    caminho = tmp_path / "sku_index.arrow"
+    escrever_indice(LINHAS, str(caminho))
+    monkeypatch.setattr(config, "SKU_INDEX_PATH", str(caminho))
+    sku_index.reset_sku_index()
+    try:
+        assert "Cód 202497" in buscar_sku("tubo ind 1 1/4 1,2mm")
+        assert "5.40 kg/un" in buscar_sku("202497")
+        assert "Cód 215777" in filtrar_skus(grupo="Chapa Plana")
+    finally:
+        sku_index.reset_sku_index()
+
+
+def test_catalog_tools_without_index(tmp_path, monkeypatch):
+    from src import config
+    from src.catalog_tools import buscar_sku
+
+    monkeypatch.setattr(config, "SKU_INDEX_PATH", str(tmp_path / "inexistente.arrow"))
+    monkeypatch.setattr(config, "KNOWLEDGE_BASE_DIR", str(tmp_path))
+    sku_index.reset_sku_index()
+    try:
+        assert "indisponível" in buscar_sku("metalon")
+    finally:
+        sku_index.reset_sku_index()
+
+
+def test_index_falls_back_to_catalog_groups_txt(tmp_path, monkeypatch):
+    from src import config
+
+    monkeypatch.setattr(config, "SKU_INDEX_PATH", str(tmp_path / "inexistente.arrow"))
+    sku_index.reset_sku_index()
+    try:
+        indice = sku_index.get_sku_index()
+        sku = indice.por_sap(202497)  # knowledge/catalog_groups/tubo.txt
+        assert sku.grupo == "Tubo"
+        assert sku.kg_un == pytest.approx(5.4)
+        assert sku.comprimento_mm == 6000
+    finally:
+        sku_index.reset_sku_index()
+
+
+def test_generator_emits_full_index(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    from scripts.generate_catalog_rag import gerar_catalogo
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["", "SAP", "", "Descrição", "", "", "Peso", "Largura", "Comprimento", "Grupo", "Subgrupo"])
+    for i in range(20):  # mais que os 8 exemplos por grupo do .txt
+        ws.append(["", 300000 + i, "", f'TUBO IND. 1" {1 + i / 10:.2f}mm LF 6000mm'.replace(".", ",", 1),
+                   "", "", f"{3 + i / 10:.2f}", None, "6000mm", "Tubo", "Industrial"])
+    planilha = tmp_path / "produtos.xlsx"
+    wb.save(planilha)
+
+    gerar_catalogo(str(planilha), str(tmp_path / "groups"), str(tmp_path / "sku_index.arrow"))
+
+    indice = SkuIndex.abrir(str(tmp_path / "sku_index.arrow"))
+    assert len(indice) == 20
+    assert (tmp_path / "groups" / "tubo.txt").exists()
+    assert indice.por_sap(300019).kg_un == pytest.approx(4.9)
@@ -0,0 +1,76 @@
+"""
+Testes da tradução de eventos do Agno para Server-Sent Events.
+"""
+from types import SimpleNamespace
+
+from src.streaming import (
+    COORDINATOR,
+    DONE,
+    FAILED,
+    format_sse,
+    map_run_event,
+    run_blocking_turn,
+    run_streaming_turn,
+)
+
+
+def _event(kind, content=None, agent_name=None):
+    return SimpleNamespace(event=kind, content=content, agent_name=agent_name)
+
+
+def test_format_sse_json_payload():
+    assert format_sse("delta", {"content": "olá"}) == 'event: delta\ndata: {"content": "olá"}\n\n'
+
+
+def test_format_sse_multiline_text():
+    assert format_sse("final", "a\nb") == "event: final\ndata: a\ndata: b\n\n"
+
+
+def test_map_member_and_coordinator_events():
+    assert map_run_event(_event("RunStarted", agent_name="Qualificador de Leads")) == (
+        "member-started", {"member": "Qualificador de Leads"},
+    )
+    assert map_run_event(_event("RunContent", "Olá", "Qualificador de Leads")) == (
+        "delta", {"source": "Qualificador de Leads", "content": "Olá"},
+    )
+    assert map_run_event(_event("RunCompleted", "Olá", "Qualificador de Leads"))[0] == "member-finished"
+    assert map_run_event(_event("TeamRunContent", "Oi")) == ("delta", {"source": COORDINATOR, "content": "Oi"})
+
+
+def test_ignores_internal_events():
+    assert map_run_event(_event("TeamToolCallStarted")) is None
+    assert map_run_event(_event("RunContent", "")) is None
+
+
+def test_run_streaming_turn_emits_done_with_last_completed_content():
+    emitted = []
+
+    def runner(run_input, stream, stream_events, **kwargs):
+        assert stream and stream_events
+        yield _event("RunStarted", agent_name="Especialista de Produtos")
+        yield _event("RunContent", "CA-50", "Especialista de Produtos")
+        yield _event("RunCompleted", "CA-50", "Especialista de Produtos")
+        yield _event("TeamRunContent", "Temos CA-50")
+        yield _event("TeamRunCompleted", "Temos CA-50")
+
+    run_streaming_turn(runner, "quero ferro", {}, lambda *e: emitted.append(e))
+    assert [e[0] for e in emitted] == ["member-started", "delta", "member-finished", "delta", DONE]
+    assert emitted[-1] == (DONE, "Temos CA-50")
+
+
+def test_run_streaming_turn_reports_failure():
+    emitted = []
+
+    def runner(*args, **kwargs):
+        raise RuntimeError("provedor fora do ar")
+        yield
+
+    run_streaming_turn(runner, "oi", {}, lambda *e: emitted.append(e))
+    assert emitted[-1][0] == FAILED
+    assert "provedor fora do ar" in str(emitted[-1][1])
+
+
+def test_run_blocking_turn():
+    emitted = []
+    run_blocking_turn(lambda x: "resumo", "lead", {}, lambda *e: emitted.append(e))
+    assert emitted == [(DONE, "resumo")]
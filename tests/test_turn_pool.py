@@ -0,0 +1,64 @@
+"""
+Testes do pool de turnos com controle de admissão.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+from src.turn_pool import TurnPool, TurnPoolFull
+
+
+def test_run_returns_function_result():
+    pool = TurnPool(max_concurrent=2, max_queued=2)
+    result = asyncio.run(pool.run(lambda a, b: a + b, 2, b=3))
+    assert result == 5
+
+
+def test_run_executes_outside_event_loop_thread():
+    pool = TurnPool(max_concurrent=1, max_queued=0)
+
+    async def main():
+        loop_thread = threading.get_ident()
+        worker_thread = await pool.run(threading.get_ident)
+        return loop_thread, worker_thread
+
+    loop_thread, worker_thread = asyncio.run(main())
+    assert loop_thread != worker_thread
+
+
+def test_rejects_when_queue_is_full():
+    pool = TurnPool(max_concurrent=1, max_queued=1, retry_after=7)
+
+    async def main():
+        running = asyncio.ensure_future(pool.run(time.sleep, 0.2))
+        waiting = asyncio.ensure_future(pool.run(time.sleep, 0.2))
+        await asyncio.sleep(0.05)
+        assert pool.in_flight == 1
+        assert pool.queued == 1
+        with pytest.raises(TurnPoolFull) as exc:
+            await pool.run(time.sleep, 0.2)
+        assert exc.value.retry_after == 7
+        await asyncio.gather(running, waiting)
+
+    asyncio.run(main())
+    assert pool.in_flight == 0
+    assert pool.queued == 0
+
+
+def test_slot_released_when_function_raises():
+    pool = TurnPool(max_concurrent=1, max_queued=0)
+
+    def boom():
+        raise RuntimeError("falha no modelo")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(pool.run(boom))
+    assert asyncio.run(pool.run(lambda: "ok")) == "ok"
+
+
+def test_invalid_limits():
+    with pytest.raises(ValueError):
+        TurnPool(max_concurrent=0, max_queued=1)
+    with pytest.raises(ValueError):
+        TurnPool(max_concurrent=1, max_queued=-1)
@@ -0,0 +1,73 @@
+"""
+Testes da leitura do resultado do turno (TurnResult ou texto livre com STATUS).
+"""
+import pytest
+
+from src.models import LeadClassification, LeadData, LeadUpdates, NextAction, TurnResult
+from src.turn_result import apply_lead_updates, parse_turn_result
+
+
+def test_structured_result_is_used_as_is():
+    result = TurnResult(
+        message="Perfeito, Carlos!",
+        classification=LeadClassification.MORNO,
+        lead_updates=LeadUpdates(name="Carlos"),
+        next_action=NextAction.GENERATE_QUOTE,
+    )
+    assert parse_turn_result(result) is result
+
+
+def test_json_text_is_validated():
+    text = '```json\n{"message": "Oi", "classification": "FRIO", "next_action": "collect_data"}\n```'
+    result = parse_turn_result(text)
+    assert result.message == "Oi"
+    assert result.lead_updates == LeadUpdates()
+
+
+def test_word_in_the_middle_of_the_text_does_not_classify():
+    text = "Seu lead ainda não está QUENTE, faltam dados.\nSTATUS: MORNO - falta CNPJ"
+    result = parse_turn_result(text)
+    assert result.classification == LeadClassification.MORNO
+    assert result.next_action == NextAction.GENERATE_QUOTE
+    assert result.message == "Seu lead ainda não está QUENTE, faltam dados."
+
+
+def test_free_text_without_status_keeps_current_classification():
+    result = parse_turn_result("Qual o seu CNPJ?", LeadClassification.MORNO)
+    assert result.classification == LeadClassification.MORNO
+    assert parse_turn_result("Não é QUENTE nem MORNO").classification == LeadClassification.FRIO
+
+
+def test_markdown_status_line():
+    result = parse_turn_result("Resumo pronto.\n**STATUS:** QUENTE → orçamento enviado")
+    assert result.classification == LeadClassification.QUENTE
+    assert result.message == "Resumo pronto."
+
+
+def test_apply_lead_updates_ignores_nulls_and_blanks():
+    lead = LeadData(session_id="x", name="Carlos", city="Fortaleza")
+    changed = apply_lead_updates(lead, LeadUpdates(email="c@x.com", city=" ", name="Carlos"))
+    assert changed == ["email"]
+    assert lead.city == "Fortaleza"
+
+
+def test_apply_lead_updates_normalizes_state_name_to_uf():
+    lead = LeadData(session_id="x", state="CE")
+    assert apply_lead_updates(lead, LeadUpdates(state="Ceará")) == []
+    assert lead.state == "CE"
+    assert apply_lead_updates(lead, LeadUpdates(state="Nordeste")) == []  # não é UF: descartado
+    assert lead.state == "CE"
+    assert apply_lead_updates(lead, LeadUpdates(state="pernambuco")) == ["state"]
+    assert lead.state == "PE"
+
+
+@pytest.mark.parametrize("product", ["Bobina", "Tela Soldada", "Treliça", "Chapa Xadrez"])
+def test_apply_lead_updates_keeps_catalog_groups(product):
+    lead = LeadData(session_id="x")
+    assert apply_lead_updates(lead, LeadUpdates(technical_product=product)) == ["technical_product"]
+
+
+def test_apply_lead_updates_drops_product_outside_portfolio():
+    lead = LeadData(session_id="x", product_interest="vergalhão")
+    assert apply_lead_updates(lead, LeadUpdates(product_interest="parafuso sextavado")) == []
+    assert lead.product_interest == "vergalhão"
@@ -0,0 +1,91 @@
+"""
+Testes da conversão de volume para kg com o kg/un do catálogo.
+"""
+import pytest
+
+from src.data.sku_index import SkuIndex, montar_tabela
+from src.volume_resolver import DEFAULT_KG_PER_UNIT, resolve_volume
+
+
+def _linha(sap, descricao, grupo, peso, comprimento):
+    return {"sap": sap, "descricao": descricao, "grupo": grupo, "subgrupo": "",
+            "peso": peso, "largura": None, "comprimento": comprimento}
+
+
+@pytest.fixture
+def index():
+    return SkuIndex(montar_tabela([
+        _linha(200028, "VERGALHAO CA50 10,0mm DOBRADO 12m", "CA-50", "7.40", "12000mm"),
+        _linha(200029, "VERGALHAO CA50 10,00mm RETO 12m", "CA-50", "7.40", "12000mm"),
+        _linha(216095, "VERGALHAO CA50 10,00mm RETO 6m", "CA-50", "3.70", "6000mm"),
+        _linha(200024, "VERGALHAO CA50 8,0mm DOBRADO 12m", "CA-50", "4.70", "12000mm"),
+        _linha(202497, 'TUBO IND. 1 1/4" 1,20mm LF 6000mm (B)', "Tubo", "5.40", "6000mm"),
+        _linha(202499, 'TUBO IND. 1 1/4" 2,00mm LQ 6000mm (B)', "Tubo", "8.80", "6000mm"),
+        _linha(215777, "CH PLANA 0,95mm GA 3000mm X 1200mm(B)", "Chapa Plana", "26.90", "3000mm"),
+    ]))
+
+
+def test_mass_units_are_converted_directly(index):
+    assert resolve_volume("5 toneladas", index=index).total_kg == 5000
+    assert resolve_volume("uns 5.000 kg", index=index).total_kg == 5000
+    assert resolve_volume("1,5 t", index=index).total_kg == 1500
+    assert resolve_volume("800", index=index).total_kg == 800  # sem unidade = kg
+
+
+@pytest.mark.parametrize("texto,kg", [
+    ("5 a 10 toneladas", 5000),
+    ("2 ou 3 toneladas", 2000),
+    ("entre 2 e 3 toneladas", 2000),
+    ("de 5 até 10 ton", 5000),
+    ("1,5-2 t", 1500),
+    ("5.000 a 8.000 kg", 5000),
+])
+def test_range_with_trailing_unit_uses_lower_bound(index, texto, kg):
+    assert resolve_volume(texto, index=index).total_kg == kg
+
+
+def test_units_use_sku_weight(index):
+    volume = resolve_volume("30 tubos 1 1/4 1,20mm", index=index)
+    assert volume.total_kg == pytest.approx(30 * 5.40)
+    assert volume.items[0].group == "Tubo"
+    assert volume.items[0].source == "sku"
+
+
+def test_mixed_order_inherits_product_and_unit(index):
+    volume = resolve_volume("50 barras de 10mm e 20 de 8mm", product="vergalhão", index=index)
+    assert [item.kg_per_unit for item in volume.items] == [7.40, 4.70]
+    assert volume.total_kg == pytest.approx(50 * 7.40 + 20 * 4.70)
+    assert volume.has_units
+
+
+def test_length_narrows_the_sku(index):
+    volume = resolve_volume("40 barras de ferro 10mm 6m", index=index)
+    assert volume.items[0].kg_per_unit == pytest.approx(3.70)
+
+
+def test_mass_and_units_in_the_same_order(index):
+    volume = resolve_volume("1 tonelada de vergalhão, 10 chapas 0,95mm", index=index)
+    assert volume.total_kg == pytest.approx(1000 + 10 * 26.90)
+
+
+def test_round_bar_without_sku_uses_theoretical_weight(index):
+    volume = resolve_volume("100 barras de 12,5mm", product="vergalhão CA-50", index=index)
+    # 0,00617 × 12,5² ≈ 0,964 kg/m × 12 m
+    assert volume.items[0].kg_per_unit == pytest.approx(11.57, abs=0.01)
+    assert volume.items[0].source == "peso teórico da barra"
+
+
+def test_group_median_when_spec_is_unknown(index):
+    volume = resolve_volume("10 peças", product="tubo", index=index)
+    assert volume.items[0].kg_per_unit == pytest.approx((5.40 + 8.80) / 2)
+
+
+def test_unknown_product_falls_back_to_default(index):
+    volume = resolve_volume("100 unidades", index=index)
+    assert volume.items[0].kg_per_unit == DEFAULT_KG_PER_UNIT
+
+
+def test_no_number_yields_empty_resolution(index):
+    volume = resolve_volume("bastante", index=index)
+    assert volume.items == []
+    assert volume.total_kg == 0